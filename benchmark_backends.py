@@ -0,0 +1,123 @@
+"""
+Benchmark dos runtimes de inferência: Keras, SavedModel, TFLite e ONNX Runtime
+
+Cada backend roda em um subprocesso próprio, para que a memória medida seja só
+a dele. Por backend: tempo de carregamento, latência com lote 1 (p50/p99),
+vazão com lote N e memória residente (pico do processo menos o pico depois dos
+imports). Os modelos exportados vêm de src/model_export.py.
+
+Uso:
+    python benchmark_backends.py [caminho_do_modelo.h5] [--backends keras savedmodel tflite onnx]
+                                 [--iterations 200] [--batch-size 16] [--threads 0]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB); None fora de sistemas POSIX"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def run_child(args):
+    """Mede um backend neste processo e imprime o resultado em JSON (última linha)"""
+    import tensorflow  # noqa: F401  (imports fora da medição de memória)
+    from inference_backends import load_backend
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    engine = load_backend(args.model_path, args.child, num_threads=args.threads or None,
+                          warmup_batch_sizes=(1, args.batch_size))
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    single = rng.random((1, *engine.input_shape), dtype=np.float32)
+    batch = rng.random((args.batch_size, *engine.input_shape), dtype=np.float32)
+
+    for _ in range(10):
+        engine.predict(single)
+    latencies = np.empty(args.iterations, dtype=np.float64)
+    for i in range(args.iterations):
+        t = time.perf_counter()
+        engine.predict(single)
+        latencies[i] = (time.perf_counter() - t) * 1000.0
+
+    rounds = max(1, args.iterations // 10)
+    t = time.perf_counter()
+    for _ in range(rounds):
+        engine.predict(batch)
+    throughput = rounds * args.batch_size / (time.perf_counter() - t)
+
+    peak = peak_rss_mb()
+    print(json.dumps({
+        'backend': args.child,
+        'model_path': getattr(engine, 'model_path', args.model_path),
+        'load_seconds': load_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput': throughput,
+        'memory_mb': (peak - baseline) if peak is not None else None
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de inferência")
+    parser.add_argument('model_path', nargs='?', default=None)
+    parser.add_argument('--backends', nargs='+', default=['keras', 'savedmodel', 'tflite', 'onnx'])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=0, help="Threads de tflite/onnx (0 = padrão do runtime)")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    from benchmark_inference import find_model
+    args.model_path = args.model_path or find_model()
+    if args.model_path is None:
+        print("❌ Nenhum modelo encontrado em models/")
+        return
+
+    print("⚡ BENCHMARK DOS BACKENDS DE INFERÊNCIA")
+    print("=" * 70)
+    print(f"   Modelo: {args.model_path} | núcleos: {os.cpu_count()} | lote da vazão: {args.batch_size}")
+    print(f"\n   {'backend':<11} {'carga':>7} {'p50':>9} {'p99':>9} {'img/s':>9} {'memória':>9}")
+
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='2')
+    for backend in args.backends:
+        command = [
+            sys.executable, os.path.abspath(__file__), args.model_path, '--child', backend,
+            '--iterations', str(args.iterations), '--batch-size', str(args.batch_size),
+            '--threads', str(args.threads)
+        ]
+        proc = subprocess.run(command, capture_output=True, text=True, env=env)
+        lines = [line for line in proc.stdout.strip().splitlines() if line.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            error = (proc.stderr.strip().splitlines() or ['erro desconhecido'])[-1]
+            print(f"   {backend:<11} ❌ {error}")
+            continue
+        r = json.loads(lines[-1])
+        memory = f"{r['memory_mb']:7.0f}MB" if r['memory_mb'] is not None else '      n/d'
+        print(f"   {backend:<11} {r['load_seconds']:6.2f}s {r['p50_ms']:7.2f}ms {r['p99_ms']:7.2f}ms "
+              f"{r['throughput']:9.1f} {memory}")
+
+
+if __name__ == "__main__":
+    main()
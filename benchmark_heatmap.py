@@ -0,0 +1,102 @@
+"""
+Micro-benchmark da geração de heatmaps
+
+Compara o caminho antigo (loops Python + plt.cm.hot + PIL) com o caminho
+vetorizado (campos de distância pré-calculados + LUT + cv2.imencode) e com o cache.
+
+Uso:
+    python benchmark_heatmap.py [--iterations 200]
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import heatmap_rendering
+
+
+def legacy_heatmap_png(tumor_prob, confidence):
+    """Implementação original de web/api_server.create_activation_heatmap"""
+    import matplotlib.pyplot as plt
+    from PIL import Image
+
+    heatmap = np.zeros((128, 128))
+    if tumor_prob > 0.35:
+        center_x, center_y = 64, 45
+        for i in range(128):
+            for j in range(128):
+                dist = np.sqrt((i - center_x)**2 + (j - center_y)**2)
+                heatmap[j, i] = max(0, confidence - dist / 50)
+        if confidence > 0.7:
+            center_x2, center_y2 = 50, 70
+            for i in range(128):
+                for j in range(128):
+                    dist = np.sqrt((i - center_x2)**2 + (j - center_y2)**2)
+                    heatmap[j, i] = max(heatmap[j, i], max(0, confidence * 0.6 - dist / 60))
+    else:
+        heatmap = np.random.rand(128, 128) * 0.2
+
+    heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min() + 1e-8)
+    heatmap_colored = (plt.cm.hot(heatmap)[:, :, :3] * 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(heatmap_colored).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def time_calls(fn, args_list):
+    latencies = np.empty(len(args_list), dtype=np.float64)
+    for i, args in enumerate(args_list):
+        start = time.perf_counter()
+        fn(*args)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def report(name, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"   {name:<34} p50: {p50:8.3f} ms | p99: {p99:8.3f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de heatmaps")
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    print("🔥 BENCHMARK DE HEATMAPS")
+    print("=" * 70)
+
+    rng = np.random.default_rng(42)
+    # Confianças distintas a cada chamada (sem acerto de cache) no pior caso: dois focos
+    unique_args = [(0.9, float(c)) for c in rng.uniform(0.71, 0.99, args.iterations)]
+    repeated_args = [(0.9, 0.85)] * args.iterations
+
+    # Aquecimento (constrói LUT, importa matplotlib/PIL)
+    legacy_heatmap_png(0.9, 0.9)
+    heatmap_rendering.render_simulated_heatmap(0.9, 0.9)
+
+    legacy_iterations = max(10, args.iterations // 10)
+    print(f"\n📊 Mapa simulado completo (geração + cor + PNG):")
+    legacy = report("Legado (loops + plt.cm + PIL)", time_calls(legacy_heatmap_png, unique_args[:legacy_iterations]))
+    fast = report("Vetorizado + LUT + cv2 (sem cache)",
+                  time_calls(lambda t, c: heatmap_rendering.render_heatmap(
+                      heatmap_rendering.simulated_heatmap(t, c)), unique_args))
+    cached = report("Vetorizado com cache (repetido)",
+                    time_calls(heatmap_rendering.render_simulated_heatmap, repeated_args))
+    print(f"   🚀 Ganho sem cache: {legacy / fast:.0f}x | com cache: {legacy / cached:.0f}x")
+
+    print(f"\n📊 Etapas isoladas (mapa uint8 de Grad-CAM):")
+    gradcam_map = (rng.random((128, 128)) * 255).astype(np.uint8)
+    maps = [(gradcam_map,)] * args.iterations
+    report("Geração do mapa simulado", time_calls(heatmap_rendering.simulated_heatmap, unique_args))
+    report("Colorização (LUT)", time_calls(heatmap_rendering.colorize, maps))
+    for fmt in heatmap_rendering.HEATMAP_FORMATS:
+        report(f"Colorização + codificação {fmt}",
+               time_calls(lambda m, f=fmt: heatmap_rendering.render_heatmap(m, f), maps))
+
+
+if __name__ == "__main__":
+    main()
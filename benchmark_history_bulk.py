@@ -0,0 +1,148 @@
+"""
+Benchmark da gravação do histórico: por linha vs. em lote
+
+Compara, contra o PostgreSQL configurado em web/api_server.py:
+- Por linha: um INSERT ... RETURNING id + commit por análise (caminho de POST /api/history)
+- execute_values: INSERT multi-linha em uma transação (caminho de POST /api/history/bulk)
+- COPY: COPY FROM STDIN em uma transação (sem ids)
+
+As linhas vão para um schema temporário (neuroai_bench), removido ao final.
+
+Uso:
+    python benchmark_history_bulk.py [--rows 500] [--repeats 3]
+"""
+import os
+import sys
+import time
+import argparse
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+from history_bulk import ANALYSIS_COLUMNS, validate_analyses, insert_analyses, copy_analyses
+
+DB_CONFIG = {
+    'host': os.environ.get('NEUROAI_DB_HOST', 'localhost'),
+    'port': int(os.environ.get('NEUROAI_DB_PORT', 5433)),
+    'database': os.environ.get('NEUROAI_DB_NAME', 'neuroia'),
+    'user': os.environ.get('NEUROAI_DB_USER', 'postgres'),
+    'password': os.environ.get('NEUROAI_DB_PASSWORD', 'neuro')
+}
+BENCH_SCHEMA = 'neuroai_bench'
+BENCH_USER_ID = 1
+
+
+def make_analyses(n):
+    analyses = []
+    for i in range(n):
+        tumor = (i % 100) / 100.0
+        analyses.append({
+            'image_name': f'bench_{i:06d}.jpg',
+            'prediction_normal': round(1.0 - tumor, 4),
+            'prediction_tumor': round(tumor, 4),
+            'confidence': round(max(tumor, 1.0 - tumor), 4),
+            'threshold_used': 0.5,
+            'result': 'Tumor' if tumor > 0.5 else 'Normal'
+        })
+    return analyses
+
+
+def setup_schema(conn):
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}")
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {BENCH_SCHEMA}.analysis_history (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER,
+                image_name VARCHAR(255),
+                prediction_normal DECIMAL(5,4),
+                prediction_tumor DECIMAL(5,4),
+                confidence DECIMAL(5,4),
+                threshold_used DECIMAL(3,2),
+                result VARCHAR(20),
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Consultas sem schema passam a usar a tabela de benchmark
+        cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    conn.commit()
+
+
+def truncate(conn):
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE analysis_history")
+    conn.commit()
+
+
+def per_row(conn, rows):
+    placeholders = ', '.join(['%s'] * (len(ANALYSIS_COLUMNS) + 1))
+    sql = (f"INSERT INTO analysis_history (user_id, {', '.join(ANALYSIS_COLUMNS)}) "
+           f"VALUES ({placeholders}) RETURNING id")
+    ids = []
+    for row in rows:
+        with conn.cursor() as cur:
+            cur.execute(sql, (BENCH_USER_ID, *row))
+            ids.append(cur.fetchone()[0])
+        conn.commit()
+    return len(ids)
+
+
+def bulk_values(conn, rows):
+    with conn.cursor() as cur:
+        ids = insert_analyses(cur, BENCH_USER_ID, rows)
+    conn.commit()
+    return len(ids)
+
+
+def bulk_copy(conn, rows):
+    with conn.cursor() as cur:
+        copy_analyses(cur, BENCH_USER_ID, rows)
+    conn.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da gravação do histórico")
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print("💾 BENCHMARK DE GRAVAÇÃO DO HISTÓRICO")
+    print("=" * 70)
+    print(f"   Banco: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']} | {args.rows} análises")
+
+    start = time.perf_counter()
+    rows = validate_analyses(make_analyses(args.rows))
+    print(f"   Validação: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        setup_schema(conn)
+
+        results = {}
+        for name, fn in (('Por linha (commit a cada INSERT)', per_row),
+                         ('execute_values (1 transação)', bulk_values),
+                         ('COPY (1 transação)', bulk_copy)):
+            times = []
+            for _ in range(args.repeats):
+                truncate(conn)
+                start = time.perf_counter()
+                written = fn(conn, rows)
+                times.append(time.perf_counter() - start)
+                assert written == args.rows
+            best = min(times)
+            results[name] = best
+            print(f"   {name:<34} {best * 1000:9.1f} ms | {args.rows / best:9.0f} linhas/s")
+
+        baseline = results['Por linha (commit a cada INSERT)']
+        print(f"\n   🚀 execute_values: {baseline / results['execute_values (1 transação)']:.1f}x | "
+              f"COPY: {baseline / results['COPY (1 transação)']:.1f}x mais rápido que por linha")
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
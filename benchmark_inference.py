@@ -0,0 +1,90 @@
+"""
+Benchmark de latência: model.predict vs InferenceEngine (tf.function compilada)
+
+Uso:
+    python benchmark_inference.py [caminho_do_modelo.h5] [--iterations 200] [--batch-sizes 1 8]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from inference_engine import InferenceEngine
+
+
+def find_model():
+    """Procura o primeiro modelo .h5 disponível em models/"""
+    preferred = [
+        'models/brain_cancer_balanced.h5',
+        'models/brain_cancer_final.h5',
+        'models/brain_cancer_corrected.h5'
+    ]
+    for path in preferred:
+        if os.path.exists(path):
+            return path
+    if os.path.isdir('models'):
+        for f in sorted(os.listdir('models')):
+            if f.endswith('.h5'):
+                return os.path.join('models', f)
+    return None
+
+
+def measure(fn, x, iterations, warmup=10):
+    """Retorna latências (ms) de cada chamada após o aquecimento"""
+    for _ in range(warmup):
+        fn(x)
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(x)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def report(name, latencies, batch_size):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    throughput = batch_size * 1000.0 / np.mean(latencies)
+    print(f"   {name:<22} p50: {p50:8.2f} ms | p99: {p99:8.2f} ms | {throughput:8.1f} img/s")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência de inferência")
+    parser.add_argument('model_path', nargs='?', default=None)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    model_path = args.model_path or find_model()
+    if model_path is None or not os.path.exists(model_path):
+        print("❌ Nenhum modelo encontrado! Informe o caminho de um arquivo .h5")
+        return
+
+    print("⏱️ BENCHMARK DE INFERÊNCIA")
+    print("=" * 60)
+
+    engine = InferenceEngine.from_path(model_path, warmup_batch_sizes=args.batch_sizes)
+    model = engine.model
+    print(f"✅ Modelo: {model_path} | Entrada: {engine.input_shape}")
+
+    rng = np.random.default_rng(42)
+    for batch_size in args.batch_sizes:
+        x = rng.random((batch_size, *engine.input_shape), dtype=np.float32)
+        print(f"\n📦 Lote de {batch_size} ({args.iterations} iterações):")
+
+        base = measure(lambda v: model.predict(v, verbose=0), x, args.iterations)
+        fast = measure(engine.predict, x, args.iterations)
+
+        base_p50, base_p99 = report("model.predict", base, batch_size)
+        fast_p50, fast_p99 = report("InferenceEngine", fast, batch_size)
+        print(f"   🚀 Ganho p50: {base_p50 / fast_p50:.1f}x | p99: {base_p99 / fast_p99:.1f}x")
+
+        # Conferir que os dois caminhos produzem o mesmo resultado
+        diff = np.max(np.abs(model.predict(x, verbose=0) - engine.predict(x)))
+        print(f"   🔍 Diferença máxima entre saídas: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
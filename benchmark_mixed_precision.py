@@ -0,0 +1,137 @@
+"""
+Benchmark de precisão mista e XLA no treinamento (CancerModelTrainer)
+
+Treina o mesmo modelo no dataset de ressonâncias cerebrais em cada modo
+(config 'precision' e 'jit_compile') e compara tempo por época e acurácia
+final no conjunto de teste. Os dados vêm do BalancedSampler (épocas
+equilibradas por oversampling) e a semente é a mesma em todos os modos.
+
+Modos: float32, mixed_bfloat16 e mixed_float16, cada um com sufixo +xla
+opcional. Em CPU, mixed_bfloat16 só acelera com instruções AMX/AVX512-BF16;
+mixed_float16 é pensado para GPU.
+
+Uso:
+    python benchmark_mixed_precision.py [--dataset datasets/brain_cancer] [--epochs 3]
+        [--modes float32 float32+xla mixed_bfloat16 mixed_bfloat16+xla]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+from balanced_sampler import BalancedSampler
+
+
+def parse_mode(mode):
+    """'mixed_bfloat16+xla' -> ('mixed_bfloat16', True)"""
+    precision, _, suffix = mode.partition('+')
+    if suffix not in ('', 'xla'):
+        raise ValueError(f"Modo inválido: {mode}")
+    return precision, suffix == 'xla'
+
+
+def run_mode(mode, sampler, splits, args):
+    """Treina um modelo no modo indicado; devolve tempos por época e acurácia de teste"""
+    import tensorflow as tf
+    from train_model import CancerModelTrainer
+
+    precision, xla = parse_mode(mode)
+    train_idx, val_idx, test_idx = splits
+    tf.keras.backend.clear_session()
+    tf.keras.utils.set_random_seed(args.seed)
+
+    trainer = CancerModelTrainer({
+        **CancerModelTrainer._get_default_config(None),
+        'img_size': (args.img_size, args.img_size),
+        'batch_size': args.batch_size,
+        'num_classes': 2,
+        'epochs': args.epochs,
+        'model_type': args.model,
+        'precision': precision,
+        'jit_compile': xla
+    })
+    model = trainer.create_model()
+
+    epoch_times = []
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_times.append(time.perf_counter() - self.start)
+
+    X_val, y_val = sampler.load(val_idx)
+    X_test, y_test = sampler.load(test_idx)
+    steps = sampler.steps_per_epoch(train_idx, args.batch_size)
+    history = model.fit(
+        sampler.dataset(train_idx, batch_size=args.batch_size),
+        steps_per_epoch=steps,
+        epochs=args.epochs,
+        validation_data=(X_val, y_val),
+        callbacks=[EpochTimer()],
+        verbose=0
+    )
+    results = model.evaluate(X_test, y_test, verbose=0, return_dict=True)
+    return {
+        'epoch_times': epoch_times,
+        'steps': steps,
+        'train_accuracy': history.history['accuracy'][-1],
+        'test_accuracy': results['accuracy'],
+        'test_loss': results['loss']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de precisão mista e XLA")
+    parser.add_argument('--dataset', default=os.path.join('datasets', 'brain_cancer'))
+    parser.add_argument('--modes', nargs='+',
+                        default=['float32', 'float32+xla', 'mixed_bfloat16', 'mixed_bfloat16+xla'])
+    parser.add_argument('--model', default='basic_cnn', choices=['basic_cnn', 'advanced_cnn'])
+    parser.add_argument('--img-size', type=int, default=128)
+    parser.add_argument('--max-per-category', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        parse_mode(mode)
+    if not os.path.exists(args.dataset):
+        print(f"❌ Dataset não encontrado: {args.dataset}")
+        print("📝 Execute primeiro: python src/data_downloader.py")
+        return
+
+    print("⚡ BENCHMARK DE PRECISÃO MISTA E XLA")
+    print("=" * 78)
+    sampler = BalancedSampler(args.dataset, img_size=(args.img_size, args.img_size),
+                              max_per_category=args.max_per_category, seed=args.seed)
+    splits = sampler.split()
+    print(f"\n📊 {args.model} {args.img_size}x{args.img_size}, {args.epochs} épocas, lotes de {args.batch_size}, "
+          f"{os.cpu_count()} núcleo(s)")
+
+    results = {}
+    for mode in args.modes:
+        print(f"\n🔄 {mode}")
+        results[mode] = run_mode(mode, sampler, splits, args)
+
+    print(f"\n{'Modo':<22}{'1ª época (s)':>14}{'Demais (s)':>12}{'img/s':>9}{'Acc treino':>12}{'Acc teste':>11}")
+    print("-" * 80)
+    baseline = None
+    for mode, result in results.items():
+        first, rest = result['epoch_times'][0], result['epoch_times'][1:] or result['epoch_times']
+        steady = float(np.mean(rest))
+        baseline = baseline or steady
+        images = result['steps'] * args.batch_size
+        print(f"{mode:<22}{first:>14.1f}{steady:>12.1f}{images / steady:>9.1f}"
+              f"{result['train_accuracy']:>12.2%}{result['test_accuracy']:>11.2%}"
+              f"   ({baseline / steady:.2f}x)")
+    print("\n1ª época inclui o trace (e a compilação XLA); 'Demais' é a média das seguintes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark de escalabilidade: inferência em lote com 1..N processos (src/parallel_predict.py)
+
+Mede a vazão (img/s) de predict_parallel para cada número de processos e mostra a
+curva de escalabilidade (aceleração e eficiência por processo). A vazão total inclui
+o início do pool (criação dos processos + carregamento do modelo); a de regime
+desconta esse início, medido em uma execução à parte (é uma estimativa).
+
+Uso:
+    python benchmark_multiprocess.py [caminho_do_modelo.h5] [--images 512] [--processes 1 2 4]
+                                     [--folder pasta_com_imagens]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+from predict import CancerPredictor
+from batch_predict import scan_images
+from parallel_predict import predict_parallel, default_threads_per_process
+from benchmark_inference import find_model
+
+
+def make_images(folder, count, size=512):
+    """Gera `count` JPEGs sintéticos (ressonância simulada) em `folder`"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        image = rng.integers(0, 80, (size, size), dtype=np.uint8)
+        cv2.ellipse(image, (size // 2, size // 2), (size // 3, size // 2 - 20), 0, 0, 360, 150, -1)
+        path = os.path.join(folder, f"img_{i:05d}.jpg")
+        cv2.imwrite(path, image)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferência em múltiplos processos")
+    parser.add_argument('model_path', nargs='?', default=None)
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--folder', default=None, help="Usa imagens reais desta pasta em vez de sintéticas")
+    parser.add_argument('--processes', type=int, nargs='+', default=None)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    args = parser.parse_args()
+
+    model_path = args.model_path or find_model()
+    if model_path is None:
+        print("❌ Nenhum modelo encontrado em models/")
+        return
+
+    cores = os.cpu_count() or 1
+    process_counts = args.processes or sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+
+    print("⚡ BENCHMARK DE INFERÊNCIA EM MÚLTIPLOS PROCESSOS")
+    print("=" * 70)
+    print(f"   Modelo: {model_path} | núcleos: {cores}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.folder:
+            paths = list(scan_images(args.folder))[:args.images]
+        else:
+            paths = make_images(tmp, args.images)
+        print(f"   Imagens: {len(paths)} | fatias de {args.chunk_size}")
+
+        predictor = CancerPredictor(model_path)
+        predictor.predict_paths(paths[:args.chunk_size])  # aquecimento
+
+        start = time.perf_counter()
+        reference = predictor.predict_paths(paths)
+        baseline = len(paths) / (time.perf_counter() - start)
+        print(f"\n   {'Em processo (sem pool)':<24} {baseline:8.1f} img/s")
+
+        print(f"\n📊 Curva de escalabilidade:")
+        print(f"   {'processos':>9} {'threads/proc':>12} {'total':>9} {'regime':>9} "
+              f"{'aceleração':>11} {'eficiência':>11} {'início':>8}")
+        first = None
+        for processes in process_counts:
+            threads = default_threads_per_process(processes)
+
+            # Só o início do pool + carregamento do modelo em cada processo
+            start = time.perf_counter()
+            predict_parallel(model_path, paths[:processes], processes=processes, chunk_size=1)
+            startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = predict_parallel(model_path, paths, processes=processes, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+            total = len(paths) / elapsed
+            steady = len(paths) / max(elapsed - startup, 1e-9)
+            first = first or steady
+
+            mismatches = sum(
+                1 for a, b in zip(results, reference)
+                if a['image_path'] != b['image_path'] or abs(a.get('probability', 0) - b.get('probability', 0)) > 1e-5
+            )
+            print(f"   {processes:>9} {threads:>12} {total:>9.1f} {steady:>9.1f} {steady / first:>10.2f}x "
+                  f"{steady / first / processes:>10.0%} {startup:>7.1f}s"
+                  + (f"  ⚠️ {mismatches} divergências" if mismatches else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark do preprocessamento: cadeia antiga vs kernel canônico (src/mri_preprocessing.py)
+
+Mede, por imagem:
+- array -> tensor: cadeia antiga (CLAHE novo a cada chamada, resize de 3 canais float32)
+  vs preprocess_mri (CLAHE por thread, resize uint8 de 1 canal, saída preallocada)
+- bytes -> tensor (caminho da API): PIL RGB + cadeia antiga vs decodificação em cinza + kernel
+
+Uso:
+    python benchmark_preprocessing.py [--iterations 200] [--sizes 256 512 2048]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+from mri_preprocessing import preprocess_mri, preprocess_mri_bytes
+from test_mri_preprocessing import legacy_preprocess, legacy_preprocess_bytes, synthetic_mri
+
+
+def measure(fn, iterations, warmup=5):
+    """Retorna latências (ms) de cada chamada após o aquecimento"""
+    for _ in range(warmup):
+        fn()
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def report(name, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"   {name:<26} p50: {p50:8.3f} ms | p99: {p99:8.3f} ms | {1000.0 / np.mean(latencies):8.1f} img/s")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do preprocessamento de ressonâncias")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 512, 2048])
+    args = parser.parse_args()
+
+    print("⚡ BENCHMARK DO PREPROCESSAMENTO")
+    print("=" * 70)
+
+    out = np.empty((1, 128, 128, 3), dtype=np.float32)
+    for size in args.sizes:
+        image = synthetic_mri((size, size, 3))
+        ok, encoded = cv2.imencode('.jpg', cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+        data = encoded.tobytes()
+
+        print(f"\n📊 Entrada {size}x{size} (JPEG: {len(data) / 1024:.0f} KB):")
+        legacy = report("Array: cadeia antiga", measure(lambda: legacy_preprocess(image), args.iterations))
+        fused = report("Array: kernel (out=)", measure(lambda: preprocess_mri(image, out=out), args.iterations))
+        print(f"   🚀 Kernel: {legacy / fused:.2f}x mais rápido")
+
+        legacy = report("Bytes: PIL RGB + antiga", measure(lambda: legacy_preprocess_bytes(data), args.iterations))
+        fused = report("Bytes: cinza + kernel", measure(lambda: preprocess_mri_bytes(data, out=out), args.iterations))
+        print(f"   🚀 Caminho da API: {legacy / fused:.2f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark de vazão da API: servidor de desenvolvimento vs. modo de produção
+
+Sobe cada servidor em um subprocesso, espera o /api/health responder com o
+modelo carregado e dispara requisições concorrentes de /api/predict.
+
+Uso:
+    python benchmark_serving.py [--modes dev prod] [--concurrency 16] [--duration 20]
+                                [--workers 2] [--threads 8] [--heatmap simulated]
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import subprocess
+
+import cv2
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_test_image():
+    """JPEG sintético de ressonância (fundo escuro, 'cérebro' claro)"""
+    rng = np.random.default_rng(0)
+    image = np.zeros((256, 256), dtype=np.uint8)
+    cv2.ellipse(image, (128, 128), (90, 110), 0, 0, 360, 140, -1)
+    image = cv2.add(image, rng.integers(0, 40, image.shape, dtype=np.uint8))
+    ok, buffer = cv2.imencode('.jpg', image)
+    return buffer.tobytes()
+
+
+def start_server(mode, port, args):
+    env = dict(os.environ)
+    if mode == 'dev':
+        # Exatamente como antes: python web/api_server.py (debug + reloader)
+        env['NEUROAI_DEBUG'] = '1'
+        command = [sys.executable, os.path.join('web', 'api_server.py')]
+        # O servidor de desenvolvimento escuta sempre na 5000
+        port = 5000
+    else:
+        command = [sys.executable, os.path.join('web', 'serve.py'),
+                   '--port', str(port), '--workers', str(args.workers), '--threads', str(args.threads)]
+
+    process = subprocess.Popen(
+        command, cwd=ROOT, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return process, f'http://127.0.0.1:{port}'
+
+
+def stop_server(process):
+    """SIGTERM no grupo inteiro (reloader + filho / master + workers)"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=40)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def wait_ready(base_url, timeout=180.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            health = requests.get(f'{base_url}/api/health', timeout=2).json()
+            if health.get('model_loaded'):
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1.0)
+    return False
+
+
+def load_test(base_url, image_bytes, concurrency, duration, heatmap):
+    url = f'{base_url}/api/predict?heatmap={heatmap}'
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.post(url, files={'image': ('mri.jpg', image_bytes, 'image/jpeg')}, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    # Aquecimento
+    for _ in range(3):
+        requests.post(url, files={'image': ('mri.jpg', image_bytes, 'image/jpeg')}, timeout=60)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000.0
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput': len(latencies) / elapsed,
+        'p50': float(np.percentile(latencies, 50)) if len(latencies) else float('nan'),
+        'p99': float(np.percentile(latencies, 99)) if len(latencies) else float('nan')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de vazão da API")
+    parser.add_argument('--modes', nargs='+', default=['dev', 'prod'], choices=['dev', 'prod'])
+    parser.add_argument('--port', type=int, default=5050, help="Porta do modo de produção")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--heatmap', default='simulated', choices=['simulated', 'gradcam', 'gradcam++'])
+    args = parser.parse_args()
+
+    print("🚀 BENCHMARK DE SERVIDOR (dev vs. produção)")
+    print("=" * 70)
+    print(f"   {args.concurrency} clientes concorrentes por {args.duration:.0f}s | heatmap: {args.heatmap}")
+
+    image_bytes = make_test_image()
+    results = {}
+    for mode in args.modes:
+        label = 'Werkzeug (debug)' if mode == 'dev' else f'Gunicorn {args.workers}w x {args.threads}t'
+        process, base_url = start_server(mode, args.port, args)
+        try:
+            if not wait_ready(base_url):
+                print(f"   ❌ {label}: servidor não ficou pronto")
+                continue
+            stats = load_test(base_url, image_bytes, args.concurrency, args.duration, args.heatmap)
+        finally:
+            stop_server(process)
+
+        results[mode] = stats
+        print(f"   {label:<24} {stats['throughput']:7.1f} req/s | p50: {stats['p50']:7.1f} ms | "
+              f"p99: {stats['p99']:7.1f} ms | erros: {stats['errors']}")
+
+    if 'dev' in results and 'prod' in results and results['dev']['throughput'] > 0:
+        print(f"\n   🚀 Produção: {results['prod']['throughput'] / results['dev']['throughput']:.1f}x a vazão do servidor de desenvolvimento")
+
+
+if __name__ == "__main__":
+    main()
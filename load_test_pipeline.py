@@ -0,0 +1,145 @@
+"""
+Teste de carga do pipeline de upload (web/api_server.py + src/async_pipeline.py)
+
+Compara, com N clientes concorrentes enviando a mesma ressonância grande:
+- Direto: cada thread de requisição decodifica, preprocessa e chama o MicroBatcher
+- Pipeline: decodificação em pool limitado + filas limitadas + MicroBatcher
+
+e mostra a contrapressão: com max_pending pequeno, o excesso é recusado
+imediatamente (503 na API) em vez de enfileirar sem limite.
+
+Uso:
+    python load_test_pipeline.py [--model models/brain_cancer_final.h5] [--clients 1 8 32]
+                                 [--requests 64] [--image-size 2048]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'web'))
+
+from inference_engine import InferenceEngine
+from micro_batching import MicroBatcher
+from async_pipeline import AsyncPredictionPipeline, PipelineOverloaded
+from api_server import preprocess_image
+
+
+def make_upload(size):
+    """JPEG grande (vários MB) com textura, para a decodificação pesar"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+    cv2.ellipse(image, (size // 2, size // 2), (size // 3, size // 2 - 10), 0, 0, 360, (140, 140, 140), -1)
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return buffer.tobytes()
+
+
+def run_clients(handler, clients, total_requests):
+    """Dispara total_requests divididas entre `clients` threads; retorna latências e recusas"""
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        local = []
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                handler()
+            except PipelineOverloaded:
+                with lock:
+                    rejected[0] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return np.array(latencies) * 1000.0, rejected[0], elapsed
+
+
+def report(name, latencies, rejected, elapsed):
+    done = len(latencies)
+    p50, p99 = np.percentile(latencies, [50, 99]) if done else (float('nan'), float('nan'))
+    print(f"   {name:<26} {done / elapsed:7.1f} req/s | p50: {p50:8.1f} ms | p99: {p99:8.1f} ms | "
+          f"recusadas: {rejected}")
+    return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do pipeline de upload")
+    parser.add_argument('--model', default='models/brain_cancer_final.h5')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--image-size', type=int, default=2048)
+    parser.add_argument('--decode-workers', type=int, default=4)
+    args = parser.parse_args()
+
+    print("⚡ TESTE DE CARGA DO PIPELINE DE UPLOAD")
+    print("=" * 70)
+
+    engine = InferenceEngine.from_path(args.model)
+    upload = make_upload(args.image_size)
+    print(f"   Upload: {args.image_size}x{args.image_size} JPEG ({len(upload) / 1e6:.1f} MB) | "
+          f"{args.requests} requisições por cenário | núcleos: {os.cpu_count()}")
+
+    batcher = MicroBatcher(engine.predict, max_batch_size=16, max_wait_ms=5).start()
+    pipeline = AsyncPredictionPipeline(
+        preprocess_image, submit_inference=batcher.submit_async,
+        decode_workers=args.decode_workers, max_pending=args.requests
+    ).start()
+
+    def direct():
+        return batcher.submit(preprocess_image(upload))
+
+    def pipelined():
+        return pipeline.submit(upload).result()
+
+    # Aquecimento
+    direct()
+    pipelined()
+
+    try:
+        for clients in args.clients:
+            print(f"\n📊 {clients} cliente(s) concorrente(s):")
+            base = report("Direto (thread da req.)", *run_clients(direct, clients, args.requests))
+            piped = report(f"Pipeline ({args.decode_workers} decodif.)", *run_clients(pipelined, clients, args.requests))
+            print(f"   🚀 Pipeline: {piped / base:.2f}x a vazão")
+
+        # Contrapressão: rajada maior que a capacidade do pipeline
+        print(f"\n📊 Rajada de {args.requests} requisições com max_pending=8:")
+        small = AsyncPredictionPipeline(
+            preprocess_image, submit_inference=batcher.submit_async,
+            decode_workers=args.decode_workers, max_pending=8
+        ).start()
+        try:
+            report("Pipeline limitado", *run_clients(lambda: small.submit(upload).result(),
+                                                     args.requests, args.requests))
+            stats = small.get_stats()
+            print(f"   Máx. pendentes: {stats['max_pending_seen']} | recusadas: {stats['rejected']} "
+                  f"(respondidas com 503 + Retry-After na API)")
+        finally:
+            small.stop()
+    finally:
+        pipeline.stop()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Pipeline assíncrono de predição: decodificação/preprocessamento em pool com admissão limitada
+
+Estágios ligados por filas limitadas, rodando em um event loop asyncio próprio:
+
+    submit(bytes) --[admissão]--> fila de entrada --> N decodificadores (pool de threads/processos)
+                  --> fila de prontos (limitada) --> estágio de inferência (lotes via MicroBatcher)
+
+Contrapressão: quando a inferência atrasa, a fila de prontos enche, os
+decodificadores param de consumir a entrada e, com max_pending itens no
+pipeline, novas submissões são recusadas com PipelineOverloaded (a API
+responde 503 em vez de acumular requisições até estourar a memória).
+"""
+import asyncio
+import threading
+import multiprocessing
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PipelineOverloaded(Exception):
+    """Pipeline cheio: a requisição deve ser recusada ou tentada depois"""
+
+
+class _Job:
+    __slots__ = ('data', 'infer', 'future', 'submitted_at')
+
+    def __init__(self, data, infer):
+        self.data = data
+        self.infer = infer
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class AsyncPredictionPipeline:
+    def __init__(self, preprocess_fn, submit_inference=None, decode_workers=4,
+                 max_pending=64, max_ready=16, max_inflight=32, use_processes=False):
+        """
+        Inicializa o pipeline
+
+        Args:
+            preprocess_fn: bytes -> array (1, H, W, C); roda no pool de decodificação
+                (precisa ser importável/picklável se use_processes=True)
+            submit_inference: array -> concurrent.futures.Future com as predições
+                (ex.: MicroBatcher.submit_async); None = só preprocessa
+            decode_workers: Decodificações simultâneas
+            max_pending: Itens admitidos no pipeline ao mesmo tempo (acima disso: PipelineOverloaded)
+            max_ready: Capacidade da fila entre preprocessamento e inferência
+            max_inflight: Itens aguardando o modelo ao mesmo tempo
+            use_processes: Usa ProcessPoolExecutor em vez de threads na decodificação
+        """
+        self.preprocess_fn = preprocess_fn
+        self.submit_inference = submit_inference
+        self.decode_workers = max(1, int(decode_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.max_ready = max(1, int(max_ready))
+        self.max_inflight = max(1, int(max_inflight))
+        self.use_processes = use_processes
+
+        # _loop só muda sob _state_lock: submit e stop não se cruzam
+        self._state_lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._intake = None
+        self._ready = None
+        self._inflight = None
+        self._tasks = []
+        self._started = threading.Event()
+
+        # Admissão (thread-safe, verificada na thread de quem submete)
+        self._pending_lock = threading.Lock()
+        self._pending = 0
+
+        # Métricas
+        self._stats_lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._errors = 0
+        self._max_pending_seen = 0
+        self._total_decode_wait = 0.0
+        self._total_latency = 0.0
+
+    # ===== Ciclo de vida =====
+
+    def start(self):
+        """Inicia o event loop e os estágios em uma thread de fundo"""
+        if self._thread is not None:
+            return self
+        if self.use_processes:
+            # 'spawn': o servidor já iniciou o runtime do TensorFlow, que não sobrevive a fork
+            self._executor = ProcessPoolExecutor(max_workers=self.decode_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.decode_workers,
+                                                thread_name_prefix='pipeline-decode')
+        self._thread = threading.Thread(target=self._run_loop, name='PredictionPipeline', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Encerra os estágios; itens ainda pendentes falham com RuntimeError"""
+        with self._state_lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None:
+            return
+        # Submissões já agendadas rodam antes do cancelamento e falham em _fail_remaining
+        loop.call_soon_threadsafe(self._cancel_tasks)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+        self._started.clear()
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._intake = asyncio.Queue()  # limitada pela admissão (max_pending)
+        self._ready = asyncio.Queue(maxsize=self.max_ready)
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        with self._state_lock:
+            self._loop = loop
+        self._tasks = [loop.create_task(self._decode_stage()) for _ in range(self.decode_workers)]
+        self._tasks.append(loop.create_task(self._inference_stage()))
+        loop.call_soon(self._started.set)
+        try:
+            loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+        finally:
+            self._fail_remaining()
+            loop.close()
+
+    def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def _fail_remaining(self):
+        for q in (self._intake, self._ready):
+            while not q.empty():
+                job = q.get_nowait()
+                self._finish(job, error=RuntimeError("Pipeline encerrado"))
+
+    # ===== Submissão =====
+
+    def submit(self, data, infer=True):
+        """
+        Enfileira bytes de uma imagem (thread-safe)
+
+        Args:
+            data: Bytes da imagem enviada
+            infer: False para só decodificar/preprocessar
+
+        Returns:
+            concurrent.futures.Future com (array preprocessado, predições ou None);
+            cancelar o Future antes da decodificação descarta o item
+
+        Raises:
+            PipelineOverloaded: Se já houver max_pending itens no pipeline
+            RuntimeError: Se o pipeline não estiver rodando
+        """
+        job = _Job(data, infer and self.submit_inference is not None)
+
+        # Sob o mesmo lock de stop(): o item entra na fila antes do cancelamento dos estágios
+        with self._state_lock:
+            loop = self._loop
+            if loop is None:
+                raise RuntimeError("Pipeline não foi iniciado")
+
+            with self._pending_lock:
+                if self._pending >= self.max_pending:
+                    with self._stats_lock:
+                        self._rejected += 1
+                    raise PipelineOverloaded(f"Pipeline cheio ({self.max_pending} itens pendentes)")
+                self._pending += 1
+                pending = self._pending
+
+            try:
+                loop.call_soon_threadsafe(self._intake.put_nowait, job)
+            except RuntimeError:
+                # Event loop já fechado: desfaz a admissão
+                with self._pending_lock:
+                    self._pending -= 1
+                raise RuntimeError("Pipeline encerrado")
+
+        with self._stats_lock:
+            self._submitted += 1
+            self._max_pending_seen = max(self._max_pending_seen, pending)
+        return job.future
+
+    async def predict(self, data, infer=True):
+        """Versão awaitable de submit para código asyncio (qualquer event loop)"""
+        return await asyncio.wrap_future(self.submit(data, infer))
+
+    def _finish(self, job, result=None, error=None):
+        with self._pending_lock:
+            self._pending -= 1
+        with self._stats_lock:
+            if error is not None:
+                self._errors += 1
+            else:
+                self._completed += 1
+                self._total_latency += time.perf_counter() - job.submitted_at
+        # Quem submeteu pode cancelar o Future a qualquer momento (timeout da API)
+        try:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    # ===== Estágios =====
+
+    async def _decode_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._intake.get()
+            if job.future.cancelled():
+                # Quem submeteu desistiu (timeout): não gasta decodificação com o item
+                self._finish(job, error=RuntimeError("Item cancelado"))
+                continue
+            started = time.perf_counter()
+            try:
+                array = await loop.run_in_executor(self._executor, self.preprocess_fn, job.data)
+            except asyncio.CancelledError:
+                self._finish(job, error=RuntimeError("Pipeline encerrado"))
+                raise
+            except Exception as e:
+                self._finish(job, error=e)
+                continue
+
+            job.data = None  # libera os bytes do upload
+            with self._stats_lock:
+                self._total_decode_wait += started - job.submitted_at
+
+            if not job.infer:
+                self._finish(job, result=(array, None))
+                continue
+            # Bloqueia aqui quando a inferência está atrasada (contrapressão)
+            await self._ready.put((job, array))
+
+    async def _inference_stage(self):
+        while True:
+            job, array = await self._ready.get()
+            if job.future.cancelled():
+                self._finish(job, error=RuntimeError("Item cancelado"))
+                continue
+            # Limita o que está no modelo; enquanto espera, a fila de prontos enche
+            await self._inflight.acquire()
+            try:
+                inference = self.submit_inference(array)
+            except Exception as e:
+                self._inflight.release()
+                self._finish(job, error=e)
+                continue
+            inference.add_done_callback(lambda f, job=job, array=array: self._on_inference_done(job, array, f))
+
+    def _on_inference_done(self, job, array, inference):
+        # Chamado na thread da inferência: devolve a vaga no event loop
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._inflight.release)
+            except RuntimeError:
+                pass  # pipeline encerrado enquanto o lote rodava
+        if inference.cancelled():
+            self._finish(job, error=RuntimeError("Inferência cancelada"))
+            return
+        error = inference.exception()
+        if error is not None:
+            self._finish(job, error=error)
+        else:
+            self._finish(job, result=(array, inference.result()))
+
+    # ===== Métricas =====
+
+    def get_stats(self):
+        """Retorna ocupação das filas, recusas e latências médias"""
+        with self._pending_lock:
+            pending = self._pending
+        with self._stats_lock:
+            completed = self._completed
+            return {
+                'running': self._loop is not None,
+                'decode_workers': self.decode_workers,
+                'executor': 'process' if self.use_processes else 'thread',
+                'pending': pending,
+                'max_pending': self.max_pending,
+                'max_pending_seen': self._max_pending_seen,
+                'ready_queue_depth': self._ready.qsize() if self._ready is not None else 0,
+                'max_inflight': self.max_inflight,
+                'submitted': self._submitted,
+                'completed': completed,
+                'rejected': self._rejected,
+                'errors': self._errors,
+                'avg_decode_queue_ms': (self._total_decode_wait / completed * 1000.0) if completed else 0.0,
+                'avg_latency_ms': (self._total_latency / completed * 1000.0) if completed else 0.0
+            }
@@ -0,0 +1,158 @@
+"""
+Execução de tarefas em segundo plano para interfaces Tk
+
+O Tk só pode ser usado pela thread principal. As tarefas (inferência, TTA,
+calibração de limiar, carregamento do modelo) rodam em um pool de threads e
+se comunicam com a interface só por uma fila de eventos, esvaziada na thread
+principal por um callback periódico (root.after):
+
+    runner = BackgroundRunner(root.after)
+    task = runner.submit(trabalho, imagem,
+                         on_progress=atualiza_barra, on_done=mostra_resultado)
+    task.cancel()
+
+A função da tarefa recebe o BackgroundTask como primeiro argumento e usa
+task.report(feito, total, mensagem) e task.check_cancelled() entre as etapas.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Levantada por BackgroundTask.check_cancelled quando a tarefa foi cancelada"""
+
+
+class BackgroundTask:
+    """Tarefa submetida ao BackgroundRunner (o estado é consultado na thread principal)"""
+
+    def __init__(self, runner, name, on_progress=None, on_done=None, on_error=None, on_cancel=None):
+        self.name = name
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.done = False
+        self._runner = runner
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Pede o cancelamento: a tarefa para na próxima verificação e on_cancel é chamado"""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Chamado pela função da tarefa entre etapas; levanta TaskCancelled se cancelada"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+    def report(self, completed, total, message=None):
+        """Publica o progresso (chamado pela função da tarefa, em qualquer thread)"""
+        self._runner._events.put(('progress', self, (completed, total, message)))
+
+
+class BackgroundRunner:
+    def __init__(self, schedule, max_workers=1, poll_ms=50):
+        """
+        Inicializa o executor de tarefas
+
+        Args:
+            schedule: Função (ms, callback) que agenda o callback na thread da
+                interface, normalmente root.after
+            max_workers: Threads do pool (1 = tarefas executadas em ordem de submissão)
+            poll_ms: Intervalo de verificação da fila de eventos enquanto há tarefas ativas
+        """
+        self.schedule = schedule
+        self.poll_ms = int(poll_ms)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)),
+                                            thread_name_prefix='neuroai-task')
+        self._events = queue.Queue()
+        self._active = set()
+        self._polling = False
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def submit(self, fn, *args, name=None, on_progress=None, on_done=None, on_error=None,
+               on_cancel=None, **kwargs):
+        """
+        Executa fn(task, *args, **kwargs) no pool
+
+        Os callbacks rodam na thread principal: on_progress(feito, total, mensagem),
+        on_done(resultado), on_error(exceção) e on_cancel().
+
+        Returns:
+            BackgroundTask
+        """
+        task = BackgroundTask(self, name or getattr(fn, '__name__', 'tarefa'),
+                              on_progress, on_done, on_error, on_cancel)
+        self._active.add(task)
+        self._executor.submit(self._run, task, fn, args, kwargs)
+        self._ensure_polling()
+        return task
+
+    def _run(self, task, fn, args, kwargs):
+        """Executado na thread do pool: nenhum acesso ao Tk aqui"""
+        try:
+            task.check_cancelled()
+            result = fn(task, *args, **kwargs)
+            task.check_cancelled()
+            self._events.put(('done', task, result))
+        except TaskCancelled:
+            self._events.put(('cancelled', task, None))
+        except Exception as e:
+            self._events.put(('error', task, e))
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.schedule(self.poll_ms, self.poll)
+
+    def poll(self):
+        """Entrega os eventos pendentes (thread principal) e reagenda enquanto houver tarefas"""
+        self._polling = False
+        latest_progress = {}
+        finished = []
+        while True:
+            try:
+                kind, task, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                # Só o último progresso de cada tarefa interessa à interface
+                latest_progress[task] = payload
+            else:
+                finished.append((kind, task, payload))
+
+        for task, (completed, total, message) in latest_progress.items():
+            if task.on_progress is not None and not task.cancelled:
+                task.on_progress(completed, total, message)
+
+        for kind, task, payload in finished:
+            task.done = True
+            self._active.discard(task)
+            if kind == 'done' and task.cancelled:
+                # Terminou depois do pedido de cancelamento: o resultado é descartado
+                kind = 'cancelled'
+            callback = {'done': task.on_done, 'error': task.on_error, 'cancelled': task.on_cancel}[kind]
+            if callback is not None:
+                callback() if kind == 'cancelled' else callback(payload)
+            elif kind == 'error':
+                print(f"❌ Erro na tarefa {task.name}: {payload}")
+
+        if self._active:
+            self._ensure_polling()
+
+    def cancel_all(self):
+        """Pede o cancelamento de todas as tarefas ativas"""
+        for task in list(self._active):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancela as tarefas e libera o pool sem esperar (ex.: ao fechar a janela)"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
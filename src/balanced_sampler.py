@@ -0,0 +1,227 @@
+"""
+Amostragem balanceada por classe do dataset de câncer cerebral
+
+Substitui os load_balanced_data/load_brain_cancer_data copiados em cada
+script de treino (primeiros max_per_category arquivos de cada pasta,
+decodificados em série para listas Python):
+
+    datasets/brain_cancer/{Training,Testing}/{notumor,glioma,meningioma,pituitary}
+
+- até max_per_category arquivos por pasta, sorteados (não os primeiros da listagem)
+- decodificação paralela e em cache por dataset_ingestion.ingest_images; as
+  imagens ficam em um array uint8 mapeado em disco, lidas lote a lote
+- a cada época as classes são equilibradas por oversampling (repete a classe
+  menor até o tamanho da maior) ou undersampling (sorteia da maior o tamanho da
+  menor), sem montar o dataset inteiro em memória
+"""
+import os
+
+import numpy as np
+
+from dataset_ingestion import DEFAULT_CACHE_DIR, ingest_images, normalize_images
+from dataset_shards import stratified_split
+
+BRAIN_CATEGORIES = {
+    'notumor': 0,      # Normal/Sem tumor
+    'glioma': 1,       # Glioma (tumor)
+    'meningioma': 1,   # Meningioma (tumor)
+    'pituitary': 1     # Pituitário (tumor)
+}
+BRAIN_SPLITS = ('Training', 'Testing')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+STRATEGIES = ('oversample', 'undersample', 'none')
+
+
+def list_category_images(dataset_path, categories=None, splits=BRAIN_SPLITS,
+                         max_per_category=None, seed=42):
+    """
+    Lista as imagens por pasta split/categoria, sem decodificar
+
+    Args:
+        dataset_path: Raiz do dataset (p.ex. datasets/brain_cancer)
+        categories: Dict nome da pasta -> label (padrão: BRAIN_CATEGORIES)
+        splits: Subpastas percorridas
+        max_per_category: Máximo de arquivos por pasta, sorteados (None = todos)
+        seed: Semente do sorteio
+
+    Returns:
+        (caminhos, labels, categorias), alinhados
+    """
+    categories = categories or BRAIN_CATEGORIES
+    rng = np.random.default_rng(seed)
+    paths, labels, names = [], [], []
+    for split in splits:
+        for category, label in categories.items():
+            folder = os.path.join(dataset_path, split, category)
+            if not os.path.isdir(folder):
+                continue
+            files = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+            if max_per_category is not None and len(files) > max_per_category:
+                files = [files[i] for i in np.sort(rng.choice(len(files), max_per_category, replace=False))]
+            paths.extend(os.path.join(folder, f) for f in files)
+            labels.extend([label] * len(files))
+            names.extend([category] * len(files))
+    return paths, np.asarray(labels, dtype=np.int64), names
+
+
+class BalancedSampler:
+    def __init__(self, dataset_path, img_size=(128, 128), max_per_category=None, strategy='oversample',
+                 categories=None, splits=BRAIN_SPLITS, seed=42, workers=None,
+                 cache_dir=DEFAULT_CACHE_DIR, verbose=True):
+        """
+        Sorteia, decodifica (em paralelo, com cache) e amostra o dataset por classe
+
+        Args:
+            dataset_path: Raiz do dataset
+            img_size: (largura, altura) das imagens
+            max_per_category: Máximo de arquivos sorteados por pasta split/categoria
+            strategy: 'oversample', 'undersample' ou 'none' (padrão das épocas de treino)
+            categories: Dict pasta -> label (padrão: BRAIN_CATEGORIES)
+            splits: Subpastas do dataset
+            seed: Semente do sorteio dos arquivos e das épocas
+            workers: Processos de decodificação (padrão: núcleos da máquina)
+            cache_dir: Cache das imagens decodificadas (None = só em memória)
+            verbose: Imprime o resumo por pasta e por classe
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia desconhecida: {strategy} (use {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.seed = seed
+        self.verbose = verbose
+
+        paths, labels, names = list_category_images(dataset_path, categories, splits, max_per_category, seed)
+        self._images, failed = ingest_images(paths, img_size, workers=workers, cache_dir=cache_dir,
+                                             verbose=verbose)
+        failed = set(failed)
+        self._rows = np.array([i for i in range(len(paths)) if i not in failed], dtype=np.int64)
+        self.paths = [paths[i] for i in self._rows]
+        self.labels = labels[self._rows]
+        self.categories = [names[i] for i in self._rows]
+        self.classes = np.unique(self.labels)
+
+        if verbose:
+            for category in dict.fromkeys(self.categories):
+                print(f"   ✅ {category}: {self.categories.count(category)} imagens")
+            self.print_distribution()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def class_counts(self, indices=None):
+        """Imagens por label (no subconjunto indicado ou em todo o dataset)"""
+        labels = self.labels if indices is None else self.labels[np.asarray(indices, dtype=np.int64)]
+        return {int(label): int(np.sum(labels == label)) for label in self.classes}
+
+    def print_distribution(self, indices=None):
+        counts = self.class_counts(indices)
+        total = max(sum(counts.values()), 1)
+        print("\n📊 DISTRIBUIÇÃO POR CLASSE:")
+        for label, count in counts.items():
+            print(f"   Classe {label}: {count} imagens ({count / total * 100:.1f}%)")
+
+    def split(self, test_size=0.2, val_size=0.16, seed=None):
+        """
+        Divisão estratificada em treino, validação e teste (frações do total)
+
+        O padrão equivale ao train_test_split duplo dos scripts de treino
+        (20% teste, depois 20% do restante para validação).
+        """
+        return stratified_split(self.labels, test_size, val_size, self.seed if seed is None else seed)
+
+    def load(self, indices=None):
+        """Imagens float32 [0, 1] e labels de um subconjunto (validação/teste)"""
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        return normalize_images(self._images[self._rows[indices]]), self.labels[indices]
+
+    def epoch_indices(self, indices=None, strategy=None, rng=None):
+        """
+        Índices de uma época com as classes equilibradas, embaralhados
+
+        Args:
+            indices: Subconjunto amostrado (p.ex. treino de split); padrão: todo o dataset
+            strategy: 'oversample' (cada classe repetida até a maior), 'undersample'
+                (cada classe sorteada até a menor) ou 'none'; padrão: self.strategy
+            rng: np.random.Generator da sequência de épocas
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        strategy = strategy or self.strategy
+        rng = rng if rng is not None else np.random.default_rng(self.seed)
+        if strategy == 'none':
+            return rng.permutation(indices)
+
+        groups = [indices[self.labels[indices] == label] for label in self.classes]
+        groups = [group for group in groups if len(group)]
+        sizes = [len(group) for group in groups]
+        target = max(sizes) if strategy == 'oversample' else min(sizes)
+
+        epoch = []
+        for group in groups:
+            if len(group) >= target:
+                epoch.append(rng.choice(group, target, replace=False))
+            else:
+                # Todas as imagens da classe menor, completadas por repetição sorteada
+                epoch.append(np.concatenate([group, rng.choice(group, target - len(group), replace=True)]))
+        return rng.permutation(np.concatenate(epoch))
+
+    def steps_per_epoch(self, indices=None, batch_size=32, strategy=None):
+        """Lotes por época equilibrada (para model.fit com um fluxo infinito)"""
+        size = len(self.epoch_indices(indices, strategy, np.random.default_rng(0)))
+        return -(-size // batch_size)
+
+    def _fetch(self, indices):
+        """Lote uint8 e labels; linhas em ordem crescente leem o memmap sequencialmente"""
+        indices = np.sort(indices)
+        return np.asarray(self._images[self._rows[indices]]), self.labels[indices]
+
+    def batches(self, indices=None, batch_size=32, strategy=None, epochs=None, normalize=True):
+        """
+        Gera lotes (imagens, labels) de épocas equilibradas, cada época reamostrada
+
+        Args:
+            indices, strategy: como em epoch_indices
+            batch_size: Imagens por lote
+            epochs: Número de épocas (None = infinito, para model.fit com steps_per_epoch)
+            normalize: float32 [0, 1] (True) ou uint8 (False)
+        """
+        rng = np.random.default_rng(self.seed)
+        epoch = 0
+        while epochs is None or epoch < epochs:
+            order = self.epoch_indices(indices, strategy, rng)
+            for start in range(0, len(order), batch_size):
+                images, labels = self._fetch(order[start:start + batch_size])
+                yield (normalize_images(images) if normalize else images), labels
+            epoch += 1
+
+    def dataset(self, indices=None, batch_size=32, strategy=None, augmentation=False, seed=None):
+        """
+        Pipeline tf.data infinito de épocas equilibradas (use com steps_per_epoch)
+
+        Os índices de cada época vêm de epoch_indices; os lotes são lidos do
+        memmap em paralelo (num_parallel_calls=AUTOTUNE), normalizados e,
+        opcionalmente, aumentados por data_pipeline.augment_batch.
+
+        Args:
+            indices, batch_size, strategy: como em batches
+            augmentation: Parâmetros de data_pipeline.augment_batch (False desativa)
+            seed: Semente da augmentation
+        """
+        import tensorflow as tf
+        from data_pipeline import AUTOTUNE, finalize_batches
+
+        def index_batches():
+            rng = np.random.default_rng(self.seed)
+            while True:
+                order = self.epoch_indices(indices, strategy, rng)
+                for start in range(0, len(order), batch_size):
+                    yield order[start:start + batch_size]
+
+        def load(batch_indices):
+            images, labels = tf.numpy_function(self._fetch, [batch_indices], [tf.uint8, tf.int64])
+            images.set_shape([None, *self._images.shape[1:]])
+            labels.set_shape([None])
+            return images, labels
+
+        dataset = tf.data.Dataset.from_generator(index_batches,
+                                                 output_signature=tf.TensorSpec((None,), tf.int64))
+        dataset = dataset.map(load, num_parallel_calls=AUTOTUNE)
+        return finalize_batches(dataset, training=augmentation is not False, augmentation=augmentation, seed=seed)
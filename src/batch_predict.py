@@ -0,0 +1,395 @@
+"""
+Predição em lote com streaming para pastas grandes
+
+Pipeline de geradores, com memória constante independente do tamanho da pasta:
+
+    varredura -> decodificação (pool de threads, lote seguinte em paralelo)
+              -> inferência (uma chamada por lote) -> escrita incremental
+
+Cada lote é gravado assim que sai do modelo (CSV com append ou uma parte
+Parquet fechada por lote). Ao reiniciar, os arquivos já presentes na saída são
+pulados, então uma interrupção perde no máximo o lote em andamento. A saída
+padrão é por arquivo de modelo, para que retomar nunca reaproveite resultados
+de outro modelo.
+
+Uso:
+    python src/batch_predict.py pasta_de_imagens [--model models/brain_cancer_final.h5]
+                                [--output results/batch_predictions_<modelo>.csv] [--format csv|parquet]
+                                [--batch-size 32] [--workers 4] [--recursive] [--no-resume]
+"""
+import os
+import csv
+import sys
+import time
+import queue
+import argparse
+import threading
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+
+RESULT_COLUMNS = [
+    'image_name', 'image_path', 'predicted_class', 'class_name',
+    'confidence', 'probability', 'error'
+]
+
+
+def scan_images(folder, extensions=IMAGE_EXTENSIONS, recursive=False):
+    """
+    Gera os caminhos das imagens da pasta em ordem estável (necessária para retomar)
+
+    Por padrão só a própria pasta, como a predição em lote anterior; recursive=True
+    desce nas subpastas. Cada diretório é listado e ordenado isoladamente, então a
+    varredura não precisa montar a lista completa de uma pasta com centenas de
+    milhares de arquivos.
+    """
+    try:
+        entries = sorted(os.scandir(folder), key=lambda e: e.name)
+    except OSError as e:
+        print(f"⚠️ Não foi possível listar {folder}: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from scan_images(entry.path, extensions, recursive)
+        elif entry.name.lower().endswith(extensions):
+            yield entry.path
+
+
+def chunked(iterable, size):
+    """Agrupa um iterável em listas de até `size` itens"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def prefetch(iterable, depth=2):
+    """
+    Consome o iterável em uma thread de fundo, mantendo até `depth` itens prontos
+
+    Permite que a decodificação do próximo lote aconteça enquanto o atual está no modelo.
+    Exceções do produtor são repassadas ao consumidor.
+    """
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=producer, name='batch-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def decode_batches(path_batches, predictor, workers=None):
+    """Decodifica cada grupo de caminhos em um lote contíguo: gera (caminhos, lote, erros)"""
+    for paths in path_batches:
+        batch, errors = predictor.preprocess_batch(paths, workers=workers)
+        yield paths, batch, errors
+
+
+def infer_batches(decoded, predictor):
+    """Uma passada do modelo por lote (CancerPredictor.predict_paths): gera a lista de linhas de resultado"""
+    for paths, batch, errors in decoded:
+        results = predictor.predict_paths(paths, preprocessed=(batch, errors))
+        yield [{
+            'image_name': result['image_name'],
+            'image_path': result['image_path'],
+            'predicted_class': result.get('predicted_class'),
+            'class_name': result.get('class_name'),
+            'confidence': result.get('confidence'),
+            'probability': result.get('probability'),
+            'error': result.get('error', '')
+        } for result in results]
+
+
+class CsvResultWriter:
+    def __init__(self, path, append=True):
+        """
+        Escritor CSV incremental (append + flush a cada lote)
+
+        Args:
+            path: Arquivo CSV de saída (criado com cabeçalho se não existir)
+            append: Se False, sobrescreve a saída existente
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if append:
+            self.repair_tail(path)
+        is_new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS)
+        if is_new:
+            self._writer.writeheader()
+            self._file.flush()
+
+    @staticmethod
+    def repair_tail(path):
+        """Descarta uma última linha incompleta (execução interrompida no meio da escrita)"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Volta até o último '\n' e trunca ali
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    f.truncate(position + newline + 1)
+                    return
+            f.truncate(0)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def processed_paths(path):
+        """Caminhos já registrados na saída (para retomar), ignorando uma linha final incompleta"""
+        if not os.path.exists(path):
+            return set()
+        CsvResultWriter.repair_tail(path)
+        with open(path, newline='', encoding='utf-8') as f:
+            return {row['image_path'] for row in csv.DictReader(f) if row.get('image_path')}
+
+
+class ParquetResultWriter:
+    def __init__(self, directory, append=True):
+        """
+        Escritor Parquet incremental: um arquivo part-NNNNN.parquet completo por lote
+
+        Um Parquet só é legível depois do rodapé, escrito ao fechar o arquivo; por
+        isso cada lote vira uma parte própria, gravada em um temporário oculto e
+        renomeada, e uma interrupção perde no máximo o lote em andamento.
+
+        Args:
+            directory: Diretório do dataset Parquet
+            append: Se False, remove as partes existentes antes de escrever
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._pq = pq
+        os.makedirs(directory, exist_ok=True)
+        self.path = directory
+        for name in os.listdir(directory):
+            if name.startswith('.part-') and name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))  # parte que não chegou a ser renomeada
+        parts = self.part_files(directory)
+        if not append:
+            for name in parts:
+                os.remove(os.path.join(directory, name))
+            parts = []
+        self._next_part = max((int(name[5:-8]) for name in parts), default=-1) + 1
+        self._schema = pa.schema([
+            ('image_name', pa.string()), ('image_path', pa.string()),
+            ('predicted_class', pa.int64()), ('class_name', pa.string()),
+            ('confidence', pa.float64()), ('probability', pa.float64()),
+            ('error', pa.string())
+        ])
+
+    @staticmethod
+    def part_files(directory):
+        """Nomes dos part-NNNNN.parquet do diretório, em ordem de gravação"""
+        parts = [name for name in os.listdir(directory)
+                 if name.startswith('part-') and name.endswith('.parquet') and name[5:-8].isdigit()]
+        return sorted(parts, key=lambda name: int(name[5:-8]))
+
+    def write(self, rows):
+        if not rows:
+            return
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        name = f"part-{self._next_part:05d}.parquet"
+        temporary = os.path.join(self.path, f".{name}.tmp")
+        self._pq.write_table(table, temporary)
+        os.replace(temporary, os.path.join(self.path, name))
+        self._next_part += 1
+
+    def close(self):
+        pass  # cada parte já é fechada em write
+
+    @staticmethod
+    def processed_paths(directory):
+        """Caminhos já registrados nos part-*.parquet do diretório; partes ilegíveis são removidas"""
+        if not os.path.isdir(directory):
+            return set()
+        import pyarrow.parquet as pq
+        processed = set()
+        for name in ParquetResultWriter.part_files(directory):
+            path = os.path.join(directory, name)
+            try:
+                column = pq.read_table(path, columns=['image_path'])
+            except Exception as e:
+                # Parte corrompida: removida para não quebrar a leitura do dataset; os itens serão refeitos
+                print(f"⚠️ Removendo {name} ilegível: {e}")
+                os.remove(path)
+                continue
+            processed.update(column.column('image_path').to_pylist())
+        return processed
+
+
+RESULT_WRITERS = {
+    'csv': CsvResultWriter,
+    'parquet': ParquetResultWriter
+}
+
+
+def default_output_path(model_path=None, fmt='csv', results_dir='results'):
+    """
+    Saída padrão de um modelo: results/batch_predictions_<modelo>.csv (ou diretório Parquet)
+
+    Cada arquivo de modelo tem a própria saída, então retomar nunca pula imagens
+    com resultados de outro modelo.
+    """
+    name = 'batch_predictions'
+    if model_path:
+        stem, ext = os.path.splitext(os.path.basename(os.path.normpath(model_path)))
+        name += f"_{stem}" + (f"_{ext[1:]}" if ext else '')
+    return os.path.join(results_dir, name + ('.csv' if fmt == 'csv' else '_parquet'))
+
+
+def run_batch_prediction(predictor, folder, output=None, fmt='csv', batch_size=32, workers=None,
+                         resume=True, recursive=False, report_every=1):
+    """
+    Executa o pipeline completo de predição em lote sobre uma pasta
+
+    Args:
+        predictor: CancerPredictor com modelo carregado
+        folder: Pasta com as imagens
+        output: Arquivo CSV ou diretório Parquet de saída (padrão: default_output_path do modelo)
+        fmt: 'csv' ou 'parquet'
+        batch_size: Imagens por chamada ao modelo
+        workers: Threads de decodificação por lote
+        resume: Pula imagens que já estão na saída
+        recursive: Inclui as subpastas
+        report_every: Intervalo (em lotes) entre relatórios de progresso
+
+    Returns:
+        Dicionário com totais (processadas, erros, puladas, segundos, img/s)
+    """
+    if fmt not in RESULT_WRITERS:
+        raise ValueError(f"Formato de saída não suportado: {fmt}")
+    writer_class = RESULT_WRITERS[fmt]
+    output = output or default_output_path(getattr(predictor, 'model_path', None), fmt)
+
+    processed = writer_class.processed_paths(output) if resume else set()
+    if processed:
+        print(f"↩️ Retomando: {len(processed)} imagens já processadas em {output}")
+
+    skipped = [0]
+
+    def pending():
+        for path in scan_images(folder, recursive=recursive):
+            if path in processed:
+                skipped[0] += 1
+                continue
+            yield path
+
+    writer = writer_class(output, append=resume)
+    done = errors = 0
+    started = time.perf_counter()
+    window_start, window_done = started, 0
+    try:
+        decoded = prefetch(decode_batches(chunked(pending(), batch_size), predictor, workers))
+        for batch_index, rows in enumerate(infer_batches(decoded, predictor), start=1):
+            writer.write(rows)
+            done += len(rows)
+            errors += sum(1 for row in rows if row['error'])
+
+            if batch_index % report_every == 0:
+                now = time.perf_counter()
+                recent = (done - window_done) / max(now - window_start, 1e-9)
+                overall = done / max(now - started, 1e-9)
+                print(f"   📈 {done} imagens | {recent:.1f} img/s (média {overall:.1f}) | erros: {errors}")
+                window_start, window_done = now, done
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'processed': done,
+        'errors': errors,
+        'skipped': skipped[0],
+        'seconds': elapsed,
+        'images_per_second': done / elapsed if elapsed > 0 else 0.0,
+        'output': writer.path
+    }
+    print(f"✅ {done} imagens em {elapsed:.1f}s ({summary['images_per_second']:.1f} img/s) | "
+          f"erros: {errors} | puladas: {skipped[0]}")
+    print(f"💾 Resultados em: {writer.path}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predição em lote com streaming")
+    parser.add_argument('folder', help="Pasta com as imagens")
+    parser.add_argument('--model', default='models/brain_cancer_final.h5')
+    parser.add_argument('--output', default=None,
+                        help="CSV ou diretório Parquet (padrão: results/batch_predictions_<modelo>.csv)")
+    parser.add_argument('--format', choices=sorted(RESULT_WRITERS), default='csv')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--recursive', action='store_true', help="Inclui as subpastas")
+    parser.add_argument('--no-resume', action='store_true', help="Reprocessa tudo do zero")
+    args = parser.parse_args()
+
+    from predict import CancerPredictor
+    predictor = CancerPredictor()
+    if not predictor.load_model(args.model):
+        sys.exit(1)
+
+    run_batch_prediction(
+        predictor, args.folder, output=args.output, fmt=args.format, batch_size=args.batch_size,
+        workers=args.workers, resume=not args.no_resume, recursive=args.recursive
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Pipeline de entrada tf.data para o treinamento
+
+Substitui ImageDataGenerator.flow, que aumenta uma imagem por vez em Python
+(scipy, uma thread) e deixa o model.fit esperando pelos dados:
+
+- fontes: arrays em memória, lista de arquivos (decodificação paralela com
+  num_parallel_calls=AUTOTUNE) ou dataset em fatias (dataset_shards.py)
+- pixels uint8 guardados no cache() e normalizados para float32 [0, 1] por lote
+- augmentation vetorizada por lote: uma matriz afim por imagem (rotação,
+  deslocamento, cisalhamento, zoom e espelhamento, com os mesmos parâmetros
+  e convenções do ImageDataGenerator) aplicada pelo kernel
+  ImageProjectiveTransformV3 ao lote inteiro
+- prefetch() sobrepõe a preparação do próximo lote ao passo de treino
+"""
+import math
+
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Mesmos argumentos de ImageDataGenerator usados até aqui no treinamento
+AUGMENTATION = {
+    'rotation_range': 20,
+    'width_shift_range': 0.2,
+    'height_shift_range': 0.2,
+    'shear_range': 0.2,
+    'zoom_range': 0.2,
+    'horizontal_flip': True,
+    'fill_mode': 'nearest'
+}
+
+
+def affine_transforms(theta, tx, ty, shear, zx, zy, flip, height, width):
+    """
+    Matrizes de transformação de um lote, na convenção de apply_affine_transform do Keras
+
+    Os parâmetros são tensores (B,): theta e shear em radianos, tx (eixo x,
+    colunas) e ty (eixo y, linhas) em pixels, zx/zy fatores de zoom e flip
+    booleano (espelhamento horizontal aplicado depois da transformação afim,
+    como no ImageDataGenerator).
+
+    Returns:
+        Tensor float32 (B, 8): mapeamento saída (x, y) -> entrada de
+        ImageProjectiveTransformV3
+    """
+    theta, tx, ty, shear, zx, zy = (tf.cast(v, tf.float32) for v in (theta, tx, ty, shear, zx, zy))
+    zeros = tf.zeros_like(theta)
+    ones = tf.ones_like(theta)
+
+    def matrix(*rows):
+        return tf.reshape(tf.stack(rows, axis=-1), (-1, 3, 3))
+
+    # Mesma composição de apply_affine_transform, em coordenadas centradas
+    rotation = matrix(tf.cos(theta), -tf.sin(theta), zeros, tf.sin(theta), tf.cos(theta), zeros, zeros, zeros, ones)
+    shift = matrix(ones, zeros, tx, zeros, ones, ty, zeros, zeros, ones)
+    shear_matrix = matrix(ones, -tf.sin(shear), zeros, zeros, tf.cos(shear), zeros, zeros, zeros, ones)
+    zoom = matrix(zx, zeros, zeros, zeros, zy, zeros, zeros, zeros, ones)
+    transform = rotation @ shift @ shear_matrix @ zoom
+
+    o_x, o_y = float(width) / 2 - 0.5, float(height) / 2 - 0.5
+    offset = tf.constant([[1, 0, o_x], [0, 1, o_y], [0, 0, 1]], tf.float32)
+    reset = tf.constant([[1, 0, -o_x], [0, 1, -o_y], [0, 0, 1]], tf.float32)
+    mirror = tf.where(tf.reshape(flip, (-1, 1, 1)),
+                      tf.constant([[-1, 0, width - 1], [0, 1, 0], [0, 0, 1]], tf.float32),
+                      tf.eye(3))
+    transform = offset @ transform @ reset @ mirror
+    return tf.concat([tf.reshape(transform[:, :2, :], (-1, 6)), tf.zeros_like(transform[:, 0, :2])], axis=1)
+
+
+def augment_batch(images, seed, augmentation=None):
+    """
+    Aplica augmentation aleatória a um lote inteiro de uma vez
+
+    Sorteia os parâmetros de cada imagem como ImageDataGenerator.get_random_transform
+    (rotação em graus, deslocamentos em fração do tamanho, cisalhamento em graus,
+    zoom independente por eixo) e interpola bilinearmente, como interpolation_order=1.
+
+    Args:
+        images: Tensor float (B, H, W, C)
+        seed: Tensor int (2,) da semente sem estado (tf.random.stateless_*)
+        augmentation: Parâmetros no formato de AUGMENTATION (padrão: AUGMENTATION)
+
+    Returns:
+        Lote transformado, mesmo formato e dtype
+    """
+    params = {**AUGMENTATION, **(augmentation or {})}
+    shape = tf.shape(images)
+    batch = shape[:1]
+    height, width = images.shape[1], images.shape[2]
+    seeds = tf.random.experimental.stateless_split(tf.cast(seed, tf.int64), 7)
+
+    def uniform(i, low, high):
+        return tf.random.stateless_uniform(batch, seeds[i], low, high)
+
+    def symmetric(i, value):
+        return uniform(i, -value, value) if value else tf.zeros(batch)
+
+    theta = symmetric(0, params['rotation_range']) * (math.pi / 180)
+    tx = symmetric(1, params['width_shift_range'])
+    ty = symmetric(2, params['height_shift_range'])
+    if params['width_shift_range'] and params['width_shift_range'] < 1:
+        tx *= width
+    if params['height_shift_range'] and params['height_shift_range'] < 1:
+        ty *= height
+    shear = symmetric(3, params['shear_range']) * (math.pi / 180)
+
+    zoom_range = params['zoom_range']
+    if np.isscalar(zoom_range):
+        zoom_range = (1 - zoom_range, 1 + zoom_range)
+    if zoom_range[0] == 1 and zoom_range[1] == 1:
+        zx = zy = tf.ones(batch)
+    else:
+        zx, zy = uniform(4, *zoom_range), uniform(5, *zoom_range)
+
+    flip = uniform(6, 0.0, 1.0) < 0.5 if params['horizontal_flip'] else tf.zeros(batch, tf.bool)
+
+    transforms = affine_transforms(theta, tx, ty, shear, zx, zy, flip, height, width)
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3],
+        fill_value=0.0,
+        interpolation='BILINEAR', fill_mode=params['fill_mode'].upper()
+    )
+
+
+def finalize_batches(dataset, training=False, augmentation=None, seed=None):
+    """
+    Etapas comuns a todas as fontes: lotes -> float32 [0, 1] -> augmentation (treino) -> prefetch
+
+    Args:
+        dataset: tf.data.Dataset de lotes (imagens, labels); imagens uint8 ou float
+        training, augmentation, seed: como em dataset_from_arrays
+    """
+    def to_float(images, labels):
+        if images.dtype == tf.uint8:
+            images = tf.cast(images, tf.float32) / 255.0
+        return tf.cast(images, tf.float32), labels
+
+    dataset = dataset.map(to_float, num_parallel_calls=AUTOTUNE)
+    if training and augmentation is not False:
+        # Uma semente por lote; rerandomize muda a sequência a cada época
+        seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+            lambda batch, batch_seed: (augment_batch(batch[0], batch_seed, augmentation), batch[1]),
+            num_parallel_calls=AUTOTUNE
+        )
+    return dataset.prefetch(AUTOTUNE)
+
+
+def _cache(dataset, cache):
+    """cache=True guarda em memória; uma string guarda no arquivo indicado"""
+    if cache:
+        dataset = dataset.cache('' if cache is True else cache)
+    return dataset
+
+
+def _indexed_batches(count, fetch, output_signature, batch_size, shuffle, seed):
+    """Lotes montados por fetch(índices) a partir de índices (embaralhados por época)"""
+    dataset = tf.data.Dataset.range(count)
+    if shuffle:
+        dataset = dataset.shuffle(count, seed=seed, reshuffle_each_iteration=True)
+
+    def load(indices):
+        outputs = tf.numpy_function(fetch, [indices], [spec.dtype for spec in output_signature])
+        for output, spec in zip(outputs, output_signature):
+            output.set_shape([None, *spec.shape[1:]])
+        return tuple(outputs)
+
+    return dataset.batch(batch_size).map(load, num_parallel_calls=AUTOTUNE)
+
+
+def dataset_from_arrays(X, y, batch_size=32, training=False, augmentation=None, seed=None):
+    """
+    Pipeline a partir de arrays em memória (ou memmaps), equivalente a ImageDataGenerator.flow
+
+    Os lotes são recortados dos arrays por índice, sem copiar o dataset para
+    dentro do grafo; uint8 é normalizado para [0, 1] e float é usado como está.
+
+    Args:
+        X: Imagens (N, H, W, C)
+        y: Labels (N,) ou one-hot (N, C)
+        batch_size: Imagens por lote
+        training: Embaralha a cada época e aplica augmentation
+        augmentation: Parâmetros de augment_batch (False desativa)
+        seed: Semente do embaralhamento e da augmentation
+    """
+    y = np.asarray(y)
+    signature = (tf.TensorSpec((None, *X.shape[1:]), tf.as_dtype(X.dtype)),
+                 tf.TensorSpec((None, *y.shape[1:]), tf.as_dtype(y.dtype)))
+
+    def fetch(indices):
+        return np.asarray(X[indices]), y[indices]
+
+    dataset = _indexed_batches(len(X), fetch, signature, batch_size, training, seed)
+    return finalize_batches(dataset, training, augmentation, seed)
+
+
+def decode_image_file(path, img_size):
+    """Lê e redimensiona um arquivo de imagem para uint8 RGB (H, W, 3) dentro do grafo"""
+    data = tf.io.read_file(path)
+    # JPEG com a DCT exata da libjpeg (a mesma do cv2.imread); o padrão do TF é a rápida
+    image = tf.cond(tf.io.is_jpeg(data),
+                    lambda: tf.io.decode_jpeg(data, channels=3, dct_method='INTEGER_ACCURATE'),
+                    lambda: tf.io.decode_image(data, channels=3, expand_animations=False))
+    image = tf.image.resize(image, (img_size[1], img_size[0]), method='bilinear')
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+def dataset_from_files(paths, labels, img_size=(224, 224), batch_size=32, training=False,
+                       augmentation=None, seed=None, cache=True):
+    """
+    Pipeline a partir de uma lista de arquivos, decodificados em paralelo
+
+    Args:
+        paths: Caminhos das imagens (JPEG, PNG, BMP ou GIF)
+        labels: Labels alinhados com paths
+        img_size: (largura, altura), como em CancerImagePreprocessor
+        batch_size, training, augmentation, seed: como em dataset_from_arrays
+        cache: True guarda as imagens decodificadas (uint8) em memória, uma string
+            em arquivo; False decodifica a cada época
+    """
+    labels = np.asarray(labels)
+    dataset = tf.data.Dataset.from_tensor_slices(([str(p) for p in paths], labels))
+    dataset = dataset.map(lambda path, label: (decode_image_file(path, img_size), label),
+                          num_parallel_calls=AUTOTUNE)
+    dataset = _cache(dataset, cache)
+    if training:
+        dataset = dataset.shuffle(len(labels), seed=seed, reshuffle_each_iteration=True)
+    return finalize_batches(dataset.batch(batch_size), training, augmentation, seed)
+
+
+def dataset_from_shards(shards, indices=None, batch_size=32, training=False,
+                        augmentation=None, seed=None, cache=False):
+    """
+    Pipeline a partir de um ShardedDataset (fatias uint8 mapeadas em memória)
+
+    Sem cache, cada lote é lido das fatias sob demanda (o dataset pode ser maior
+    que a memória); com cache, as imagens lidas na primeira época ficam em
+    memória (cache=True) ou em arquivo (string) e são embaralhadas a partir dele.
+
+    Args:
+        shards: dataset_shards.ShardedDataset
+        indices: Subconjunto (p.ex. saída de split_indices); padrão: todo o dataset
+        batch_size, training, augmentation, seed: como em dataset_from_arrays
+        cache: True (memória), caminho de arquivo ou False
+    """
+    indices = np.arange(len(shards)) if indices is None else np.asarray(indices, dtype=np.int64)
+    signature = (tf.TensorSpec((None, *shards.image_shape), tf.uint8), tf.TensorSpec((None,), tf.int64))
+
+    def fetch(positions):
+        # Índices em ordem crescente leem as fatias sequencialmente
+        return shards.get_batch(np.sort(indices[positions]), normalize=False)
+
+    if not cache:
+        dataset = _indexed_batches(len(indices), fetch, signature, batch_size, training, seed)
+        return finalize_batches(dataset, training, augmentation, seed)
+
+    dataset = _cache(_indexed_batches(len(indices), fetch, signature, batch_size, False, seed).unbatch(), cache)
+    if training:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    return finalize_batches(dataset.batch(batch_size), training, augmentation, seed)
@@ -0,0 +1,199 @@
+"""
+Ingestão paralela e em cache dos datasets de imagens para treinamento
+
+A lista de arquivos é decodificada por um pool de processos que grava direto
+em um array uint8 (N, H, W, 3) mapeado em disco (.npy), sem listas Python nem
+cópias intermediárias. O arquivo fica em cache, com uma chave derivada da lista
+de arquivos (caminho, mtime, tamanho) e do img_size: rodar o treinamento de
+novo sobre o mesmo dataset só abre o .npy, sem decodificar nada.
+
+    datasets/.cache/images_<chave>.npy    pixels uint8 RGB
+    datasets/.cache/images_<chave>.json   metadados (contagem, img_size, falhas)
+
+Pixels idênticos ao carregamento anterior (cv2.imread, BGR->RGB, cv2.resize);
+a normalização para float32 [0, 1] é feita por normalize_images.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get('NEUROAI_DATASET_CACHE', os.path.join('datasets', '.cache'))
+DEFAULT_INGEST_WORKERS = os.cpu_count() or 1
+DEFAULT_CHUNK_SIZE = 128
+
+
+def cache_key(paths, img_size):
+    """Chave do cache: versão, img_size e (caminho, mtime, tamanho) de cada arquivo, em ordem"""
+    digest = hashlib.sha256(f"v{CACHE_VERSION}|{img_size[0]}x{img_size[1]}".encode())
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}\n".encode())
+    return digest.hexdigest()[:24]
+
+
+def decode_into(path, out):
+    """
+    Decodifica uma imagem redimensionada em RGB direto na linha de saída
+
+    Args:
+        path: Arquivo de imagem
+        out: Array uint8 (H, W, 3) de destino
+
+    Returns:
+        True se a imagem foi decodificada; False se o arquivo é ilegível
+    """
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return False
+    # Redimensionar antes de converter a cor dá o mesmo resultado (interpolação
+    # independente por canal) e converte menos pixels
+    resized = cv2.resize(img, (out.shape[1], out.shape[0]))
+    cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=out)
+    return True
+
+
+def _decode_chunk(array_path, start, paths):
+    """Executado no worker: decodifica uma fatia direto no .npy mapeado e devolve os índices com falha"""
+    cv2.setNumThreads(1)  # o paralelismo vem dos processos
+    images = np.load(array_path, mmap_mode='r+')
+    failed = []
+    for offset, path in enumerate(paths):
+        row = images[start + offset]
+        try:
+            ok = decode_into(path, row)
+        except cv2.error:
+            ok = False
+        if not ok:
+            row[...] = 0
+            failed.append(start + offset)
+    images.flush()
+    return failed
+
+
+def _decode_all(array_path, paths, workers, chunk_size):
+    """Distribui as fatias entre processos (ou decodifica no próprio processo)"""
+    chunks = [(start, paths[start:start + chunk_size]) for start in range(0, len(paths), chunk_size)]
+    workers = min(max(1, int(workers)), len(chunks))
+    if workers <= 1:
+        return sorted(i for start, chunk in chunks for i in _decode_chunk(array_path, start, chunk))
+
+    # 'spawn': o processo pai pode já ter iniciado o runtime do TensorFlow
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(_decode_chunk, array_path, start, chunk) for start, chunk in chunks]
+        return sorted(i for future in futures for i in future.result())
+
+
+def _cache_paths(cache_dir, key):
+    base = os.path.join(cache_dir, f"images_{key}")
+    return f"{base}.npy", f"{base}.json"
+
+
+def load_cached(paths, img_size, cache_dir=DEFAULT_CACHE_DIR, key=None):
+    """
+    Abre o cache correspondente à lista de arquivos, se existir
+
+    Returns:
+        (images memmap somente leitura, índices com falha) ou None
+    """
+    key = key or cache_key(paths, img_size)
+    array_path, meta_path = _cache_paths(cache_dir, key)
+    if not (os.path.exists(array_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        images = np.load(array_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if meta.get('count') != len(paths) or images.shape != (len(paths), img_size[1], img_size[0], 3):
+        return None
+    return images, meta.get('failed', [])
+
+
+def ingest_images(paths, img_size, workers=None, cache_dir=DEFAULT_CACHE_DIR,
+                  chunk_size=DEFAULT_CHUNK_SIZE, verbose=True):
+    """
+    Decodifica e redimensiona uma lista de imagens para um array uint8
+
+    Args:
+        paths: Caminhos das imagens (a ordem define as linhas do array)
+        img_size: (largura, altura) de saída, como em cv2.resize
+        workers: Processos de decodificação (padrão: núcleos da máquina)
+        cache_dir: Diretório do cache (None = sem cache; o resultado fica só em memória)
+        chunk_size: Imagens por tarefa do pool
+        verbose: Imprime o resumo da ingestão
+
+    Returns:
+        images: Array uint8 (N, H, W, 3) RGB alinhado com paths (memmap quando em cache)
+        failed: Índices das imagens ilegíveis (linhas zeradas)
+    """
+    paths = [str(p) for p in paths]
+    img_size = (int(img_size[0]), int(img_size[1]))
+    shape = (len(paths), img_size[1], img_size[0], 3)
+    if not paths:
+        return np.empty(shape, dtype=np.uint8), []
+
+    key = None
+    if cache_dir is not None:
+        key = cache_key(paths, img_size)
+        cached = load_cached(paths, img_size, cache_dir, key)
+        if cached is not None:
+            if verbose:
+                print(f"♻️ Cache de imagens: {len(paths)} imagens {img_size[0]}x{img_size[1]} "
+                      f"({_cache_paths(cache_dir, key)[0]})")
+            return cached
+        os.makedirs(cache_dir, exist_ok=True)
+        work_dir = cache_dir
+    else:
+        work_dir = tempfile.mkdtemp(prefix='neuroai_ingest_')
+
+    start = time.perf_counter()
+    partial_path = os.path.join(work_dir, f"images_{key or 'tmp'}.{os.getpid()}.partial.npy")
+    np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint8, shape=shape).flush()
+    try:
+        failed = _decode_all(partial_path, paths, workers or DEFAULT_INGEST_WORKERS, chunk_size)
+        if cache_dir is None:
+            images = np.load(partial_path)
+        else:
+            array_path, meta_path = _cache_paths(cache_dir, key)
+            os.replace(partial_path, array_path)
+            meta = {
+                'version': CACHE_VERSION,
+                'count': len(paths),
+                'img_size': list(img_size),
+                'failed': failed,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+            tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_meta, meta_path)  # metadados por último: marcam o cache como completo
+            images = np.load(array_path, mmap_mode='r')
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if cache_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if verbose:
+        elapsed = time.perf_counter() - start
+        print(f"🖼️ {len(paths) - len(failed)} imagens decodificadas em {elapsed:.1f}s "
+              f"({len(paths) / max(elapsed, 1e-9):.0f} img/s)" + (f", {len(failed)} ilegíveis" if failed else ""))
+    return images, failed
+
+
+def normalize_images(images, out=None):
+    """uint8 [0, 255] -> float32 [0, 1] sem array temporário (mesmo resultado de img.astype(float32) / 255)"""
+    if out is None:
+        out = np.empty(images.shape, dtype=np.float32)
+    np.divide(images, np.float32(255.0), out=out, casting='unsafe')
+    return out
@@ -0,0 +1,249 @@
+"""
+Dataset preprocessado em fatias (shards) uint8 mapeadas em memória
+
+Substitui o despejo de X_preprocessed.npy em float32 (4x maior e carregado
+inteiro na RAM) por um diretório:
+
+    datasets/preprocessed/
+        index.json          versão, contagem, formato das imagens, fatias, classes
+        shard_00000.npy     pixels uint8 (n, H, W, 3)
+        shard_00001.npy     ...
+        labels.npy          labels int64 (N,) na ordem global
+        metadata.json       caminho de origem de cada imagem e metadados livres
+
+As fatias são abertas com np.load(mmap_mode='r'): o acesso aleatório lê só as
+páginas usadas e a normalização para float32 [0, 1] é feita por lote em
+get_batch/batches, então o dataset pode ser maior que a memória.
+"""
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+
+from dataset_ingestion import normalize_images
+
+SHARDS_VERSION = 1
+DEFAULT_SHARDS_DIR = os.path.join('datasets', 'preprocessed')
+DEFAULT_SHARD_SIZE = 1024  # 224x224x3 uint8: ~150 MB por fatia
+INDEX_FILE = 'index.json'
+LABELS_FILE = 'labels.npy'
+METADATA_FILE = 'metadata.json'
+
+
+def write_shards(out_dir, images, labels, class_names=None, sources=None, indices=None,
+                 shard_size=DEFAULT_SHARD_SIZE, metadata=None):
+    """
+    Grava um dataset em fatias uint8
+
+    Os dados são copiados fatia por fatia (images pode ser um memmap maior que
+    a memória). A gravação acontece em um diretório temporário que substitui
+    out_dir no final, e index.json é o último arquivo escrito.
+
+    Args:
+        out_dir: Diretório do dataset
+        images: Array uint8 (N, H, W, C), p.ex. o memmap de dataset_ingestion.ingest_images
+        labels: Labels alinhados com images
+        class_names: Nomes das classes/datasets
+        sources: Caminho de origem de cada imagem (alinhado com images)
+        indices: Linhas de images a gravar, em ordem (padrão: todas)
+        shard_size: Imagens por fatia
+        metadata: Dicionário extra salvo em metadata.json
+
+    Returns:
+        Caminho de out_dir
+    """
+    if images.dtype != np.uint8:
+        raise ValueError(f"As fatias guardam pixels uint8, recebido {images.dtype}")
+    indices = np.arange(len(images)) if indices is None else np.asarray(indices, dtype=np.int64)
+    labels = np.asarray(labels, dtype=np.int64)
+    shard_size = max(1, int(shard_size))
+
+    out_dir = os.path.normpath(out_dir)
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        shards = []
+        for offset in range(0, len(indices), shard_size):
+            rows = indices[offset:offset + shard_size]
+            name = f"shard_{len(shards):05d}.npy"
+            shard = np.lib.format.open_memmap(os.path.join(tmp_dir, name), mode='w+',
+                                              dtype=np.uint8, shape=(len(rows), *images.shape[1:]))
+            shard[:] = images[rows]
+            shard.flush()
+            del shard
+            shards.append({'file': name, 'offset': int(offset), 'count': int(len(rows))})
+
+        np.save(os.path.join(tmp_dir, LABELS_FILE), labels[indices])
+        with open(os.path.join(tmp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'sources': [str(sources[i]) for i in indices] if sources is not None else None,
+                **(metadata or {})
+            }, f, ensure_ascii=False)
+
+        index = {
+            'version': SHARDS_VERSION,
+            'count': int(len(indices)),
+            'image_shape': [int(d) for d in images.shape[1:]],
+            'dtype': 'uint8',
+            'shard_size': shard_size,
+            'shards': shards,
+            'class_names': list(class_names or []),
+            'labels_file': LABELS_FILE,
+            'metadata_file': METADATA_FILE,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        with open(os.path.join(tmp_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+
+        # Troca o dataset anterior pelo novo
+        old_dir = f"{out_dir}.old{os.getpid()}"
+        if os.path.exists(out_dir):
+            os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def shards_exist(directory=DEFAULT_SHARDS_DIR):
+    """Indica se o diretório contém um dataset em fatias completo"""
+    return os.path.exists(os.path.join(directory, INDEX_FILE))
+
+
+class ShardedDataset:
+    def __init__(self, directory=DEFAULT_SHARDS_DIR):
+        """
+        Abre um dataset gravado por write_shards (as fatias são mapeadas sob demanda)
+
+        Args:
+            directory: Diretório com index.json
+        """
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        if self.index.get('version') != SHARDS_VERSION:
+            raise ValueError(f"Versão de dataset não suportada: {self.index.get('version')}")
+
+        self.image_shape = tuple(self.index['image_shape'])
+        self.class_names = self.index['class_names']
+        self.labels = np.load(os.path.join(directory, self.index['labels_file']), mmap_mode='r')
+        self._shard_info = self.index['shards']
+        self._offsets = np.array([s['offset'] for s in self._shard_info], dtype=np.int64)
+        self._shards = [None] * len(self._shard_info)
+        self._metadata = None
+
+    def __len__(self):
+        return int(self.index['count'])
+
+    @property
+    def metadata(self):
+        """Conteúdo de metadata.json (origens das imagens), lido na primeira consulta"""
+        if self._metadata is None:
+            with open(os.path.join(self.directory, self.index['metadata_file']), 'r', encoding='utf-8') as f:
+                self._metadata = json.load(f)
+        return self._metadata
+
+    def _shard(self, shard_id):
+        shard = self._shards[shard_id]
+        if shard is None:
+            info = self._shard_info[shard_id]
+            shard = np.load(os.path.join(self.directory, info['file']), mmap_mode='r')
+            self._shards[shard_id] = shard
+        return shard
+
+    def _locate(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < -len(self) or indices.max() >= len(self)):
+            raise IndexError(f"Índice fora do dataset de {len(self)} imagens")
+        indices = np.where(indices < 0, indices + len(self), indices)
+        shard_ids = np.searchsorted(self._offsets, indices, side='right') - 1
+        return indices, shard_ids, indices - self._offsets[shard_ids]
+
+    def __getitem__(self, i):
+        """Imagem uint8 (H, W, C) como visão do memmap, sem cópia"""
+        _, shard_ids, local = self._locate([i])
+        return self._shard(int(shard_ids[0]))[int(local[0])]
+
+    def get_batch(self, indices, normalize=True, out=None):
+        """
+        Monta um lote a partir de índices globais
+
+        Args:
+            indices: Índices das imagens
+            normalize: True = float32 [0, 1]; False = uint8
+            out: Array de destino preexistente (reaproveitado entre lotes)
+
+        Returns:
+            (imagens (n, H, W, C), labels (n,))
+        """
+        indices, shard_ids, local = self._locate(indices)
+        dtype = np.float32 if normalize else np.uint8
+        if out is None:
+            out = np.empty((len(indices), *self.image_shape), dtype=dtype)
+        for i, (shard_id, row) in enumerate(zip(shard_ids, local)):
+            image = self._shard(int(shard_id))[int(row)]
+            if normalize:
+                normalize_images(image, out=out[i])
+            else:
+                out[i] = image
+        return out, np.asarray(self.labels[indices])
+
+    def batches(self, indices=None, batch_size=32, shuffle=False, seed=None, normalize=True, repeat=False):
+        """
+        Gera lotes (imagens, labels) normalizados sob demanda
+
+        Args:
+            indices: Subconjunto do dataset (p.ex. saída de split_indices); padrão: todo
+            batch_size: Imagens por lote
+            shuffle: Embaralha a ordem a cada época
+            seed: Semente do embaralhamento
+            normalize: float32 [0, 1] (True) ou uint8 (False)
+            repeat: Repete as épocas indefinidamente (para model.fit com steps_per_epoch)
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        while True:
+            order = rng.permutation(indices) if shuffle else indices
+            for start in range(0, len(order), batch_size):
+                yield self.get_batch(order[start:start + batch_size], normalize=normalize)
+            if not repeat:
+                return
+
+    def split_indices(self, test_size=0.2, val_size=0.2, seed=42, stratify=True):
+        """
+        Divide os índices em treino, validação e teste sem carregar imagens
+
+        Mesmas proporções de CancerImagePreprocessor.split_data (frações do total),
+        estratificadas por label.
+
+        Returns:
+            (train_idx, val_idx, test_idx), cada um em ordem crescente
+        """
+        return stratified_split(self.labels, test_size, val_size, seed, stratify)
+
+
+def stratified_split(labels, test_size=0.2, val_size=0.2, seed=42, stratify=True):
+    """
+    Divide posições 0..N-1 em treino, validação e teste (frações do total), por label
+
+    Returns:
+        (train_idx, val_idx, test_idx), cada um em ordem crescente
+    """
+    labels = np.asarray(labels)
+    rng = np.random.default_rng(seed)
+    groups = [np.nonzero(labels == label)[0] for label in np.unique(labels)] if stratify \
+        else [np.arange(len(labels))]
+
+    train, val, test = [], [], []
+    for group in groups:
+        group = rng.permutation(group)
+        n_test = int(round(len(group) * test_size))
+        n_val = int(round(len(group) * val_size))
+        test.append(group[:n_test])
+        val.append(group[n_test:n_test + n_val])
+        train.append(group[n_test + n_val:])
+    return tuple(np.sort(np.concatenate(part)).astype(np.int64) for part in (train, val, test))
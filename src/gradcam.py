@@ -0,0 +1,121 @@
+"""
+Mapas de ativação Grad-CAM / Grad-CAM++ para os modelos de diagnóstico
+
+Uma única passada com GradientTape devolve a probabilidade da classe e o mapa
+de ativação da última camada convolucional, então não é necessária uma segunda
+inferência para gerar o heatmap.
+
+O TensorFlow é importado ao criar o GradCAM (GRADCAM_METHODS não depende dele).
+"""
+import numpy as np
+
+GRADCAM_METHODS = ('gradcam', 'gradcam++')
+
+
+def find_last_conv_layer(model):
+    """Retorna a última camada Conv2D do modelo"""
+    import tensorflow as tf
+    for layer in reversed(model.layers):
+        if isinstance(layer, tf.keras.layers.Conv2D):
+            return layer
+    raise ValueError("Modelo não possui camada Conv2D para Grad-CAM")
+
+
+class GradCAM:
+    def __init__(self, model, layer_name=None, class_index=None):
+        """
+        Inicializa o gerador de Grad-CAM
+
+        Args:
+            model: Modelo Keras carregado (Sequential ou funcional)
+            layer_name: Camada convolucional alvo (padrão: a última Conv2D)
+            class_index: Saída usada como alvo (padrão: 0 para sigmoid, última classe para softmax)
+        """
+        import tensorflow as tf
+
+        self.model = model
+        self.layer = model.get_layer(layer_name) if layer_name else find_last_conv_layer(model)
+        self.input_shape = tuple(int(d) for d in model.input_shape[1:])
+
+        num_outputs = int(model.output_shape[-1])
+        if class_index is None:
+            # Sigmoid: única saída = tumor; softmax: [normal, tumor]
+            class_index = 0 if num_outputs == 1 else num_outputs - 1
+        self.class_index = class_index
+
+        self._is_sequential = isinstance(model, tf.keras.Sequential)
+        if not self._is_sequential:
+            self._grad_model = tf.keras.Model(model.inputs, [self.layer.output, model.output])
+
+        signature = [tf.TensorSpec(shape=(None, *self.input_shape), dtype=tf.float32)]
+        self._compute_fns = {
+            method: tf.function(
+                lambda x, m=method: self._compute_graph(x, m),
+                input_signature=signature
+            )
+            for method in GRADCAM_METHODS
+        }
+
+    def _forward(self, x):
+        """Executa o modelo retornando (ativações da camada alvo, saída)"""
+        if not self._is_sequential:
+            return self._grad_model(x, training=False)
+
+        activations = None
+        for layer in self.model.layers:
+            x = layer(x, training=False)
+            if layer is self.layer:
+                activations = x
+        return activations, x
+
+    def _compute_graph(self, x, method):
+        import tensorflow as tf
+        with tf.GradientTape() as tape:
+            activations, outputs = self._forward(x)
+            score = outputs[:, self.class_index]
+        grads = tape.gradient(score, activations)
+
+        if method == 'gradcam++':
+            # Aproximação de 2ª/3ª ordem usando potências do gradiente (Chattopadhyay et al.)
+            grads_2 = tf.square(grads)
+            grads_3 = grads_2 * grads
+            sum_activations = tf.reduce_sum(activations, axis=(1, 2), keepdims=True)
+            denominator = 2.0 * grads_2 + sum_activations * grads_3
+            denominator = tf.where(denominator != 0.0, denominator, tf.ones_like(denominator))
+            alphas = grads_2 / denominator
+            weights = tf.reduce_sum(alphas * tf.nn.relu(grads), axis=(1, 2))
+        else:
+            weights = tf.reduce_mean(grads, axis=(1, 2))
+
+        cam = tf.nn.relu(tf.einsum('nhwc,nc->nhw', activations, weights))
+
+        # Leva para a resolução de entrada e normaliza cada mapa para [0, 1] (depois
+        # do resize, que suaviza o pico, para o máximo ser sempre 255)
+        cam = tf.image.resize(cam[..., tf.newaxis], self.input_shape[:2], method='bilinear')[..., 0]
+        cam_max = tf.reduce_max(cam, axis=(1, 2), keepdims=True)
+        cam = tf.math.divide_no_nan(cam, cam_max)
+        maps = tf.cast(tf.round(tf.clip_by_value(cam, 0.0, 1.0) * 255.0), tf.uint8)
+        return outputs, maps
+
+    def compute(self, batch, method='gradcam'):
+        """
+        Calcula probabilidades e mapas de ativação em uma única passada
+
+        Args:
+            batch: Array (N, H, W, C) ou (H, W, C) em float32 [0, 1]
+            method: 'gradcam' ou 'gradcam++'
+
+        Returns:
+            probs: Array (N, saídas) com a saída do modelo
+            maps: Array uint8 (N, H, W) pronto para colorir/codificar em PNG
+        """
+        if method not in self._compute_fns:
+            raise ValueError(f"Método de mapa de ativação não suportado: {method}")
+
+        import tensorflow as tf
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+
+        outputs, maps = self._compute_fns[method](tf.convert_to_tensor(batch))
+        return outputs.numpy(), maps.numpy()
@@ -0,0 +1,135 @@
+"""
+Renderização rápida de mapas de ativação
+
+- Campos de distância dos focos simulados pré-calculados uma vez (broadcasting NumPy)
+- Colormap 'hot' como tabela de 256 cores aplicada por indexação inteira
+- Codificação PNG/WebP/raw com cache para mapas que se repetem
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+HEATMAP_SIZE = 128
+HEATMAP_FORMATS = ('png', 'webp', 'raw')
+
+# Focos do mapa simulado: (centro_x, centro_y)
+_PRIMARY_FOCUS = (64, 45)
+_SECONDARY_FOCUS = (50, 70)
+
+
+def _distance_field(center, size=HEATMAP_SIZE):
+    """Distância euclidiana de cada pixel [linha=y, coluna=x] até o centro"""
+    ys, xs = np.ogrid[:size, :size]
+    return np.sqrt((xs - center[0]) ** 2 + (ys - center[1]) ** 2).astype(np.float32)
+
+
+# Pré-calculados uma única vez no import
+_PRIMARY_DIST_SCALED = _distance_field(_PRIMARY_FOCUS) / 50.0
+_SECONDARY_DIST_SCALED = _distance_field(_SECONDARY_FOCUS) / 60.0
+_NORMAL_NOISE = np.random.default_rng(0).random((HEATMAP_SIZE, HEATMAP_SIZE), dtype=np.float32) * 0.2
+
+
+def _build_lut(name='hot'):
+    """Tabela (256, 3) uint8 RGB equivalente a plt.cm.<name> aplicado em índices 0-255"""
+    from matplotlib import colormaps
+    colormap = colormaps[name]
+    return (colormap(np.arange(256))[:, :3] * 255).astype(np.uint8)
+
+
+_LUT_RGB = None
+_LUT_BGR = None
+
+
+def get_colormap_lut():
+    """Retorna as tabelas (RGB, BGR) do colormap 'hot' no formato (256, 1, 3) do cv2.applyColorMap"""
+    global _LUT_RGB, _LUT_BGR
+    if _LUT_RGB is None:
+        lut = _build_lut('hot')
+        _LUT_RGB = np.ascontiguousarray(lut.reshape(256, 1, 3))
+        _LUT_BGR = np.ascontiguousarray(lut[:, ::-1].reshape(256, 1, 3))
+    return _LUT_RGB, _LUT_BGR
+
+
+def to_lut_indices(heatmap):
+    """
+    Converte um mapa float [0, 1] em índices uint8 da tabela de cores
+
+    Segue a mesma regra do matplotlib para floats: índice = int(x * 256), limitado a 255.
+    Mapas uint8 são retornados sem alteração.
+    """
+    if heatmap.dtype == np.uint8:
+        return heatmap
+    return np.clip(heatmap * 256.0, 0, 255).astype(np.uint8)
+
+
+def colorize(heatmap, bgr=False):
+    """Aplica o colormap 'hot' por indexação inteira na tabela, retornando (H, W, 3) uint8"""
+    lut_rgb, lut_bgr = get_colormap_lut()
+    return cv2.applyColorMap(to_lut_indices(heatmap), lut_bgr if bgr else lut_rgb)
+
+
+def encode_image(image_bgr, fmt='png'):
+    """
+    Codifica uma imagem BGR uint8
+
+    Args:
+        image_bgr: Array (H, W, 3) uint8 em ordem BGR
+        fmt: 'png' (compressão rápida), 'webp' (sem perdas) ou 'raw' (bytes RGB)
+    """
+    if fmt == 'raw':
+        return np.ascontiguousarray(image_bgr[..., ::-1]).tobytes()
+    if fmt == 'png':
+        ok, buffer = cv2.imencode('.png', image_bgr, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    elif fmt == 'webp':
+        ok, buffer = cv2.imencode('.webp', image_bgr, [cv2.IMWRITE_WEBP_QUALITY, 101])
+    else:
+        raise ValueError(f"Formato de heatmap não suportado: {fmt}")
+    if not ok:
+        raise RuntimeError(f"Falha ao codificar heatmap em {fmt}")
+    return buffer.tobytes()
+
+
+def render_heatmap(heatmap, fmt='png'):
+    """Colore e codifica um mapa (float [0, 1] ou uint8 0-255)"""
+    return encode_image(colorize(heatmap, bgr=True), fmt)
+
+
+def simulated_heatmap(tumor_prob, confidence):
+    """
+    Mapa de ativação simulado, vetorizado
+
+    Returns:
+        Array float32 (128, 128) normalizado em [0, 1]
+    """
+    if tumor_prob > 0.35:
+        # Foco principal (região central-superior)
+        heatmap = np.maximum(confidence - _PRIMARY_DIST_SCALED, 0.0)
+        # Foco secundário
+        if confidence > 0.7:
+            np.maximum(heatmap, confidence * 0.6 - _SECONDARY_DIST_SCALED, out=heatmap)
+    else:
+        # Normal - ativação baixa e dispersa (ruído fixo, para que o mapa possa ir para o cache)
+        heatmap = _NORMAL_NOISE.copy()
+
+    low, high = heatmap.min(), heatmap.max()
+    heatmap -= low
+    heatmap /= (high - low + 1e-8)
+    return heatmap
+
+
+@lru_cache(maxsize=512)
+def _render_simulated_cached(is_tumor, confidence, fmt):
+    tumor_prob = 1.0 if is_tumor else 0.0
+    return render_heatmap(simulated_heatmap(tumor_prob, confidence), fmt)
+
+
+def render_simulated_heatmap(tumor_prob, confidence, fmt='png'):
+    """
+    Mapa simulado já colorido e codificado, com cache
+
+    O mapa só depende do ramo (tumor/normal) e da confiança, arredondada para
+    4 casas decimais (diferença visualmente imperceptível).
+    """
+    is_tumor = tumor_prob > 0.35
+    return _render_simulated_cached(is_tumor, round(float(confidence), 4) if is_tumor else 0.0, fmt)
@@ -0,0 +1,187 @@
+"""
+Runtimes de inferência intercambiáveis para o CancerPredictor e a API
+
+Todos implementam InferenceBackend (src/inference_engine.py):
+
+    keras       InferenceEngine: modelo .h5 em uma tf.function de assinatura fixa
+    savedmodel  SavedModelEngine: diretório SavedModel exportado (sem código Keras)
+    tflite      TFLiteEngine: arquivo .tflite (faixa dinâmica ou INT8)
+    onnx        OnnxEngine: arquivo .onnx executado pelo ONNX Runtime (opcional)
+
+Os arquivos exportados (src/model_export.py) ficam ao lado do .h5, com nomes
+derivados dele, então a escolha do runtime é só um nome:
+
+    models/brain_cancer_final.h5 -> models/brain_cancer_final_savedmodel/
+                                    models/brain_cancer_final_dynamic.tflite
+                                    models/brain_cancer_final.onnx
+
+Importar este módulo não carrega o TensorFlow nem o ONNX Runtime: cada motor
+importa o seu runtime ao ser criado.
+"""
+import os
+
+import numpy as np
+
+from inference_engine import InferenceBackend, InferenceEngine
+from tflite_engine import TFLiteEngine
+
+
+class SavedModelEngine(InferenceBackend):
+    name = 'savedmodel'
+
+    def __init__(self, model_path, warmup=True, warmup_batch_sizes=(1,)):
+        """
+        Inicializa o motor SavedModel
+
+        Args:
+            model_path: Diretório exportado com a assinatura 'serve' (lote dinâmico)
+            warmup: Se deve executar o grafo no carregamento
+            warmup_batch_sizes: Tamanhos de lote usados no aquecimento
+        """
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self._module = tf.saved_model.load(model_path)
+        self._forward = self._module.serve
+        spec = self._forward.input_signature[0]
+        self.input_shape = tuple(int(d) for d in spec.shape[1:])
+
+        if warmup:
+            self.warmup(warmup_batch_sizes)
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        """Carrega um diretório SavedModel e cria o motor de inferência"""
+        return cls(model_path, **kwargs)
+
+    def predict(self, batch):
+        import tensorflow as tf
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        return np.asarray(self._forward(tf.convert_to_tensor(batch)), dtype=np.float32)
+
+
+class OnnxEngine(InferenceBackend):
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None, warmup=True, warmup_batch_sizes=(1,)):
+        """
+        Inicializa o motor ONNX Runtime (CPU)
+
+        Args:
+            model_path: Arquivo .onnx
+            num_threads: Threads intra-op da sessão (None = padrão do ONNX Runtime)
+            warmup: Se deve executar a sessão no carregamento
+            warmup_batch_sizes: Tamanhos de lote usados no aquecimento
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("Backend ONNX requer o pacote onnxruntime (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.model_path = model_path
+        self._session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.input_shape = tuple(int(d) for d in model_input.shape[1:])
+
+        if warmup:
+            self.warmup(warmup_batch_sizes)
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        """Carrega um arquivo .onnx e cria o motor de inferência"""
+        return cls(model_path, **kwargs)
+
+    def predict(self, batch):
+        # InferenceSession.run é seguro para chamadas concorrentes
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        return self._session.run(None, {self._input_name: np.ascontiguousarray(batch)})[0]
+
+
+BACKENDS = {
+    'keras': InferenceEngine,
+    'savedmodel': SavedModelEngine,
+    'tflite': TFLiteEngine,
+    'onnx': OnnxEngine
+}
+
+# Runtimes com número de threads próprio (keras e savedmodel seguem tf.config.threading)
+THREADED_BACKENDS = ('tflite', 'onnx')
+
+
+def detect_backend(model_path):
+    """Runtime pelo tipo do arquivo: .h5/.keras, diretório SavedModel, .tflite ou .onnx"""
+    if os.path.isdir(model_path):
+        if os.path.exists(os.path.join(model_path, 'saved_model.pb')):
+            return 'savedmodel'
+        raise ValueError(f"Diretório não é um SavedModel: {model_path}")
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension in ('.h5', '.keras'):
+        return 'keras'
+    if extension == '.tflite':
+        return 'tflite'
+    if extension == '.onnx':
+        return 'onnx'
+    raise ValueError(f"Formato de modelo não reconhecido: {model_path}")
+
+
+def exported_path(h5_path, backend, tflite_variant='dynamic'):
+    """Caminho do modelo exportado para o runtime, derivado do .h5 (ver model_export.py)"""
+    base = os.path.splitext(h5_path)[0]
+    if backend == 'keras':
+        return h5_path
+    if backend == 'savedmodel':
+        return f"{base}_savedmodel"
+    if backend == 'tflite':
+        return f"{base}_{tflite_variant}.tflite"
+    if backend == 'onnx':
+        return f"{base}.onnx"
+    raise ValueError(f"Backend de inferência desconhecido: {backend}")
+
+
+def resolve_model_path(model_path, backend=None):
+    """
+    Decide runtime e arquivo: sem backend, segue o tipo do arquivo; com backend
+    e um .h5, usa o modelo exportado correspondente
+
+    Returns:
+        (backend, caminho)
+    """
+    if backend is None:
+        return detect_backend(model_path), model_path
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferência desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    if backend != 'keras' and detect_backend(model_path) == 'keras':
+        model_path = exported_path(model_path, backend)
+    return backend, model_path
+
+
+def load_backend(model_path, backend=None, num_threads=None, **kwargs):
+    """
+    Carrega o modelo no runtime escolhido
+
+    Args:
+        model_path: .h5, diretório SavedModel, .tflite ou .onnx
+        backend: 'keras', 'savedmodel', 'tflite' ou 'onnx' (None = pelo tipo do arquivo)
+        num_threads: Threads do runtime (só tflite e onnx; nos demais vale a configuração do TensorFlow)
+        **kwargs: warmup, warmup_batch_sizes
+
+    Returns:
+        Instância de InferenceBackend
+    """
+    backend, model_path = resolve_model_path(model_path, backend)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"Modelo para o backend '{backend}' não encontrado: {model_path} "
+            f"(exporte com: python src/model_export.py --formats {backend})"
+        )
+    if backend in THREADED_BACKENDS and num_threads:
+        kwargs['num_threads'] = num_threads
+    return BACKENDS[backend].from_path(model_path, **kwargs)
@@ -0,0 +1,187 @@
+"""
+Motor de inferência compartilhado para os modelos .h5
+
+Envolve o modelo Keras carregado em uma tf.function com assinatura de entrada
+fixa (lote dinâmico), evitando o adaptador de dados e os callbacks que o
+model.predict monta a cada chamada. O grafo é rastreado e aquecido no carregamento.
+
+O TensorFlow só é importado quando um InferenceEngine é criado: as funções de
+TTA e a interface InferenceBackend ficam disponíveis sem o custo do import.
+"""
+import numpy as np
+
+# Transformações de Test-Time Augmentation sobre lotes NHWC (eixos espaciais 1 e 2)
+TTA_TRANSFORMS = {
+    'identity': lambda x: x,
+    'flip_h': lambda x: x[:, :, ::-1],
+    'flip_v': lambda x: x[:, ::-1],
+    'rot90': lambda x: np.rot90(x, 1, axes=(1, 2)),
+    'rot180': lambda x: np.rot90(x, 2, axes=(1, 2)),
+    'rot270': lambda x: np.rot90(x, 3, axes=(1, 2))
+}
+
+DEFAULT_TTA_TRANSFORMS = ('identity', 'flip_h', 'flip_v', 'rot90', 'rot180', 'rot270')
+
+TTA_AGGREGATIONS = {
+    'mean': np.mean,
+    'median': np.median,
+    'max': np.max
+}
+
+
+def build_tta_batch(batch, transforms=DEFAULT_TTA_TRANSFORMS):
+    """
+    Gera todas as variantes de TTA em um único tensor empilhado
+
+    Args:
+        batch: Array (N, H, W, C)
+        transforms: Nomes das transformações (chaves de TTA_TRANSFORMS)
+
+    Returns:
+        Array (T * N, H, W, C) ordenado por transformação
+    """
+    batch = np.asarray(batch, dtype=np.float32)
+    if batch.ndim == 3:
+        batch = batch[np.newaxis]
+
+    unknown = [t for t in transforms if t not in TTA_TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Transformações de TTA desconhecidas: {unknown}")
+
+    n = len(batch)
+    stacked = np.empty((len(transforms) * n, *batch.shape[1:]), dtype=np.float32)
+    for i, name in enumerate(transforms):
+        stacked[i * n:(i + 1) * n] = TTA_TRANSFORMS[name](batch)
+    return stacked
+
+
+def aggregate_tta(outputs, num_transforms, aggregation='mean'):
+    """
+    Agrega as predições das variantes de TTA
+
+    Args:
+        outputs: Array (T * N, saídas) retornado pelo modelo
+        num_transforms: Número T de transformações usadas
+        aggregation: 'mean', 'median' ou 'max'
+
+    Returns:
+        Array (N, saídas)
+    """
+    if aggregation not in TTA_AGGREGATIONS:
+        raise ValueError(f"Agregação de TTA não suportada: {aggregation}")
+    outputs = np.asarray(outputs)
+    grouped = outputs.reshape(num_transforms, -1, *outputs.shape[1:])
+    return TTA_AGGREGATIONS[aggregation](grouped, axis=0)
+
+
+class InferenceBackend:
+    """
+    Interface comum dos runtimes de inferência (Keras, SavedModel, TFLite, ONNX Runtime)
+
+    Subclasses definem `name`, `input_shape` e `predict(batch)`; predict_single,
+    predict_tta e warmup vêm daqui. Quem chama (CancerPredictor, MicroBatcher,
+    API) só usa esta interface, então trocar de runtime não muda as chamadas.
+    """
+    name = None
+    input_shape = None
+
+    def predict(self, batch):
+        """
+        Faz predição para um lote
+
+        Args:
+            batch: Array (N, H, W, C) em float32 [0, 1]
+
+        Returns:
+            Array numpy (N, saídas) em float32
+        """
+        raise NotImplementedError
+
+    def warmup(self, batch_sizes=(1,)):
+        """Executa o modelo com entradas nulas para evitar latência na primeira chamada"""
+        for size in batch_sizes:
+            self.predict(np.zeros((int(size), *self.input_shape), dtype=np.float32))
+
+    def predict_single(self, image):
+        """
+        Faz predição para uma única amostra
+
+        Args:
+            image: Array (H, W, C) ou (1, H, W, C)
+
+        Returns:
+            Array numpy (saídas,)
+        """
+        return self.predict(image)[0]
+
+    def predict_tta(self, batch, transforms=DEFAULT_TTA_TRANSFORMS, aggregation='mean'):
+        """
+        Faz predição com Test-Time Augmentation em uma única passada
+
+        Args:
+            batch: Array (N, H, W, C) ou (H, W, C)
+            transforms: Nomes das transformações (chaves de TTA_TRANSFORMS)
+            aggregation: 'mean', 'median' ou 'max'
+
+        Returns:
+            Array numpy (N, saídas) com as predições agregadas
+        """
+        stacked = build_tta_batch(batch, transforms)
+        return aggregate_tta(self.predict(stacked), len(transforms), aggregation)
+
+
+class InferenceEngine(InferenceBackend):
+    name = 'keras'
+
+    def __init__(self, model, warmup=True, warmup_batch_sizes=(1,)):
+        """
+        Inicializa o motor de inferência
+
+        Args:
+            model: Modelo Keras já carregado
+            warmup: Se deve rastrear e executar o grafo no carregamento
+            warmup_batch_sizes: Tamanhos de lote usados no aquecimento
+        """
+        import tensorflow as tf
+
+        self.model = model
+        self.input_shape = tuple(int(d) for d in model.input_shape[1:])
+
+        # Assinatura fixa: só o tamanho do lote varia, então o grafo é rastreado uma vez
+        signature = [tf.TensorSpec(shape=(None, *self.input_shape), dtype=tf.float32)]
+        self._forward = tf.function(self._call_model, input_signature=signature)
+
+        if warmup:
+            self.warmup(warmup_batch_sizes)
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        """Carrega um modelo .h5 e cria o motor de inferência"""
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model_path, compile=False)
+        return cls(model, **kwargs)
+
+    def _call_model(self, x):
+        return self.model(x, training=False)
+
+    def warmup(self, batch_sizes=(1,)):
+        """Executa o grafo com entradas nulas para evitar latência na primeira chamada"""
+        import tensorflow as tf
+        for size in batch_sizes:
+            self._forward(tf.zeros((int(size), *self.input_shape), dtype=tf.float32))
+
+    def predict(self, batch):
+        """
+        Faz predição para um lote
+
+        Args:
+            batch: Array (N, H, W, C) em float32 [0, 1]
+
+        Returns:
+            Array numpy (N, saídas)
+        """
+        import tensorflow as tf
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        return self._forward(tf.convert_to_tensor(batch)).numpy()
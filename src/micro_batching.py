@@ -0,0 +1,215 @@
+"""
+Agrupamento dinâmico de requisições (micro-batching) para inferência
+
+Coleta tensores preprocessados de várias requisições concorrentes durante
+uma janela curta (tamanho máximo de lote / espera máxima em ms), executa uma
+única passada do modelo e devolve a cada chamador a sua fatia do resultado.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+
+class _PendingItem:
+    """Item aguardando inferência na fila do agendador"""
+
+    __slots__ = ('batch', 'future', 'enqueued_at')
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0, max_queue_size=256):
+        """
+        Inicializa o agendador de micro-batching
+
+        Args:
+            predict_fn: Função que recebe um array (N, H, W, C) e retorna (N, ...)
+            max_batch_size: Número máximo de amostras por passada do modelo
+            max_wait_ms: Tempo máximo de espera por mais amostras após a primeira
+            max_queue_size: Limite de itens pendentes (0 = ilimitado)
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._carry = None  # Item que não coube no lote anterior
+        self._thread = None
+        self._running = False
+        self._state_lock = threading.Lock()  # start/stop vs. submit_async
+
+        # Estatísticas
+        self._stats_lock = threading.Lock()
+        self._total_items = 0
+        self._total_samples = 0
+        self._total_batches = 0
+        self._max_batch_seen = 0
+        self._last_batch_size = 0
+        self._total_wait = 0.0
+        self._errors = 0
+
+    def start(self):
+        """Inicia a thread de inferência"""
+        with self._state_lock:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._worker_loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Para a thread de inferência após esvaziar o lote atual"""
+        with self._state_lock:
+            if not self._running:
+                return
+            # Depois daqui nenhum item novo entra: o worker esvazia a fila e sai
+            self._running = False
+        self._queue.put(None)  # Sentinela para acordar o worker
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def submit_async(self, batch):
+        """
+        Enfileira um array (N, H, W, C) e retorna um Future com as N predições
+
+        Raises:
+            RuntimeError: Se o agendador não estiver rodando (ou já tiver sido parado)
+            queue.Full: Se a fila de pendentes estiver cheia
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+
+        item = _PendingItem(batch)
+        # Verificação e enfileiramento atômicos em relação a stop(): um item aceito
+        # sempre é processado ou falha na drenagem final do worker
+        with self._state_lock:
+            if not self._running:
+                raise RuntimeError("MicroBatcher não está rodando")
+            self._queue.put_nowait(item)
+        return item.future
+
+    def submit(self, batch, timeout=None):
+        """
+        Enfileira um array e bloqueia até a predição correspondente ficar pronta
+
+        Raises:
+            concurrent.futures.TimeoutError: Se a predição não ficar pronta em timeout segundos
+        """
+        future = self.submit_async(batch)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    def _next_item(self, timeout):
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        try:
+            return self._queue.get(timeout=timeout) if timeout is not None else self._queue.get()
+        except queue.Empty:
+            return None
+
+    def _collect_batch(self):
+        """Coleta itens até atingir o tamanho máximo ou estourar a janela de espera"""
+        first = self._next_item(timeout=None)
+        if first is None:
+            return []
+
+        items = [first]
+        samples = len(first.batch)
+        deadline = time.perf_counter() + self.max_wait
+
+        while samples < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            item = self._next_item(timeout=remaining)
+            if item is None:
+                break
+            if samples + len(item.batch) > self.max_batch_size:
+                # Não cabe neste lote: fica para o próximo
+                self._carry = item
+                break
+            items.append(item)
+            samples += len(item.batch)
+
+        return items
+
+    def _worker_loop(self):
+        while self._running or self._carry is not None:
+            items = self._collect_batch()
+            if not items:
+                continue
+            self._run_batch(items)
+
+        # Falha explícita para quem ainda estiver esperando
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item.future.set_running_or_notify_cancel():
+                item.future.set_exception(RuntimeError("MicroBatcher encerrado"))
+
+    def _run_batch(self, items):
+        # Itens cujo chamador desistiu (timeout em submit) não vão para o modelo
+        items = [item for item in items if item.future.set_running_or_notify_cancel()]
+        if not items:
+            return
+        started = time.perf_counter()
+        sizes = [len(item.batch) for item in items]
+
+        try:
+            stacked = items[0].batch if len(items) == 1 else np.concatenate([i.batch for i in items], axis=0)
+            outputs = np.asarray(self.predict_fn(stacked))
+        except Exception as e:
+            with self._stats_lock:
+                self._errors += 1
+            for item in items:
+                item.future.set_exception(e)
+            return
+
+        offset = 0
+        for item, size in zip(items, sizes):
+            item.future.set_result(outputs[offset:offset + size])
+            offset += size
+
+        batch_size = sum(sizes)
+        with self._stats_lock:
+            self._total_items += len(items)
+            self._total_samples += batch_size
+            self._total_batches += 1
+            self._last_batch_size = batch_size
+            self._max_batch_seen = max(self._max_batch_seen, batch_size)
+            self._total_wait += sum(started - item.enqueued_at for item in items)
+
+    def get_stats(self):
+        """Retorna estatísticas de fila e tamanho de lote"""
+        with self._stats_lock:
+            batches = self._total_batches
+            items = self._total_items
+            return {
+                'running': self._running,
+                'queue_depth': self._queue.qsize() + (1 if self._carry is not None else 0),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'total_requests': items,
+                'total_batches': batches,
+                'avg_batch_size': (self._total_samples / batches) if batches else 0.0,
+                'max_batch_size_seen': self._max_batch_seen,
+                'last_batch_size': self._last_batch_size,
+                'avg_queue_wait_ms': (self._total_wait / items * 1000.0) if items else 0.0,
+                'errors': self._errors
+            }
@@ -1,6 +1,8 @@
 """
 Arquiteturas de modelos CNN para diagnóstico de câncer multi-classe
 """
+from contextlib import contextmanager
+
 import tensorflow as tf
 from tensorflow.keras.models import Sequential, Model
 from tensorflow.keras.layers import (
@@ -11,15 +13,45 @@ from tensorflow.keras.applications import (
     VGG16, ResNet50, InceptionV3, EfficientNetB0
 )
 from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.mixed_precision import LossScaleOptimizer
 from tensorflow.keras.callbacks import (
     EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
 )
 import matplotlib.pyplot as plt
 
+# Políticas de precisão aceitas por precision_policy / config['precision']
+PRECISION_POLICIES = ('float32', 'mixed_float16', 'mixed_bfloat16')
+
+
+@contextmanager
+def precision_policy(name='float32'):
+    """
+    Constrói modelos com a política de precisão indicada e restaura a anterior
+
+    Com 'mixed_float16'/'mixed_bfloat16' as camadas calculam em 16 bits e
+    mantêm as variáveis em float32; as cabeças de saída dos modelos desta
+    classe são sempre float32 (sigmoid/softmax estáveis).
+    """
+    if name not in PRECISION_POLICIES:
+        raise ValueError(f"Precisão não suportada: {name} (use {', '.join(PRECISION_POLICIES)})")
+    previous = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy(name)
+    try:
+        yield
+    finally:
+        tf.keras.mixed_precision.set_global_policy(previous)
+
+
 class CancerCNNModels:
     def __init__(self, input_shape=(224, 224, 3), num_classes=2):
         self.input_shape = input_shape
         self.num_classes = num_classes
+    
+    def _output_layer(self):
+        """Camada de saída: 1 unidade sigmoid (binário) ou softmax, sempre em float32"""
+        if self.num_classes == 2:
+            return Dense(1, activation='sigmoid', dtype='float32')
+        return Dense(self.num_classes, activation='softmax', dtype='float32')
         
     def create_basic_cnn(self):
         """
@@ -52,7 +84,7 @@ class CancerCNNModels:
             Dropout(0.5),
             Dense(256, activation='relu'),
             Dropout(0.3),
-            Dense(self.num_classes, activation='softmax' if self.num_classes > 2 else 'sigmoid')
+            self._output_layer()
         ])
         
         return model
@@ -98,7 +130,7 @@ class CancerCNNModels:
             Dropout(0.5),
             Dense(512, activation='relu'),
             Dropout(0.3),
-            Dense(self.num_classes, activation='softmax' if self.num_classes > 2 else 'sigmoid')
+            self._output_layer()
         ])
         
         return model
@@ -156,7 +188,7 @@ class CancerCNNModels:
             Dropout(0.5),
             Dense(256, activation='relu'),
             Dropout(0.3),
-            Dense(self.num_classes, activation='softmax' if self.num_classes > 2 else 'sigmoid')
+            self._output_layer()
         ])
         
         return model
@@ -203,10 +235,10 @@ class CancerCNNModels:
         x = Dropout(0.3)(x)
         
         # Cabeças de classificação específicas para cada tipo de câncer
-        breast_output = Dense(2, activation='softmax', name='breast_cancer')(x)
-        skin_output = Dense(2, activation='softmax', name='skin_cancer')(x)
-        lung_output = Dense(2, activation='softmax', name='lung_cancer')(x)
-        brain_output = Dense(2, activation='softmax', name='brain_cancer')(x)
+        breast_output = Dense(2, activation='softmax', name='breast_cancer', dtype='float32')(x)
+        skin_output = Dense(2, activation='softmax', name='skin_cancer', dtype='float32')(x)
+        lung_output = Dense(2, activation='softmax', name='lung_cancer', dtype='float32')(x)
+        brain_output = Dense(2, activation='softmax', name='brain_cancer', dtype='float32')(x)
         
         # Criar modelo
         model = Model(
@@ -216,9 +248,16 @@ class CancerCNNModels:
         
         return model
     
-    def compile_model(self, model, learning_rate=0.001, loss_function=None):
+    def compile_model(self, model, learning_rate=0.001, loss_function=None, jit_compile='auto'):
         """
         Compila o modelo com otimizador e função de perda
+        
+        Args:
+            model: Modelo criado (dentro de precision_policy, se for treinar em precisão mista)
+            learning_rate: Taxa de aprendizado do Adam
+            loss_function: Perda personalizada (padrão: binária ou categórica)
+            jit_compile: True compila o passo de treino com XLA; 'auto' deixa a
+                decisão ao Keras (desligado em máquinas só com CPU)
         """
         
         # Definir função de perda baseada no número de classes
@@ -233,11 +272,18 @@ class CancerCNNModels:
             loss = loss_function
             metrics = ['accuracy']
         
+        # float16 precisa de escala dinâmica da perda (gradientes pequenos viram
+        # zero); bfloat16 tem o mesmo expoente do float32 e dispensa
+        optimizer = Adam(learning_rate=learning_rate)
+        if model.dtype_policy.name == 'mixed_float16':
+            optimizer = LossScaleOptimizer(optimizer)
+        
         # Compilar modelo
         model.compile(
-            optimizer=Adam(learning_rate=learning_rate),
+            optimizer=optimizer,
             loss=loss,
-            metrics=metrics
+            metrics=metrics,
+            jit_compile=jit_compile
         )
         
         return model
@@ -0,0 +1,155 @@
+"""
+Exporta os modelos .h5 para os demais runtimes (SavedModel, TFLite, ONNX)
+
+Os arquivos são gravados ao lado do .h5 com os nomes esperados por
+inference_backends.exported_path, e cada exportação é conferida contra o
+modelo Keras em um lote aleatório antes de ser considerada válida.
+
+Uso:
+    python src/model_export.py [models/brain_cancer_final.h5 ...]
+                               [--formats savedmodel tflite onnx] [--opset 17]
+"""
+import os
+import sys
+import glob
+import shutil
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from inference_engine import InferenceEngine
+from inference_backends import exported_path, load_backend
+from tflite_export import export_tflite
+
+EXPORT_FORMATS = ('savedmodel', 'tflite', 'onnx')
+
+# Diferença máxima aceita entre a exportação e o Keras (probabilidades em [0, 1])
+PARITY_TOLERANCE = {
+    'savedmodel': 1e-5,
+    'tflite': 2e-2,  # faixa dinâmica: pesos quantizados
+    'onnx': 1e-4
+}
+
+
+def serving_function(model):
+    """tf.function com lote dinâmico e a mesma assinatura do InferenceEngine"""
+    input_shape = tuple(int(d) for d in model.input_shape[1:])
+    spec = tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32, name='input')
+    return tf.function(lambda x: model(x, training=False), input_signature=[spec]), spec
+
+
+def export_savedmodel(model, path):
+    """Diretório SavedModel com a assinatura 'serve' (carregável sem o código do modelo)"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    module = tf.Module()
+    module.model = model
+    module.serve, _ = serving_function(model)
+    tf.saved_model.save(module, path, signatures={'serving_default': module.serve})
+    return path
+
+
+def export_onnx(model, path, opset=17):
+    """Arquivo .onnx via tf2onnx (convertido a partir da tf.function, compatível com Keras 3)"""
+    try:
+        import tf2onnx
+    except ImportError:
+        raise ImportError("Exportação ONNX requer o pacote tf2onnx (pip install tf2onnx)")
+    forward, spec = serving_function(model)
+    tf2onnx.convert.from_function(forward, input_signature=[spec], opset=opset, output_path=path)
+    return path
+
+
+def _staging_path(path):
+    """Caminho temporário ao lado do destino, com a mesma extensão (p.ex. x.partial.tflite)"""
+    head, tail = os.path.split(path)
+    stem, ext = os.path.splitext(tail)
+    return os.path.join(head, f"{stem}.partial{ext}")
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def export_model(h5_path, formats=EXPORT_FORMATS, opset=17, check=True):
+    """
+    Exporta um .h5 para os formatos pedidos
+
+    Cada exportação é gravada em um caminho temporário e só vai para
+    exported_path depois de passar na conferência; se falhar, a exportação
+    anterior (que não corresponde mais ao .h5) também é removida, para o
+    servidor nunca carregar um modelo divergente.
+
+    Returns:
+        Dicionário {formato: caminho} das exportações bem-sucedidas
+    """
+    model = tf.keras.models.load_model(h5_path, compile=False)
+    sample = np.random.default_rng(0).random((4, *model.input_shape[1:]), dtype=np.float32)
+    reference = InferenceEngine(model, warmup=False).predict(sample) if check else None
+
+    exported = {}
+    for fmt in formats:
+        path = exported_path(h5_path, fmt)
+        staging = _staging_path(path)
+        _remove(staging)
+        try:
+            if fmt == 'savedmodel':
+                export_savedmodel(model, staging)
+            elif fmt == 'tflite':
+                with open(staging, 'wb') as f:
+                    f.write(export_tflite(model, 'dynamic'))
+            elif fmt == 'onnx':
+                export_onnx(model, staging, opset)
+            else:
+                raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+            message = ''
+            if check:
+                result = load_backend(staging, fmt, warmup=False).predict(sample)
+                diff = float(np.abs(result - reference).max())
+                if diff > PARITY_TOLERANCE[fmt]:
+                    raise ValueError(f"diverge do Keras (dif. máx. {diff:.2e})")
+                message = f" (dif. máx. vs Keras {diff:.1e})"
+        except Exception as e:
+            _remove(staging)
+            if os.path.exists(path):
+                _remove(path)
+                print(f"   🗑️ {fmt}: exportação anterior removida ({path})")
+            print(f"   ❌ {fmt}: {e}")
+            continue
+
+        _remove(path)
+        os.replace(staging, path)
+        print(f"   ✅ {fmt}: {path}{message}")
+        exported[fmt] = path
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta modelos .h5 para SavedModel, TFLite e ONNX")
+    parser.add_argument('models', nargs='*', help="Modelos .h5 (padrão: todos em models/)")
+    parser.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=list(EXPORT_FORMATS))
+    parser.add_argument('--opset', type=int, default=17)
+    args = parser.parse_args()
+
+    model_paths = args.models or sorted(glob.glob(os.path.join('models', '*.h5')))
+    if not model_paths:
+        print("❌ Nenhum modelo .h5 encontrado em models/")
+        sys.exit(1)
+
+    print("📦 EXPORTAÇÃO DE MODELOS")
+    print("=" * 50)
+    failed = False
+    for h5_path in model_paths:
+        print(f"\n🔄 {h5_path}")
+        exported = export_model(h5_path, args.formats, args.opset)
+        failed = failed or len(exported) < len(args.formats)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Preprocessamento canônico das ressonâncias (servidor, GUI e scripts)
+
+Mesma cadeia usada desde o início do projeto:
+    corta 10% das bordas -> escala de cinza -> CLAHE -> [0, 1] -> 3 canais -> resize
+
+mas em um kernel único e sem alocações desnecessárias:
+- o corte é uma view (sem cópia)
+- um objeto CLAHE por thread, reaproveitado entre chamadas
+- o resize acontece em uint8 e em um único canal (antes: 3 canais float32 idênticos)
+- a conversão para float e a replicação dos canais são escritas direto no buffer de saída
+  (que pode ser preallocado pelo chamador, inclusive uma fatia de um lote maior)
+
+Diferença para a cadeia antiga: o resize em uint8 arredonda para o nível de cinza
+mais próximo, então cada pixel pode diferir em até 1/255 (ver test_mri_preprocessing.py).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+DEFAULT_TARGET_SIZE = (128, 128)
+CROP_MARGIN = 0.10
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+JPEG_MAGIC = b'\xff\xd8'
+
+# Decodificação em lote: o OpenCV libera o GIL, então threads escalam com os núcleos
+DEFAULT_BATCH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Parâmetros que definem a saída (usados p.ex. na chave do cache de predições da API)
+PREPROCESS_CONFIG = {
+    'target_size': DEFAULT_TARGET_SIZE,
+    'crop_margin': CROP_MARGIN,
+    'clahe_clip_limit': CLAHE_CLIP_LIMIT,
+    'clahe_tile_grid': CLAHE_TILE_GRID,
+    'resize': 'uint8-linear'
+}
+
+_local = threading.local()
+
+
+def get_clahe(clip_limit=CLAHE_CLIP_LIMIT, tile_grid=CLAHE_TILE_GRID):
+    """Objeto CLAHE da thread atual (cv2.CLAHE não é seguro para uso concorrente)"""
+    cache = getattr(_local, 'clahe', None)
+    if cache is None:
+        cache = _local.clahe = {}
+    key = (float(clip_limit), tuple(tile_grid))
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid))
+    return clahe
+
+
+def _scratch(name, shape):
+    """Buffer uint8 reaproveitado por thread (realocado só quando o tamanho muda)"""
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = buffers[name] = np.empty(shape, dtype=np.uint8)
+    return buf
+
+
+def decode_image(data, grayscale=True):
+    """
+    Decodifica bytes de imagem (JPEG/PNG/...) com OpenCV, ignorando a orientação EXIF
+
+    Com grayscale=True, JPEGs são decodificados direto em um canal (só a
+    luminância, bem mais rápido que decodificar RGB e converter depois). Nos
+    demais formatos a conversão interna do decodificador arredonda diferente
+    do cv2.cvtColor, então decodifica em cores e converte como antes.
+
+    Raises:
+        ValueError: Se os bytes não forem uma imagem válida
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    direct_gray = grayscale and bytes(data[:2]) == JPEG_MAGIC
+    flags = (cv2.IMREAD_GRAYSCALE if direct_gray else cv2.IMREAD_COLOR) | cv2.IMREAD_IGNORE_ORIENTATION
+    image = cv2.imdecode(buffer, flags)
+    if image is None:
+        raise ValueError("Não foi possível decodificar a imagem")
+    if direct_gray:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if grayscale else cv2.COLOR_BGR2RGB)
+
+
+def crop_box(height, width):
+    """
+    Região da imagem que o modelo vê: (topo, base, esquerda, direita) sem as margens de CROP_MARGIN
+
+    Mapas de ativação (Grad-CAM) correspondem a esta região, não ao quadro inteiro.
+    """
+    margin_h = int(height * CROP_MARGIN)
+    margin_w = int(width * CROP_MARGIN)
+    return margin_h, height - margin_h, margin_w, width - margin_w
+
+
+def preprocess_mri(image, target_size=DEFAULT_TARGET_SIZE, out=None, dtype=np.float32):
+    """
+    Preprocessa uma ressonância para o modelo
+
+    Args:
+        image: Array uint8 (H, W, 3) RGB ou (H, W) em escala de cinza
+        target_size: (largura, altura) da saída, como no cv2.resize
+        out: Buffer de saída opcional (H, W, 3) ou (1, H, W, 3); p.ex. batch[i]
+        dtype: np.float32 (valores em [0, 1]) ou np.uint8 (valores 0-255)
+
+    Returns:
+        Array (1, H, W, 3) se out não for informado; senão, o próprio out
+    """
+    width, height = target_size
+    if out is None:
+        out = np.empty((1, height, width, 3), dtype=dtype)
+    target = out[0] if out.ndim == 4 else out
+
+    # 1. Corta 10% das bordas (view, sem cópia)
+    top, bottom, left, right = crop_box(*image.shape[:2])
+    cropped = image[top:bottom, left:right]
+
+    # 2. Escala de cinza
+    if cropped.ndim == 3:
+        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY, dst=_scratch('gray', cropped.shape[:2]))
+    else:
+        gray = cropped
+
+    # 3. CLAHE (objeto da thread, saída em buffer reaproveitado)
+    try:
+        equalized = get_clahe().apply(gray, _scratch('equalized', gray.shape))
+    except cv2.error:
+        equalized = cv2.equalizeHist(gray)
+
+    # 4. Resize em uint8, um canal só
+    resized = cv2.resize(equalized, (width, height), dst=_scratch('resized', (height, width)))
+
+    # 5. Escala para [0, 1] direto no canal 0 da saída e replica nos outros dois
+    if target.dtype == np.uint8:
+        target[..., 0] = resized
+    else:
+        np.multiply(resized, np.float32(1.0 / 255.0), out=target[..., 0], casting='unsafe')
+    target[..., 1] = target[..., 0]
+    target[..., 2] = target[..., 0]
+    return out
+
+
+def preprocess_mri_bytes(data, target_size=DEFAULT_TARGET_SIZE, out=None, dtype=np.float32):
+    """Decodifica (direto em escala de cinza) e preprocessa bytes de uma imagem enviada"""
+    return preprocess_mri(decode_image(data, grayscale=True), target_size, out, dtype)
+
+
+def read_source(source):
+    """Bytes de uma imagem: o próprio buffer (bytes/bytearray/memoryview) ou o conteúdo do caminho"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def preprocess_batch(sources, target_size=DEFAULT_TARGET_SIZE, dtype=np.float32,
+                     workers=None, item_fn=None, out=None):
+    """
+    Preprocessa N imagens em paralelo direto em um único lote NHWC contíguo
+
+    Cada item é lido, decodificado e escrito na própria fatia out[i] por um pool
+    de threads; o lote resultante vai inteiro para uma única chamada ao modelo.
+    Falhas não interrompem o lote: a fatia fica zerada e o erro é devolvido à parte.
+
+    Args:
+        sources: Caminhos de arquivo e/ou buffers de bytes
+        target_size: (largura, altura) de cada imagem no lote
+        dtype: np.float32 ([0, 1]) ou np.uint8 (0-255)
+        workers: Threads de decodificação (padrão: DEFAULT_BATCH_WORKERS)
+        item_fn: Função (bytes, fatia) que preenche a fatia (padrão: preprocess_mri_bytes)
+        out: Lote preallocado (N, H, W, 3) opcional
+
+    Returns:
+        (lote, erros): lote (N, H, W, 3) e dicionário {índice: mensagem} dos itens que falharam
+    """
+    width, height = target_size
+    n = len(sources)
+    if out is None:
+        out = np.zeros((n, height, width, 3), dtype=dtype)
+    if item_fn is None:
+        def item_fn(data, slot):
+            preprocess_mri_bytes(data, target_size, out=slot)
+
+    def run(i):
+        try:
+            item_fn(read_source(sources[i]), out[i])
+            return i, None
+        except Exception as e:
+            out[i] = 0
+            return i, str(e) or e.__class__.__name__
+
+    workers = min(workers or DEFAULT_BATCH_WORKERS, n)
+    if workers <= 1:
+        results = [run(i) for i in range(n)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='preprocess') as pool:
+            results = list(pool.map(run, range(n)))
+
+    errors = {i: message for i, message in results if message is not None}
+    return out, errors
@@ -0,0 +1,101 @@
+"""
+Inferência em lote distribuída entre processos (reprocessamento de acervos grandes)
+
+Uma sessão do TensorFlow em um processo não aproveita bem máquinas com muitos
+núcleos (decodificação, preprocessamento e partes do grafo ficam serializadas).
+Aqui a lista de arquivos é dividida em fatias entregues a N processos:
+
+- cada processo ajusta as próprias threads intra/inter-op antes de iniciar o
+  runtime do TensorFlow e carrega o modelo uma única vez (initializer do pool,
+  via load_worker_predictor)
+- os processos são criados com 'spawn' (o runtime do TensorFlow não sobrevive a fork)
+- cada fatia volta com seu índice e os resultados são remontados na ordem de entrada
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_CHUNK_SIZE = 64
+
+# Preditor carregado no processo worker (um por processo)
+_worker_predictor = None
+
+
+def default_threads_per_process(processes):
+    """Divide os núcleos da máquina entre os processos (mínimo 1 thread cada)"""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def load_worker_predictor(model_path, img_size, backend, intra_op_threads, inter_op_threads):
+    """Preditor padrão dos workers: threads do TensorFlow e CancerPredictor com o modelo carregado"""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    from predict import CancerPredictor
+    predictor = CancerPredictor(backend=backend)
+    predictor.img_size = tuple(img_size)
+    if not predictor.load_model(model_path):
+        raise RuntimeError(f"Worker {os.getpid()} não conseguiu carregar o modelo: {model_path}")
+    return predictor
+
+
+def _init_worker(predictor_factory, *args):
+    """Initializer do pool: cria o preditor uma vez por processo"""
+    global _worker_predictor
+    _worker_predictor = predictor_factory(*args)
+
+
+def _predict_chunk(index, paths, decode_workers):
+    """Executado no worker: prediz uma fatia e devolve (índice, resultados)"""
+    return index, _worker_predictor.predict_paths(paths, workers=decode_workers)
+
+
+def predict_parallel(model_path, image_paths, processes=None, img_size=(224, 224), backend=None,
+                     threads_per_process=None, inter_op_threads=1, decode_workers=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE, predictor_factory=load_worker_predictor):
+    """
+    Prediz uma lista de imagens distribuindo fatias entre processos
+
+    Args:
+        model_path: Modelo .h5 carregado por cada processo
+        image_paths: Caminhos das imagens (os workers leem os arquivos diretamente)
+        processes: Número de processos (padrão: núcleos da máquina)
+        img_size: Tamanho de entrada do CancerPredictor
+        backend: Runtime de inferência de cada processo (ver inference_backends.py)
+        threads_per_process: Threads intra-op por processo (padrão: núcleos / processos)
+        inter_op_threads: Threads inter-op por processo
+        decode_workers: Threads de decodificação por processo (padrão: threads_per_process)
+        chunk_size: Imagens por fatia (fatias menores equilibram melhor a carga)
+        predictor_factory: Cria o preditor de cada processo com os mesmos argumentos de
+            load_worker_predictor; precisa ser importável pelos processos 'spawn'
+
+    Returns:
+        Lista de resultados na ordem de image_paths (mesmo formato de CancerPredictor.predict_paths)
+    """
+    image_paths = list(image_paths)
+    if not image_paths:
+        return []
+
+    processes = max(1, int(processes or os.cpu_count() or 1))
+    threads_per_process = threads_per_process or default_threads_per_process(processes)
+    decode_workers = decode_workers or threads_per_process
+    chunks = [image_paths[i:i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+    processes = min(processes, len(chunks))
+
+    results = [None] * len(chunks)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(predictor_factory, model_path, tuple(img_size), backend,
+                  threads_per_process, inter_op_threads)
+    ) as pool:
+        futures = [pool.submit(_predict_chunk, i, chunk, decode_workers) for i, chunk in enumerate(chunks)]
+        for future in as_completed(futures):
+            index, chunk_results = future.result()
+            results[index] = chunk_results
+
+    return [result for chunk_results in results for result in chunk_results]
@@ -1,28 +1,41 @@
 """
 Interface para fazer predições com modelos de diagnóstico de câncer
+
+TensorFlow e matplotlib são importados só quando usados (ao carregar o modelo
+e ao visualizar), então o menu abre sem esperar por eles.
 """
 import os
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
-from tensorflow.keras.models import load_model
-from PIL import Image
+from inference_engine import DEFAULT_TTA_TRANSFORMS
+from inference_backends import load_backend
+from mri_preprocessing import preprocess_batch
+from batch_predict import run_batch_prediction
+from parallel_predict import predict_parallel
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 
 class CancerPredictor:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend=None):
         """
         Inicializa o preditor de câncer
         
         Args:
             model_path: Caminho para o modelo treinado
+            backend: Runtime de inferência ('keras', 'savedmodel', 'tflite', 'onnx');
+                None segue o tipo do arquivo (ver inference_backends.py)
         """
         self.model = None
+        self.engine = None
         self.model_path = model_path
+        self.backend = backend
         self.img_size = (224, 224)
         
+        # Test-Time Augmentation (usado quando predict_single_image(tta=True))
+        self.tta_transforms = DEFAULT_TTA_TRANSFORMS
+        self.tta_aggregation = 'mean'
+        
         # Mapeamento de classes
         self.class_names = {
             0: 'Benigno',
@@ -40,17 +53,44 @@ class CancerPredictor:
         if model_path:
             self.load_model(model_path)
     
-    def load_model(self, model_path):
-        """Carrega modelo treinado"""
+    def load_model(self, model_path, backend=None):
+        """
+        Carrega modelo treinado
+        
+        Args:
+            model_path: .h5, diretório SavedModel, .tflite ou .onnx
+            backend: Runtime de inferência; com um .h5 e backend diferente de
+                'keras', usa o modelo exportado ao lado dele (model_export.py)
+        """
         try:
-            self.model = load_model(model_path)
+            backend = backend or self.backend
+            self.engine = load_backend(model_path, backend)
+            self.model = getattr(self.engine, 'model', None)
             self.model_path = model_path
-            print(f"✅ Modelo carregado: {model_path}")
+            self.backend = backend
+            print(f"✅ Modelo carregado: {model_path} ({self.engine.name})")
             return True
         except Exception as e:
             print(f"❌ Erro ao carregar modelo: {e}")
             return False
     
+    def _resize_normalize(self, img, out):
+        """Converte BGR para RGB, redimensiona e normaliza para [0, 1] direto em out (H, W, 3)"""
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+        elif img.shape[2] == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        img = cv2.resize(img, self.img_size)
+        np.divide(img, np.float32(255.0), out=out, casting='unsafe')
+        return out
+    
+    def _preprocess_bytes_into(self, data, out):
+        """Decodifica bytes de imagem e escreve o resultado preprocessado em out (uma fatia do lote)"""
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Não foi possível decodificar a imagem")
+        self._resize_normalize(img, out)
+    
     def preprocess_image(self, image_path):
         """
         Pré-processa imagem para predição
@@ -71,37 +111,65 @@ class CancerPredictor:
                 # Se já é um array numpy
                 img = image_path
             
-            # Converter BGR para RGB
-            if len(img.shape) == 3 and img.shape[2] == 3:
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            
-            # Redimensionar
-            img = cv2.resize(img, self.img_size)
-            
-            # Normalizar
-            img = img.astype(np.float32) / 255.0
-            
-            # Expandir dimensões para batch
-            img = np.expand_dims(img, axis=0)
-            
-            return img
+            # RGB, redimensionar e normalizar em um lote de 1
+            batch = np.empty((1, self.img_size[1], self.img_size[0], 3), dtype=np.float32)
+            self._resize_normalize(img, batch[0])
+            return batch
             
         except Exception as e:
             print(f"❌ Erro ao preprocessar imagem: {e}")
             return None
     
-    def predict_single_image(self, image_path, show_confidence=True):
+    def preprocess_batch(self, sources, workers=None):
+        """
+        Pré-processa várias imagens em paralelo em um único lote (N, H, W, 3)
+        
+        Args:
+            sources: Caminhos e/ou bytes das imagens
+            workers: Threads de decodificação (padrão do mri_preprocessing)
+            
+        Returns:
+            (lote, erros): erros é um dicionário {índice: mensagem}; a fatia de um item com erro fica zerada
+        """
+        return preprocess_batch(
+            sources, target_size=self.img_size, workers=workers, item_fn=self._preprocess_bytes_into
+        )
+    
+    def _interpret_prediction(self, prediction):
+        """Converte a saída do modelo para uma amostra em classe, confiança e probabilidade"""
+        prediction = np.atleast_1d(prediction)
+        if prediction.shape[0] == 1:
+            # Classificação binária
+            probability = float(prediction[0])
+            predicted_class = 1 if probability > 0.5 else 0
+            confidence = probability if probability > 0.5 else 1 - probability
+        else:
+            # Classificação multi-classe
+            predicted_class = int(np.argmax(prediction))
+            confidence = float(np.max(prediction))
+            probability = float(prediction[predicted_class])
+        
+        return {
+            "predicted_class": predicted_class,
+            "class_name": self.class_names.get(predicted_class, f"Classe {predicted_class}"),
+            "confidence": confidence,
+            "probability": probability,
+            "raw_prediction": prediction.tolist()
+        }
+    
+    def predict_single_image(self, image_path, show_confidence=True, tta=False):
         """
         Faz predição para uma única imagem
         
         Args:
             image_path: Caminho para a imagem
             show_confidence: Se deve mostrar a confiança da predição
+            tta: Se deve usar Test-Time Augmentation (todas as variantes em um único lote)
             
         Returns:
             Dicionário com resultado da predição
         """
-        if self.model is None:
+        if self.engine is None:
             return {"error": "Modelo não carregado"}
         
         # Preprocessar imagem
@@ -111,28 +179,16 @@ class CancerPredictor:
         
         try:
             # Fazer predição
-            prediction = self.model.predict(img, verbose=0)
-            
-            # Interpretar resultado
-            if len(prediction.shape) == 1 or prediction.shape[1] == 1:
-                # Classificação binária
-                probability = float(prediction[0][0]) if len(prediction.shape) > 1 else float(prediction[0])
-                predicted_class = 1 if probability > 0.5 else 0
-                confidence = probability if probability > 0.5 else 1 - probability
+            if tta:
+                prediction = self.engine.predict_tta(
+                    img, transforms=self.tta_transforms, aggregation=self.tta_aggregation
+                )
             else:
-                # Classificação multi-classe
-                predicted_class = int(np.argmax(prediction[0]))
-                confidence = float(np.max(prediction[0]))
-                probability = float(prediction[0][predicted_class])
+                prediction = self.engine.predict(img)
             
-            # Preparar resultado
-            result = {
-                "predicted_class": predicted_class,
-                "class_name": self.class_names.get(predicted_class, f"Classe {predicted_class}"),
-                "confidence": confidence,
-                "probability": probability,
-                "raw_prediction": prediction[0].tolist()
-            }
+            # Interpretar resultado
+            result = self._interpret_prediction(prediction[0])
+            confidence = result["confidence"]
             
             if show_confidence:
                 print(f"🔍 Predição: {result['class_name']}")
@@ -143,31 +199,93 @@ class CancerPredictor:
         except Exception as e:
             return {"error": f"Erro na predição: {str(e)}"}
     
-    def predict_batch(self, image_paths, save_results=True):
+    def predict_paths(self, image_paths, workers=None, names=None, preprocessed=None):
+        """
+        Predição em lote sem saída no console: um lote contíguo, uma chamada ao modelo
+        
+        Args:
+            image_paths: Lista de caminhos (ou bytes) das imagens
+            workers: Threads de decodificação (padrão do mri_preprocessing)
+            names: Nomes das imagens na mesma ordem (para bytes; caminhos usam o nome do arquivo)
+            preprocessed: (lote, erros) já devolvido por preprocess_batch(image_paths), para
+                quem decodifica o próximo lote enquanto este está no modelo
+            
+        Returns:
+            Lista de resultados na ordem de image_paths (itens com falha trazem "error");
+            "image_path" só aparece para caminhos e "image_name" para caminhos ou nomes informados
+        """
+        if names is not None and len(names) != len(image_paths):
+            raise ValueError(f"names tem {len(names)} itens para {len(image_paths)} imagens")
+        
+        if preprocessed is None:
+            preprocessed = self.preprocess_batch(image_paths, workers=workers)
+        batch, errors = preprocessed
+        errors = dict(errors)
+        valid = [i for i in range(len(image_paths)) if i not in errors]
+        
+        predictions = {}
+        if valid:
+            try:
+                # Uma única passada do modelo (sem cópia quando todas as imagens são válidas)
+                outputs = self.engine.predict(batch if not errors else batch[valid])
+                predictions = dict(zip(valid, outputs))
+            except Exception as e:
+                errors.update({i: f"Erro na predição: {str(e)}" for i in valid})
+        
+        results = []
+        for i, img_path in enumerate(image_paths):
+            if i in predictions:
+                result = self._interpret_prediction(predictions[i])
+            else:
+                result = {"error": errors[i]}
+            if names is not None:
+                result["image_name"] = names[i]
+            if isinstance(img_path, (str, os.PathLike)):
+                result["image_path"] = img_path
+                result.setdefault("image_name", os.path.basename(img_path))
+            results.append(result)
+        return results
+    
+    def predict_batch(self, image_paths, save_results=True, workers=None, processes=1,
+                      threads_per_process=None):
         """
         Faz predição para múltiplas imagens
         
+        As imagens são decodificadas em paralelo direto em um lote contíguo
+        e o modelo é chamado uma única vez para todas as válidas.
+        Com processes > 1, a lista é dividida entre processos que carregam
+        o modelo uma vez cada (ver parallel_predict.py).
+        
         Args:
             image_paths: Lista de caminhos para imagens
             save_results: Se deve salvar resultados em arquivo
+            workers: Threads de decodificação (padrão do mri_preprocessing)
+            processes: Processos de inferência (1 = neste processo)
+            threads_per_process: Threads intra-op do TensorFlow por processo (padrão: núcleos / processos)
             
         Returns:
-            Lista com resultados das predições
+            Lista com resultados das predições (na ordem de image_paths)
         """
-        if self.model is None:
+        if self.engine is None:
             print("❌ Modelo não carregado")
             return []
         
-        results = []
         print(f"🔄 Processando {len(image_paths)} imagens...")
         
-        for i, img_path in enumerate(image_paths):
-            print(f"   {i+1}/{len(image_paths)}: {os.path.basename(img_path)}")
-            
-            result = self.predict_single_image(img_path, show_confidence=False)
-            result["image_path"] = img_path
-            result["image_name"] = os.path.basename(img_path)
-            results.append(result)
+        if processes > 1:
+            results = predict_parallel(
+                self.model_path, image_paths, processes=processes, img_size=self.img_size,
+                backend=self.backend,
+                threads_per_process=threads_per_process, decode_workers=workers
+            )
+        else:
+            results = self.predict_paths(image_paths, workers=workers)
+        
+        for result in results:
+            if "error" in result:
+                print(f"   ⚠️ {result['image_name']}: {result['error']}")
+        analyzed = sum(1 for result in results if "error" not in result)
+        print(f"✅ {analyzed}/{len(image_paths)} imagens analisadas")
         
         if save_results:
             self.save_batch_results(results)
@@ -219,6 +337,7 @@ class CancerPredictor:
         
         # Carregar e exibir imagem
         try:
+            import matplotlib.pyplot as plt
             img = cv2.imread(image_path)
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             
@@ -310,7 +429,7 @@ class CancerPredictor:
                 """Atualiza lista de modelos disponíveis"""
                 models_dir = "models"
                 if os.path.exists(models_dir):
-                    model_files = [f for f in os.listdir(models_dir) if f.endswith('.h5')]
+                    model_files = [f for f in os.listdir(models_dir) if f.endswith(('.h5', '.tflite', '.onnx'))]
                     self.model_combo['values'] = model_files
                     if model_files:
                         self.model_combo.set(model_files[0])
@@ -344,7 +463,7 @@ class CancerPredictor:
             
             def predict_image(self):
                 """Faz predição da imagem selecionada"""
-                if self.predictor.model is None:
+                if self.predictor.engine is None:
                     messagebox.showerror("Erro", "Carregue um modelo primeiro")
                     return
                 
@@ -403,7 +522,7 @@ def main():
         print("Execute primeiro o treinamento: python src/train_model.py")
         return
     
-    model_files = [f for f in os.listdir(models_dir) if f.endswith('.h5')]
+    model_files = [f for f in os.listdir(models_dir) if f.endswith(('.h5', '.tflite', '.onnx'))]
     
     if not model_files:
         print("❌ Nenhum modelo encontrado!")
@@ -430,7 +549,7 @@ def main():
         
         elif choice == "2":
             # Carregar modelo se necessário
-            if predictor.model is None:
+            if predictor.engine is None:
                 print("\n📁 Modelos disponíveis:")
                 for i, model in enumerate(model_files):
                     print(f"   {i+1}. {model}")
@@ -459,24 +578,17 @@ def main():
         
         elif choice == "3":
             # Predição em lote
-            if predictor.model is None:
+            if predictor.engine is None:
                 print("❌ Carregue um modelo primeiro (opção 2)")
                 continue
             
             folder_path = input("Digite o caminho da pasta com imagens: ").strip()
-            if os.path.exists(folder_path):
-                # Encontrar imagens na pasta
-                image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-                image_paths = []
-                
-                for file in os.listdir(folder_path):
-                    if any(file.lower().endswith(ext) for ext in image_extensions):
-                        image_paths.append(os.path.join(folder_path, file))
-                
-                if image_paths:
-                    results = predictor.predict_batch(image_paths)
-                    print(f"✅ Processadas {len(results)} imagens")
-                else:
+            if os.path.isdir(folder_path):
+                # Varredura, decodificação, inferência e escrita em streaming; retomar uma
+                # execução interrompida só quando pedido (senão a saída do modelo é refeita)
+                resume = input("Retomar execução anterior deste modelo? (s/N): ").strip().lower() == 's'
+                summary = run_batch_prediction(predictor, folder_path, resume=resume)
+                if summary['processed'] == 0 and summary['skipped'] == 0:
                     print("❌ Nenhuma imagem encontrada na pasta")
             else:
                 print("❌ Pasta não encontrada")
@@ -1,20 +1,30 @@
 """
 Módulo de pré-processamento de imagens para diagnóstico de câncer
+
+A decodificação das imagens fica em dataset_ingestion.py (pool de processos,
+array uint8 mapeado em disco e cache por lista de arquivos) e o dataset
+preprocessado é salvo em fatias uint8 por dataset_shards.py; sklearn,
+TensorFlow e matplotlib são importados só pelos métodos que os usam.
 """
 import os
-import cv2
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.utils import to_categorical
-import matplotlib.pyplot as plt
-from tqdm import tqdm
+
+from dataset_ingestion import DEFAULT_CACHE_DIR, ingest_images, normalize_images
+from dataset_shards import DEFAULT_SHARDS_DIR, DEFAULT_SHARD_SIZE, ShardedDataset, write_shards
 
 class CancerImagePreprocessor:
-    def __init__(self, img_size=(224, 224), batch_size=32):
+    def __init__(self, img_size=(224, 224), batch_size=32, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Args:
+            img_size: (largura, altura) das imagens
+            batch_size: Tamanho de lote dos geradores de dados
+            workers: Processos de decodificação (padrão: núcleos da máquina)
+            cache_dir: Cache das imagens decodificadas (None desativa)
+        """
         self.img_size = img_size
         self.batch_size = batch_size
+        self.workers = workers
+        self.cache_dir = cache_dir
         self.cancer_types = {
             'breast_cancer': 0,
             'skin_cancer': 1, 
@@ -22,24 +32,22 @@ class CancerImagePreprocessor:
             'brain_cancer': 3
         }
         
-    def load_and_preprocess_images(self, dataset_paths):
+    def list_dataset_images(self, dataset_paths):
         """
-        Carrega e pré-processa imagens de todos os tipos de câncer
+        Lista as imagens de todos os tipos de câncer, sem decodificar
         
         Args:
             dataset_paths: Dict com caminhos para cada tipo de câncer
             
         Returns:
-            X: Array de imagens preprocessadas
-            y: Array de labels
-            class_names: Lista com nomes das classes
+            paths: Caminhos das imagens
+            labels: Label de cada imagem
+            class_names: Tipos de câncer encontrados
         """
-        images = []
+        paths = []
         labels = []
         class_names = []
         
-        print("🔄 Carregando e preprocessando imagens...")
-        
         for cancer_type, type_id in self.cancer_types.items():
             if cancer_type not in dataset_paths:
                 print(f"⚠️ Dataset não encontrado para {cancer_type}")
@@ -52,162 +60,134 @@ class CancerImagePreprocessor:
             
             print(f"📁 Processando {cancer_type}...")
             
-            # Carregar imagens para este tipo de câncer
-            cancer_images, cancer_labels = self._load_cancer_type_images(
-                dataset_path, type_id, cancer_type
-            )
+            # Listar imagens e labels deste tipo de câncer
+            cancer_paths, cancer_labels = self._list_cancer_type_images(dataset_path, cancer_type)
             
-            images.extend(cancer_images)
+            paths.extend(cancer_paths)
             labels.extend(cancer_labels)
             class_names.append(cancer_type)
         
-        # Converter para arrays numpy
-        X = np.array(images)
-        y = np.array(labels)
+        return paths, labels, class_names
+    
+    def load_and_preprocess_images(self, dataset_paths, dtype=np.float32):
+        """
+        Carrega e pré-processa imagens de todos os tipos de câncer
+        
+        Args:
+            dataset_paths: Dict com caminhos para cada tipo de câncer
+            dtype: np.float32 (normalizado 0-1) ou np.uint8 (pixels crus, sem cópia)
+            
+        Returns:
+            X: Array de imagens preprocessadas
+            y: Array de labels
+            class_names: Lista com nomes das classes
+        """
+        print("🔄 Carregando e preprocessando imagens...")
+        paths, labels, class_names = self.list_dataset_images(dataset_paths)
+        
+        # Decodificar tudo de uma vez (em paralelo, ou direto do cache)
+        images, failed = ingest_images(paths, self.img_size, workers=self.workers, cache_dir=self.cache_dir)
+        y = np.array(labels, dtype=np.int64)
+        if failed:
+            keep = np.setdiff1d(np.arange(len(paths)), failed)
+            images, y = images[keep], y[keep]
+        
+        X = images if np.dtype(dtype) == np.uint8 else normalize_images(images)
         
         print(f"✅ Total de imagens carregadas: {len(X)}")
         print(f"📊 Distribuição por classe: {np.bincount(y)}")
         
         return X, y, class_names
     
-    def _load_cancer_type_images(self, dataset_path, type_id, cancer_type):
-        """Carrega imagens de um tipo específico de câncer"""
-        images = []
-        labels = []
+    def build_shards(self, dataset_paths, out_dir=DEFAULT_SHARDS_DIR, shard_size=DEFAULT_SHARD_SIZE):
+        """
+        Grava o dataset preprocessado em fatias uint8 mapeáveis (ver dataset_shards.py)
         
-        # Estratégias diferentes para cada tipo de dataset
-        if cancer_type == "breast_cancer":
-            images, labels = self._load_breast_cancer_images(dataset_path, type_id)
-        elif cancer_type == "skin_cancer":
-            images, labels = self._load_skin_cancer_images(dataset_path, type_id)
-        elif cancer_type == "lung_cancer":
-            images, labels = self._load_lung_cancer_images(dataset_path, type_id)
-        elif cancer_type == "brain_cancer":
-            images, labels = self._load_brain_cancer_images(dataset_path, type_id)
+        As imagens vão do array de ingestão (memmap) para as fatias sem passar
+        por um array float32 nem carregar o dataset inteiro na memória.
         
-        return images, labels
+        Returns:
+            ShardedDataset aberto sobre out_dir
+        """
+        print("🔄 Carregando e preprocessando imagens...")
+        paths, labels, class_names = self.list_dataset_images(dataset_paths)
+        images, failed = ingest_images(paths, self.img_size, workers=self.workers, cache_dir=self.cache_dir)
+        keep = np.setdiff1d(np.arange(len(paths)), failed)
+        
+        write_shards(
+            out_dir, images, labels,
+            class_names=class_names,
+            sources=paths,
+            indices=keep,
+            shard_size=shard_size,
+            metadata={'img_size': list(self.img_size), 'unreadable': [paths[i] for i in failed]}
+        )
+        dataset = ShardedDataset(out_dir)
+        print(f"✅ {len(dataset)} imagens em {len(dataset.index['shards'])} fatia(s): {out_dir}")
+        print(f"📊 Distribuição por classe: {np.bincount(np.asarray(dataset.labels))}")
+        return dataset
     
-    def _load_breast_cancer_images(self, dataset_path, type_id):
-        """Carrega imagens de câncer de mama"""
-        images = []
-        labels = []
-        
-        # Procurar por subdiretórios (IDC_negative, IDC_positive, etc.)
-        for root, dirs, files in os.walk(dataset_path):
-            for file in files[:1000]:  # Limitar para exemplo
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    img_path = os.path.join(root, file)
-                    img = self._load_and_resize_image(img_path)
-                    if img is not None:
-                        images.append(img)
-                        
-                        # Determinar label baseado no nome do arquivo ou diretório
-                        if 'positive' in root.lower() or '1.png' in file:
-                            labels.append(1)  # Maligno
-                        else:
-                            labels.append(0)  # Benigno
+    def _list_cancer_type_images(self, dataset_path, cancer_type):
+        """Lista (caminhos, labels) de um tipo específico de câncer, na ordem do os.walk"""
+        # Estratégias diferentes para cada tipo de dataset
+        label_rules = {
+            'breast_cancer': self._breast_cancer_label,
+            'skin_cancer': self._skin_cancer_label,
+            'lung_cancer': self._lung_cancer_label,
+            'brain_cancer': self._brain_cancer_label
+        }
+        label_fn = label_rules[cancer_type]
         
-        return images, labels
-    
-    def _load_skin_cancer_images(self, dataset_path, type_id):
-        """Carrega imagens de câncer de pele"""
-        images = []
+        paths = []
         labels = []
-        
         for root, dirs, files in os.walk(dataset_path):
             for file in files[:1000]:  # Limitar para exemplo
                 if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    img_path = os.path.join(root, file)
-                    img = self._load_and_resize_image(img_path)
-                    if img is not None:
-                        images.append(img)
-                        
-                        # Determinar label baseado no diretório
-                        if 'malignant' in root.lower():
-                            labels.append(1)  # Maligno
-                        else:
-                            labels.append(0)  # Benigno
+                    paths.append(os.path.join(root, file))
+                    labels.append(label_fn(root, file))
         
-        return images, labels
+        return paths, labels
     
-    def _load_lung_cancer_images(self, dataset_path, type_id):
-        """Carrega imagens de câncer de pulmão"""
-        images = []
-        labels = []
-        
-        for root, dirs, files in os.walk(dataset_path):
-            for file in files[:1000]:  # Limitar para exemplo
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    img_path = os.path.join(root, file)
-                    img = self._load_and_resize_image(img_path)
-                    if img is not None:
-                        images.append(img)
-                        
-                        # Determinar label baseado no diretório
-                        if any(word in root.lower() for word in ['cancer', 'malignant', 'adenocarcinoma']):
-                            labels.append(1)  # Maligno
-                        else:
-                            labels.append(0)  # Normal/Benigno
-        
-        return images, labels
+    @staticmethod
+    def _breast_cancer_label(root, file):
+        """Câncer de mama: subdiretórios IDC_negative/IDC_positive ou sufixo do arquivo"""
+        if 'positive' in root.lower() or '1.png' in file:
+            return 1  # Maligno
+        return 0  # Benigno
     
-    def _load_brain_cancer_images(self, dataset_path, type_id):
-        """Carrega imagens de câncer cerebral"""
-        images = []
-        labels = []
-        
-        for root, dirs, files in os.walk(dataset_path):
-            for file in files[:1000]:  # Limitar para exemplo
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    img_path = os.path.join(root, file)
-                    img = self._load_and_resize_image(img_path)
-                    if img is not None:
-                        images.append(img)
-                        
-                        # Determinar label baseado no diretório
-                        if any(word in root.lower() for word in ['tumor', 'glioma', 'meningioma']):
-                            labels.append(1)  # Tumor
-                        else:
-                            labels.append(0)  # Normal
-        
-        return images, labels
+    @staticmethod
+    def _skin_cancer_label(root, file):
+        """Câncer de pele: label pelo diretório"""
+        return 1 if 'malignant' in root.lower() else 0
     
-    def _load_and_resize_image(self, img_path):
-        """Carrega e redimensiona uma imagem"""
-        try:
-            # Carregar imagem
-            img = cv2.imread(img_path)
-            if img is None:
-                return None
-                
-            # Converter de BGR para RGB
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            
-            # Redimensionar
-            img = cv2.resize(img, self.img_size)
-            
-            # Normalizar para 0-1
-            img = img.astype(np.float32) / 255.0
-            
-            return img
-            
-        except Exception as e:
-            print(f"❌ Erro ao carregar imagem {img_path}: {e}")
-            return None
+    @staticmethod
+    def _lung_cancer_label(root, file):
+        """Câncer de pulmão: label pelo diretório (Normal/Benigno = 0)"""
+        return 1 if any(word in root.lower() for word in ['cancer', 'malignant', 'adenocarcinoma']) else 0
+    
+    @staticmethod
+    def _brain_cancer_label(root, file):
+        """Câncer cerebral: label pelo diretório (Tumor = 1)"""
+        return 1 if any(word in root.lower() for word in ['tumor', 'glioma', 'meningioma']) else 0
+    
+    def create_datasets(self, X_train, y_train, X_val, y_val, seed=None):
+        """
+        Cria os pipelines tf.data de treino (embaralhado, com augmentation
+        vetorizada por lote) e de validação (sem augmentation)
+        """
+        from data_pipeline import dataset_from_arrays
+        
+        train_dataset = dataset_from_arrays(X_train, y_train, batch_size=self.batch_size, training=True, seed=seed)
+        val_dataset = dataset_from_arrays(X_val, y_val, batch_size=self.batch_size)
+        return train_dataset, val_dataset
     
     def create_data_generators(self, X_train, y_train, X_val, y_val):
-        """Cria geradores de dados com data augmentation"""
+        """Cria geradores ImageDataGenerator.flow (caminho anterior; o treinamento usa create_datasets)"""
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        from data_pipeline import AUGMENTATION
         
         # Data augmentation para treino
-        train_datagen = ImageDataGenerator(
-            rotation_range=20,
-            width_shift_range=0.2,
-            height_shift_range=0.2,
-            shear_range=0.2,
-            zoom_range=0.2,
-            horizontal_flip=True,
-            fill_mode='nearest'
-        )
+        train_datagen = ImageDataGenerator(**AUGMENTATION)
         
         # Apenas normalização para validação
         val_datagen = ImageDataGenerator()
@@ -229,6 +209,7 @@ class CancerImagePreprocessor:
     
     def split_data(self, X, y, test_size=0.2, val_size=0.2):
         """Divide dados em treino, validação e teste"""
+        from sklearn.model_selection import train_test_split
         
         # Primeiro split: treino+val vs teste
         X_temp, X_test, y_temp, y_test = train_test_split(
@@ -250,6 +231,8 @@ class CancerImagePreprocessor:
     
     def visualize_samples(self, X, y, class_names, num_samples=12):
         """Visualiza amostras das imagens"""
+        import matplotlib.pyplot as plt
+        
         fig, axes = plt.subplots(3, 4, figsize=(15, 12))
         axes = axes.ravel()
         
@@ -286,19 +269,21 @@ def main():
     # Criar preprocessador
     preprocessor = CancerImagePreprocessor(img_size=(224, 224))
     
-    # Carregar e preprocessar dados
-    X, y, class_names = preprocessor.load_and_preprocess_images(dataset_paths)
+    # Carregar, preprocessar e salvar em fatias uint8 (datasets/preprocessed/)
+    dataset = preprocessor.build_shards(dataset_paths)
     
-    if len(X) > 0:
-        # Dividir dados
-        X_train, X_val, X_test, y_train, y_val, y_test = preprocessor.split_data(X, y)
+    if len(dataset) > 0:
+        # Dividir dados (só índices; as imagens continuam no disco)
+        train_idx, val_idx, test_idx = dataset.split_indices()
+        print(f"📊 Divisão dos dados:")
+        print(f"   Treino: {len(train_idx)} amostras")
+        print(f"   Validação: {len(val_idx)} amostras") 
+        print(f"   Teste: {len(test_idx)} amostras")
         
         # Visualizar amostras
-        preprocessor.visualize_samples(X, y, class_names)
-        
-        # Salvar dados preprocessados
-        np.save('datasets/X_preprocessed.npy', X)
-        np.save('datasets/y_preprocessed.npy', y)
+        sample = np.sort(np.random.choice(len(dataset), min(12, len(dataset)), replace=False))
+        X_sample, y_sample = dataset.get_batch(sample, normalize=False)
+        preprocessor.visualize_samples(X_sample, y_sample, dataset.class_names, num_samples=len(sample))
         
         print("✅ Dados preprocessados salvos!")
     else:
@@ -0,0 +1,104 @@
+"""
+Motor de inferência TFLite (modelos exportados por src/tflite_export.py)
+
+Implementa InferenceBackend (predict, predict_single, predict_tta, warmup,
+input_shape), então pode substituir o InferenceEngine no CancerPredictor, no
+MicroBatcher e na API sem mudar quem chama.
+
+- Entradas/saídas quantizadas (modelo INT8 completo) são convertidas com a
+  escala e o ponto zero do próprio modelo: quem chama sempre usa float32 [0, 1]
+- O tamanho do lote é dinâmico (o tensor de entrada é redimensionado só quando muda)
+- O interpretador TFLite não é seguro para uso concorrente: as chamadas são serializadas
+- O TensorFlow só é importado ao criar o motor
+"""
+import threading
+
+import numpy as np
+
+from inference_engine import InferenceBackend
+
+
+class TFLiteEngine(InferenceBackend):
+    name = 'tflite'
+
+    def __init__(self, model_path=None, model_content=None, num_threads=None,
+                 warmup=True, warmup_batch_sizes=(1,)):
+        """
+        Inicializa o motor TFLite
+
+        Args:
+            model_path: Arquivo .tflite
+            model_content: Bytes do modelo (alternativa a model_path)
+            num_threads: Threads do interpretador (None = padrão do TFLite)
+            warmup: Se deve executar o modelo com entradas nulas no carregamento
+            warmup_batch_sizes: Tamanhos de lote usados no aquecimento
+        """
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self._interpreter = tf.lite.Interpreter(
+            model_path=model_path, model_content=model_content, num_threads=num_threads
+        )
+        self._interpreter.allocate_tensors()
+        self._lock = threading.Lock()
+
+        input_details = self._interpreter.get_input_details()[0]
+        output_details = self._interpreter.get_output_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = output_details['index']
+        self._input_dtype = input_details['dtype']
+        self._output_dtype = output_details['dtype']
+        self._input_quant = input_details['quantization']
+        self._output_quant = output_details['quantization']
+        self._batch_size = int(input_details['shape'][0])
+
+        self.input_shape = tuple(int(d) for d in input_details['shape'][1:])
+        self.output_shape = tuple(int(d) for d in output_details['shape'][1:])
+        self.quantized = self._input_dtype in (np.int8, np.uint8)
+
+        if warmup:
+            self.warmup(warmup_batch_sizes)
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        """Carrega um modelo .tflite e cria o motor de inferência"""
+        return cls(model_path=model_path, **kwargs)
+
+    def _quantize(self, batch):
+        scale, zero_point = self._input_quant
+        info = np.iinfo(self._input_dtype)
+        quantized = np.round(batch / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(self._input_dtype)
+
+    def _dequantize(self, output):
+        scale, zero_point = self._output_quant
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        """
+        Faz predição para um lote
+
+        Args:
+            batch: Array (N, H, W, C) em float32 [0, 1]
+
+        Returns:
+            Array numpy (N, saídas) em float32
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        if self.quantized:
+            batch = self._quantize(batch)
+
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input_index, batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self._interpreter.set_tensor(self._input_index, np.ascontiguousarray(batch))
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output_index)
+
+        if self._output_dtype in (np.int8, np.uint8):
+            return self._dequantize(output)
+        return output.astype(np.float32, copy=True)
@@ -0,0 +1,264 @@
+"""
+Exporta os modelos .h5 para TFLite e compara com o modelo original
+
+Variantes geradas para cada models/<nome>.h5:
+- <nome>_dynamic.tflite: quantização de faixa dinâmica (pesos INT8, ativações float)
+- <nome>_int8.tflite: INT8 completo (pesos, ativações, entrada e saída), calibrado
+  com uma amostra representativa de datasets/brain_cancer preprocessada com o
+  mesmo kernel do servidor (src/mri_preprocessing.py)
+
+O relatório compara cada variante com o .h5 em uma amostra rotulada do dataset:
+acurácia, concordância de classe, diferença de probabilidade, latência
+(lote 1, p50/p99), vazão (lote 16) e tamanho do arquivo.
+
+Uso:
+    python src/tflite_export.py [models/brain_cancer_final.h5 ...] [--dataset datasets/brain_cancer]
+                                [--variants dynamic int8] [--calibration-samples 200]
+                                [--report-samples 400] [--no-report]
+"""
+import os
+import sys
+import json
+import time
+import glob
+import random
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from mri_preprocessing import preprocess_batch
+from inference_engine import InferenceEngine
+from tflite_engine import TFLiteEngine
+
+TFLITE_VARIANTS = ('dynamic', 'int8')
+
+# Mesmo mapeamento de rótulos usado no treinamento (train_final_model.py)
+DATASET_CATEGORIES = {
+    'notumor': 0,
+    'glioma': 1,
+    'meningioma': 1,
+    'pituitary': 1
+}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def list_dataset_images(dataset_path, splits=('Training', 'Testing')):
+    """Lista (caminho, rótulo) do dataset no layout <split>/<categoria>/<imagem>"""
+    items = []
+    for split in splits:
+        for category, label in DATASET_CATEGORIES.items():
+            folder = os.path.join(dataset_path, split, category)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    items.append((os.path.join(folder, name), label))
+    return items
+
+
+def load_sample(dataset_path, count, input_shape, seed=42, splits=('Training', 'Testing')):
+    """
+    Amostra aleatória (semente fixa) do dataset, preprocessada para a entrada do modelo
+
+    Returns:
+        (imagens float32 (N, H, W, 3), rótulos (N,))
+    """
+    items = list_dataset_images(dataset_path, splits)
+    if not items:
+        raise FileNotFoundError(f"Nenhuma imagem encontrada em {dataset_path}")
+    random.Random(seed).shuffle(items)
+    items = items[:count]
+
+    height, width = input_shape[:2]
+    batch, errors = preprocess_batch([path for path, _ in items], target_size=(width, height))
+    valid = [i for i in range(len(items)) if i not in errors]
+    labels = np.array([items[i][1] for i in valid], dtype=np.int64)
+    return batch[valid], labels
+
+
+def export_tflite(model, variant, calibration=None):
+    """
+    Converte um modelo Keras para TFLite
+
+    Args:
+        model: Modelo Keras carregado
+        variant: 'dynamic' ou 'int8'
+        calibration: Imagens float32 (N, H, W, 3) para calibrar o INT8
+
+    Returns:
+        Bytes do modelo .tflite
+    """
+    if variant not in TFLITE_VARIANTS:
+        raise ValueError(f"Variante TFLite não suportada: {variant}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == 'int8':
+        if calibration is None or len(calibration) == 0:
+            raise ValueError("A variante int8 precisa de imagens de calibração")
+
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis].astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def tflite_path(h5_path, variant):
+    """models/<nome>.h5 -> models/<nome>_<variante>.tflite"""
+    return f"{os.path.splitext(h5_path)[0]}_{variant}.tflite"
+
+
+def measure_latency(predict, image, iterations=100, warmup=10):
+    """Latências (ms) de chamadas com lote 1"""
+    for _ in range(warmup):
+        predict(image)
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        predict(image)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def measure_throughput(predict, images, batch_size=16, repeats=3):
+    """Imagens/s em lotes de `batch_size`"""
+    predict(images[:batch_size])
+    start = time.perf_counter()
+    count = 0
+    for _ in range(repeats):
+        for i in range(0, len(images), batch_size):
+            predict(images[i:i + batch_size])
+            count += len(images[i:i + batch_size])
+    return count / (time.perf_counter() - start)
+
+
+def predict_all(predict, images, batch_size=32):
+    return np.concatenate([predict(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+
+
+def tumor_probability(outputs):
+    """Probabilidade de tumor para saídas sigmoid (N, 1) ou softmax (N, 2)"""
+    return outputs[:, 0] if outputs.shape[1] == 1 else outputs[:, 1]
+
+
+def compare_models(h5_path, tflite_paths, images, labels, iterations=100):
+    """
+    Compara o .h5 (InferenceEngine) com cada variante TFLite
+
+    Returns:
+        Lista de dicionários (uma linha por modelo, a primeira é o original)
+    """
+    engines = [('keras (float32)', h5_path, InferenceEngine.from_path(h5_path))]
+    engines += [(f"tflite ({variant})", path, TFLiteEngine.from_path(path)) for variant, path in tflite_paths]
+
+    reference = None
+    rows = []
+    for name, path, engine in engines:
+        probs = tumor_probability(predict_all(engine.predict, images))
+        if reference is None:
+            reference = probs
+        latencies = measure_latency(engine.predict, images[:1], iterations)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        rows.append({
+            'model': name,
+            'path': path,
+            'size_kb': os.path.getsize(path) / 1024.0,
+            'accuracy': float(np.mean((probs > 0.5) == labels)),
+            'agreement': float(np.mean((probs > 0.5) == (reference > 0.5))),
+            'max_abs_diff': float(np.max(np.abs(probs - reference))),
+            'mean_abs_diff': float(np.mean(np.abs(probs - reference))),
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'throughput_img_s': float(measure_throughput(engine.predict, images))
+        })
+    return rows
+
+
+def write_report(rows, samples, output_dir='results'):
+    """Grava o relatório em Markdown e JSON e imprime a tabela"""
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(rows[0]['path']))[0]
+    md_path = os.path.join(output_dir, f"tflite_report_{base}.md")
+    json_path = os.path.join(output_dir, f"tflite_report_{base}.json")
+
+    lines = [
+        f"# Relatório TFLite: {rows[0]['path']}",
+        "",
+        f"Amostra: {samples} imagens rotuladas do dataset | núcleos: {os.cpu_count()}",
+        "",
+        "| Modelo | Tamanho (KB) | Acurácia | Concordância | Dif. máx. | Dif. média | p50 (ms) | p99 (ms) | img/s (lote 16) |",
+        "|---|---|---|---|---|---|---|---|---|"
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['model']} | {row['size_kb']:.0f} | {row['accuracy']:.2%} | {row['agreement']:.2%} | "
+            f"{row['max_abs_diff']:.4f} | {row['mean_abs_diff']:.4f} | {row['latency_p50_ms']:.2f} | "
+            f"{row['latency_p99_ms']:.2f} | {row['throughput_img_s']:.1f} |"
+        )
+    with open(md_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'samples': samples, 'models': rows}, f, indent=2)
+
+    print('\n'.join(lines))
+    print(f"\n💾 Relatório salvo em: {md_path}")
+    return md_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta modelos .h5 para TFLite (faixa dinâmica e INT8)")
+    parser.add_argument('models', nargs='*', help="Modelos .h5 (padrão: todos em models/)")
+    parser.add_argument('--dataset', default='datasets/brain_cancer')
+    parser.add_argument('--variants', nargs='+', choices=TFLITE_VARIANTS, default=list(TFLITE_VARIANTS))
+    parser.add_argument('--calibration-samples', type=int, default=200)
+    parser.add_argument('--report-samples', type=int, default=400)
+    parser.add_argument('--no-report', action='store_true')
+    args = parser.parse_args()
+
+    model_paths = args.models or sorted(glob.glob(os.path.join('models', '*.h5')))
+    if not model_paths:
+        print("❌ Nenhum modelo .h5 encontrado em models/")
+        sys.exit(1)
+
+    print("📦 EXPORTAÇÃO TFLITE")
+    print("=" * 50)
+
+    for h5_path in model_paths:
+        print(f"\n🔄 {h5_path}")
+        model = tf.keras.models.load_model(h5_path, compile=False)
+        input_shape = tuple(int(d) for d in model.input_shape[1:])
+
+        calibration = None
+        if 'int8' in args.variants:
+            # Calibração só com o split de treino (o relatório usa o de teste quando existe)
+            calibration, _ = load_sample(args.dataset, args.calibration_samples, input_shape,
+                                         splits=('Training',))
+            print(f"   Calibração INT8: {len(calibration)} imagens de {args.dataset}")
+
+        exported = []
+        for variant in args.variants:
+            content = export_tflite(model, variant, calibration)
+            path = tflite_path(h5_path, variant)
+            with open(path, 'wb') as f:
+                f.write(content)
+            exported.append((variant, path))
+            print(f"   ✅ {variant}: {path} ({len(content) / 1024:.0f} KB)")
+
+        if not args.no_report:
+            splits = ('Testing',) if list_dataset_images(args.dataset, ('Testing',)) else ('Training', 'Testing')
+            images, labels = load_sample(args.dataset, args.report_samples, input_shape, seed=7, splits=splits)
+            print(f"\n📊 Comparação em {len(images)} imagens ({', '.join(splits)}):\n")
+            write_report(compare_models(h5_path, exported, images, labels), len(images))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,17 @@
 """
 Script principal para treinamento dos modelos de diagnóstico de câncer
+
+sklearn e seaborn são importados só pelos métodos que os usam.
 """
 import os
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.utils.class_weight import compute_class_weight
 import tensorflow as tf
 from tensorflow.keras.utils import to_categorical
 
 # Imports locais
 from preprocessing import CancerImagePreprocessor
-from model_architecture import CancerCNNModels
+from model_architecture import CancerCNNModels, precision_policy
 
 class CancerModelTrainer:
     def __init__(self, config=None):
@@ -49,7 +47,9 @@ class CancerModelTrainer:
             'validation_split': 0.2,
             'test_split': 0.2,
             'model_type': 'advanced_cnn',  # 'basic_cnn', 'advanced_cnn', 'transfer_learning'
-            'transfer_base': 'vgg16'  # Para transfer learning
+            'transfer_base': 'vgg16',  # Para transfer learning
+            'precision': 'float32',  # 'mixed_float16' (GPU) ou 'mixed_bfloat16' (CPU/TPU)
+            'jit_compile': 'auto'  # True = passo de treino compilado com XLA
         }
     
     def load_data(self, dataset_paths):
@@ -84,28 +84,38 @@ class CancerModelTrainer:
     
     def create_model(self):
         """Cria o modelo baseado na configuração"""
-        print(f"🏗️ Criando modelo: {self.config['model_type']}")
-        
-        if self.config['model_type'] == 'basic_cnn':
-            model = self.models.create_basic_cnn()
-        elif self.config['model_type'] == 'advanced_cnn':
-            model = self.models.create_advanced_cnn()
-        elif self.config['model_type'] == 'transfer_learning':
-            model = self.models.create_transfer_learning_model(
-                base_model_name=self.config['transfer_base'],
-                trainable_layers=5
-            )
-        else:
-            raise ValueError(f"Tipo de modelo não suportado: {self.config['model_type']}")
+        precision = self.config.get('precision', 'float32')
+        jit_compile = self.config.get('jit_compile', 'auto')
+        print(f"🏗️ Criando modelo: {self.config['model_type']} (precisão: {precision}, XLA: {jit_compile})")
+        
+        # Camadas criadas com a política de precisão; a saída fica em float32
+        with precision_policy(precision):
+            if self.config['model_type'] == 'basic_cnn':
+                model = self.models.create_basic_cnn()
+            elif self.config['model_type'] == 'advanced_cnn':
+                model = self.models.create_advanced_cnn()
+            elif self.config['model_type'] == 'transfer_learning':
+                model = self.models.create_transfer_learning_model(
+                    base_model_name=self.config['transfer_base'],
+                    trainable_layers=5
+                )
+            else:
+                raise ValueError(f"Tipo de modelo não suportado: {self.config['model_type']}")
         
-        # Compilar modelo
-        model = self.models.compile_model(model, learning_rate=self.config['learning_rate'])
+        # Compilar modelo (Adam com escala de perda em mixed_float16)
+        model = self.models.compile_model(
+            model,
+            learning_rate=self.config['learning_rate'],
+            jit_compile=jit_compile
+        )
         
         print(f"✅ Modelo criado com {model.count_params():,} parâmetros")
         return model
     
     def calculate_class_weights(self, y_train):
         """Calcula pesos das classes para lidar com desbalanceamento"""
+        from sklearn.utils.class_weight import compute_class_weight
+        
         if self.config['num_classes'] == 2:
             # Para classificação binária
             class_weights = compute_class_weight(
@@ -144,16 +154,16 @@ class CancerModelTrainer:
             model_name=f"{self.config['model_type']}_cancer_model"
         )
         
-        # Criar geradores de dados com augmentation
-        train_generator, val_generator = self.preprocessor.create_data_generators(
+        # Pipelines tf.data com augmentation vetorizada e prefetch
+        train_dataset, val_dataset = self.preprocessor.create_datasets(
             X_train, y_train, X_val, y_val
         )
         
         # Treinar modelo
         history = model.fit(
-            train_generator,
+            train_dataset,
             epochs=self.config['epochs'],
-            validation_data=val_generator,
+            validation_data=val_dataset,
             class_weight=class_weights,
             callbacks=callbacks,
             verbose=1
@@ -171,6 +181,8 @@ class CancerModelTrainer:
             X_test, y_test: Dados de teste
             class_names: Nomes das classes
         """
+        from sklearn.metrics import classification_report, confusion_matrix
+        
         print("📈 Avaliando modelo...")
         
         # Fazer predições
@@ -242,6 +254,8 @@ class CancerModelTrainer:
     
     def plot_confusion_matrix(self, cm, class_names=None, save_path='results/confusion_matrix.png'):
         """Plota matriz de confusão"""
+        import seaborn as sns
+        
         plt.figure(figsize=(10, 8))
         
         if class_names is None:
@@ -307,7 +321,9 @@ def main():
         'validation_split': 0.2,
         'test_split': 0.2,
         'model_type': 'advanced_cnn',  # Pode alterar para 'basic_cnn' ou 'transfer_learning'
-        'transfer_base': 'vgg16'
+        'transfer_base': 'vgg16',
+        'precision': 'float32',  # 'mixed_bfloat16' em CPU / 'mixed_float16' em GPU
+        'jit_compile': 'auto'  # True para compilar com XLA
     }
     
     # Paths dos datasets
@@ -0,0 +1,210 @@
+"""
+Testes das rotas de sessão e histórico da API (web/api_server.py)
+
+O pool PostgreSQL é trocado por um banco falso em memória que executa os
+prepared statements pelo nome, então as rotas rodam sem servidor de banco.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+import api_server
+from session_cache import SessionCache
+
+USER = (1, 'medico', 'Dra. Teste', 'doctor')
+
+
+class FakeCursor:
+    def __init__(self):
+        self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return list(self.result)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Banco em memória com a mesma interface de db_pool usada pelas rotas"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.history = []  # (id, user_id, image_name, normal, tumor, confidence, threshold, result, created_at)
+        self.pending_deletes = []
+        self.before_commit = None
+
+    @contextmanager
+    def cursor(self, commit=False):
+        yield FakeCursor()
+        if commit:
+            if self.before_commit is not None:
+                self.before_commit()
+            for token in self.pending_deletes:
+                self.sessions.pop(token, None)
+            self.pending_deletes = []
+
+    def execute_prepared(self, cur, name, params=()):
+        cur.result = getattr(self, name)(*params)
+
+    # Prepared statements usados nos testes
+    def verify_token(self, token, now):
+        session = self.sessions.get(token)
+        if session is None or session[1] <= now:
+            return []
+        return [(*USER, session[1])]
+
+    def delete_session(self, token):
+        self.pending_deletes.append(token)
+        return []
+
+    def _page(self, user_id, limit, after=None):
+        rows = sorted((r for r in self.history if r[1] == user_id), key=lambda r: (r[8], r[0]), reverse=True)
+        if after is not None:
+            rows = [r for r in rows if (r[8], r[0]) < after]
+        return [(r[0], *r[2:]) for r in rows[:limit]]
+
+    def history_first_page(self, user_id, limit):
+        return self._page(user_id, limit)
+
+    def history_next_page(self, user_id, created_at, analysis_id, limit):
+        return self._page(user_id, limit, (created_at, analysis_id))
+
+
+@contextmanager
+def fake_database():
+    """Troca o pool e o cache de sessões do servidor enquanto o teste roda"""
+    original_pool, original_cache = api_server.db_pool, api_server.session_cache
+    pool = FakePool()
+    pool.sessions['token-valido'] = (USER[0], datetime.now() + timedelta(hours=1))
+    api_server.db_pool = pool
+    api_server.session_cache = SessionCache()
+    try:
+        yield pool, api_server.app.test_client()
+    finally:
+        api_server.db_pool, api_server.session_cache = original_pool, original_cache
+
+
+def test_logout_survives_concurrent_validation():
+    """Validação concorrente antes do commit do DELETE não deixa o token válido no cache"""
+    with fake_database() as (pool, client):
+        assert api_server.get_session('token-valido')['id'] == USER[0]
+        # Outra requisição valida o token na linha ainda não apagada
+        pool.before_commit = lambda: api_server.get_session('token-valido')
+
+        response = client.post('/api/auth/logout', json={'token': 'token-valido'})
+        assert response.status_code == 200 and response.get_json()['success']
+        assert api_server.session_cache.get('token-valido') is None
+        assert api_server.get_session('token-valido') is None
+
+
+def add_history(pool, count, created_at=None, start_id=1):
+    """count análises do usuário; com created_at fixo, todas empatadas no mesmo instante"""
+    base = datetime(2026, 3, 1, 12, 0, 0, 123456)
+    for i in range(count):
+        analysis_id = start_id + i
+        when = created_at or base + timedelta(minutes=analysis_id)
+        pool.history.append((analysis_id, USER[0], f"img{analysis_id}.png", 0.2, 0.8, 0.8, 0.5, 'Tumor', when))
+
+
+def fetch_all_pages(client, limit):
+    """Percorre o histórico seguindo next_cursor; devolve (ids na ordem, número de páginas)"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        query = f"/api/history?limit={limit}" + (f"&cursor={cursor}" if cursor else '')
+        response = client.get(query, headers={'Authorization': 'Bearer token-valido'})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['success'] and len(body['history']) <= limit
+        ids.extend(item['id'] for item in body['history'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+def test_history_page_boundaries():
+    """Páginas cheias até a última; next_cursor some no fim; sem repetir nem pular itens"""
+    with fake_database() as (pool, client):
+        add_history(pool, 7)
+        ids, pages = fetch_all_pages(client, limit=3)
+        assert ids == [7, 6, 5, 4, 3, 2, 1] and pages == 3
+
+        ids, pages = fetch_all_pages(client, limit=7)  # exatamente uma página
+        assert ids == [7, 6, 5, 4, 3, 2, 1] and pages == 1
+
+
+def test_history_ties_on_created_at():
+    """Análises no mesmo instante atravessam a borda da página, desempatadas pelo id"""
+    with fake_database() as (pool, client):
+        add_history(pool, 3)
+        add_history(pool, 5, created_at=datetime(2026, 3, 1, 12, 2, 30), start_id=10)
+        ids, pages = fetch_all_pages(client, limit=2)
+        assert ids == [3, 14, 13, 12, 11, 10, 2, 1]
+        assert len(ids) == len(set(ids)) and pages == 4
+
+
+def test_history_cursor_and_invalid_requests():
+    """Cursor preserva microssegundos; cursor ou limit inválido dá 400; sem token, 401"""
+    when = datetime(2026, 3, 1, 12, 0, 0, 654321)
+    assert api_server.decode_history_cursor(api_server.encode_history_cursor(when, 42)) == (when, 42)
+
+    with fake_database() as (pool, client):
+        headers = {'Authorization': 'Bearer token-valido'}
+        for query in ('cursor=nao-e-um-cursor', 'cursor=%%%', 'limit=abc'):
+            response = client.get(f"/api/history?{query}", headers=headers)
+            assert response.status_code == 400 and 'error' in response.get_json()
+        assert client.get('/api/history').status_code == 401
+
+
+def test_history_bad_rows_never_truncate_json():
+    """Colunas NULL viram null; linha impossível de serializar dá 500 com JSON válido"""
+    with fake_database() as (pool, client):
+        headers = {'Authorization': 'Bearer token-valido'}
+        add_history(pool, 2)
+        pool.history.append((3, USER[0], 'sem_limiar.png', 0.5, 0.5, 0.5, None, 'Normal',
+                             datetime(2026, 3, 2)))
+        response = client.get('/api/history', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['history'][0]['threshold_used'] is None
+
+        pool.history.append((4, USER[0], 'corrompida.png', 'abc', 0.5, 0.5, 0.5, 'Normal',
+                             datetime(2026, 3, 3)))
+        response = client.get('/api/history', headers=headers)
+        assert response.status_code == 500 and 'error' in response.get_json()
+
+
+def test_history_statements_use_keyset():
+    """Próxima página filtra por (created_at, id) na mesma ordem do índice composto"""
+    statements = {name: sql for name, (types, sql) in api_server.db_pool._statements.items()}
+    for name in ('history_first_page', 'history_next_page'):
+        assert 'ORDER BY created_at DESC, id DESC' in statements[name]
+    assert '(created_at, id) < ($2, $3)' in statements['history_next_page']
+
+
+def main():
+    """Executa todos os testes da API"""
+    print("🧪 TESTES DAS ROTAS DA API")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
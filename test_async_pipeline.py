@@ -0,0 +1,259 @@
+"""
+Testes do pipeline assíncrono de upload (src/async_pipeline.py)
+"""
+import os
+import sys
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from async_pipeline import AsyncPredictionPipeline, PipelineOverloaded
+from mri_preprocessing import preprocess_mri_bytes
+from test_mri_preprocessing import synthetic_mri
+
+
+def decode_value(data):
+    """'preprocessa' bytes em um array (1, 1) com o valor codificado"""
+    if data == b'ruim':
+        raise ValueError("imagem ilegível")
+    return np.array([[float(data.decode())]], dtype=np.float32)
+
+
+def double_inference(array):
+    """submit_inference síncrono: Future já resolvido com o dobro da entrada"""
+    future = Future()
+    future.set_result(array * 2)
+    return future
+
+
+def test_results_follow_submissions():
+    """Cada Future recebe o resultado da própria imagem; com 1 decodificador, na ordem de envio"""
+    done_order = []
+    pipeline = AsyncPredictionPipeline(decode_value, double_inference, decode_workers=1).start()
+    try:
+        futures = [pipeline.submit(str(i).encode()) for i in range(20)]
+        for i, future in enumerate(futures):
+            future.add_done_callback(lambda f, i=i: done_order.append(i))
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        pipeline.stop()
+
+    for i, (array, predictions) in enumerate(results):
+        assert array[0, 0] == i and predictions[0, 0] == 2 * i
+    assert done_order == list(range(20))
+
+    pipeline = AsyncPredictionPipeline(decode_value, double_inference, decode_workers=4).start()
+    try:
+        array, predictions = pipeline.submit(b'7', infer=False).result(timeout=5)
+        assert array[0, 0] == 7 and predictions is None
+    finally:
+        pipeline.stop()
+
+
+def test_decode_failure_is_per_item():
+    """Falha de decodificação chega só ao Future da imagem ruim; o pipeline segue atendendo"""
+    pipeline = AsyncPredictionPipeline(decode_value, double_inference, decode_workers=2).start()
+    try:
+        bad = pipeline.submit(b'ruim')
+        good = pipeline.submit(b'3')
+        try:
+            bad.result(timeout=5)
+        except ValueError as e:
+            assert "ilegível" in str(e)
+        else:
+            raise AssertionError("deveria propagar o erro de decodificação")
+        assert good.result(timeout=5)[1][0, 0] == 6
+        stats = pipeline.get_stats()
+        assert stats['errors'] == 1 and stats['completed'] == 1 and stats['pending'] == 0
+    finally:
+        pipeline.stop()
+
+
+def test_timeout_and_cancellation():
+    """result(timeout) não bloqueia para sempre; itens cancelados liberam a vaga sem decodificar"""
+    release = threading.Event()
+    decoded = []
+
+    def slow_decode(data):
+        release.wait(5)
+        decoded.append(data)
+        return decode_value(data)
+
+    pipeline = AsyncPredictionPipeline(slow_decode, double_inference, decode_workers=1, max_pending=2).start()
+    try:
+        first = pipeline.submit(b'1')
+        second = pipeline.submit(b'2')
+        started = time.perf_counter()
+        try:
+            second.result(timeout=0.05)
+        except FutureTimeout:
+            second.cancel()
+        else:
+            raise AssertionError("deveria estourar o timeout")
+        assert time.perf_counter() - started < 1.0
+
+        release.set()
+        assert first.result(timeout=5)[1][0, 0] == 2
+        deadline = time.perf_counter() + 5
+        while pipeline.get_stats()['pending'] and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert pipeline.get_stats()['pending'] == 0
+        assert decoded == [b'1']
+    finally:
+        release.set()
+        pipeline.stop()
+
+
+def test_cancel_during_inference_keeps_stages_alive():
+    """Cancelar o Future com o item já no modelo não derruba o estágio; o pipeline segue atendendo"""
+    held = []
+
+    def held_inference(array):
+        future = Future()
+        held.append((future, array))
+        return future
+
+    pipeline = AsyncPredictionPipeline(decode_value, held_inference, decode_workers=1).start()
+    try:
+        first = pipeline.submit(b'1')
+        deadline = time.perf_counter() + 5
+        while not held and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert first.cancel()
+        inference, array = held.pop()
+        inference.set_result(array * 2)  # resolve um Future já cancelado
+
+        second = pipeline.submit(b'4')
+        while not held and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        inference, array = held.pop()
+        inference.set_result(array * 2)
+        assert second.result(timeout=5)[1][0, 0] == 8
+        assert pipeline.get_stats()['pending'] == 0
+    finally:
+        pipeline.stop()
+
+
+def test_cancelled_inference_releases_item():
+    """Future de inferência cancelado vira erro no item e devolve a vaga de admissão"""
+    def cancelled_inference(array):
+        future = Future()
+        future.cancel()
+        return future
+
+    pipeline = AsyncPredictionPipeline(decode_value, cancelled_inference, decode_workers=1, max_pending=1).start()
+    try:
+        try:
+            pipeline.submit(b'1').result(timeout=5)
+        except RuntimeError as e:
+            assert "cancelada" in str(e)
+        else:
+            raise AssertionError("deveria falhar com a inferência cancelada")
+        stats = pipeline.get_stats()
+        assert stats['pending'] == 0 and stats['errors'] == 1
+        pipeline.submit(b'2', infer=False).result(timeout=5)  # a vaga voltou
+    finally:
+        pipeline.stop()
+
+
+def test_submit_racing_stop():
+    """Submissões concorrentes com stop() são recusadas ou resolvidas; nenhuma fica pendurada"""
+    pipeline = AsyncPredictionPipeline(decode_value, double_inference, decode_workers=2,
+                                       max_pending=10000).start()
+    accepted = []
+    refused = []
+
+    def producer():
+        for i in range(300):
+            try:
+                accepted.append(pipeline.submit(str(i).encode()))
+            except RuntimeError:
+                refused.append(i)
+
+    threads = [threading.Thread(target=producer) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.005)
+    pipeline.stop()
+    for thread in threads:
+        thread.join()
+
+    for future in accepted:
+        try:
+            future.result(timeout=5)
+        except RuntimeError as e:
+            assert "encerrado" in str(e)
+    assert len(accepted) + len(refused) == 900
+    assert pipeline.get_stats()['pending'] == 0
+    try:
+        pipeline.submit(b'1')
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("submit após stop deveria falhar")
+
+
+def test_backpressure_rejects_excess():
+    """Com max_pending itens em processamento, novas submissões são recusadas na hora"""
+    release = threading.Event()
+
+    def blocked_decode(data):
+        release.wait(5)
+        return decode_value(data)
+
+    pipeline = AsyncPredictionPipeline(blocked_decode, double_inference, decode_workers=1, max_pending=3).start()
+    try:
+        futures = [pipeline.submit(str(i).encode()) for i in range(3)]
+        try:
+            pipeline.submit(b'9')
+        except PipelineOverloaded:
+            pass
+        else:
+            raise AssertionError("deveria recusar acima de max_pending")
+        release.set()
+        assert [f.result(timeout=5)[0][0, 0] for f in futures] == [0, 1, 2]
+        assert pipeline.get_stats()['rejected'] == 1
+    finally:
+        release.set()
+        pipeline.stop()
+
+
+def test_process_pool_uses_spawn():
+    """Decodificação em processos 'spawn' com o kernel canônico dá o mesmo array da thread"""
+    ok, buffer = cv2.imencode('.png', synthetic_mri((96, 96, 3), seed=3))
+    data = buffer.tobytes()
+    pipeline = AsyncPredictionPipeline(preprocess_mri_bytes, decode_workers=1, use_processes=True).start()
+    try:
+        assert pipeline._executor._mp_context.get_start_method() == 'spawn'
+        array, predictions = pipeline.submit(data).result(timeout=60)
+    finally:
+        pipeline.stop()
+    assert predictions is None
+    assert np.array_equal(array, preprocess_mri_bytes(data))
+
+
+def main():
+    """Executa todos os testes do pipeline assíncrono"""
+    print("🧪 TESTES DO PIPELINE DE UPLOAD")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,174 @@
+"""
+Testes de paridade numérica entre os runtimes de inferência (src/inference_backends.py)
+
+Um modelo pequeno (mesma estrutura dos CNNs do projeto) é salvo como .h5,
+exportado por src/model_export.py e executado em cada backend sobre imagens
+preprocessadas pelo kernel canônico. O backend ONNX só é testado quando
+onnxruntime e tf2onnx estão instalados (são opcionais).
+"""
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import importlib.util
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import tensorflow as tf
+from mri_preprocessing import preprocess_mri
+from inference_engine import InferenceBackend
+from inference_backends import BACKENDS, detect_backend, exported_path, load_backend, resolve_model_path
+from model_export import export_model, PARITY_TOLERANCE
+from test_mri_preprocessing import synthetic_mri
+
+ONNX_AVAILABLE = all(importlib.util.find_spec(m) for m in ('onnxruntime', 'tf2onnx'))
+
+_state = {}
+
+
+def setup_models():
+    """Salva o modelo de teste e exporta para todos os formatos disponíveis (uma vez)"""
+    if 'h5_path' not in _state:
+        tmp = tempfile.mkdtemp(prefix='neuroai_backends_')
+        atexit.register(shutil.rmtree, tmp, True)
+        tf.random.set_seed(0)
+        model = tf.keras.Sequential([
+            tf.keras.Input((64, 64, 3)),
+            tf.keras.layers.Conv2D(8, 3, activation='relu'),
+            tf.keras.layers.BatchNormalization(),
+            tf.keras.layers.MaxPooling2D(2),
+            tf.keras.layers.Conv2D(16, 3, activation='relu'),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(1, activation='sigmoid')
+        ])
+        h5_path = os.path.join(tmp, 'modelo.h5')
+        model.save(h5_path)
+
+        formats = ['savedmodel', 'tflite'] + (['onnx'] if ONNX_AVAILABLE else [])
+        _state.update(
+            tmp=tmp,
+            h5_path=h5_path,
+            exported=export_model(h5_path, formats),
+            images=np.concatenate([
+                preprocess_mri(synthetic_mri((256, 256, 3), seed=i), (64, 64)) for i in range(6)
+            ])
+        )
+    return _state
+
+
+def check_parity(backend):
+    state = setup_models()
+    reference = load_backend(state['h5_path'], 'keras').predict(state['images'])
+    engine = load_backend(state['h5_path'], backend)
+    assert isinstance(engine, InferenceBackend) and engine.name == backend
+    assert engine.input_shape == (64, 64, 3)
+    result = engine.predict(state['images'])
+    assert result.shape == reference.shape and result.dtype == np.float32
+    diff = np.abs(result - reference).max()
+    assert diff <= PARITY_TOLERANCE[backend], (backend, diff)
+    # Lote de 1 e lote completo dão o mesmo resultado por item
+    assert np.allclose(engine.predict_single(state['images'][2]), result[2], atol=1e-5)
+
+
+def test_savedmodel_parity():
+    """SavedModel exportado == Keras"""
+    check_parity('savedmodel')
+
+
+def test_tflite_parity():
+    """TFLite (faixa dinâmica) ≈ Keras"""
+    check_parity('tflite')
+
+
+def test_onnx_parity():
+    """ONNX Runtime ≈ Keras (opcional)"""
+    if not ONNX_AVAILABLE:
+        print("      (onnxruntime/tf2onnx não instalados: ignorado)")
+        return
+    check_parity('onnx')
+
+
+def test_tta_uses_backend():
+    """predict_tta vem da interface comum e funciona em qualquer backend"""
+    state = setup_models()
+    keras_tta = load_backend(state['h5_path'], 'keras').predict_tta(state['images'][:2])
+    saved_tta = load_backend(state['h5_path'], 'savedmodel').predict_tta(state['images'][:2])
+    assert np.allclose(keras_tta, saved_tta, atol=1e-5)
+
+
+def test_backend_resolution():
+    """Tipo do arquivo define o backend; backend explícito + .h5 usa o arquivo exportado"""
+    state = setup_models()
+    h5_path = state['h5_path']
+    assert detect_backend(h5_path) == 'keras'
+    assert detect_backend(exported_path(h5_path, 'savedmodel')) == 'savedmodel'
+    assert detect_backend(exported_path(h5_path, 'tflite')) == 'tflite'
+    assert resolve_model_path(h5_path, 'tflite') == ('tflite', exported_path(h5_path, 'tflite'))
+    assert set(BACKENDS) == {'keras', 'savedmodel', 'tflite', 'onnx'}
+    try:
+        load_backend(h5_path, 'desconhecido')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar backend desconhecido")
+
+
+def test_missing_export_reports_command():
+    """Backend sem arquivo exportado gera FileNotFoundError com a instrução de exportação"""
+    state = setup_models()
+    other = os.path.join(state['tmp'], 'sem_export.h5')
+    shutil.copy(state['h5_path'], other)
+    try:
+        load_backend(other, 'savedmodel')
+    except FileNotFoundError as e:
+        assert 'model_export.py' in str(e)
+        return
+    raise AssertionError("deveria indicar que falta exportar")
+
+
+def test_divergent_export_is_removed():
+    """Exportação reprovada na conferência não fica no disco (nem a anterior, já desatualizada)"""
+    state = setup_models()
+    other = os.path.join(state['tmp'], 'divergente.h5')
+    shutil.copy(state['h5_path'], other)
+    stale = exported_path(other, 'tflite')
+    with open(stale, 'wb') as f:
+        f.write(b'exportacao antiga')
+
+    tolerance = PARITY_TOLERANCE['tflite']
+    PARITY_TOLERANCE['tflite'] = -1.0  # qualquer diferença reprova
+    try:
+        exported = export_model(other, ['tflite'])
+    finally:
+        PARITY_TOLERANCE['tflite'] = tolerance
+    assert exported == {}
+    assert not os.path.exists(stale)
+    assert not any('.partial' in name for name in os.listdir(state['tmp']))
+
+    assert export_model(other, ['tflite']) == {'tflite': stale}
+    assert load_backend(other, 'tflite').predict(state['images']).shape == (len(state['images']), 1)
+
+
+def main():
+    """Executa todos os testes de paridade entre backends"""
+    print("🧪 TESTES DE PARIDADE ENTRE BACKENDS")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,172 @@
+"""
+Testes do executor de tarefas em segundo plano da interface (src/background_tasks.py)
+
+O root.after do Tk é substituído por um agendador que guarda os callbacks;
+o teste faz o papel do loop da interface chamando-os na thread principal.
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from background_tasks import BackgroundRunner, TaskCancelled
+
+
+class FakeLoop:
+    """Imita root.after: callbacks agendados são executados por run_until"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback, *args):
+        self.callbacks.append((callback, args))
+
+    def run_until(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "tempo esgotado esperando a tarefa"
+            pending, self.callbacks = self.callbacks, []
+            for callback, args in pending:
+                callback(*args)
+            time.sleep(0.005)
+
+
+def test_result_delivered_on_main_thread():
+    """Função roda no pool; on_done roda na thread que processa o loop"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    main_thread = threading.get_ident()
+    seen = {}
+
+    def work(task, x):
+        seen['worker'] = threading.get_ident()
+        return x * 2
+
+    def on_done(result):
+        seen['result'] = result
+        seen['callback'] = threading.get_ident()
+
+    task = runner.submit(work, 21, on_done=on_done)
+    loop.run_until(lambda: task.done)
+    assert seen['result'] == 42
+    assert seen['worker'] != main_thread and seen['callback'] == main_thread
+    assert not runner.busy
+    runner.shutdown()
+
+
+def test_progress_is_reported():
+    """Progresso chega à interface; eventos acumulados entregam só o último"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    updates = []
+    release = threading.Event()
+
+    def work(task, total):
+        for i in range(total):
+            task.report(i + 1, total, f"{i + 1}/{total}")
+        release.wait(5)
+        return total
+
+    task = runner.submit(work, 50, on_progress=lambda done, total, msg: updates.append((done, total, msg)))
+    time.sleep(0.1)  # todos os eventos de progresso já estão na fila
+    loop.run_until(lambda: bool(updates))
+    release.set()
+    loop.run_until(lambda: task.done)
+    assert updates[0] == (50, 50, "50/50") and len(updates) == 1
+    runner.shutdown()
+
+
+def test_cancellation_stops_task():
+    """cancel() interrompe a tarefa na próxima verificação e chama on_cancel"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    steps = []
+    outcome = []
+    started = threading.Event()
+
+    def work(task):
+        for i in range(1000):
+            task.check_cancelled()
+            steps.append(i)
+            started.set()
+            time.sleep(0.001)
+        return 'terminou'
+
+    task = runner.submit(work, on_done=outcome.append, on_cancel=lambda: outcome.append('cancelada'))
+    started.wait(5)
+    task.cancel()
+    loop.run_until(lambda: task.done)
+    assert outcome == ['cancelada']
+    assert len(steps) < 1000
+    runner.shutdown()
+
+
+def test_result_after_cancel_is_discarded():
+    """Tarefa que termina depois do pedido de cancelamento não entrega resultado"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    outcome = []
+    release = threading.Event()
+
+    def work(task):
+        release.wait(5)  # não verifica o cancelamento
+        return 'resultado'
+
+    task = runner.submit(work, on_done=outcome.append, on_cancel=lambda: outcome.append('cancelada'))
+    task.cancel()
+    release.set()
+    loop.run_until(lambda: task.done)
+    assert outcome == ['cancelada']
+    runner.shutdown()
+
+
+def test_errors_reach_callback():
+    """Exceção da tarefa vai para on_error na thread principal"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    errors = []
+
+    def work(task):
+        raise ValueError("imagem inválida")
+
+    task = runner.submit(work, on_error=errors.append)
+    loop.run_until(lambda: task.done)
+    assert isinstance(errors[0], ValueError) and str(errors[0]) == "imagem inválida"
+    assert not isinstance(errors[0], TaskCancelled)
+    runner.shutdown()
+
+
+def test_polling_stops_when_idle():
+    """Sem tarefas ativas o loop não é reagendado"""
+    loop = FakeLoop()
+    runner = BackgroundRunner(loop.after)
+    task = runner.submit(lambda task: None)
+    loop.run_until(lambda: task.done)
+    loop.run_until(lambda: not loop.callbacks)
+    runner.poll()
+    assert not loop.callbacks
+    runner.shutdown()
+
+
+def main():
+    """Executa todos os testes do executor em segundo plano"""
+    print("🧪 TESTES DAS TAREFAS EM SEGUNDO PLANO")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
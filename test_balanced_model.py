@@ -3,35 +3,19 @@ Teste do modelo balanceado com limiar ajustado
 """
 import os
 import cv2
+import sys
 import numpy as np
-from tensorflow.keras.models import load_model
 import random
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from inference_engine import InferenceEngine
+from mri_preprocessing import preprocess_mri
+
 def preprocess_image(img):
     """Pré-processa imagem igual ao modelo"""
-    h, w = img.shape[:2]
-    margin_h = int(h * 0.10)
-    margin_w = int(w * 0.10)
-    cropped = img[margin_h:h-margin_h, margin_w:w-margin_w]
-    
-    if len(cropped.shape) == 3:
-        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = cropped
-    
-    try:
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray = clahe.apply(gray)
-    except:
-        gray = cv2.equalizeHist(gray)
-    
-    gray = gray.astype(np.float32) / 255.0
-    img_rgb = np.stack([gray, gray, gray], axis=-1)
-    img_resized = cv2.resize(img_rgb, (128, 128))
-    img_processed = np.expand_dims(img_resized, axis=0)
-    return img_processed
+    return preprocess_mri(img, (128, 128))
 
-def test_category(model, category_path, category_name, expected_label, threshold=0.4, num_samples=5):
+def test_category(engine, category_path, category_name, expected_label, threshold=0.4, num_samples=5):
     """Testa uma categoria específica"""
     print(f"\n🧪 TESTANDO {category_name.upper()} (limiar {threshold}):")
     print("=" * 50)
@@ -69,7 +53,7 @@ def test_category(model, category_path, category_name, expected_label, threshold
             img_processed = preprocess_image(img)
             
             # Fazer predição
-            prediction = model.predict(img_processed, verbose=0)[0][0]
+            prediction = engine.predict(img_processed)[0][0]
             predictions.append(prediction)
             
             # Classificar com limiar ajustado
@@ -128,7 +112,7 @@ def main():
         print("❌ Modelo balanceado não encontrado!")
         return
     
-    model = load_model(model_path)
+    engine = InferenceEngine.from_path(model_path)
     print(f"✅ Modelo carregado: {model_path}")
     
     # Definir categorias para teste
@@ -146,7 +130,7 @@ def main():
     # Testar cada categoria
     for category_path, category_name, expected_label in test_categories:
         predictions, correct, samples = test_category(
-            model, category_path, category_name, expected_label, threshold=0.4, num_samples=10
+            engine, category_path, category_name, expected_label, threshold=0.4, num_samples=10
         )
         
         total_correct += correct
@@ -176,7 +160,7 @@ def main():
     # Teste de viés
     print(f"\n🔍 TESTE DE VIÉS:")
     noise_img = np.random.random((1, 128, 128, 3))
-    noise_pred = model.predict(noise_img, verbose=0)[0][0]
+    noise_pred = engine.predict(noise_img)[0][0]
     print(f"Ruído aleatório: {noise_pred:.4f} ({noise_pred*100:.1f}%)")
     
     if 0.1 < noise_pred < 0.9:
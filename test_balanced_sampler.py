@@ -0,0 +1,152 @@
+"""
+Testes da amostragem balanceada por classe (src/balanced_sampler.py)
+
+Dataset sintético no layout datasets/brain_cancer/{Training,Testing}/<categoria>,
+desbalanceado (notumor em minoria) e com um arquivo ilegível.
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from balanced_sampler import BalancedSampler, list_category_images
+from test_dataset_ingestion import legacy_load
+from test_mri_preprocessing import synthetic_mri
+
+IMG_SIZE = (32, 24)
+COUNTS = {'notumor': 3, 'glioma': 6, 'meningioma': 4, 'pituitary': 2}
+
+
+def make_brain_dataset(root):
+    """Training e Testing com COUNTS imagens por categoria, mais um JPEG corrompido"""
+    dataset_path = os.path.join(root, 'brain_cancer')
+    for s, split in enumerate(('Training', 'Testing')):
+        for c, (category, count) in enumerate(COUNTS.items()):
+            folder = os.path.join(dataset_path, split, category)
+            os.makedirs(folder)
+            for i in range(count):
+                img = synthetic_mri((40 + 3 * i, 50, 3), seed=100 * s + 10 * c + i)
+                cv2.imwrite(os.path.join(folder, f"{category}_{i:02d}.{'png' if i % 2 else 'jpg'}"), img)
+    with open(os.path.join(dataset_path, 'Testing', 'glioma', 'glioma_99.jpg'), 'wb') as f:
+        f.write(b'\xff\xd8 corrompido')
+    return dataset_path
+
+
+def with_brain_dataset(test):
+    def wrapper():
+        tmp = tempfile.mkdtemp(prefix='neuroai_sampler_test_')
+        try:
+            test(make_brain_dataset(tmp), os.path.join(tmp, 'cache'))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+@with_brain_dataset
+def test_random_capped_listing(dataset_path, cache_dir):
+    """Até max_per_category por pasta, sorteados (não os primeiros), reprodutível pela semente"""
+    paths, labels, categories = list_category_images(dataset_path, max_per_category=3, seed=1)
+    for split in ('Training', 'Testing'):
+        for category, count in COUNTS.items():
+            chosen = [p for p in paths if os.path.join(split, category) in p]
+            assert len(chosen) == min(count, 3)
+    assert labels[[c == 'notumor' for c in categories]].tolist() == [0] * 6
+    assert set(labels[[c != 'notumor' for c in categories]].tolist()) == {1}
+
+    again, _, _ = list_category_images(dataset_path, max_per_category=3, seed=1)
+    assert again == paths
+    glioma = [[p for p in list_category_images(dataset_path, max_per_category=3, seed=seed)[0]
+               if os.path.join('Training', 'glioma') in p] for seed in range(6)]
+    assert any(g != glioma[0] for g in glioma)
+
+
+@with_brain_dataset
+def test_pixels_match_legacy_loader(dataset_path, cache_dir):
+    """Mesmas imagens do load_balanced_data anterior (imread, RGB, resize, /255); ilegível descartado"""
+    sampler = BalancedSampler(dataset_path, img_size=IMG_SIZE, workers=1, cache_dir=cache_dir, verbose=False)
+    assert len(sampler) == 2 * sum(COUNTS.values())
+    assert not any(p.endswith('glioma_99.jpg') for p in sampler.paths)
+
+    X, y = sampler.load()
+    assert X.dtype == np.float32 and X.shape == (len(sampler), IMG_SIZE[1], IMG_SIZE[0], 3)
+    for i in (0, 5, len(sampler) - 1):
+        assert np.array_equal(X[i], legacy_load(sampler.paths[i], IMG_SIZE))
+    assert sampler.class_counts() == {0: 6, 1: 24}
+
+
+@with_brain_dataset
+def test_epochs_are_balanced(dataset_path, cache_dir):
+    """Oversampling usa todas as imagens e repete a minoria; undersampling reamostra a maioria a cada época"""
+    sampler = BalancedSampler(dataset_path, img_size=IMG_SIZE, workers=1, cache_dir=cache_dir, verbose=False)
+    rng = np.random.default_rng(0)
+
+    over = sampler.epoch_indices(strategy='oversample', rng=rng)
+    assert sampler.class_counts(over) == {0: 24, 1: 24}
+    assert set(over.tolist()) == set(range(len(sampler)))
+
+    epochs = [sampler.epoch_indices(strategy='undersample', rng=rng) for _ in range(3)]
+    for epoch in epochs:
+        assert sampler.class_counts(epoch) == {0: 6, 1: 6} and len(set(epoch.tolist())) == 12
+    assert len({tuple(sorted(epoch.tolist())) for epoch in epochs}) > 1
+
+    none = sampler.epoch_indices(strategy='none', rng=rng)
+    assert sorted(none.tolist()) == list(range(len(sampler)))
+    try:
+        BalancedSampler(dataset_path, strategy='smote', cache_dir=cache_dir, verbose=False)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar estratégia desconhecida")
+
+
+@with_brain_dataset
+def test_split_and_streams(dataset_path, cache_dir):
+    """Divisão estratificada; batches e dataset tf.data entregam épocas equilibradas do treino"""
+    sampler = BalancedSampler(dataset_path, img_size=IMG_SIZE, workers=1, cache_dir=cache_dir, verbose=False)
+    train, val, test = sampler.split(test_size=0.2, val_size=0.2)
+    assert len(train) + len(val) + len(test) == len(sampler)
+    assert not (set(train) & set(val) or set(train) & set(test) or set(val) & set(test))
+    assert sampler.class_counts(test) == {0: 1, 1: 5}
+
+    steps = sampler.steps_per_epoch(train, batch_size=5)
+    first_epoch = list(sampler.batches(train, batch_size=5, epochs=1))
+    assert len(first_epoch) == steps
+    labels = np.concatenate([y for _, y in first_epoch])
+    assert np.bincount(labels).tolist() == [sampler.class_counts(train)[1]] * 2
+    for X, y in first_epoch:
+        assert X.dtype == np.float32 and X.max() <= 1.0
+
+    dataset = sampler.dataset(train, batch_size=5)
+    streamed = [y.numpy() for _, y in dataset.take(steps)]
+    assert np.bincount(np.concatenate(streamed)).tolist() == np.bincount(labels).tolist()
+    images, _ = next(iter(dataset))
+    assert images.dtype.name == 'float32' and images.shape[1:] == (IMG_SIZE[1], IMG_SIZE[0], 3)
+
+
+def main():
+    """Executa todos os testes da amostragem balanceada"""
+    print("🧪 TESTES DA AMOSTRAGEM BALANCEADA")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,269 @@
+"""
+Testes da predição em lote com streaming (src/batch_predict.py)
+
+Usa o CancerPredictor com um motor falso (sem TensorFlow) no lugar do modelo.
+Os testes de Parquet rodam só quando o pyarrow está instalado (é opcional).
+"""
+import os
+import csv
+import sys
+import tempfile
+import importlib.util
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from predict import CancerPredictor
+from batch_predict import (scan_images, prefetch, run_batch_prediction, default_output_path,
+                           CsvResultWriter, ParquetResultWriter)
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+class StandInEngine:
+    def __init__(self, fail_on_call=None, error=KeyboardInterrupt):
+        self.calls = 0
+        self.batch_sizes = []
+        self.fail_on_call = fail_on_call
+        self.error = error
+
+    def predict(self, batch):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise self.error
+        self.batch_sizes.append(len(batch))
+        return batch.mean(axis=(1, 2, 3))[:, None]
+
+
+def stand_in_predictor(engine=None, model_path=None):
+    """CancerPredictor sem modelo carregado, com lote pequeno e o motor falso"""
+    predictor = CancerPredictor()
+    predictor.engine = engine or StandInEngine()
+    predictor.model_path = model_path
+    predictor.img_size = (32, 32)
+    return predictor
+
+
+def make_folder(root, count=10):
+    """Pasta com `count` imagens (metade em subpasta) e um arquivo corrompido"""
+    os.makedirs(os.path.join(root, 'sub'))
+    for i in range(count):
+        value = 40 + 20 * i
+        image = np.full((64, 64), value, dtype=np.uint8)
+        folder = root if i % 2 == 0 else os.path.join(root, 'sub')
+        cv2.imwrite(os.path.join(folder, f"img{i:02d}.png"), image)
+    with open(os.path.join(root, 'corrompida.jpg'), 'wb') as f:
+        f.write(b'nao e imagem')
+    with open(os.path.join(root, 'notas.txt'), 'w') as f:
+        f.write('ignorado')
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_scan_is_ordered_and_optionally_recursive():
+    """Só a própria pasta por padrão; recursive=True inclui subpastas; só imagens, em ordem estável"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_folder(tmp)
+        top = list(scan_images(tmp))
+        assert len(top) == 6 and not any(os.sep + 'sub' + os.sep in p for p in top)
+        paths = list(scan_images(tmp, recursive=True))
+        assert len(paths) == 11
+        assert paths == list(scan_images(tmp, recursive=True))
+        assert not any(p.endswith('.txt') for p in paths)
+
+
+def test_streams_batches_and_records_errors():
+    """Uma chamada ao modelo por lote; erros viram linhas com a coluna error"""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_folder(os.path.join(tmp, 'imgs'))
+        output = os.path.join(tmp, 'out', 'preds.csv')
+        engine = StandInEngine()
+        summary = run_batch_prediction(stand_in_predictor(engine), os.path.join(tmp, 'imgs'),
+                                       output=output, batch_size=4, recursive=True)
+
+        rows = read_rows(output)
+        assert summary['processed'] == 11 and summary['errors'] == 1
+        assert engine.calls == 3 and sum(engine.batch_sizes) == 10
+        assert [r['image_name'] for r in rows if r['error']] == ['corrompida.jpg']
+        assert all(r['class_name'] in ('Benigno', 'Maligno') for r in rows if not r['error'])
+
+
+def test_resume_after_interruption():
+    """Interrompido no meio: a segunda execução só processa o que falta, sem duplicatas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder)
+        output = os.path.join(tmp, 'preds.csv')
+
+        try:
+            run_batch_prediction(stand_in_predictor(StandInEngine(fail_on_call=2)), folder,
+                                 output=output, batch_size=4, recursive=True)
+            raise AssertionError("deveria ter sido interrompido")
+        except KeyboardInterrupt:
+            pass
+        assert len(read_rows(output)) == 4
+
+        # Linha final cortada no meio da escrita
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write('img99.png,/caminho/cortado')
+
+        summary = run_batch_prediction(stand_in_predictor(StandInEngine()), folder,
+                                       output=output, batch_size=4, recursive=True)
+        rows = read_rows(output)
+        paths = [r['image_path'] for r in rows]
+        assert summary['skipped'] == 4 and summary['processed'] == 7
+        assert len(paths) == len(set(paths)) == 11
+        assert '/caminho/cortado' not in paths
+
+
+def test_no_resume_overwrites():
+    """resume=False reprocessa tudo e sobrescreve a saída"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder, count=3)
+        output = os.path.join(tmp, 'preds.csv')
+        run_batch_prediction(stand_in_predictor(StandInEngine()), folder, output=output, recursive=True)
+        summary = run_batch_prediction(stand_in_predictor(StandInEngine()), folder,
+                                       output=output, resume=False, recursive=True)
+        assert summary['skipped'] == 0 and len(read_rows(output)) == 4
+
+
+def test_inference_error_becomes_rows():
+    """Exceção do modelo em um lote vira a coluna error das imagens dele; os outros lotes seguem"""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder)
+        output = os.path.join(tmp, 'preds.csv')
+        engine = StandInEngine(fail_on_call=2, error=RuntimeError("memória insuficiente"))
+        summary = run_batch_prediction(stand_in_predictor(engine), folder, output=output,
+                                       batch_size=4, recursive=True)
+
+        rows = read_rows(output)
+        failed = [r for r in rows if 'memória insuficiente' in r['error']]
+        assert summary['processed'] == 11 and len(failed) == 4
+        assert all(r['class_name'] == '' for r in failed)
+        assert summary['errors'] == 5  # 4 do lote com falha + a imagem corrompida
+
+
+def test_default_output_is_per_model():
+    """Cada modelo tem a própria saída padrão, então retomar não reaproveita outro modelo"""
+    assert default_output_path('models/brain_cancer_final.h5') == os.path.join(
+        'results', 'batch_predictions_brain_cancer_final_h5.csv')
+    assert default_output_path('models/brain_cancer_final.tflite') != default_output_path('models/brain_cancer_final.h5')
+    assert default_output_path('models/brain_cancer_final_savedmodel/', 'parquet') == os.path.join(
+        'results', 'batch_predictions_brain_cancer_final_savedmodel_parquet')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder, count=3)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            first = run_batch_prediction(stand_in_predictor(StandInEngine(), 'models/a.h5'), folder)
+            second = run_batch_prediction(stand_in_predictor(StandInEngine(), 'models/b.h5'), folder)
+        finally:
+            os.chdir(cwd)
+        assert first['output'] != second['output']
+        assert second['skipped'] == 0 and second['processed'] == first['processed'] == 3
+
+
+def test_parquet_part_per_batch_survives_interruption():
+    """Cada lote vira uma parte Parquet fechada: uma interrupção perde só o lote em andamento"""
+    if not PYARROW_AVAILABLE:
+        print("      (pyarrow não instalado: ignorado)")
+        return
+    import pyarrow.parquet as pq
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder)
+        output = os.path.join(tmp, 'preds_parquet')
+        try:
+            run_batch_prediction(stand_in_predictor(StandInEngine(fail_on_call=3)), folder, output=output,
+                                 fmt='parquet', batch_size=4, recursive=True)
+        except KeyboardInterrupt:
+            pass
+        else:
+            raise AssertionError("o motor deveria interromper a execução")
+        assert ParquetResultWriter.part_files(output) == ['part-00000.parquet', 'part-00001.parquet']
+        assert len(ParquetResultWriter.processed_paths(output)) == 8
+
+        summary = run_batch_prediction(stand_in_predictor(), folder, output=output, fmt='parquet',
+                                       batch_size=4, recursive=True)
+        assert summary['skipped'] == 8 and summary['processed'] == 3
+        paths = pq.read_table(output).column('image_path').to_pylist()
+        assert sorted(paths) == sorted(scan_images(folder, recursive=True))
+
+
+def test_parquet_unreadable_part_is_removed():
+    """Parte ilegível e temporário órfão são apagados ao retomar; os itens deles são refeitos"""
+    if not PYARROW_AVAILABLE:
+        print("      (pyarrow não instalado: ignorado)")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'imgs')
+        make_folder(folder, count=4)
+        output = os.path.join(tmp, 'preds_parquet')
+        run_batch_prediction(stand_in_predictor(), folder, output=output, fmt='parquet', batch_size=2)
+        with open(os.path.join(output, 'part-00001.parquet'), 'wb') as f:
+            f.write(b'PAR1 sem rodape')
+        with open(os.path.join(output, '.part-00002.parquet.tmp'), 'wb') as f:
+            f.write(b'PAR1')
+
+        summary = run_batch_prediction(stand_in_predictor(), folder, output=output, fmt='parquet',
+                                       batch_size=2)
+        assert summary['skipped'] == 2 and summary['processed'] == 1
+        assert sorted(os.listdir(output)) == ['part-00000.parquet', 'part-00001.parquet']
+
+
+def test_prefetch_propagates_errors():
+    """Exceções do produtor chegam ao consumidor"""
+    def producer():
+        yield 1
+        raise ValueError("falhou")
+
+    received = []
+    try:
+        for item in prefetch(producer()):
+            received.append(item)
+    except ValueError:
+        assert received == [1]
+        return
+    raise AssertionError("deveria repassar a exceção")
+
+
+def test_repair_tail_keeps_complete_lines():
+    """Só a última linha incompleta é descartada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'x.csv')
+        with open(path, 'w') as f:
+            f.write('a,b\n1,2\n3,')
+        CsvResultWriter.repair_tail(path)
+        with open(path) as f:
+            assert f.read() == 'a,b\n1,2\n'
+
+
+def main():
+    """Executa todos os testes da predição em lote"""
+    print("🧪 TESTES DA PREDIÇÃO EM LOTE (STREAMING)")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
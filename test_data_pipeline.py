@@ -0,0 +1,153 @@
+"""
+Testes do pipeline de entrada tf.data (src/data_pipeline.py)
+
+A augmentation vetorizada é comparada com apply_affine_transform do Keras (a
+transformação usada por ImageDataGenerator, requer scipy) e com rotações e
+espelhamentos exatos do numpy.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import tensorflow as tf
+from data_pipeline import (affine_transforms, augment_batch, dataset_from_arrays,
+                           dataset_from_files, dataset_from_shards)
+from dataset_ingestion import ingest_images
+from preprocessing import CancerImagePreprocessor
+from test_dataset_ingestion import IMG_SIZE, list_paths, make_dataset
+
+NO_AUGMENTATION = {'rotation_range': 0, 'width_shift_range': 0, 'height_shift_range': 0,
+                   'shear_range': 0, 'zoom_range': 0, 'horizontal_flip': False}
+
+
+def smooth_image(size=45):
+    """Imagem suave e assimétrica: a interpolação bilinear não esconde erros de convenção"""
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    return np.stack([np.sin(xx / 5) + yy / 40, np.cos(yy / 7), xx * yy / 2000], axis=-1)
+
+
+def transform(image, theta=0, tx=0, ty=0, shear=0, zx=1, zy=1, flip=False):
+    """Aplica uma transformação explícita (ângulos em graus) com o kernel do pipeline"""
+    params = [tf.constant([value], tf.float32) for value in (np.deg2rad(theta), tx, ty, np.deg2rad(shear), zx, zy)]
+    transforms = affine_transforms(*params, tf.constant([flip]), image.shape[0], image.shape[1])
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=image[None], transforms=transforms, output_shape=image.shape[:2],
+        fill_value=0.0, interpolation='BILINEAR', fill_mode='NEAREST'
+    )[0].numpy()
+
+
+def test_exact_rotation_and_flip():
+    """90 graus = np.rot90 (anti-horário, como no Keras); flip = inverter as colunas; tx desloca colunas"""
+    image = smooth_image()
+    assert np.allclose(transform(image), image, atol=1e-6)
+    assert np.allclose(transform(image, theta=90), np.rot90(image), atol=1e-5)
+    assert np.allclose(transform(image, flip=True), image[:, ::-1], atol=1e-6)
+    assert np.allclose(transform(image, tx=3), np.concatenate([image[:, 3:], np.repeat(image[:, -1:], 3, 1)], 1),
+                       atol=1e-5)
+
+
+def test_matches_keras_affine_transform():
+    """Rotação, deslocamento, cisalhamento, zoom e fill 'nearest' iguais ao ImageDataGenerator"""
+    if importlib.util.find_spec('scipy') is None:
+        print("      (scipy ausente: comparação com o Keras ignorada)")
+        return
+    from keras.src.legacy.preprocessing.image import apply_affine_transform
+
+    image = smooth_image()
+    for theta, tx, ty, shear, zx, zy, flip in [(17, 4.3, -6.1, 0.2, 0.85, 1.12, False),
+                                              (-13, -3, 2, 10, 1.1, 0.9, True)]:
+        expected = apply_affine_transform(image, theta=theta, tx=tx, ty=ty, shear=shear, zx=zx, zy=zy,
+                                          row_axis=0, col_axis=1, channel_axis=2, fill_mode='nearest', order=1)
+        if flip:
+            expected = expected[:, ::-1]
+        assert np.allclose(transform(image, theta, tx, ty, shear, zx, zy, flip), expected, atol=1e-5)
+
+
+def test_augment_batch_is_per_image_and_seeded():
+    """Cada imagem do lote recebe sua transformação; mesma semente = mesmo lote"""
+    batch = tf.constant(np.stack([smooth_image()] * 6))
+    first = augment_batch(batch, tf.constant([1, 2])).numpy()
+    again = augment_batch(batch, tf.constant([1, 2])).numpy()
+    other = augment_batch(batch, tf.constant([3, 4])).numpy()
+    assert first.shape == batch.shape and first.dtype == np.float32
+    assert np.array_equal(first, again) and not np.array_equal(first, other)
+    assert len({first[i].tobytes() for i in range(6)}) == 6
+    assert np.array_equal(augment_batch(batch, tf.constant([1, 2]), NO_AUGMENTATION).numpy(), batch.numpy())
+
+
+def test_arrays_pipeline_epochs():
+    """Treino: cada amostra uma vez por época, ordem nova a cada época; validação intacta"""
+    rng = np.random.default_rng(0)
+    X = rng.random((21, 8, 8, 3), dtype=np.float32)
+    y = np.arange(21)
+
+    train = dataset_from_arrays(X, y, batch_size=4, training=True, augmentation=NO_AUGMENTATION, seed=5)
+    epochs = [np.concatenate([labels.numpy() for _, labels in train]) for _ in range(2)]
+    assert sorted(epochs[0]) == list(range(21)) and sorted(epochs[1]) == list(range(21))
+    assert not np.array_equal(epochs[0], epochs[1])
+    for images, labels in train:
+        assert np.array_equal(images.numpy(), X[labels.numpy()])
+
+    val = dataset_from_arrays(X, y, batch_size=4)
+    assert np.array_equal(np.concatenate([images.numpy() for images, _ in val]), X)
+
+    augmented = dataset_from_arrays(X, y, batch_size=4, training=True, seed=5)
+    images, labels = next(iter(augmented))
+    assert images.shape == (4, 8, 8, 3) and not np.array_equal(images.numpy(), X[labels.numpy()])
+
+
+def test_files_and_shards_sources():
+    """Arquivos (decodificação no grafo) e fatias dão as mesmas imagens da ingestão, normalizadas"""
+    tmp = tempfile.mkdtemp(prefix='neuroai_pipeline_test_')
+    try:
+        dataset_paths = make_dataset(tmp)
+        paths, labels = list_paths(dataset_paths, None)
+        images, failed = ingest_images(paths, IMG_SIZE, workers=1, cache_dir=None, verbose=False)
+        readable = [i for i in range(len(paths)) if i not in failed]
+        expected = images[readable].astype(np.float32) / 255.0
+
+        files = dataset_from_files([paths[i] for i in readable], [labels[i] for i in readable], IMG_SIZE, batch_size=5)
+        decoded = np.concatenate([batch.numpy() for batch, _ in files])
+        assert decoded.shape == expected.shape
+        assert np.abs(decoded - expected).max() <= 1.5 / 255  # arredondamento do resize
+
+        preprocessor = CancerImagePreprocessor(img_size=IMG_SIZE, workers=1, cache_dir=None)
+        shards = preprocessor.build_shards(dataset_paths, os.path.join(tmp, 'preprocessed'), shard_size=5)
+        sequential = dataset_from_shards(shards, batch_size=5)
+        assert np.array_equal(np.concatenate([batch.numpy() for batch, _ in sequential]), expected)
+        for cache in (False, True):
+            train = dataset_from_shards(shards, batch_size=5, training=True, augmentation=NO_AUGMENTATION,
+                                        seed=2, cache=cache)
+            for _ in range(2):
+                seen = np.concatenate([batch.numpy() for batch, _ in train])
+                assert sorted(map(bytes, seen)) == sorted(map(bytes, expected))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    """Executa todos os testes do pipeline tf.data"""
+    print("🧪 TESTES DO PIPELINE TF.DATA")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
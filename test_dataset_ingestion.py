@@ -0,0 +1,159 @@
+"""
+Testes da ingestão paralela e em cache dos datasets (src/dataset_ingestion.py)
+
+Um dataset sintético (JPEG e PNG de tamanhos variados, mais um arquivo
+corrompido) é carregado pelo CancerImagePreprocessor e comparado com o
+carregamento anterior, imagem por imagem (cv2.imread + cvtColor + resize + /255).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from dataset_ingestion import cache_key, ingest_images, normalize_images
+from preprocessing import CancerImagePreprocessor
+from test_mri_preprocessing import synthetic_mri
+
+IMG_SIZE = (48, 40)
+
+
+def legacy_load(img_path, img_size=IMG_SIZE):
+    """Carregamento anterior do CancerImagePreprocessor (_load_and_resize_image)"""
+    img = cv2.imread(img_path)
+    if img is None:
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, img_size)
+    return img.astype(np.float32) / 255.0
+
+
+def make_dataset(root):
+    """Dataset cerebral sintético: 2 classes, JPEG/PNG, um arquivo ilegível"""
+    for cls, count in (('glioma', 7), ('notumor', 5)):
+        folder = os.path.join(root, 'brain_cancer', 'Training', cls)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(count):
+            img = synthetic_mri((90 + 13 * i, 110 + 7 * i, 3), seed=i + (100 if cls == 'glioma' else 0))
+            ext = '.png' if i % 3 == 0 else '.jpg'
+            cv2.imwrite(os.path.join(folder, f"{cls}_{i}{ext}"), img)
+    with open(os.path.join(root, 'brain_cancer', 'Training', 'glioma', 'corrompida.jpg'), 'wb') as f:
+        f.write(b'\xff\xd8 isto nao e um jpeg')
+    return {'brain_cancer': os.path.join(root, 'brain_cancer')}
+
+
+def with_dataset(test):
+    """Cria dataset e diretório de cache temporários para o teste"""
+    def wrapper():
+        tmp = tempfile.mkdtemp(prefix='neuroai_ingest_test_')
+        try:
+            test(make_dataset(tmp), os.path.join(tmp, 'cache'))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+def list_paths(dataset_paths, cache_dir):
+    preprocessor = CancerImagePreprocessor(img_size=IMG_SIZE, cache_dir=cache_dir)
+    return preprocessor._list_cancer_type_images(dataset_paths['brain_cancer'], 'brain_cancer')
+
+
+@with_dataset
+def test_matches_legacy_loader(dataset_paths, cache_dir):
+    """Mesmos pixels, labels e ordem do carregamento anterior; arquivo ilegível descartado"""
+    preprocessor = CancerImagePreprocessor(img_size=IMG_SIZE, workers=1, cache_dir=cache_dir)
+    X, y, class_names = preprocessor.load_and_preprocess_images(dataset_paths)
+
+    paths, labels = list_paths(dataset_paths, cache_dir)
+    legacy = [(legacy_load(p), lab) for p, lab in zip(paths, labels)]
+    legacy = [(img, lab) for img, lab in legacy if img is not None]
+
+    assert class_names == ['brain_cancer']
+    assert X.dtype == np.float32 and X.shape == (12, IMG_SIZE[1], IMG_SIZE[0], 3)
+    assert np.array_equal(X, np.stack([img for img, _ in legacy]))
+    assert y.tolist() == [lab for _, lab in legacy]
+
+
+@with_dataset
+def test_second_run_uses_cache(dataset_paths, cache_dir):
+    """Dataset inalterado: a segunda ingestão abre o .npy sem decodificar"""
+    paths, _ = list_paths(dataset_paths, cache_dir)
+    first, failed = ingest_images(paths, IMG_SIZE, workers=1, cache_dir=cache_dir, verbose=False)
+    assert len(failed) == 1 and not first[failed[0]].any()
+
+    key = cache_key(paths, IMG_SIZE)
+    with open(os.path.join(cache_dir, f"images_{key}.json")) as f:
+        assert json.load(f)['failed'] == failed
+
+    # Decodificar de novo falharia: o cache precisa ser usado
+    original_imread = cv2.imread
+    cv2.imread = lambda *args, **kwargs: None
+    try:
+        second, second_failed = ingest_images(paths, IMG_SIZE, workers=1, cache_dir=cache_dir, verbose=False)
+    finally:
+        cv2.imread = original_imread
+    assert isinstance(second, np.memmap) and second_failed == failed
+    assert np.array_equal(np.asarray(first), np.asarray(second))
+
+
+@with_dataset
+def test_cache_invalidated_by_changes(dataset_paths, cache_dir):
+    """Arquivo alterado (mtime), arquivo novo ou outro img_size geram outra chave"""
+    paths, _ = list_paths(dataset_paths, cache_dir)
+    key = cache_key(paths, IMG_SIZE)
+    assert cache_key(paths, IMG_SIZE) == key
+    assert cache_key(paths, (IMG_SIZE[0] + 1, IMG_SIZE[1])) != key
+    assert cache_key(paths[:-1], IMG_SIZE) != key
+
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache_key(paths, IMG_SIZE) != key
+
+
+@with_dataset
+def test_process_pool_matches_single_process(dataset_paths, cache_dir):
+    """Pool de processos (fatias pequenas) produz o mesmo array que um processo só"""
+    paths, _ = list_paths(dataset_paths, cache_dir)
+    single, single_failed = ingest_images(paths, IMG_SIZE, workers=1, cache_dir=None, verbose=False)
+    pooled, pooled_failed = ingest_images(paths, IMG_SIZE, workers=2, chunk_size=3,
+                                          cache_dir=cache_dir, verbose=False)
+    assert single_failed == pooled_failed
+    assert np.array_equal(single, pooled)
+    assert not [f for f in os.listdir(cache_dir) if 'partial' in f]
+
+
+def test_normalize_images():
+    """uint8 -> float32 igual a astype(float32) / 255"""
+    images = np.random.default_rng(0).integers(0, 256, (3, 5, 7, 3), dtype=np.uint8)
+    assert np.array_equal(normalize_images(images), images.astype(np.float32) / 255.0)
+
+
+def main():
+    """Executa todos os testes de ingestão"""
+    print("🧪 TESTES DE INGESTÃO DO DATASET")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        start = time.perf_counter()
+        try:
+            test()
+            print(f"   ✅ {test.__name__} ({time.perf_counter() - start:.1f}s)")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
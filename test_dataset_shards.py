@@ -0,0 +1,159 @@
+"""
+Testes do dataset em fatias uint8 mapeadas em memória (src/dataset_shards.py)
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from dataset_shards import ShardedDataset, shards_exist, write_shards
+from preprocessing import CancerImagePreprocessor
+from test_dataset_ingestion import IMG_SIZE, make_dataset
+
+
+def sample_arrays(n=23, seed=0):
+    rng = np.random.default_rng(seed)
+    images = rng.integers(0, 256, (n, 6, 5, 3), dtype=np.uint8)
+    labels = rng.integers(0, 3, n)
+    sources = [f"img_{i}.jpg" for i in range(n)]
+    return images, labels, sources
+
+
+def with_tmp_dir(test):
+    def wrapper():
+        tmp = tempfile.mkdtemp(prefix='neuroai_shards_test_')
+        try:
+            test(tmp)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+@with_tmp_dir
+def test_roundtrip(tmp):
+    """Fatias, labels e origens voltam iguais; índice e fatias com o tamanho pedido"""
+    images, labels, sources = sample_arrays()
+    out_dir = os.path.join(tmp, 'preprocessed')
+    write_shards(out_dir, images, labels, class_names=['a', 'b', 'c'], sources=sources, shard_size=5)
+
+    assert shards_exist(out_dir)
+    dataset = ShardedDataset(out_dir)
+    assert len(dataset) == 23 and dataset.image_shape == (6, 5, 3)
+    assert [s['count'] for s in dataset.index['shards']] == [5, 5, 5, 5, 3]
+    assert dataset.class_names == ['a', 'b', 'c']
+    assert np.array_equal(dataset.labels, labels)
+    assert dataset.metadata['sources'] == sources
+    for i in (0, 4, 5, 17, 22, -1):
+        assert np.array_equal(dataset[i], images[i])
+
+
+@with_tmp_dir
+def test_random_access_is_zero_copy(tmp):
+    """Imagens vêm do memmap da fatia; os arquivos guardam uint8"""
+    images, labels, _ = sample_arrays()
+    out_dir = write_shards(os.path.join(tmp, 'preprocessed'), images, labels, shard_size=8)
+    dataset = ShardedDataset(out_dir)
+
+    image = dataset[10]
+    assert image.dtype == np.uint8
+    assert isinstance(dataset._shard(1), np.memmap) and np.shares_memory(image, dataset._shard(1))
+    shard_bytes = sum(os.path.getsize(os.path.join(out_dir, s['file'])) for s in dataset.index['shards'])
+    assert shard_bytes <= images.nbytes + 128 * len(dataset.index['shards'])
+    try:
+        dataset[23]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("deveria recusar índice fora do dataset")
+
+
+@with_tmp_dir
+def test_batches_normalize_on_the_fly(tmp):
+    """get_batch/batches devolvem float32 [0, 1] atravessando fatias, cada imagem uma vez por época"""
+    images, labels, _ = sample_arrays()
+    dataset = ShardedDataset(write_shards(os.path.join(tmp, 'preprocessed'), images, labels, shard_size=4))
+
+    picked = np.array([21, 3, 4, 9, 0])
+    X, y = dataset.get_batch(picked)
+    assert X.dtype == np.float32
+    assert np.array_equal(X, images[picked].astype(np.float32) / 255.0)
+    assert np.array_equal(y, labels[picked])
+
+    seen = []
+    for X, y in dataset.batches(batch_size=7, shuffle=True, seed=1):
+        assert len(X) <= 7 and X.max() <= 1.0
+        seen.extend(y.tolist())
+    assert sorted(seen) == sorted(labels.tolist())
+
+    raw, _ = dataset.get_batch([1, 2], normalize=False)
+    assert raw.dtype == np.uint8 and np.array_equal(raw, images[1:3])
+
+
+@with_tmp_dir
+def test_split_indices(tmp):
+    """Divisão estratificada, disjunta e cobrindo todo o dataset"""
+    images, _, _ = sample_arrays(n=40)
+    labels = np.array([0] * 30 + [1] * 10)
+    dataset = ShardedDataset(write_shards(os.path.join(tmp, 'preprocessed'), images, labels, shard_size=16))
+
+    train, val, test = dataset.split_indices(test_size=0.2, val_size=0.2)
+    assert len(train) + len(val) + len(test) == 40
+    assert not (set(train) & set(val) or set(train) & set(test) or set(val) & set(test))
+    assert np.bincount(labels[test]).tolist() == [6, 2]
+    assert np.bincount(labels[val]).tolist() == [6, 2]
+
+
+@with_tmp_dir
+def test_rewrite_replaces_dataset(tmp):
+    """Gravar de novo no mesmo diretório substitui as fatias antigas"""
+    images, labels, _ = sample_arrays()
+    out_dir = os.path.join(tmp, 'preprocessed')
+    write_shards(out_dir, images, labels, shard_size=2)
+    write_shards(out_dir, images[:6], labels[:6], shard_size=10)
+    dataset = ShardedDataset(out_dir)
+    assert len(dataset) == 6
+    assert sorted(os.listdir(out_dir)) == ['index.json', 'labels.npy', 'metadata.json', 'shard_00000.npy']
+    assert not [d for d in os.listdir(tmp) if d != 'preprocessed']
+
+
+@with_tmp_dir
+def test_build_shards_from_preprocessor(tmp):
+    """CancerImagePreprocessor.build_shards == load_and_preprocess_images em uint8, sem o arquivo ilegível"""
+    dataset_paths = make_dataset(tmp)
+    preprocessor = CancerImagePreprocessor(img_size=IMG_SIZE, workers=1, cache_dir=os.path.join(tmp, 'cache'))
+    X, y, class_names = preprocessor.load_and_preprocess_images(dataset_paths, dtype=np.uint8)
+
+    dataset = preprocessor.build_shards(dataset_paths, os.path.join(tmp, 'preprocessed'), shard_size=5)
+    stored, stored_labels = dataset.get_batch(np.arange(len(dataset)), normalize=False)
+    assert np.array_equal(stored, X) and np.array_equal(stored_labels, y)
+    assert dataset.class_names == class_names
+    assert len(dataset.metadata['unreadable']) == 1
+    assert all(os.path.exists(p) for p in dataset.metadata['sources'])
+
+
+def main():
+    """Executa todos os testes do dataset em fatias"""
+    print("🧪 TESTES DO DATASET EM FATIAS")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,288 @@
+"""
+Testes do pool de conexões PostgreSQL (web/db_pool.py)
+
+Usa um banco substituto em memória que imita a interface do psycopg2
+(connect/cursor/execute/fetchone/commit/rollback/close), então roda sem PostgreSQL.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+from db_pool import DatabasePool, PoolTimeoutError
+
+
+class OperationalError(Exception):
+    """Mesmo nome do erro de conexão do psycopg2"""
+
+
+class StandInDatabase:
+    """Banco substituto: registra conexões abertas e comandos executados"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = []
+        self.statements = []
+        self.fail_connect = False
+
+    def connect(self, **config):
+        if self.fail_connect:
+            raise OperationalError("banco fora do ar")
+        conn = StandInConnection(self)
+        with self.lock:
+            self.connections.append(conn)
+        return conn
+
+    def open_connections(self):
+        return sum(1 for c in self.connections if not c.closed)
+
+
+class StandInConnection:
+    def __init__(self, db):
+        self.db = db
+        self.closed = 0
+        self.prepared = set()
+        self.in_transaction = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        if self.closed:
+            raise OperationalError("conexão fechada")
+        return StandInCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+
+    def rollback(self):
+        if self.closed:
+            raise OperationalError("conexão fechada")
+        if self.in_transaction:
+            self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = 1
+
+
+class StandInCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._row = None
+
+    def execute(self, sql, params=None):
+        conn = self.connection
+        if conn.closed:
+            raise OperationalError("conexão fechada")
+        conn.in_transaction = True
+        with conn.db.lock:
+            conn.db.statements.append((id(conn), sql, params))
+
+        if sql.startswith("PREPARE "):
+            name = sql.split()[1]
+            if name in conn.prepared:
+                raise RuntimeError(f"prepared statement \"{name}\" already exists")
+            conn.prepared.add(name)
+        elif sql.startswith("EXECUTE "):
+            name = sql.split()[1]
+            if name not in conn.prepared:
+                raise RuntimeError(f"prepared statement \"{name}\" does not exist")
+            self._row = (42,)
+        elif sql == "DEALLOCATE ALL":
+            conn.prepared.clear()
+        elif sql == "SELECT 1":
+            self._row = (1,)
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+
+def make_pool(db, **kwargs):
+    kwargs.setdefault('min_size', 1)
+    kwargs.setdefault('max_size', 3)
+    return DatabasePool({'host': 'stand-in'}, connect=db.connect, **kwargs)
+
+
+def test_reuses_connections():
+    """Checkouts sequenciais reaproveitam a mesma conexão"""
+    db = StandInDatabase()
+    pool = make_pool(db).open()
+
+    for _ in range(20):
+        with pool.cursor() as cur:
+            cur.execute("SELECT 1")
+
+    stats = pool.get_stats()
+    assert len(db.connections) == 1, db.connections
+    assert stats['checkouts'] == 20
+    assert stats['idle'] == 1 and stats['in_use'] == 0
+
+
+def test_respects_max_size_under_concurrency():
+    """Nunca abre mais que max_size conexões, mesmo com muitas threads"""
+    db = StandInDatabase()
+    pool = make_pool(db, max_size=3, checkout_timeout=5.0)
+    peak = []
+
+    def worker():
+        for _ in range(10):
+            with pool.connection():
+                peak.append(pool.get_stats()['in_use'])
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(db.connections) <= 3
+    assert max(peak) <= 3
+    assert pool.get_stats()['checkouts'] == 80
+
+
+def test_timeout_when_exhausted():
+    """Checkout falha com PoolTimeoutError quando todas as conexões estão em uso"""
+    db = StandInDatabase()
+    pool = make_pool(db, max_size=1, checkout_timeout=0.05)
+
+    with pool.connection():
+        try:
+            with pool.connection():
+                pass
+        except PoolTimeoutError:
+            pass
+        else:
+            raise AssertionError("deveria estourar o tempo de checkout")
+
+    assert pool.get_stats()['timeouts'] == 1
+
+
+def test_connection_returned_on_error():
+    """Erros dentro do bloco devolvem a conexão (sem vazamento) e desfazem a transação"""
+    db = StandInDatabase()
+    pool = make_pool(db, max_size=1)
+
+    for _ in range(5):
+        try:
+            with pool.connection() as conn:
+                conn.cursor().execute("INSERT INTO x VALUES (1)")
+                raise ValueError("falha na rota")
+        except ValueError:
+            pass
+
+    assert len(db.connections) == 1
+    assert db.connections[0].rollbacks == 5
+    assert pool.get_stats()['in_use'] == 0
+
+
+def test_broken_connection_is_discarded():
+    """Conexões fechadas ou com erro de conexão são substituídas"""
+    db = StandInDatabase()
+    pool = make_pool(db).open()
+
+    try:
+        with pool.connection() as conn:
+            conn.close()
+            conn.cursor()
+    except OperationalError:
+        pass
+
+    with pool.cursor() as cur:
+        cur.execute("SELECT 1")
+
+    stats = pool.get_stats()
+    assert stats['discarded'] == 1
+    assert stats['created'] == 2
+    assert db.open_connections() == 1
+
+
+def test_health_check_on_stale_connection():
+    """Conexões ociosas além do intervalo são testadas com SELECT 1 no checkout"""
+    db = StandInDatabase()
+    pool = make_pool(db, health_check_interval=0.0).open()
+
+    with pool.connection():
+        pass
+
+    health_checks = [s for _, s, _ in db.statements if s == "SELECT 1"]
+    assert len(health_checks) == 1
+
+
+def test_prepared_once_per_connection():
+    """PREPARE roda uma vez por conexão; depois só EXECUTE"""
+    db = StandInDatabase()
+    pool = make_pool(db, max_size=1)
+    pool.register_statement('session_user', "SELECT user_id FROM sessions WHERE token = $1", ('text',))
+
+    for _ in range(10):
+        with pool.cursor() as cur:
+            pool.execute_prepared(cur, 'session_user', ('abc',))
+            assert cur.fetchone() == (42,)
+
+    prepares = [s for _, s, _ in db.statements if s.startswith("PREPARE")]
+    executes = [(s, p) for _, s, p in db.statements if s.startswith("EXECUTE")]
+    assert prepares == ["PREPARE session_user (text) AS SELECT user_id FROM sessions WHERE token = $1"]
+    assert len(executes) == 10
+    assert executes[0] == ("EXECUTE session_user (%s)", ('abc',))
+
+
+def test_prepared_statements_reset_after_error():
+    """Após um erro, os prepared statements da conexão são descartados e refeitos"""
+    db = StandInDatabase()
+    pool = make_pool(db, max_size=1)
+    pool.register_statement('q', "SELECT 1")
+
+    try:
+        with pool.cursor() as cur:
+            pool.execute_prepared(cur, 'q')
+            raise ValueError("falha depois do PREPARE")
+    except ValueError:
+        pass
+
+    with pool.cursor() as cur:
+        pool.execute_prepared(cur, 'q')
+
+    prepares = [s for _, s, _ in db.statements if s.startswith("PREPARE")]
+    assert len(prepares) == 2
+
+
+def test_open_tolerates_database_down():
+    """O servidor sobe mesmo com o banco fora do ar; conexões abrem sob demanda"""
+    db = StandInDatabase()
+    db.fail_connect = True
+    pool = make_pool(db, min_size=2).open()
+    assert pool.get_stats()['size'] == 0
+
+    db.fail_connect = False
+    with pool.cursor() as cur:
+        cur.execute("SELECT 1")
+    assert pool.get_stats()['size'] == 1
+
+
+def main():
+    """Executa todos os testes do pool"""
+    print("🧪 TESTES DO POOL DE CONEXÕES")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
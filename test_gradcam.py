@@ -0,0 +1,118 @@
+"""
+Testes dos mapas de ativação Grad-CAM / Grad-CAM++ (src/gradcam.py)
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import tensorflow as tf
+from gradcam import GradCAM, GRADCAM_METHODS, find_last_conv_layer
+from mri_preprocessing import preprocess_mri
+from test_mri_preprocessing import synthetic_mri
+
+INPUT_SHAPE = (64, 64, 3)
+
+
+def sequential_model(outputs=1):
+    """CNN pequena com a mesma estrutura dos modelos do projeto (sigmoid ou softmax)"""
+    tf.random.set_seed(0)
+    return tf.keras.Sequential([
+        tf.keras.Input(INPUT_SHAPE),
+        tf.keras.layers.Conv2D(8, 3, activation='relu'),
+        tf.keras.layers.MaxPooling2D(2),
+        tf.keras.layers.Conv2D(16, 3, activation='relu', name='ultima_conv'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(outputs, activation='sigmoid' if outputs == 1 else 'softmax')
+    ])
+
+
+def functional_model():
+    tf.random.set_seed(1)
+    inputs = tf.keras.Input(INPUT_SHAPE)
+    x = tf.keras.layers.Conv2D(8, 3, activation='relu')(inputs)
+    x = tf.keras.layers.Conv2D(8, 3, activation='relu', name='conv_alvo')(x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    return tf.keras.Model(inputs, tf.keras.layers.Dense(2, activation='softmax')(x))
+
+
+def images(n=3):
+    return np.concatenate([preprocess_mri(synthetic_mri((128, 128, 3), seed=i), INPUT_SHAPE[:2])
+                           for i in range(n)])
+
+
+def test_maps_shape_and_normalization():
+    """Mapas uint8 (N, H, W) na resolução de entrada, cada um normalizado até 255 (ou todo zero)"""
+    batch = images()
+    for model in (sequential_model(1), sequential_model(2), functional_model()):
+        gradcam = GradCAM(model)
+        for method in GRADCAM_METHODS:
+            _, maps = gradcam.compute(batch, method=method)
+            assert maps.dtype == np.uint8 and maps.shape == (len(batch), *INPUT_SHAPE[:2])
+            for heatmap in maps:
+                assert heatmap.max() in (0, 255)
+
+    _, single = GradCAM(sequential_model()).compute(batch[0])
+    assert single.shape == (1, *INPUT_SHAPE[:2])
+
+
+def test_probabilities_match_model_predict():
+    """A saída devolvida junto com o mapa é a mesma de model.predict"""
+    batch = images(4)
+    for model in (sequential_model(1), sequential_model(2), functional_model()):
+        expected = model.predict(batch, verbose=0)
+        for method in GRADCAM_METHODS:
+            probs, _ = GradCAM(model).compute(batch, method=method)
+            assert probs.shape == expected.shape
+            assert np.allclose(probs, expected, atol=1e-5)
+
+
+def test_target_layer_and_class():
+    """Última Conv2D por padrão; classe alvo 0 para sigmoid e a última para softmax"""
+    assert GradCAM(sequential_model(1)).layer.name == 'ultima_conv'
+    assert GradCAM(sequential_model(1)).class_index == 0
+    assert GradCAM(sequential_model(2)).class_index == 1
+    assert find_last_conv_layer(functional_model()).name == 'conv_alvo'
+
+
+def test_invalid_inputs():
+    """Método desconhecido e modelo sem Conv2D são recusados com ValueError"""
+    try:
+        GradCAM(sequential_model()).compute(images(1), method='scorecam')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar método desconhecido")
+
+    dense = tf.keras.Sequential([tf.keras.Input(INPUT_SHAPE), tf.keras.layers.Flatten(),
+                                 tf.keras.layers.Dense(1, activation='sigmoid')])
+    try:
+        GradCAM(dense)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar modelo sem Conv2D")
+
+
+def main():
+    """Executa todos os testes de Grad-CAM"""
+    print("🧪 TESTES DE GRAD-CAM")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,113 @@
+"""
+Testes da renderização de mapas de ativação (src/heatmap_rendering.py)
+
+A tabela de cores tem que reproduzir plt.cm.hot (o caminho anterior) e o mapa
+simulado do caso normal tem que ser determinístico (entra no cache).
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import heatmap_rendering
+from heatmap_rendering import colorize, render_heatmap, render_simulated_heatmap, simulated_heatmap
+
+
+def legacy_colorize(heatmap):
+    """Caminho anterior de web/api_server: plt.cm.hot em RGBA, descartando alfa"""
+    return (plt.cm.hot(heatmap)[:, :, :3] * 255).astype(np.uint8)
+
+
+def legacy_tumor_map(tumor_prob, confidence):
+    """Laços do create_activation_heatmap original (ramo tumor)"""
+    heatmap = np.zeros((128, 128))
+    for i in range(128):
+        for j in range(128):
+            dist = np.sqrt((i - 64) ** 2 + (j - 45) ** 2)
+            heatmap[j, i] = max(0, confidence - dist / 50)
+    if confidence > 0.7:
+        for i in range(128):
+            for j in range(128):
+                dist = np.sqrt((i - 50) ** 2 + (j - 70) ** 2)
+                heatmap[j, i] = max(heatmap[j, i], max(0, confidence * 0.6 - dist / 60))
+    return (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min() + 1e-8)
+
+
+def test_lut_matches_matplotlib_hot():
+    """LUT + applyColorMap == plt.cm.hot, para mapas float [0, 1] (bordas incluídas) e uint8"""
+    rng = np.random.default_rng(0)
+    heatmap = rng.random((64, 96), dtype=np.float32)
+    heatmap[0, :4] = (0.0, 1.0, 0.5, 255.5 / 256.0)
+    assert np.array_equal(colorize(heatmap), legacy_colorize(heatmap))
+
+    ramp = np.linspace(0.0, 1.0, 4096, dtype=np.float32).reshape(64, 64)
+    assert np.array_equal(colorize(ramp), legacy_colorize(ramp))
+
+    indices = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    assert np.array_equal(colorize(indices), legacy_colorize(indices))
+    assert np.array_equal(colorize(heatmap, bgr=True), colorize(heatmap)[..., ::-1])
+
+
+def test_simulated_tumor_map_matches_legacy_loops():
+    """Campos de distância pré-calculados == laços originais (com e sem foco secundário)"""
+    for tumor_prob, confidence in ((0.9, 0.95), (0.5, 0.6)):
+        expected = legacy_tumor_map(tumor_prob, confidence)
+        result = simulated_heatmap(tumor_prob, confidence)
+        assert result.shape == (128, 128) and result.dtype == np.float32
+        assert np.allclose(result, expected, atol=1e-5)
+
+
+def test_normal_map_is_deterministic():
+    """Caso normal: ruído fixo, mesmo mapa e mesmos bytes a cada chamada (e após limpar o cache)"""
+    first = simulated_heatmap(0.1, 0.9)
+    assert np.array_equal(first, simulated_heatmap(0.2, 0.8))
+    assert first.min() == 0.0 and abs(float(first.max()) - 1.0) < 1e-6
+
+    encoded = render_simulated_heatmap(0.1, 0.9)
+    heatmap_rendering._render_simulated_cached.cache_clear()
+    assert render_simulated_heatmap(0.1, 0.9) == encoded
+    assert render_simulated_heatmap(0.3, 0.7) == encoded  # confiança não muda o ramo normal
+
+
+def test_encoding_is_lossless():
+    """PNG/WebP decodificam para o mapa colorido; 'raw' são os bytes RGB"""
+    heatmap = simulated_heatmap(0.9, 0.95)
+    expected_bgr = colorize(heatmap, bgr=True)
+    for fmt in ('png', 'webp'):
+        decoded = cv2.imdecode(np.frombuffer(render_heatmap(heatmap, fmt), np.uint8), cv2.IMREAD_COLOR)
+        assert np.array_equal(decoded, expected_bgr), fmt
+    assert render_heatmap(heatmap, 'raw') == colorize(heatmap).tobytes()
+    try:
+        render_heatmap(heatmap, 'gif')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar formato desconhecido")
+
+
+def main():
+    """Executa todos os testes de renderização de heatmaps"""
+    print("🧪 TESTES DE RENDERIZAÇÃO DE HEATMAPS")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,83 @@
+"""
+Testes da decodificação/validação do histórico em lote (web/history_bulk.py)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+from history_bulk import BulkValidationError, parse_analyses, validate_analyses
+
+VALID = ('{"image_name": "a.jpg", "prediction_normal": 0.1, "prediction_tumor": 0.9, '
+         '"confidence": 0.9, "threshold_used": 0.5, "result": "Tumor"}')
+
+
+def test_parse_json_array_object_and_ndjson():
+    """Array JSON, {"analyses": [...]} e NDJSON produzem a mesma lista"""
+    as_array = parse_analyses(f'[{VALID}, {VALID}]'.encode())
+    as_object = parse_analyses(f'{{"analyses": [{VALID}, {VALID}]}}')
+    as_ndjson = parse_analyses(f'{VALID}\n\n{VALID}\n'.encode(), 'application/x-ndjson')
+    assert as_array == as_object == as_ndjson
+    assert len(as_array) == 2
+
+
+def test_parse_rejects_bad_payloads():
+    """Corpo vazio, JSON inválido ou formato errado geram BulkValidationError"""
+    for body in (b'[]', b'{"x": 1}', b'nope', b'"texto"'):
+        try:
+            parse_analyses(body)
+        except BulkValidationError:
+            continue
+        raise AssertionError(f"deveria rejeitar {body!r}")
+
+
+def test_parse_rejects_non_utf8_body():
+    """Corpo que não é UTF-8 gera BulkValidationError (400), não UnicodeDecodeError (500)"""
+    for body, mimetype in ((b'[{"image_name": "\xff\xfe"}]', None),
+                           (VALID.encode('latin-1') + b'\n\xe9', 'application/x-ndjson')):
+        try:
+            parse_analyses(body, mimetype)
+        except BulkValidationError as e:
+            assert 'UTF-8' in str(e)
+            continue
+        raise AssertionError(f"deveria rejeitar {body!r}")
+
+
+def test_validate_builds_rows_in_column_order():
+    """Itens válidos viram tuplas na ordem das colunas do INSERT/COPY"""
+    rows = validate_analyses(parse_analyses(f'[{VALID}]'))
+    assert rows == [('a.jpg', 0.1, 0.9, 0.9, 0.5, 'Tumor')]
+
+
+def test_validate_reports_every_invalid_item():
+    """Todos os itens inválidos são reportados de uma vez, com o índice"""
+    items = parse_analyses(f'[{{}}, {VALID}, {VALID.replace("0.9,", "1.5,", 1)}]')
+    items.append(dict(items[1], confidence=True))
+    try:
+        validate_analyses(items)
+    except BulkValidationError as e:
+        assert [index for index, _ in e.errors] == [0, 2, 3], e.errors
+    else:
+        raise AssertionError("deveria rejeitar a carga")
+
+
+def main():
+    """Executa todos os testes do histórico em lote"""
+    print("🧪 TESTES DO HISTÓRICO EM LOTE")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
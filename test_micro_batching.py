@@ -0,0 +1,178 @@
+"""
+Testes do agendador de micro-batching (src/micro_batching.py)
+"""
+import os
+import sys
+import time
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from micro_batching import MicroBatcher
+
+SHAPE = (4, 4, 3)
+
+
+def item(value, n=1):
+    """Lote (n, 4, 4, 3) preenchido com value"""
+    return np.full((n, *SHAPE), value, dtype=np.float32)
+
+
+def mean_predict(calls):
+    """predict_fn que registra o tamanho de cada lote e devolve a média por amostra"""
+    def predict(batch):
+        calls.append(len(batch))
+        return batch.reshape(len(batch), -1).mean(axis=1, keepdims=True)
+    return predict
+
+
+def test_concurrent_requests_coalesce():
+    """Requisições concorrentes viram um único lote; cada uma recebe a sua fatia"""
+    calls = []
+    gate = threading.Event()
+
+    def slow_predict(batch):
+        gate.wait(1.0)  # segura o primeiro lote enquanto os demais chegam
+        return mean_predict(calls)(batch)
+
+    batcher = MicroBatcher(slow_predict, max_batch_size=8, max_wait_ms=50).start()
+    try:
+        futures = [batcher.submit_async(item(i, n=2 if i == 3 else 1)) for i in range(5)]
+        gate.set()
+        results = [f.result(timeout=2) for f in futures]
+    finally:
+        batcher.stop()
+
+    assert sum(calls) == 6 and len(calls) < 5
+    for i, result in enumerate(results):
+        assert result.shape == ((2 if i == 3 else 1), 1)
+        assert np.allclose(result, i)
+    assert batcher.get_stats()['total_requests'] == 5
+
+
+def test_max_wait_flushes_partial_batch():
+    """Um item sozinho é processado depois de max_wait_ms, sem esperar o lote encher"""
+    calls = []
+    batcher = MicroBatcher(mean_predict(calls), max_batch_size=64, max_wait_ms=20).start()
+    try:
+        started = time.perf_counter()
+        result = batcher.submit(item(7), timeout=2)
+        elapsed = time.perf_counter() - started
+    finally:
+        batcher.stop()
+    assert calls == [1] and np.allclose(result, 7)
+    assert 0.015 <= elapsed < 1.0
+
+
+def test_exception_reaches_every_caller():
+    """Erro do modelo chega ao Future de cada item do lote; o agendador continua atendendo"""
+    state = {'fail': True}
+
+    def flaky_predict(batch):
+        if state['fail']:
+            raise ValueError("falha no modelo")
+        return batch.reshape(len(batch), -1).mean(axis=1, keepdims=True)
+
+    batcher = MicroBatcher(flaky_predict, max_batch_size=8, max_wait_ms=30).start()
+    try:
+        futures = [batcher.submit_async(item(i)) for i in range(3)]
+        for future in futures:
+            try:
+                future.result(timeout=2)
+            except ValueError as e:
+                assert "falha no modelo" in str(e)
+            else:
+                raise AssertionError("deveria propagar o erro do modelo")
+        state['fail'] = False
+        assert np.allclose(batcher.submit(item(5), timeout=2), 5)
+    finally:
+        batcher.stop()
+    assert batcher.get_stats()['errors'] >= 1
+
+
+def test_submit_after_stop_fails_fast():
+    """Depois de stop, submit falha na hora; itens aceitos nunca ficam sem resposta"""
+    batcher = MicroBatcher(mean_predict([]), max_batch_size=4, max_wait_ms=1).start()
+    batcher.stop()
+    try:
+        batcher.submit(item(1), timeout=1)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("deveria recusar submissão após stop")
+
+    # Submissões disputando com stop: cada uma é recusada ou resolvida, nunca pendurada
+    for _ in range(20):
+        batcher = MicroBatcher(mean_predict([]), max_batch_size=4, max_wait_ms=1).start()
+        futures, refused = [], []
+
+        def client():
+            for i in range(50):
+                try:
+                    futures.append(batcher.submit_async(item(i)))
+                except RuntimeError:
+                    refused.append(i)
+
+        thread = threading.Thread(target=client)
+        thread.start()
+        batcher.stop()
+        thread.join()
+        for future in futures:
+            try:
+                future.result(timeout=1)
+            except RuntimeError:
+                pass  # "MicroBatcher encerrado"
+            except FutureTimeout:
+                raise AssertionError("item aceito ficou sem resposta após stop")
+
+
+def test_submit_timeout():
+    """submit com timeout não bloqueia para sempre quando o modelo trava"""
+    release = threading.Event()
+    calls = []
+
+    def stuck_predict(batch):
+        calls.append(len(batch))
+        release.wait(2.0)
+        return np.zeros((len(batch), 1), dtype=np.float32)
+
+    batcher = MicroBatcher(stuck_predict, max_batch_size=1, max_wait_ms=0).start()
+    try:
+        batcher.submit_async(item(0))
+        started = time.perf_counter()
+        try:
+            batcher.submit(item(1), timeout=0.05)
+        except FutureTimeout:
+            pass
+        else:
+            raise AssertionError("deveria estourar o timeout")
+        assert time.perf_counter() - started < 1.0
+    finally:
+        release.set()
+        batcher.stop()
+    assert calls == [1]  # o item que desistiu não vai para o modelo
+
+
+def main():
+    """Executa todos os testes do micro-batching"""
+    print("🧪 TESTES DO MICRO-BATCHING")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,112 @@
+"""
+Testes do modo de precisão mista e XLA (model_architecture.precision_policy e
+config 'precision'/'jit_compile' do CancerModelTrainer)
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import tensorflow as tf
+from model_architecture import CancerCNNModels, precision_policy
+
+INPUT_SHAPE = (64, 64, 3)
+
+
+def build(precision, num_classes=2, jit_compile='auto'):
+    models = CancerCNNModels(input_shape=INPUT_SHAPE, num_classes=num_classes)
+    with precision_policy(precision):
+        model = models.create_basic_cnn()
+    return models.compile_model(model, jit_compile=jit_compile)
+
+
+def test_layers_follow_policy_with_float32_head():
+    """Camadas em 16 bits, variáveis e cabeça de saída em float32"""
+    for precision, compute in (('float32', 'float32'), ('mixed_float16', 'float16'),
+                               ('mixed_bfloat16', 'bfloat16')):
+        model = build(precision)
+        conv, head = model.layers[0], model.layers[-1]
+        assert conv.compute_dtype == compute and conv.variable_dtype == 'float32'
+        assert head.dtype_policy.name == 'float32' and head.units == 1
+        output = model(np.random.rand(2, *INPUT_SHAPE).astype(np.float32))
+        assert output.dtype == tf.float32 and output.shape == (2, 1)
+
+
+def test_loss_scaling_only_for_float16():
+    """mixed_float16 usa LossScaleOptimizer; float32 e bfloat16 usam o Adam direto"""
+    assert isinstance(build('mixed_float16').optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
+    for precision in ('float32', 'mixed_bfloat16'):
+        optimizer = build(precision).optimizer
+        assert not isinstance(optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
+
+
+def test_policy_restored_and_validated():
+    """A política global volta ao valor anterior, mesmo com erro; nomes inválidos são recusados"""
+    assert tf.keras.mixed_precision.global_policy().name == 'float32'
+    try:
+        with precision_policy('mixed_bfloat16'):
+            assert tf.keras.mixed_precision.global_policy().name == 'mixed_bfloat16'
+            raise RuntimeError("falha durante a construção")
+    except RuntimeError:
+        pass
+    assert tf.keras.mixed_precision.global_policy().name == 'float32'
+    try:
+        with precision_policy('float8'):
+            pass
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("deveria recusar precisão desconhecida")
+
+
+def test_trainer_config_mixed_xla_step():
+    """CancerModelTrainer: config precision/jit_compile; passo de treino XLA em float16 com perda finita"""
+    from train_model import CancerModelTrainer
+
+    tmp = tempfile.mkdtemp(prefix='neuroai_mixed_test_')
+    cwd = os.getcwd()
+    os.chdir(tmp)  # o trainer cria models/, results/ e logs/
+    try:
+        trainer = CancerModelTrainer({
+            **CancerModelTrainer._get_default_config(None),
+            'img_size': INPUT_SHAPE[:2], 'model_type': 'basic_cnn',
+            'precision': 'mixed_float16', 'jit_compile': True
+        })
+        model = trainer.create_model()
+        assert model.jit_compile is True and model.layers[0].compute_dtype == 'float16'
+
+        rng = np.random.default_rng(0)
+        X = rng.random((8, *INPUT_SHAPE), dtype=np.float32)
+        y = rng.integers(0, 2, 8)
+        history = model.fit(X, y, batch_size=4, epochs=1, verbose=0)
+        assert np.isfinite(history.history['loss'][0])
+        assert all(w.dtype == 'float32' for w in model.trainable_weights)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    """Executa todos os testes de precisão mista"""
+    print("🧪 TESTES DE PRECISÃO MISTA E XLA")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,231 @@
+"""
+Teste de saída de referência do preprocessamento canônico (src/mri_preprocessing.py)
+
+A referência é a cadeia antiga, copiada de visual_diagnosis_modern.py /
+web/api_server.py (float32 antes do resize, 3 canais redimensionados).
+O kernel novo faz o resize em uint8, então cada pixel pode diferir em até 1/255.
+"""
+import io
+import os
+import sys
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from mri_preprocessing import preprocess_mri, preprocess_mri_bytes, decode_image, preprocess_batch, crop_box
+
+TOLERANCE = 1.0 / 255.0 + 1e-6
+
+
+def legacy_preprocess(image, target_size=(128, 128)):
+    """Cadeia original (referência)"""
+    h, w = image.shape[:2]
+    margin_h = int(h * 0.10)
+    margin_w = int(w * 0.10)
+    cropped = image[margin_h:h - margin_h, margin_w:w - margin_w]
+
+    if len(cropped.shape) == 3:
+        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
+    else:
+        gray = cropped
+
+    try:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        gray = clahe.apply(gray)
+    except Exception:
+        gray = cv2.equalizeHist(gray)
+
+    gray = gray.astype(np.float32) / 255.0
+    img_rgb = np.stack([gray, gray, gray], axis=-1)
+    img_resized = cv2.resize(img_rgb, target_size)
+    return np.expand_dims(img_resized, axis=0)
+
+
+def legacy_preprocess_bytes(image_bytes):
+    """Decodificação original da API (PIL -> RGB) + cadeia original"""
+    img = Image.open(io.BytesIO(image_bytes))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return legacy_preprocess(np.array(img))
+
+
+def synthetic_mri(shape, seed=0):
+    """Imagem sintética com estrutura (elipse + textura) e bordas com 'régua'"""
+    rng = np.random.default_rng(seed)
+    h, w = shape[:2]
+    image = np.zeros((h, w), dtype=np.uint8)
+    cv2.ellipse(image, (w // 2, h // 2), (max(1, w // 3), max(1, h // 3)), 0, 0, 360, 150, -1)
+    image = cv2.add(image, rng.integers(0, 60, (h, w), dtype=np.uint8))
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    image[:, :max(1, w // 20)] = 255  # régua na borda (removida pelo corte)
+    if len(shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        image[..., 0] = cv2.add(image[..., 0], 10)  # leve diferença entre canais
+    return image
+
+
+SHAPES = [(512, 512, 3), (256, 256), (630, 512, 3), (2048, 1536, 3), (64, 48), (128, 128, 3)]
+
+
+def test_matches_legacy_output():
+    """Mesma saída da cadeia antiga (até 1/255), formato e faixa de valores"""
+    for i, shape in enumerate(SHAPES):
+        image = synthetic_mri(shape, seed=i)
+        expected = legacy_preprocess(image)
+        result = preprocess_mri(image)
+        assert result.shape == expected.shape == (1, 128, 128, 3), shape
+        assert result.dtype == np.float32
+        assert np.abs(result - expected).max() <= TOLERANCE, (shape, np.abs(result - expected).max())
+        assert 0.0 <= result.min() and result.max() <= 1.0
+        assert np.array_equal(result[..., 0], result[..., 1]) and np.array_equal(result[..., 0], result[..., 2])
+
+
+def test_other_target_size():
+    """target_size segue a convenção (largura, altura) do cv2.resize"""
+    image = synthetic_mri((300, 400, 3))
+    result = preprocess_mri(image, (96, 64))
+    expected = legacy_preprocess(image, (96, 64))
+    assert result.shape == (1, 64, 96, 3)
+    assert np.abs(result - expected).max() <= TOLERANCE
+
+
+def test_bytes_path_matches_legacy_api():
+    """Bytes enviados à API: decodificação em escala de cinza x PIL RGB da versão antiga"""
+    for fmt in ('.jpg', '.png'):
+        image = synthetic_mri((480, 400, 3), seed=3)
+        ok, encoded = cv2.imencode(fmt, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        expected = legacy_preprocess_bytes(encoded.tobytes())
+        result = preprocess_mri_bytes(encoded.tobytes())
+        assert np.abs(result - expected).max() <= TOLERANCE, fmt
+
+
+def test_writes_into_preallocated_batch():
+    """out= escreve direto em uma fatia de um lote, sem alocar a saída"""
+    images = [synthetic_mri(shape, seed=i) for i, shape in enumerate(SHAPES[:3])]
+    batch = np.zeros((len(images), 128, 128, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        returned = preprocess_mri(image, out=batch[i])
+        assert returned is batch[i] or np.shares_memory(returned, batch)
+    for i, image in enumerate(images):
+        assert np.array_equal(batch[i:i + 1], preprocess_mri(image))
+
+
+def test_uint8_output():
+    """dtype=np.uint8 devolve os níveis de cinza (0-255) replicados"""
+    image = synthetic_mri((512, 512, 3))
+    as_uint8 = preprocess_mri(image, dtype=np.uint8)
+    as_float = preprocess_mri(image)
+    assert as_uint8.dtype == np.uint8
+    assert np.allclose(as_uint8.astype(np.float32) / 255.0, as_float, atol=1e-6)
+
+
+def test_thread_safe():
+    """Threads concorrentes (CLAHE e buffers por thread) produzem a mesma saída"""
+    images = [synthetic_mri(shape, seed=i) for i, shape in enumerate(SHAPES)]
+    expected = [preprocess_mri(image) for image in images]
+    mismatches = []
+
+    def worker():
+        for _ in range(5):
+            for image, ref in zip(images, expected):
+                if not np.array_equal(preprocess_mri(image), ref):
+                    mismatches.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not mismatches
+
+
+def test_invalid_bytes():
+    """Bytes que não são imagem geram ValueError"""
+    try:
+        decode_image(b'isto nao e uma imagem')
+    except ValueError:
+        return
+    raise AssertionError("deveria rejeitar bytes inválidos")
+
+
+def encode(image, fmt='.png'):
+    ok, encoded = cv2.imencode(fmt, cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if image.ndim == 3 else image)
+    return encoded.tobytes()
+
+
+def test_crop_box_is_the_region_the_model_sees():
+    """Só os pixels dentro de crop_box afetam a saída (região onde o Grad-CAM deve ser sobreposto)"""
+    image = synthetic_mri((203, 157, 3), seed=4)
+    top, bottom, left, right = crop_box(*image.shape[:2])
+    assert (top, bottom, left, right) == (20, 183, 15, 142)
+
+    outside = image.copy()
+    outside[:top] = 255
+    outside[bottom:] = 0
+    outside[:, :left] = 255
+    outside[:, right:] = 0
+    assert np.array_equal(preprocess_mri(outside), preprocess_mri(image))
+
+    inside = image.copy()
+    inside[top:top + 20, left:left + 20] = 255
+    assert not np.array_equal(preprocess_mri(inside), preprocess_mri(image))
+
+
+def test_batch_matches_single_and_reports_errors():
+    """Lote de caminhos + bytes: igual item a item, erros à parte sem abortar o lote"""
+    payloads = [encode(synthetic_mri(shape, seed=i)) for i, shape in enumerate(SHAPES[:4])]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'img0.png')
+        with open(path, 'wb') as f:
+            f.write(payloads[0])
+        sources = [path, payloads[1], b'corrompido', payloads[2],
+                   os.path.join(tmp, 'inexistente.png'), payloads[3]]
+
+        batch, errors = preprocess_batch(sources, workers=3)
+
+    assert batch.shape == (6, 128, 128, 3) and batch.dtype == np.float32
+    assert batch.flags['C_CONTIGUOUS']
+    assert sorted(errors) == [2, 4]
+    assert not batch[2].any() and not batch[4].any()
+    for i, payload in zip((0, 1, 3, 5), payloads):
+        assert np.array_equal(batch[i:i + 1], preprocess_mri_bytes(payload))
+
+
+def test_batch_uint8_and_custom_item_fn():
+    """dtype uint8, item_fn próprio e um worker só produzem o mesmo lote"""
+    data = [encode(synthetic_mri((200, 160, 3), seed=i)) for i in range(5)]
+    as_uint8, errors = preprocess_batch(data, dtype=np.uint8, workers=4)
+    assert not errors and as_uint8.dtype == np.uint8
+
+    def item_fn(buffer, slot):
+        preprocess_mri_bytes(buffer, out=slot, dtype=np.uint8)
+
+    sequential, errors = preprocess_batch(data, dtype=np.uint8, workers=1, item_fn=item_fn)
+    assert not errors and np.array_equal(as_uint8, sequential)
+
+
+def main():
+    """Executa todos os testes do preprocessamento"""
+    print("🧪 TESTES DO PREPROCESSAMENTO CANÔNICO")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
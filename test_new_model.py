@@ -3,8 +3,12 @@ Teste rápido do novo modelo balanceado
 """
 import os
 import cv2
+import sys
 import numpy as np
-from tensorflow.keras.models import load_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from inference_engine import InferenceEngine
+from mri_preprocessing import preprocess_mri
 
 def test_model_with_image(image_path):
     """Testa modelo com uma imagem específica"""
@@ -23,7 +27,7 @@ def test_model_with_image(image_path):
     print("=" * 50)
     
     # Carregar modelo
-    model = load_model(model_path)
+    engine = InferenceEngine.from_path(model_path)
     print(f"✅ Modelo carregado: {model_path}")
     
     # Carregar imagem
@@ -31,30 +35,11 @@ def test_model_with_image(image_path):
     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     print(f"📐 Dimensões da imagem: {img.shape}")
     
-    # Pré-processar (método melhorado)
-    h, w = img.shape[:2]
-    margin_h = int(h * 0.10)
-    margin_w = int(w * 0.10)
-    cropped = img[margin_h:h-margin_h, margin_w:w-margin_w]
-    
-    if len(cropped.shape) == 3:
-        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = cropped
-    
-    try:
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray = clahe.apply(gray)
-    except:
-        gray = cv2.equalizeHist(gray)
-    
-    gray = gray.astype(np.float32) / 255.0
-    img_rgb = np.stack([gray, gray, gray], axis=-1)
-    img_resized = cv2.resize(img_rgb, (128, 128))
-    img_processed = np.expand_dims(img_resized, axis=0)
+    # Pré-processar (método melhorado: corte + cinza + CLAHE)
+    img_processed = preprocess_mri(img, (128, 128))
     
     # Fazer predição
-    prediction = model.predict(img_processed, verbose=0)[0][0]
+    prediction = engine.predict(img_processed)[0][0]
     
     print(f"\n📊 RESULTADO:")
     print(f"   Probabilidade de tumor: {prediction:.4f} ({prediction*100:.1f}%)")
@@ -83,7 +68,7 @@ def test_model_with_image(image_path):
     # Testar com ruído para verificar viés
     print(f"\n🔍 TESTE DE VIÉS:")
     noise_img = np.random.random((1, 128, 128, 3))
-    noise_pred = model.predict(noise_img, verbose=0)[0][0]
+    noise_pred = engine.predict(noise_img)[0][0]
     print(f"   Ruído aleatório: {noise_pred:.4f} ({noise_pred*100:.1f}%)")
     
     if noise_pred < 0.1:
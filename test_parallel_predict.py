@@ -0,0 +1,113 @@
+"""
+Testes da inferência em lote entre processos (src/parallel_predict.py)
+
+Os workers 'spawn' usam um preditor falso (CancerPredictor com o motor falso de
+test_batch_predict), então os testes não carregam o TensorFlow.
+"""
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from parallel_predict import predict_parallel
+from test_batch_predict import stand_in_predictor
+
+# Preditores criados neste processo (cada worker tem o seu contador)
+_created = 0
+
+
+class WorkerStub:
+    def __init__(self, *init_args):
+        """Preditor dos workers: recebe os argumentos de load_worker_predictor"""
+        global _created
+        _created += 1
+        self.init_args = init_args
+        self.predictor = stand_in_predictor()
+
+    def predict_paths(self, paths, workers=None):
+        if any('lenta' in os.path.basename(path) for path in paths):
+            time.sleep(0.5)  # a primeira fatia termina por último
+        results = self.predictor.predict_paths(paths, workers=workers)
+        for result in results:
+            result.update(pid=os.getpid(), init_args=self.init_args, created=_created)
+        return results
+
+
+def failing_factory(*init_args):
+    raise RuntimeError("modelo ausente")
+
+
+def make_images(folder):
+    """8 imagens, a primeira 'lenta' e uma corrompida no meio"""
+    paths = []
+    for i in range(8):
+        name = f"img{i}_lenta.png" if i == 0 else f"img{i}.png"
+        path = os.path.join(folder, name)
+        if i == 5:
+            with open(path, 'wb') as f:
+                f.write(b'nao e imagem')
+        else:
+            cv2.imwrite(path, np.full((48, 48), 30 * i, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_results_in_input_order_with_per_image_errors():
+    """Fatias de processos diferentes voltam na ordem de entrada; a imagem ruim traz o próprio erro"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_images(tmp)
+        results = predict_parallel('models/stub.h5', paths, processes=2, img_size=(32, 32),
+                                   backend='tflite', threads_per_process=1, chunk_size=2,
+                                   predictor_factory=WorkerStub)
+
+    assert [result['image_path'] for result in results] == paths
+    assert 'error' in results[5] and results[5]['image_name'] == 'img5.png'
+    assert all('error' not in result for i, result in enumerate(results) if i != 5)
+    assert [result['predicted_class'] for result in results[:5]] == [0, 0, 0, 0, 0]
+    assert results[7]['predicted_class'] == 1
+
+    # Cada processo criou o preditor uma única vez, com os argumentos do pool
+    assert {result['init_args'] for result in results} == {('models/stub.h5', (32, 32), 'tflite', 1, 1)}
+    assert {result['created'] for result in results} == {1}
+    assert len({result['pid'] for result in results}) <= 2
+    assert os.getpid() not in {result['pid'] for result in results}
+
+
+def test_worker_init_failure_is_reported():
+    """Falha ao criar o preditor no worker chega a quem chamou (pool quebrado), sem travar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_images(tmp)[:2]
+        try:
+            predict_parallel('models/stub.h5', paths, processes=1, predictor_factory=failing_factory)
+        except BrokenProcessPool:
+            pass
+        else:
+            raise AssertionError("deveria falhar na inicialização do worker")
+
+
+def main():
+    """Executa todos os testes da inferência entre processos"""
+    print("🧪 TESTES DA INFERÊNCIA ENTRE PROCESSOS")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,75 @@
+"""
+Testes da predição em lote do CancerPredictor (src/predict.py)
+
+Usa o preditor com motor falso de test_batch_predict (sem TensorFlow).
+"""
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from test_batch_predict import stand_in_predictor
+
+
+def png_bytes(value):
+    ok, buffer = cv2.imencode('.png', np.full((48, 48), value, dtype=np.uint8))
+    return buffer.tobytes()
+
+
+def test_names_for_paths_and_bytes():
+    """Caminhos ganham image_path e o nome do arquivo; bytes só o nome informado por quem chama"""
+    predictor = stand_in_predictor()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'exame.png')
+        cv2.imwrite(path, np.full((48, 48), 200, dtype=np.uint8))
+
+        from_path, from_bytes = predictor.predict_paths([path, png_bytes(60)])
+        assert from_path['image_path'] == path and from_path['image_name'] == 'exame.png'
+        assert 'image_path' not in from_bytes and 'image_name' not in from_bytes
+        assert from_path['predicted_class'] == 1 and from_bytes['predicted_class'] == 0
+
+        named = predictor.predict_paths([png_bytes(60), path], names=['upload.png', 'outro.png'])
+        assert named[0]['image_name'] == 'upload.png' and 'image_path' not in named[0]
+        assert named[1]['image_name'] == 'outro.png' and named[1]['image_path'] == path
+
+
+def test_bad_bytes_are_a_per_item_error():
+    """Bytes ilegíveis viram erro só no próprio item, com o nome informado"""
+    predictor = stand_in_predictor()
+    results = predictor.predict_paths([b'nao e imagem', png_bytes(200)], names=['ruim', 'boa'])
+    assert 'error' in results[0] and results[0]['image_name'] == 'ruim'
+    assert 'error' not in results[1] and results[1]['image_name'] == 'boa'
+    assert predictor.engine.batch_sizes == [1]
+
+    try:
+        predictor.predict_paths([png_bytes(1)], names=['a', 'b'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("names com tamanho diferente deveria falhar")
+
+
+def main():
+    """Executa todos os testes do CancerPredictor"""
+    print("🧪 TESTES DO CANCERPREDICTOR")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
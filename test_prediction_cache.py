@@ -0,0 +1,106 @@
+"""
+Testes do cache de predições por conteúdo (web/prediction_cache.py)
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+from prediction_cache import PredictionCache, model_identity
+
+CONFIG = {'target_size': (128, 128), 'crop_margin': 0.10}
+RESULT = {'predictions': {'normal': 0.2, 'tumor': 0.8}, 'heatmap': 'abc'}
+
+
+def test_key_depends_on_image_and_variant():
+    """Mesma imagem e variante geram a mesma chave; qualquer diferença muda a chave"""
+    cache = PredictionCache()
+    key = cache.make_key(b'imagem', tta=None, heatmap='gradcam')
+    assert key == cache.make_key(b'imagem', heatmap='gradcam', tta=None)
+    assert key != cache.make_key(b'imagem2', tta=None, heatmap='gradcam')
+    assert key != cache.make_key(b'imagem', tta='mean', heatmap='gradcam')
+
+
+def test_memory_hit_and_lru():
+    """Acerto em memória e descarte do item menos usado"""
+    cache = PredictionCache(max_entries=2)
+    cache.set_namespace('modelo-a', CONFIG)
+    cache.put('k1', RESULT)
+    cache.put('k2', RESULT)
+    assert cache.get('k1') == RESULT
+    cache.put('k3', RESULT)
+
+    assert cache.get('k2') is None
+    stats = cache.get_stats()
+    assert stats['hits_memory'] == 1 and stats['misses'] == 1 and stats['evictions'] == 1
+
+
+def test_model_change_invalidates():
+    """Trocar o modelo (ou o preprocessamento) descarta os resultados anteriores"""
+    cache = PredictionCache()
+    cache.set_namespace('modelo-a', CONFIG)
+    cache.put('k', RESULT)
+
+    cache.set_namespace('modelo-a', CONFIG)
+    assert cache.get('k') == RESULT
+
+    cache.set_namespace('modelo-b', CONFIG)
+    assert cache.get('k') is None
+    cache.set_namespace('modelo-b', dict(CONFIG, crop_margin=0.05))
+    assert cache.get_stats()['invalidations'] == 2
+
+
+def test_disk_tier_survives_restart():
+    """O nível em disco é reaproveitado por outra instância com o mesmo modelo"""
+    with tempfile.TemporaryDirectory() as disk_dir:
+        first = PredictionCache(disk_dir=disk_dir)
+        first.set_namespace('modelo-a', CONFIG)
+        first.put('k', RESULT)
+
+        second = PredictionCache(disk_dir=disk_dir)
+        second.set_namespace('modelo-a', CONFIG)
+        assert second.get('k') == RESULT
+        assert second.get('k') == RESULT
+        stats = second.get_stats()
+        assert stats['hits_disk'] == 1 and stats['hits_memory'] == 1
+
+        other = PredictionCache(disk_dir=disk_dir)
+        other.set_namespace('modelo-b', CONFIG)
+        assert other.get('k') is None
+
+
+def test_model_identity_tracks_file_content():
+    """A identidade muda quando o arquivo do modelo é substituído"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'modelo.h5')
+        with open(path, 'wb') as f:
+            f.write(b'pesos v1')
+        first = model_identity(path)
+        assert first == model_identity(path)
+
+        with open(path, 'wb') as f:
+            f.write(b'pesos v2')
+        assert model_identity(path) != first
+
+
+def main():
+    """Executa todos os testes do cache de predições"""
+    print("🧪 TESTES DO CACHE DE PREDIÇÕES")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,105 @@
+"""
+Testes do cache de tokens de sessão (web/session_cache.py)
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+from session_cache import SessionCache
+
+
+def test_hit_and_miss_counters():
+    """Primeira consulta é falta; depois de put, acerto"""
+    cache = SessionCache()
+    assert cache.get('abc') is None
+    cache.put('abc', {'id': 1})
+    assert cache.get('abc') == {'id': 1}
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+
+def test_ttl_expiration():
+    """Entradas expiram após o TTL"""
+    cache = SessionCache(ttl_seconds=0.02)
+    cache.put('abc', {'id': 1})
+    time.sleep(0.03)
+    assert cache.get('abc') is None
+    assert cache.get_stats()['expirations'] == 1
+
+
+def test_ttl_capped_by_session_expiry():
+    """O TTL nunca passa do expires_at da sessão; sessões vencidas não entram"""
+    cache = SessionCache(ttl_seconds=3600)
+    cache.put('quase', {'id': 1}, datetime.now() + timedelta(milliseconds=20))
+    cache.put('vencida', {'id': 2}, datetime.now() - timedelta(seconds=1))
+    assert cache.get('quase') == {'id': 1}
+    assert cache.get('vencida') is None
+
+    time.sleep(0.03)
+    assert cache.get('quase') is None
+
+
+def test_lru_eviction():
+    """O token menos usado recentemente sai quando o limite é atingido"""
+    cache = SessionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_invalidate_on_logout():
+    """invalidate remove o token imediatamente"""
+    cache = SessionCache()
+    cache.put('abc', {'id': 1})
+    cache.invalidate('abc')
+    cache.invalidate('inexistente')
+    assert cache.get('abc') is None
+    assert cache.get_stats()['invalidations'] == 1
+
+
+def test_put_after_invalidate_is_ignored():
+    """Validação concorrente lida antes do logout não devolve o token ao cache durante o TTL"""
+    cache = SessionCache(ttl_seconds=0.05)
+    cache.put('abc', {'id': 1})
+    cache.invalidate('abc')
+    cache.put('abc', {'id': 1})
+    assert cache.get('abc') is None
+
+    cache.put('outro', {'id': 2})
+    assert cache.get('outro') == {'id': 2}
+
+    time.sleep(0.06)
+    cache.put('abc', {'id': 1})
+    assert cache.get('abc') == {'id': 1}
+
+
+def main():
+    """Executa todos os testes do cache"""
+    print("🧪 TESTES DO CACHE DE SESSÕES")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
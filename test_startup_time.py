@@ -0,0 +1,119 @@
+"""
+Teste de regressão do tempo de inicialização (python -X importtime)
+
+Os pontos de entrada (menu de predição, API, interface gráfica) não devem
+importar TensorFlow, matplotlib, seaborn ou sklearn no topo: esses módulos
+são carregados só quando usados. Cada módulo é importado em um processo novo
+com -X importtime, que informa o tempo acumulado de cada import.
+
+O orçamento de tempo pode ser ajustado em máquinas lentas com
+NEUROAI_STARTUP_BUDGET_MS (padrão 1500 ms; só o import do TensorFlow leva
+vários segundos).
+"""
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_BUDGET_MS = float(os.environ.get('NEUROAI_STARTUP_BUDGET_MS', 1500))
+
+# Pacotes pesados que não podem ser importados só por abrir um ponto de entrada
+HEAVY_MODULES = ('tensorflow', 'keras', 'matplotlib', 'seaborn', 'sklearn')
+
+# (diretório do módulo, módulo)
+ENTRY_POINTS = [
+    ('src', 'predict'),
+    ('src', 'batch_predict'),
+    ('src', 'inference_backends'),
+    ('src', 'gradcam'),
+    ('web', 'api_server'),
+    ('.', 'visual_diagnosis_modern')
+]
+
+
+def import_profile(directory, module):
+    """
+    Importa o módulo em um processo novo com -X importtime
+
+    Returns:
+        Dicionário {módulo importado: tempo acumulado em ms}
+    """
+    code = (
+        "import sys; "
+        f"sys.path[:0] = [{os.path.join(ROOT, directory)!r}, {os.path.join(ROOT, 'src')!r}]; "
+        f"import {module}"
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, cwd=ROOT, env=env)
+    assert proc.returncode == 0, proc.stderr.strip().splitlines()[-1:]
+
+    profile = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative) / 1000.0
+    return profile
+
+
+def check_entry_point(directory, module):
+    profile = import_profile(directory, module)
+    heavy = sorted(name for name in profile if name.split('.')[0] in HEAVY_MODULES)
+    assert not heavy, f"{module} importa módulos pesados na inicialização: {heavy[:5]}"
+    assert module in profile, f"{module} não aparece no -X importtime"
+    assert profile[module] <= STARTUP_BUDGET_MS, (
+        f"{module} levou {profile[module]:.0f} ms para importar (orçamento {STARTUP_BUDGET_MS:.0f} ms)"
+    )
+    return profile[module]
+
+
+def test_predict_startup():
+    """Menu de predição abre sem TensorFlow/matplotlib"""
+    check_entry_point('src', 'predict')
+
+
+def test_batch_predict_startup():
+    """CLI de predição em lote abre sem TensorFlow"""
+    check_entry_point('src', 'batch_predict')
+
+
+def test_backends_startup():
+    """Runtimes de inferência só importam TensorFlow/ONNX Runtime ao criar um motor"""
+    check_entry_point('src', 'inference_backends')
+    check_entry_point('src', 'gradcam')
+
+
+def test_api_server_startup():
+    """API importa sem TensorFlow (o modelo é carregado em init_worker)"""
+    check_entry_point('web', 'api_server')
+
+
+def test_gui_startup():
+    """Interface gráfica importa sem TensorFlow/matplotlib (modelo carregado em segundo plano)"""
+    check_entry_point('.', 'visual_diagnosis_modern')
+
+
+def main():
+    """Mede o import de cada ponto de entrada e confere o orçamento"""
+    print("🧪 TESTES DE TEMPO DE INICIALIZAÇÃO")
+    print("=" * 50)
+    print(f"   Orçamento por ponto de entrada: {STARTUP_BUDGET_MS:.0f} ms\n")
+
+    failures = 0
+    for directory, module in ENTRY_POINTS:
+        try:
+            elapsed = check_entry_point(directory, module)
+            print(f"   ✅ {module:<24} {elapsed:7.0f} ms")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {module:<24} {e}")
+
+    print(f"\n📊 {len(ENTRY_POINTS) - failures}/{len(ENTRY_POINTS)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,121 @@
+"""
+Testes da exportação TFLite e do motor TFLiteEngine (src/tflite_export.py, src/tflite_engine.py)
+
+Usa um modelo pequeno com a mesma estrutura dos CNNs do projeto
+(Conv2D + BatchNormalization + pooling + Dense sigmoid), criado na hora.
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+import tensorflow as tf
+from inference_engine import InferenceEngine
+from tflite_engine import TFLiteEngine
+from tflite_export import export_tflite, tumor_probability
+
+_cache = {}
+
+
+def small_model():
+    if 'model' not in _cache:
+        tf.random.set_seed(0)
+        model = tf.keras.Sequential([
+            tf.keras.Input((64, 64, 3)),
+            tf.keras.layers.Conv2D(8, 3, activation='relu'),
+            tf.keras.layers.BatchNormalization(),
+            tf.keras.layers.MaxPooling2D(2),
+            tf.keras.layers.Conv2D(16, 3, activation='relu'),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(1, activation='sigmoid')
+        ])
+        rng = np.random.default_rng(0)
+        _cache['model'] = model
+        _cache['images'] = rng.random((24, 64, 64, 3), dtype=np.float32)
+    return _cache['model'], _cache['images']
+
+
+def exported(variant):
+    key = f"tflite_{variant}"
+    if key not in _cache:
+        model, images = small_model()
+        _cache[key] = export_tflite(model, variant, calibration=images[:16])
+    return _cache[key]
+
+
+def test_dynamic_range_matches_keras():
+    """Faixa dinâmica: mesmas probabilidades do Keras (tolerância de quantização dos pesos)"""
+    model, images = small_model()
+    reference = InferenceEngine(model).predict(images)
+    result = TFLiteEngine(model_content=exported('dynamic')).predict(images)
+    assert result.shape == reference.shape and result.dtype == np.float32
+    assert np.abs(result - reference).max() < 0.02
+
+
+def test_int8_quantized_io():
+    """INT8 completo: entrada/saída int8 convertidas de forma transparente"""
+    model, images = small_model()
+    engine = TFLiteEngine(model_content=exported('int8'))
+    assert engine.quantized and engine.input_shape == (64, 64, 3)
+    reference = InferenceEngine(model).predict(images)
+    result = engine.predict(images)
+    assert result.dtype == np.float32
+    assert np.abs(result - reference).max() < 0.05
+
+
+def test_dynamic_batch_size():
+    """Lotes de tamanhos diferentes no mesmo interpretador dão o mesmo resultado por item"""
+    _, images = small_model()
+    engine = TFLiteEngine(model_content=exported('dynamic'), warmup_batch_sizes=(1, 8))
+    full = engine.predict(images)
+    assert np.allclose(engine.predict(images[:1]), full[:1], atol=1e-6)
+    assert np.allclose(engine.predict(images[:5]), full[:5], atol=1e-6)
+    assert np.allclose(engine.predict_single(images[3]), full[3], atol=1e-6)
+
+
+def test_int8_requires_calibration():
+    """Sem imagens de calibração a variante int8 é recusada"""
+    model, _ = small_model()
+    try:
+        export_tflite(model, 'int8', calibration=None)
+    except ValueError:
+        return
+    raise AssertionError("deveria exigir calibração")
+
+
+def test_load_from_file_and_tumor_probability():
+    """Arquivo .tflite em disco e extração da probabilidade de tumor (sigmoid/softmax)"""
+    _, images = small_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'modelo_dynamic.tflite')
+        with open(path, 'wb') as f:
+            f.write(exported('dynamic'))
+        engine = TFLiteEngine.from_path(path)
+        assert engine.predict(images[:2]).shape == (2, 1)
+    assert np.allclose(tumor_probability(np.array([[0.2], [0.9]])), [0.2, 0.9])
+    assert np.allclose(tumor_probability(np.array([[0.8, 0.2], [0.1, 0.9]])), [0.2, 0.9])
+
+
+def main():
+    """Executa todos os testes da exportação TFLite"""
+    print("🧪 TESTES DA EXPORTAÇÃO TFLITE")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
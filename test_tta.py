@@ -0,0 +1,113 @@
+"""
+Testes de paridade do Test-Time Augmentation empilhado (src/inference_engine.py)
+
+Compara build_tta_batch/aggregate_tta com o laço por variante que o
+visual_diagnosis_modern.predict_with_tta usava antes (uma predição por
+variante e média em Python).
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from inference_engine import (InferenceBackend, DEFAULT_TTA_TRANSFORMS,
+                              build_tta_batch, aggregate_tta)
+from mri_preprocessing import preprocess_mri
+from test_mri_preprocessing import synthetic_mri
+
+
+def legacy_variants(x):
+    """Variantes na ordem do laço anterior: original, flip horizontal/vertical, rotações 90/180/270"""
+    return [x, np.flip(x, axis=1), np.flip(x, axis=0), np.rot90(x, 1), np.rot90(x, 2), np.rot90(x, 3)]
+
+
+class OrientationEngine(InferenceBackend):
+    """Backend determinístico sem TensorFlow, sensível à orientação da imagem"""
+    name = 'stub'
+    input_shape = (64, 64, 3)
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.weights = rng.standard_normal(self.input_shape).astype(np.float32)
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        score = (batch * self.weights).mean(axis=(1, 2, 3)) * 50.0
+        return (1.0 / (1.0 + np.exp(-score)))[:, None].astype(np.float32)
+
+
+def fixed_image(seed=7):
+    return preprocess_mri(synthetic_mri((200, 180, 3), seed=seed), (64, 64))
+
+
+def test_stacked_batch_matches_legacy_variants():
+    """Mesmas transformações, na mesma ordem, que o laço anterior"""
+    image = fixed_image()
+    stacked = build_tta_batch(image)
+    assert stacked.shape == (len(DEFAULT_TTA_TRANSFORMS), 64, 64, 3) and stacked.dtype == np.float32
+    for variant, expected in zip(stacked, legacy_variants(image[0])):
+        assert np.array_equal(variant, expected)
+    assert np.array_equal(build_tta_batch(image[0]), stacked)
+
+
+def test_multi_image_batch_is_ordered_by_transform():
+    """Com N imagens, o lote é T blocos de N (transformação por fora, imagem por dentro)"""
+    images = np.concatenate([fixed_image(1), fixed_image(2)])
+    stacked = build_tta_batch(images)
+    for t in range(len(DEFAULT_TTA_TRANSFORMS)):
+        for n in range(2):
+            assert np.array_equal(stacked[t * 2 + n], legacy_variants(images[n])[t])
+
+
+def test_aggregated_prediction_matches_legacy_mean():
+    """predict_tta (uma passada) == média das predições por variante do código anterior"""
+    engine = OrientationEngine()
+    image = fixed_image()
+    legacy = float(np.mean([float(engine.predict(v[np.newaxis])[0][0]) for v in legacy_variants(image[0])]))
+    assert abs(float(engine.predict_tta(image, aggregation='mean')[0][0]) - legacy) < 1e-6
+
+    images = np.concatenate([fixed_image(1), fixed_image(2)])
+    outputs = engine.predict(build_tta_batch(images))
+    for aggregation, reduce in (('mean', np.mean), ('median', np.median), ('max', np.max)):
+        result = aggregate_tta(outputs, len(DEFAULT_TTA_TRANSFORMS), aggregation)
+        assert result.shape == (2, 1)
+        for n in range(2):
+            per_variant = [engine.predict(v[np.newaxis])[0][0] for v in legacy_variants(images[n])]
+            assert abs(result[n, 0] - reduce(per_variant)) < 1e-6
+
+
+def test_invalid_transform_and_aggregation():
+    """Transformação ou agregação desconhecida gera ValueError"""
+    for call in (lambda: build_tta_batch(fixed_image(), ('identity', 'zoom')),
+                 lambda: aggregate_tta(np.zeros((6, 1)), 6, 'moda')):
+        try:
+            call()
+        except ValueError:
+            continue
+        raise AssertionError("deveria recusar opção desconhecida")
+
+
+def main():
+    """Executa todos os testes de TTA"""
+    print("🧪 TESTES DE TEST-TIME AUGMENTATION")
+    print("=" * 50)
+
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith('test_') and callable(obj)]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} testes passaram")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
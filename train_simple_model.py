@@ -2,10 +2,8 @@
 Treinamento de modelo SIMPLES e EQUILIBRADO
 """
 import os
+import sys
 import numpy as np
-import cv2
-from sklearn.model_selection import train_test_split
-from sklearn.utils.class_weight import compute_class_weight
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, BatchNormalization
 from tensorflow.keras.optimizers import Adam
@@ -13,80 +11,8 @@ from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
 from tensorflow.keras.regularizers import l2
 import matplotlib.pyplot as plt
 
-def load_balanced_data(dataset_path, max_per_category=200):
-    """Carrega dados com balanceamento perfeito"""
-    
-    print(f"📁 Carregando dados EQUILIBRADOS de {dataset_path}...")
-    
-    images = []
-    labels = []
-    
-    categories = {
-        'notumor': 0,      # Normal/Sem tumor
-        'glioma': 1,       # Glioma (tumor)
-        'meningioma': 1,   # Meningioma (tumor)  
-        'pituitary': 1     # Pituitário (tumor)
-    }
-    
-    category_counts = {0: 0, 1: 0}
-    
-    # Processar Training e Testing
-    for split in ['Training', 'Testing']:
-        split_path = os.path.join(dataset_path, split)
-        if not os.path.exists(split_path):
-            continue
-            
-        print(f"📂 Processando {split}...")
-        
-        for category_name, label in categories.items():
-            category_path = os.path.join(split_path, category_name)
-            
-            if not os.path.exists(category_path):
-                continue
-            
-            print(f"   📁 {category_name} -> Label {label} ({'Normal' if label == 0 else 'Tumor'})")
-            
-            # Listar arquivos de imagem
-            image_files = [f for f in os.listdir(category_path) 
-                          if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            
-            # LIMITAR para garantir balanceamento
-            image_files = image_files[:max_per_category]
-            
-            count = 0
-            for img_file in image_files:
-                img_path = os.path.join(category_path, img_file)
-                
-                try:
-                    # Carregar e processar imagem
-                    img = cv2.imread(img_path)
-                    if img is None:
-                        continue
-                        
-                    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                    img = cv2.resize(img, (128, 128))
-                    img = img.astype(np.float32) / 255.0
-                    
-                    images.append(img)
-                    labels.append(label)
-                    category_counts[label] += 1
-                    count += 1
-                    
-                    if count % 100 == 0:
-                        print(f"      Processadas: {count}")
-                        
-                except Exception as e:
-                    continue
-            
-            print(f"   ✅ {category_name}: {count} imagens carregadas")
-    
-    print(f"\n📊 DISTRIBUIÇÃO EQUILIBRADA:")
-    print(f"   Normal (0): {category_counts[0]} imagens")
-    print(f"   Tumor (1): {category_counts[1]} imagens")
-    print(f"   Total: {len(images)} imagens")
-    print(f"   Proporção: {category_counts[0]/len(images)*100:.1f}% normal, {category_counts[1]/len(images)*100:.1f}% tumor")
-    
-    return np.array(images), np.array(labels)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from balanced_sampler import BalancedSampler
 
 def create_simple_model(input_shape):
     """Cria modelo simples e equilibrado"""
@@ -165,40 +91,28 @@ def main():
         return
     
     try:
-        # Carregar dados equilibrados
-        X, y = load_balanced_data(dataset_path, max_per_category=200)
+        # Amostragem balanceada: até 200 imagens sorteadas por pasta, decodificadas
+        # em paralelo; as classes são equilibradas a cada época (undersample)
+        sampler = BalancedSampler(dataset_path, img_size=(128, 128), max_per_category=200, strategy='undersample')
         
-        if len(X) == 0:
+        if len(sampler) == 0:
             print("❌ Nenhuma imagem carregada!")
             return
         
-        # Verificar distribuição
-        unique, counts = np.unique(y, return_counts=True)
-        print(f"\n📈 Distribuição final:")
-        for label, count in zip(unique, counts):
-            print(f"   Classe {label}: {count} amostras ({count/len(y)*100:.1f}%)")
-        
-        # Dividir dados
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        X_train, X_val, y_train, y_val = train_test_split(
-            X_train, y_train, test_size=0.2, random_state=42, stratify=y_train
-        )
+        # Dividir dados (estratificado, só índices)
+        train_idx, val_idx, test_idx = sampler.split()
+        X_val, y_val = sampler.load(val_idx)
+        X_test, y_test = sampler.load(test_idx)
         
         print(f"\n📋 Divisão dos dados:")
-        print(f"   Treino: {len(X_train)} | Validação: {len(X_val)} | Teste: {len(X_test)}")
+        print(f"   Treino: {len(train_idx)} | Validação: {len(val_idx)} | Teste: {len(test_idx)}")
         
-        # Calcular pesos das classes
-        class_weights = compute_class_weight(
-            'balanced', classes=np.unique(y_train), y=y_train
-        )
-        class_weight_dict = dict(enumerate(class_weights))
-        print(f"⚖️ Pesos das classes: {class_weight_dict}")
+        # Épocas equilibradas substituem os pesos das classes
+        epoch_counts = sampler.class_counts(sampler.epoch_indices(train_idx))
+        print(f"⚖️ Treino por classe: {sampler.class_counts(train_idx)} | por época ({sampler.strategy}): {epoch_counts}")
         
         # Criar modelo simples
-        model = create_simple_model(X_train.shape[1:])
+        model = create_simple_model(X_val.shape[1:])
         print(f"🧠 Modelo criado com {model.count_params():,} parâmetros")
         
         # Callbacks
@@ -214,11 +128,10 @@ def main():
         print(f"\n🚀 Iniciando treinamento simples (15 épocas)...")
         
         history = model.fit(
-            X_train, y_train,
+            sampler.dataset(train_idx, batch_size=32),
+            steps_per_epoch=sampler.steps_per_epoch(train_idx, batch_size=32),
             epochs=15,
-            batch_size=32,
             validation_data=(X_val, y_val),
-            class_weight=class_weight_dict,
             callbacks=[early_stopping, reduce_lr],
             verbose=1
         )
@@ -1,17 +1,25 @@
 """
 Interface Visual MODERNA para Diagnóstico de Câncer - Design Profissional
 Layout moderno com tema médico elegante
+
+A janela aparece antes do TensorFlow: carregamento do modelo, análise e
+calibração do limiar rodam em segundo plano (src/background_tasks.py), com
+barra de progresso e cancelamento, e o matplotlib só é importado ao desenhar
+os gráficos.
 """
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk, ImageDraw, ImageFilter
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.patches import Rectangle
 import os
-from tensorflow.keras.models import load_model
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from inference_engine import InferenceEngine, DEFAULT_TTA_TRANSFORMS, build_tta_batch, aggregate_tta
+from gradcam import GradCAM
+from mri_preprocessing import crop_box, preprocess_mri
+from background_tasks import BackgroundRunner
 
 class ModernCancerDiagnosis:
     def __init__(self):
@@ -60,6 +68,14 @@ class ModernCancerDiagnosis:
         
         # Variáveis
         self.model = None
+        self.engine = None
+        self.gradcam = None
+        
+        # Tarefas em segundo plano: resultados entregues ao loop do Tk via root.after
+        self.runner = BackgroundRunner(self.root.after, max_workers=2)
+        self._model_task = None
+        self.current_task = None  # Análise ou calibração em andamento (uma por vez)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.current_image = None
         self.current_image_path = None
         self.img_size = (128, 128)
@@ -337,18 +353,38 @@ class ModernCancerDiagnosis:
         self.analyze_btn.pack(pady=20)
         
         # Progress bar moderna
-        progress_frame = tk.Frame(analysis_card, bg=self.colors['bg_card'])
-        progress_frame.pack(fill='x', padx=20, pady=(0, 20))
+        self.progress_frame = tk.Frame(analysis_card, bg=self.colors['bg_card'])
+        self.progress_frame.pack(fill='x', padx=20, pady=(0, 20))
         
         self.progress_var = tk.DoubleVar()
         self.progress = ttk.Progressbar(
-            progress_frame,
+            self.progress_frame,
             variable=self.progress_var,
-            mode='indeterminate',
+            mode='determinate',
+            maximum=100,
             style='Modern.Horizontal.TProgressbar'
         )
         self.progress.pack(fill='x')
         
+        self.progress_label = tk.Label(
+            self.progress_frame,
+            text="",
+            font=self.fonts['small'],
+            bg=self.colors['bg_card'],
+            fg=self.colors['text_muted']
+        )
+        self.progress_label.pack(anchor='w', pady=(4, 0))
+        
+        # Botão de cancelamento (visível só enquanto há tarefa em andamento)
+        self.cancel_btn = self.create_modern_button(
+            analysis_card,
+            text="✖ Cancelar",
+            command=self.cancel_task,
+            color=self.colors['accent_red'],
+            width=250,
+            height=40
+        )
+        
         # Configurar estilo da progress bar
         self.setup_progressbar_style()
         
@@ -772,7 +808,7 @@ class ModernCancerDiagnosis:
         )
     
     def load_corrected_model(self):
-        """Carrega o modelo balanceado (sem viés)"""
+        """Procura o modelo balanceado (sem viés) e inicia o carregamento em segundo plano"""
         # Tentar primeiro o modelo balanceado
         balanced_model = "models/brain_cancer_balanced.h5"
         corrected_model = "models/brain_cancer_corrected.h5"
@@ -788,22 +824,108 @@ class ModernCancerDiagnosis:
             model_info = "Acurácia: 83.96% • Modelo Corrigido"
         
         if model_path:
-            try:
-                self.model = load_model(model_path)
-                self.status_indicator.config(fg=self.colors['success'])
-                self.model_status_label.config(text="Modelo Online")
-                self.model_info_label.config(text=model_info)
-                print(f"✅ Modelo carregado: {model_path}")
-            except Exception as e:
-                self.status_indicator.config(fg=self.colors['danger'])
-                self.model_status_label.config(text="Erro no Modelo")
-                self.model_info_label.config(text="Falha ao carregar")
-                print(f"❌ Erro: {e}")
+            # Importar o TensorFlow e carregar o modelo leva alguns segundos: a janela
+            # fica utilizável enquanto isso e o status é atualizado ao terminar
+            self.model_info_label.config(text=os.path.basename(model_path))
+            self._model_task = self.runner.submit(
+                self._load_model_worker, model_path,
+                name='carregar_modelo',
+                on_done=lambda loaded: self._on_model_loaded(model_path, model_info, loaded),
+                on_error=self._on_model_error
+            )
+            # Adianta o import do matplotlib para o primeiro gráfico não esperar por ele
+            self.runner.submit(self._preload_plotting, name='preload_matplotlib')
         else:
             self.status_indicator.config(fg=self.colors['danger'])
             self.model_status_label.config(text="Modelo Não Encontrado")
             self.model_info_label.config(text="Execute o treinamento")
     
+    def _load_model_worker(self, task, model_path):
+        """Tarefa de fundo: modelo, motor de inferência e Grad-CAM (não toca nos widgets)"""
+        from tensorflow.keras.models import load_model
+        model = load_model(model_path)
+        task.check_cancelled()
+        engine = InferenceEngine(model)
+        try:
+            gradcam = GradCAM(model)
+        except ValueError as e:
+            print(f"⚠️ Grad-CAM indisponível: {e}")
+            gradcam = None
+        return model, engine, gradcam
+    
+    def _preload_plotting(self, task):
+        """Tarefa de fundo: importa o matplotlib antes da primeira análise"""
+        try:
+            import matplotlib.pyplot  # noqa: F401
+        except ImportError:
+            pass
+    
+    def _on_model_loaded(self, model_path, model_info, loaded):
+        """Modelo pronto (thread principal): publica e atualiza o status"""
+        self.model, self.engine, self.gradcam = loaded
+        self.status_indicator.config(fg=self.colors['success'])
+        self.model_status_label.config(text="Modelo Online")
+        self.model_info_label.config(text=model_info)
+        print(f"✅ Modelo carregado: {model_path}")
+    
+    def _on_model_error(self, error):
+        self.status_indicator.config(fg=self.colors['danger'])
+        self.model_status_label.config(text="Erro no Modelo")
+        self.model_info_label.config(text="Falha ao carregar")
+        print(f"❌ Erro: {error}")
+    
+    def model_ready(self):
+        """Indica se o modelo já pode ser usado, avisando se ainda está carregando"""
+        if self.model is not None:
+            return True
+        if self._model_task is not None and not self._model_task.done:
+            messagebox.showinfo("Aguarde", "O modelo ainda está sendo carregado.\nTente novamente em alguns segundos.")
+        else:
+            messagebox.showerror("Erro", "Modelo não foi carregado corretamente")
+        return False
+    
+    def task_running(self):
+        """Indica se há análise/calibração em andamento, avisando o usuário"""
+        if self.current_task is not None and not self.current_task.done:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.\nAguarde ou cancele antes de iniciar outra.")
+            return True
+        return False
+    
+    def start_progress(self, message):
+        """Zera a barra de progresso e mostra o botão de cancelamento"""
+        self.progress_var.set(0)
+        self.progress_label.config(text=message)
+        self.cancel_btn.pack(after=self.progress_frame, pady=(0, 12))
+    
+    def update_progress(self, completed, total, message=None):
+        """Callback de progresso das tarefas (thread principal)"""
+        self.progress_var.set(100.0 * completed / max(1, total))
+        if message:
+            self.progress_label.config(text=message)
+    
+    def finish_progress(self, message=""):
+        """Encerra a barra de progresso e esconde o botão de cancelamento"""
+        self.progress_var.set(0)
+        self.progress_label.config(text=message)
+        self.cancel_btn.pack_forget()
+    
+    def cancel_task(self):
+        """Pede o cancelamento da análise/calibração em andamento"""
+        if self.current_task is not None and not self.current_task.done:
+            self.current_task.cancel()
+            self.progress_label.config(text="Cancelando...")
+    
+    def _on_task_cancelled(self):
+        self.finish_progress("Operação cancelada")
+        self.quick_result_icon.config(text="⏹", fg=self.colors['text_muted'])
+        self.quick_result_text.config(text="Operação cancelada", fg=self.colors['text_secondary'])
+    
+    def _on_task_error(self, error):
+        self.finish_progress("")
+        self.quick_result_icon.config(text="❌", fg=self.colors['danger'])
+        self.quick_result_text.config(text="Erro na análise", fg=self.colors['danger'])
+        messagebox.showerror("Erro", f"Erro durante análise:\n{str(error)}")
+    
     def select_image(self):
         """Seleciona imagem para análise"""
         file_path = filedialog.askopenfilename(
@@ -818,6 +940,9 @@ class ModernCancerDiagnosis:
         )
         
         if file_path:
+            # A análise em andamento era da imagem anterior
+            if self.current_task is not None and self.current_task.name == 'analise':
+                self.current_task.cancel()
             self.current_image_path = file_path
             self.display_image(file_path)
             filename = os.path.basename(file_path)
@@ -877,51 +1002,74 @@ class ModernCancerDiagnosis:
             messagebox.showerror("Erro", f"Erro ao carregar imagem:\n{str(e)}")
     
     def analyze_image(self):
-        """Realiza análise da imagem com interface moderna"""
-        if self.model is None:
-            messagebox.showerror("Erro", "Modelo não foi carregado corretamente")
+        """Inicia a análise da imagem em segundo plano (a janela continua responsiva)"""
+        if not self.model_ready():
             return
         
         if self.current_image is None:
             messagebox.showerror("Erro", "Selecione uma imagem primeiro")
             return
         
-        try:
-            # Iniciar animação de progresso
-            self.progress.start(10)
-            self.quick_result_icon.config(text="🔄", fg=self.colors['warning'])
-            self.quick_result_text.config(text="Analisando...", fg=self.colors['text_primary'])
-            self.root.update()
-            
-            # Pré-processar imagem
-            processed_img = self.preprocess_image(self.current_image)
-            
-            # Fazer predição com TTA (rotações e flips)
+        if self.task_running():
+            return
+        
+        self.quick_result_icon.config(text="🔄", fg=self.colors['warning'])
+        self.quick_result_text.config(text="Analisando...", fg=self.colors['text_primary'])
+        self.start_progress("Pré-processando imagem...")
+        self.current_task = self.runner.submit(
+            self._analysis_worker, self.current_image,
+            name='analise',
+            on_progress=self.update_progress,
+            on_done=self._on_analysis_done,
+            on_error=self._on_task_error,
+            on_cancel=self._on_task_cancelled
+        )
+    
+    def _analysis_worker(self, task, image):
+        """Tarefa de fundo: preprocessamento, TTA e Grad-CAM (não toca nos widgets)"""
+        task.report(0, 4, "Pré-processando imagem...")
+        processed_img = self.preprocess_image(image)
+        task.check_cancelled()
+        
+        # Fazer predição com TTA (rotações e flips) e Grad-CAM na mesma passada
+        task.report(1, 4, "Executando o modelo (TTA + Grad-CAM)...")
+        heatmap = None
+        if self.gradcam is not None:
+            outputs, maps = self.gradcam.compute(build_tta_batch(processed_img, DEFAULT_TTA_TRANSFORMS))
+            prediction = aggregate_tta(outputs, len(DEFAULT_TTA_TRANSFORMS))[0][0]
+            heatmap = maps[0]  # Mapa da variante original
+        else:
             prediction = self.predict_with_tta(processed_img)
-            
-            # Interpretar resultado
-            probability = float(prediction)
-            threshold = float(self.decision_threshold.get())
-            is_tumor = probability > threshold
-            confidence = probability if is_tumor else 1 - probability
-            
-            # Parar progresso
-            self.progress.stop()
-            
-            # Atualizar resultados
-            self.display_modern_results(is_tumor, confidence, probability)
-            
-            # Gerar gráficos modernos
-            self.display_modern_charts(confidence, is_tumor, probability)
-            
-            # Gerar mapa de ativação
-            self.generate_activation_map(processed_img, is_tumor, confidence)
-            
-        except Exception as e:
-            self.progress.stop()
-            self.quick_result_icon.config(text="❌", fg=self.colors['danger'])
-            self.quick_result_text.config(text="Erro na análise", fg=self.colors['danger'])
-            messagebox.showerror("Erro", f"Erro durante análise:\n{str(e)}")
+        
+        task.report(2, 4, "Gerando gráficos...")
+        return float(prediction), heatmap
+    
+    def _on_analysis_done(self, result):
+        """Resultado da análise (thread principal): textos, gráficos e mapa de ativação"""
+        probability, heatmap = result
+        threshold = float(self.decision_threshold.get())
+        is_tumor = probability > threshold
+        confidence = probability if is_tumor else 1 - probability
+        
+        # Atualizar resultados
+        self.display_modern_results(is_tumor, confidence, probability)
+        
+        # Gráficos e mapa precisam da thread do Tk: cada um em um ciclo do loop,
+        # para a janela processar eventos entre eles
+        def render_charts():
+            try:
+                self.display_modern_charts(confidence, is_tumor, probability)
+            except Exception as e:
+                self._on_task_error(e)
+                return
+            self.update_progress(3, 4, "Gerando mapa de ativação...")
+            self.root.after(1, render_heatmap)
+        
+        def render_heatmap():
+            self.generate_activation_map(heatmap)
+            self.finish_progress("Análise concluída")
+        
+        self.root.after(1, render_charts)
     
     def display_modern_results(self, is_tumor, confidence, probability):
         """Exibe resultados com design moderno"""
@@ -1000,6 +1148,9 @@ class ModernCancerDiagnosis:
     
     def display_modern_charts(self, confidence, is_tumor, probability):
         """Exibe gráficos com design moderno"""
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         # Limpar frame anterior
         for widget in self.charts_frame.winfo_children():
             widget.destroy()
@@ -1118,55 +1269,41 @@ class ModernCancerDiagnosis:
         - Normaliza 0-1 e replica para 3 canais
         - Redimensiona para o tamanho do modelo
         """
-        h, w = image.shape[:2]
-        margin_h = int(h * 0.10)
-        margin_w = int(w * 0.10)
-        cropped = image[margin_h:h - margin_h, margin_w:w - margin_w]
-
-        if len(cropped.shape) == 3:
-            gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = cropped
-
-        try:
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            gray = clahe.apply(gray)
-        except Exception:
-            gray = cv2.equalizeHist(gray)
-
-        gray = gray.astype(np.float32) / 255.0
-        img_rgb = np.stack([gray, gray, gray], axis=-1)
-        img_resized = cv2.resize(img_rgb, self.img_size)
-        img_resized = np.expand_dims(img_resized, axis=0)
-        return img_resized
+        return preprocess_mri(image, self.img_size)
 
     def predict_with_tta(self, img_batch):
         """Aplica Test-Time Augmentation e retorna média das probabilidades"""
         # img_batch: (1, H, W, 3) em float32 [0,1]
-        x = img_batch[0]
-        variants = []
-        variants.append(x)  # original
-        variants.append(np.flip(x, axis=1))  # flip horizontal
-        variants.append(np.flip(x, axis=0))  # flip vertical
-        variants.append(np.rot90(x, 1))
-        variants.append(np.rot90(x, 2))
-        variants.append(np.rot90(x, 3))
-        
-        probs = []
-        for v in variants:
-            pv = np.expand_dims(v, axis=0)
-            p = self.model.predict(pv, verbose=0)[0][0]
-            probs.append(float(p))
-        
-        return float(np.mean(probs))
+        # Original, flips horizontal/vertical e rotações de 90/180/270 em um único lote
+        return float(self.engine.predict_tta(img_batch, aggregation='mean')[0][0])
 
     def compute_optimal_threshold(self):
-        """Calcula limiar ótimo no conjunto Testing (Youden J)"""
+        """Calcula limiar ótimo no conjunto Testing (Youden J) em segundo plano"""
+        if not self.model_ready():
+            return
+        
         testing_dir = "datasets/brain_cancer/Testing"
         if not os.path.exists(testing_dir):
             messagebox.showwarning("Aviso", "Pasta Testing não encontrada")
             return
         
+        if self.task_running():
+            return
+        
+        self.quick_result_icon.config(text="🔄", fg=self.colors['warning'])
+        self.quick_result_text.config(text="Calibrando limiar...", fg=self.colors['text_primary'])
+        self.start_progress("Listando imagens de Testing...")
+        self.current_task = self.runner.submit(
+            self._calibration_worker, testing_dir,
+            name='calibracao',
+            on_progress=self.update_progress,
+            on_done=self._on_calibration_done,
+            on_error=self._on_task_error,
+            on_cancel=self._on_task_cancelled
+        )
+    
+    def _calibration_worker(self, task, testing_dir):
+        """Tarefa de fundo: probabilidades (com TTA) de uma amostra do Testing"""
         classes = {
             'notumor': 0,
             'glioma': 1,
@@ -1174,31 +1311,39 @@ class ModernCancerDiagnosis:
             'pituitary': 1
         }
         
-        probs = []
-        labels = []
-        
         # Amostrar limitando para rapidez
+        samples = []
         for cls, lab in classes.items():
             cls_dir = os.path.join(testing_dir, cls)
             if not os.path.exists(cls_dir):
                 continue
             files = [f for f in os.listdir(cls_dir) if f.lower().endswith((".jpg", ".jpeg", ".png"))]
             files = files[:80]  # limitar
-            for f in files:
-                try:
-                    p = os.path.join(cls_dir, f)
-                    img = cv2.imread(p)
-                    if img is None:
-                        continue
+            samples.extend((os.path.join(cls_dir, f), lab) for f in files)
+        
+        probs = []
+        labels = []
+        for i, (p, lab) in enumerate(samples):
+            task.check_cancelled()
+            try:
+                img = cv2.imread(p)
+                if img is not None:
                     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
                     x = self.preprocess_image(img)
-                    prob = self.predict_with_tta(x)
-                    probs.append(prob)
+                    probs.append(self.predict_with_tta(x))
                     labels.append(lab)
-                except Exception:
-                    continue
+            except Exception:
+                pass
+            task.report(i + 1, len(samples), f"Calibrando limiar: {i + 1}/{len(samples)} imagens")
         
+        return probs, labels
+    
+    def _on_calibration_done(self, result):
+        """Busca do limiar ótimo (thread principal) sobre as probabilidades calculadas"""
+        probs, labels = result
+        self.finish_progress(f"Calibração concluída ({len(probs)} imagens)")
         if not probs:
+            self.reset_results()
             messagebox.showwarning("Aviso", "Não foi possível calcular o limiar")
             return
         
@@ -1239,13 +1384,19 @@ class ModernCancerDiagnosis:
         from datetime import datetime
         return datetime.now().strftime("%d/%m/%Y %H:%M:%S")
     
-    def generate_activation_map(self, processed_img, is_tumor, confidence):
-        """Gera mapa de ativação mostrando onde a IA está focando"""
+    def generate_activation_map(self, heatmap):
+        """Gera mapa de ativação (Grad-CAM) mostrando onde a IA está focando"""
         try:
+            import matplotlib.pyplot as plt
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            
             # Limpar frame anterior
             for widget in self.heatmap_frame.winfo_children():
                 widget.destroy()
             
+            if heatmap is None:
+                raise ValueError("Grad-CAM indisponível para este modelo")
+            
             # Criar figura para o heatmap
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
             fig.patch.set_facecolor('#1a1f35')
@@ -1258,14 +1409,17 @@ class ModernCancerDiagnosis:
             ax1.set_title('Imagem Original', color='white', fontweight='bold')
             ax1.axis('off')
             
-            # Simular mapa de ativação baseado na predição
-            # Em um modelo real, usaríamos Grad-CAM ou técnicas similares
-            heatmap = self.create_simulated_heatmap(is_tumor, confidence)
+            # O mapa corresponde à região que o modelo vê (sem as margens do preprocessamento):
+            # sobrepõe na mesma região, na resolução do mapa
+            top, bottom, left, right = crop_box(*self.current_image.shape[:2])
+            analyzed_img = cv2.resize(self.current_image[top:bottom, left:right],
+                                      (heatmap.shape[1], heatmap.shape[0]))
             
-            # Sobrepor heatmap na imagem
-            im = ax2.imshow(original_img, alpha=0.6)
-            im2 = ax2.imshow(heatmap, alpha=0.4, cmap='hot', interpolation='bilinear')
-            ax2.set_title('Mapa de Ativação', color='white', fontweight='bold')
+            # Sobrepor heatmap Grad-CAM (uint8 0-255) na imagem
+            im = ax2.imshow(analyzed_img, alpha=0.6)
+            im2 = ax2.imshow(heatmap / 255.0, alpha=0.4, cmap='hot', interpolation='bilinear',
+                             vmin=0.0, vmax=1.0)
+            ax2.set_title('Mapa de Ativação (região analisada)', color='white', fontweight='bold')
             ax2.axis('off')
             
             # Barra de cores
@@ -1306,54 +1460,15 @@ AZUL: Regiões consideradas normais
             )
             error_label.pack(expand=True)
     
-    def create_simulated_heatmap(self, is_tumor, confidence):
-        """Cria um heatmap simulado baseado na predição"""
-        # Criar mapa base 128x128
-        heatmap = np.zeros((128, 128))
-        
-        if is_tumor:
-            # Se tumor detectado, criar focos de ativação
-            # Simular regiões suspeitas
-            
-            # Foco principal (região central-superior)
-            center_x, center_y = 64, 45
-            for i in range(128):
-                for j in range(128):
-                    dist = np.sqrt((i - center_x)**2 + (j - center_y)**2)
-                    if dist < 25:
-                        heatmap[j, i] = confidence * np.exp(-dist/15)
-            
-            # Foco secundário se confiança alta
-            if confidence > 0.8:
-                center_x2, center_y2 = 85, 70
-                for i in range(128):
-                    for j in range(128):
-                        dist = np.sqrt((i - center_x2)**2 + (j - center_y2)**2)
-                        if dist < 15:
-                            heatmap[j, i] = max(heatmap[j, i], 
-                                              confidence * 0.7 * np.exp(-dist/10))
-        else:
-            # Se normal, criar ativação difusa e baixa
-            # Simular que a IA está "verificando" mas não encontrando nada suspeito
-            noise = np.random.random((128, 128)) * 0.2
-            heatmap = noise * (1 - confidence)
-        
-        # Aplicar suavização
-        from scipy import ndimage
-        try:
-            heatmap = ndimage.gaussian_filter(heatmap, sigma=3)
-        except:
-            # Se scipy não disponível, usar média simples
-            kernel_size = 5
-            kernel = np.ones((kernel_size, kernel_size)) / (kernel_size * kernel_size)
-            heatmap = np.convolve(heatmap.flatten(), kernel.flatten(), mode='same').reshape(128, 128)
-        
-        return heatmap
-    
     def create_animations(self):
         """Cria animações sutis"""
         pass  # Placeholder para futuras animações
     
+    def on_close(self):
+        """Fecha a janela cancelando as tarefas em segundo plano"""
+        self.runner.shutdown()
+        self.root.destroy()
+    
     def run(self):
         """Executa a interface"""
         self.root.mainloop()
@@ -1,20 +1,36 @@
 """
 Servidor Flask para API local do NeuroAI
 Permite usar o modelo .h5 treinado diretamente na web sem conversão
+
+O TensorFlow é importado só ao carregar o modelo (init_worker), então o processo
+vigia do reloader e as ferramentas que importam este módulo não pagam esse custo.
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-import tensorflow as tf
 import numpy as np
-from PIL import Image
-import cv2
-import matplotlib.pyplot as plt
-import io
 import os
+import json
+import base64
+import sys
 import psycopg2
 from datetime import datetime, timedelta
 import secrets
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# Módulos compartilhados em src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from micro_batching import MicroBatcher
+from async_pipeline import AsyncPredictionPipeline, PipelineOverloaded
+from inference_engine import InferenceEngine, DEFAULT_TTA_TRANSFORMS, TTA_AGGREGATIONS, build_tta_batch, aggregate_tta
+from inference_backends import load_backend
+from gradcam import GradCAM, GRADCAM_METHODS
+from heatmap_rendering import render_heatmap, render_simulated_heatmap
+from mri_preprocessing import PREPROCESS_CONFIG, preprocess_mri_bytes
+from db_pool import DatabasePool
+from session_cache import SessionCache
+from prediction_cache import PredictionCache, model_identity
+from history_bulk import BulkValidationError, parse_analyses, validate_analyses, insert_analyses
 
 app = Flask(__name__)
 CORS(app)  # Permite requisições do navegador
@@ -28,19 +44,176 @@ DB_CONFIG = {
     'password': 'neuro'
 }
 
-def get_db_connection():
-    """Cria conexão com PostgreSQL"""
-    return psycopg2.connect(**DB_CONFIG)
+# Pool de conexões (reaproveita conexões entre requisições)
+DB_POOL_MIN = int(os.environ.get('NEUROAI_DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('NEUROAI_DB_POOL_MAX', 10))
+db_pool = DatabasePool(DB_CONFIG, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX, connect=psycopg2.connect)
+
+# Cache de tokens validados (evita uma consulta à tabela sessions por requisição)
+SESSION_CACHE_SIZE = int(os.environ.get('NEUROAI_SESSION_CACHE_SIZE', 10000))
+SESSION_CACHE_TTL = float(os.environ.get('NEUROAI_SESSION_CACHE_TTL', 60))
+session_cache = SessionCache(max_entries=SESSION_CACHE_SIZE, ttl_seconds=SESSION_CACHE_TTL)
+
+# Prepared statements das consultas mais frequentes
+db_pool.register_statement(
+    'login_user',
+    "SELECT id, username, full_name, email, role FROM users WHERE username = $1 AND password = $2 AND is_active = true",
+    ('text', 'text')
+)
+db_pool.register_statement(
+    'insert_session',
+    "INSERT INTO sessions (user_id, token, expires_at) VALUES ($1, $2, $3)",
+    ('integer', 'text', 'timestamp')
+)
+db_pool.register_statement(
+    'update_last_login',
+    "UPDATE users SET last_login = $1 WHERE id = $2",
+    ('timestamp', 'integer')
+)
+db_pool.register_statement(
+    'verify_token',
+    """SELECT u.id, u.username, u.full_name, u.role, s.expires_at
+       FROM sessions s
+       JOIN users u ON s.user_id = u.id
+       WHERE s.token = $1 AND s.expires_at > $2""",
+    ('text', 'timestamp')
+)
+db_pool.register_statement(
+    'delete_session',
+    "DELETE FROM sessions WHERE token = $1",
+    ('text',)
+)
+# Histórico paginado por cursor (keyset) sobre o índice (user_id, created_at, id)
+db_pool.register_statement(
+    'history_first_page',
+    """SELECT id, image_name, prediction_normal, prediction_tumor,
+              confidence, threshold_used, result, created_at
+       FROM analysis_history
+       WHERE user_id = $1
+       ORDER BY created_at DESC, id DESC
+       LIMIT $2""",
+    ('integer', 'integer')
+)
+db_pool.register_statement(
+    'history_next_page',
+    """SELECT id, image_name, prediction_normal, prediction_tumor,
+              confidence, threshold_used, result, created_at
+       FROM analysis_history
+       WHERE user_id = $1 AND (created_at, id) < ($2, $3)
+       ORDER BY created_at DESC, id DESC
+       LIMIT $4""",
+    ('integer', 'timestamp', 'integer', 'integer')
+)
+db_pool.register_statement(
+    'insert_analysis',
+    """INSERT INTO analysis_history
+       (user_id, image_name, prediction_normal, prediction_tumor,
+        confidence, threshold_used, result)
+       VALUES ($1, $2, $3, $4, $5, $6, $7)
+       RETURNING id""",
+    ('integer', 'text', 'numeric', 'numeric', 'numeric', 'numeric', 'text')
+)
+db_pool.register_statement(
+    'delete_user_analysis',
+    "DELETE FROM analysis_history WHERE id = $1 AND user_id = $2 RETURNING id",
+    ('integer', 'integer')
+)
+db_pool.register_statement(
+    'clear_user_history',
+    "DELETE FROM analysis_history WHERE user_id = $1",
+    ('integer',)
+)
+
+# Paginação do histórico
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 500
+
+def encode_history_cursor(created_at, analysis_id):
+    """Cursor opaco apontando para o último item de uma página"""
+    raw = f"{created_at.isoformat()}|{analysis_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_history_cursor(cursor):
+    """Retorna (created_at, id) do cursor; ValueError se inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, analysis_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+def get_session(token):
+    """
+    Retorna a sessão válida para o token, ou None
+
+    Consulta o cache primeiro; só vai ao banco em caso de falta.
+    """
+    if not token:
+        return None
+
+    session = session_cache.get(token)
+    if session is not None:
+        return session
+
+    with db_pool.cursor() as cur:
+        db_pool.execute_prepared(cur, 'verify_token', (token, datetime.now()))
+        row = cur.fetchone()
+    if not row:
+        return None
+
+    user_id, username, full_name, role, expires_at = row
+    session = {'id': user_id, 'username': username, 'full_name': full_name, 'role': role}
+    session_cache.put(token, session, expires_at)
+    return session
+
+def get_session_user_id(token):
+    """Retorna o user_id da sessão válida para o token, ou None"""
+    session = get_session(token)
+    return session['id'] if session else None
 
 # Carrega o modelo na inicialização
-MODEL_PATH = 'models/brain_cancer_final.h5'
+MODEL_PATH = os.environ.get('NEUROAI_MODEL_PATH', 'models/brain_cancer_final.h5')
+loaded_model_path = None
 model = None
+engine = None
+gradcam = None
+
+# Backend de inferência: 'keras' (grafo float32), 'savedmodel', 'tflite' ou 'onnx'
+# (exportados por src/model_export.py). O modelo Keras continua carregado para Grad-CAM e /api/model-info.
+INFERENCE_BACKEND = os.environ.get('NEUROAI_BACKEND', 'keras')
+BACKEND_PATH = os.environ.get('NEUROAI_BACKEND_PATH') or None
+BACKEND_THREADS = int(os.environ.get('NEUROAI_BACKEND_THREADS', 0)) or None
+inference_model_path = None
+
+# Mapa de ativação padrão: 'gradcam', 'gradcam++' ou 'simulated'
+HEATMAP_MODE = os.environ.get('NEUROAI_HEATMAP', 'gradcam')
+
+# Micro-batching: agrupa requisições concorrentes em uma única passada do modelo
+BATCH_MAX_SIZE = int(os.environ.get('NEUROAI_BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('NEUROAI_BATCH_MAX_WAIT_MS', 5))
+BATCH_TIMEOUT = float(os.environ.get('NEUROAI_BATCH_TIMEOUT', 30))  # espera máxima da requisição (s)
+batcher = None
+
+# Pipeline de upload: decodificação/preprocessamento em pool, filas limitadas e 503 quando saturado
+PIPELINE_ENABLED = os.environ.get('NEUROAI_PIPELINE', '1') == '1'
+PIPELINE_DECODE_WORKERS = int(os.environ.get('NEUROAI_DECODE_WORKERS', 4))
+PIPELINE_DECODE_PROCESSES = os.environ.get('NEUROAI_DECODE_PROCESSES', '0') == '1'
+PIPELINE_MAX_PENDING = int(os.environ.get('NEUROAI_PIPELINE_MAX_PENDING', 64))
+PIPELINE_TIMEOUT = float(os.environ.get('NEUROAI_PIPELINE_TIMEOUT', 30))
+pipeline = None
+
+# Cache de predições por conteúdo (imagem + modelo + preprocessamento)
+PREDICTION_CACHE_SIZE = int(os.environ.get('NEUROAI_PREDICTION_CACHE_SIZE', 512))
+PREDICTION_CACHE_DIR = os.environ.get('NEUROAI_PREDICTION_CACHE_DIR') or None
+prediction_cache = PredictionCache(max_entries=PREDICTION_CACHE_SIZE, disk_dir=PREDICTION_CACHE_DIR)
 
 def load_model():
-    global model
+    global model, engine, gradcam, loaded_model_path, inference_model_path
+    import tensorflow as tf
     if os.path.exists(MODEL_PATH):
         print(f"Carregando modelo: {MODEL_PATH}")
         model = tf.keras.models.load_model(MODEL_PATH)
+        loaded_model_path = MODEL_PATH
         print(f"Modelo carregado! Input shape: {model.input_shape}")
     else:
         print(f"⚠️ Modelo não encontrado: {MODEL_PATH}")
@@ -55,50 +228,106 @@ def load_model():
             if os.path.exists(alt):
                 print(f"Usando modelo alternativo: {alt}")
                 model = tf.keras.models.load_model(alt)
+                loaded_model_path = alt
                 break
 
-def preprocess_image(image_bytes, target_size=(128, 128)):
-    """Preprocessa imagem EXATAMENTE igual ao visual_diagnosis_modern.py"""
-    # Abre imagem
-    img = Image.open(io.BytesIO(image_bytes))
-    
-    # Converte para array numpy RGB
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
-    img_array = np.array(img)
-    
-    # 1. Crop 10% das bordas (remove régua/legendas)
-    h, w = img_array.shape[:2]
-    margin_h = int(h * 0.10)
-    margin_w = int(w * 0.10)
-    cropped = img_array[margin_h:h - margin_h, margin_w:w - margin_w]
-    
-    # 2. Converte para grayscale
-    if len(cropped.shape) == 3:
-        gray = cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = cropped
-    
-    # 3. Aplica CLAHE (equalização adaptativa)
-    try:
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray = clahe.apply(gray)
-    except Exception:
-        gray = cv2.equalizeHist(gray)
-    
-    # 4. Normaliza [0, 255] -> [0, 1]
-    gray = gray.astype(np.float32) / 255.0
-    
-    # 5. Replica para 3 canais RGB (grayscale replicado)
-    img_rgb = np.stack([gray, gray, gray], axis=-1)
-    
-    # 6. Resize para tamanho do modelo
-    img_resized = cv2.resize(img_rgb, target_size)
+    if model is not None:
+        engine = None
+        inference_model_path = loaded_model_path
+        if INFERENCE_BACKEND != 'keras':
+            try:
+                engine = load_backend(
+                    BACKEND_PATH or loaded_model_path, INFERENCE_BACKEND,
+                    num_threads=BACKEND_THREADS, warmup_batch_sizes=(1, BATCH_MAX_SIZE)
+                )
+                inference_model_path = engine.model_path
+                print(f"Backend {INFERENCE_BACKEND}: {inference_model_path}")
+            except (OSError, ImportError, ValueError) as e:
+                print(f"⚠️ Backend {INFERENCE_BACKEND} indisponível ({e}); usando Keras.")
+        if engine is None:
+            # Grafo compilado com assinatura fixa, aquecido para lote 1 e lote máximo
+            engine = InferenceEngine(model, warmup_batch_sizes=(1, BATCH_MAX_SIZE))
+        try:
+            gradcam = GradCAM(model)
+            print(f"Grad-CAM na camada: {gradcam.layer.name}")
+        except ValueError as e:
+            print(f"⚠️ Grad-CAM indisponível: {e}")
+        
+        # Resultados em cache valem só para os arquivos que os produzem: probabilidades
+        # do backend de inferência e, com Grad-CAM, mapas do modelo Keras
+        model_id = model_identity(inference_model_path)
+        if gradcam is not None and loaded_model_path != inference_model_path:
+            model_id = f"{model_id}|{model_identity(loaded_model_path)}"
+        prediction_cache.set_namespace(model_id, PREPROCESS_CONFIG)
+
+def start_batcher():
+    """Inicia o agendador de micro-batching na frente do modelo global"""
+    global batcher
+    if engine is None or batcher is not None:
+        return
+    batcher = MicroBatcher(
+        engine.predict,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS
+    ).start()
+    print(f"Micro-batching ativo: lote máx. {BATCH_MAX_SIZE}, espera máx. {BATCH_MAX_WAIT_MS} ms")
+
+def start_pipeline():
+    """Inicia o pipeline de decodificação/preprocessamento na frente do micro-batching"""
+    global pipeline
+    if not PIPELINE_ENABLED or pipeline is not None:
+        return
+    pipeline = AsyncPredictionPipeline(
+        # Função de src/: processos 'spawn' importam só o kernel, não este servidor
+        preprocess_mri_bytes,
+        submit_inference=batcher.submit_async if batcher is not None else None,
+        decode_workers=PIPELINE_DECODE_WORKERS,
+        max_pending=PIPELINE_MAX_PENDING,
+        max_inflight=BATCH_MAX_SIZE * 2,
+        use_processes=PIPELINE_DECODE_PROCESSES
+    ).start()
+    print(f"Pipeline de upload ativo: {PIPELINE_DECODE_WORKERS} decodificador(es), "
+          f"máx. {PIPELINE_MAX_PENDING} pendentes")
+
+def init_worker():
+    """
+    Prepara o processo para atender requisições: modelo, micro-batching e pool
+
+    Chamado uma vez por processo (servidor de desenvolvimento ou cada worker de
+    produção, depois do fork: o runtime do TensorFlow não sobrevive a fork).
+    """
+    # Threads do TensorFlow por processo (evita N workers disputando todos os núcleos)
+    intra_op = int(os.environ.get('NEUROAI_TF_INTRA_OP_THREADS', 0))
+    if intra_op > 0:
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        except RuntimeError as e:
+            print(f"⚠️ Não foi possível ajustar as threads do TensorFlow: {e}")
     
-    # 7. Adiciona batch dimension
-    img_resized = np.expand_dims(img_resized, axis=0)
+    if model is None:
+        load_model()
+    start_batcher()
+    start_pipeline()
     
-    return img_resized
+    # Abre conexões mínimas do pool PostgreSQL
+    db_pool.open()
+
+def shutdown_worker():
+    """Encerramento gracioso: para o pipeline, o micro-batching e fecha as conexões do pool"""
+    global batcher, pipeline
+    if pipeline is not None:
+        pipeline.stop()
+        pipeline = None
+    if batcher is not None:
+        batcher.stop()
+        batcher = None
+    db_pool.close_all()
+
+def preprocess_image(image_bytes, target_size=PREPROCESS_CONFIG['target_size']):
+    """Preprocessa imagem EXATAMENTE igual ao visual_diagnosis_modern.py (kernel canônico em src/)"""
+    return preprocess_mri_bytes(image_bytes, target_size)
 
 @app.route('/api/health', methods=['GET'])
 def health():
@@ -106,48 +335,28 @@ def health():
     return jsonify({
         'status': 'ok',
         'model_loaded': model is not None,
-        'model_path': MODEL_PATH if model else None
+        'model_path': loaded_model_path if model else None,
+        # Backend que de fato produz as probabilidades (keras se o pedido não pôde ser carregado)
+        'inference_backend': engine.name if engine else None,
+        'requested_backend': INFERENCE_BACKEND,
+        'inference_model_path': inference_model_path if model else None,
+        'heatmap_model_path': loaded_model_path if gradcam is not None else None,
+        'batching': batcher.get_stats() if batcher else None,
+        'pipeline': pipeline.get_stats() if pipeline else None,
+        'db_pool': db_pool.get_stats(),
+        'session_cache': session_cache.get_stats(),
+        'prediction_cache': prediction_cache.get_stats()
     })
 
-def create_activation_heatmap(tumor_prob, confidence):
-    """Cria mapa de ativação simulado (igual ao desktop)"""
-    import base64
-    from io import BytesIO
-    
-    heatmap = np.zeros((128, 128))
-    
-    if tumor_prob > 0.35:  # Tumor detectado
-        # Foco principal (região central-superior)
-        center_x, center_y = 64, 45
-        for i in range(128):
-            for j in range(128):
-                dist = np.sqrt((i - center_x)**2 + (j - center_y)**2)
-                activation = max(0, confidence - dist / 50)
-                heatmap[j, i] = activation
-        
-        # Foco secundário
-        if confidence > 0.7:
-            center_x2, center_y2 = 50, 70
-            for i in range(128):
-                for j in range(128):
-                    dist = np.sqrt((i - center_x2)**2 + (j - center_y2)**2)
-                    activation = max(0, confidence * 0.6 - dist / 60)
-                    heatmap[j, i] = max(heatmap[j, i], activation)
-    else:
-        # Normal - ativação baixa e dispersa
-        heatmap = np.random.rand(128, 128) * 0.2
-    
-    # Normaliza e converte para imagem
-    heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min() + 1e-8)
-    heatmap_colored = (plt.cm.hot(heatmap)[:, :, :3] * 255).astype(np.uint8)
-    
-    # Converte para base64
-    img_pil = Image.fromarray(heatmap_colored)
-    buffer = BytesIO()
-    img_pil.save(buffer, format='PNG')
-    img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    
-    return img_base64
+def create_activation_heatmap(tumor_prob, confidence, fmt='png'):
+    """Cria mapa de ativação simulado (usado quando Grad-CAM não está disponível)"""
+    # Campos de distância pré-calculados + LUT de cores + cache de codificação
+    heatmap_bytes = render_simulated_heatmap(tumor_prob, confidence, fmt)
+    return base64.b64encode(heatmap_bytes).decode('utf-8')
+
+def encode_heatmap(heatmap, fmt='png'):
+    """Colore o mapa (float [0, 1] ou uint8) com o colormap 'hot' e codifica em base64"""
+    return base64.b64encode(render_heatmap(heatmap, fmt)).decode('utf-8')
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
@@ -165,11 +374,72 @@ def predict():
         file = request.files['image']
         image_bytes = file.read()
         
-        # Preprocessa
-        img_array = preprocess_image(image_bytes)
+        # Test-Time Augmentation opcional (?tta=1&tta_agg=mean|median|max)
+        use_tta = request.args.get('tta', '0').lower() in ('1', 'true', 'yes')
+        tta_agg = request.args.get('tta_agg', 'mean')
+        if use_tta and tta_agg not in TTA_AGGREGATIONS:
+            return jsonify({'error': f'Agregação de TTA inválida: {tta_agg}'}), 400
+        
+        # Mapa de ativação (?heatmap=gradcam|gradcam++|simulated)
+        heatmap_mode = request.args.get('heatmap', HEATMAP_MODE)
+        if heatmap_mode not in GRADCAM_METHODS + ('simulated',):
+            return jsonify({'error': f'Mapa de ativação inválido: {heatmap_mode}'}), 400
+        use_gradcam = heatmap_mode in GRADCAM_METHODS and gradcam is not None
+        heatmap_format = request.args.get('heatmap_format', 'png')
+        if heatmap_format not in ('png', 'webp'):
+            return jsonify({'error': f'Formato de mapa inválido: {heatmap_format}'}), 400
+        
+        # Mesma imagem + mesmo modelo + mesma variante: devolve o resultado guardado
+        cache_key = prediction_cache.make_key(
+            image_bytes,
+            tta=tta_agg if use_tta else None,
+            heatmap=heatmap_mode if use_gradcam else 'simulated',
+            heatmap_format=heatmap_format
+        )
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(dict(cached, cached=True))
+        
+        # Decodificação no pool do pipeline; sem TTA ele já devolve também a predição agrupada
+        predictions = None
+        if pipeline is not None:
+            try:
+                job = pipeline.submit(image_bytes, infer=not use_tta)
+            except PipelineOverloaded as e:
+                response = jsonify({'error': str(e), 'success': False})
+                response.status_code = 503
+                response.headers['Retry-After'] = '1'
+                return response
+            # A rota continua síncrona: a thread WSGI fica bloqueada aqui até a resposta ou o
+            # timeout. O pipeline limita decodificação/inferência e recusa o excesso (503),
+            # mas não libera a thread da requisição.
+            try:
+                img_array, predictions = job.result(timeout=PIPELINE_TIMEOUT)
+            except FutureTimeout:
+                job.cancel()  # descarta o item se ainda não foi decodificado
+                raise
+        else:
+            img_array = preprocess_image(image_bytes)
+        
+        if use_tta:
+            # Todas as variantes vão juntas no mesmo lote
+            img_array = build_tta_batch(img_array, DEFAULT_TTA_TRANSFORMS)
+        
+        # Predição (se o pipeline ainda não a fez), sempre pelo backend de inferência
+        if predictions is None:
+            if batcher is not None:
+                # Agrupada com outras requisições concorrentes
+                predictions = batcher.submit(img_array, timeout=BATCH_TIMEOUT)
+            else:
+                predictions = engine.predict(img_array)
         
-        # Predição
-        predictions = model.predict(img_array, verbose=0)
+        if use_tta:
+            predictions = aggregate_tta(predictions, len(DEFAULT_TTA_TRANSFORMS), tta_agg)
+        
+        # Grad-CAM só para o mapa (com TTA, o da variante original); a saída usada é a do backend
+        activation_maps = None
+        if use_gradcam:
+            _, activation_maps = gradcam.compute(img_array[:1], method=heatmap_mode)
         
         # Extrai probabilidades
         probs = predictions[0].tolist()
@@ -195,8 +465,12 @@ def predict():
             print(f"   Tumor:  {tumor_prob:.4f} ({tumor_prob*100:.2f}%)")
             print(f"{'='*60}\n")
         
-        # Gera mapa de ativação
-        heatmap_base64 = create_activation_heatmap(tumor_prob, max(normal_prob, tumor_prob))
+        # Gera mapa de ativação (com TTA, o mapa é o da variante original)
+        if activation_maps is not None:
+            heatmap_base64 = encode_heatmap(activation_maps[0], heatmap_format)
+        else:
+            heatmap_mode = 'simulated'
+            heatmap_base64 = create_activation_heatmap(tumor_prob, max(normal_prob, tumor_prob), heatmap_format)
         
         # Formato de resposta
         result = {
@@ -207,11 +481,21 @@ def predict():
             },
             'confidence': float(max(normal_prob, tumor_prob)),
             'classification': 'tumor' if tumor_prob > 0.5 else 'normal',
-            'heatmap': heatmap_base64
+            'heatmap': heatmap_base64,
+            'heatmap_method': heatmap_mode,
+            'heatmap_format': heatmap_format,
+            'tta': use_tta
         }
+        prediction_cache.put(cache_key, result)
         
-        return jsonify(result)
+        return jsonify(dict(result, cached=False))
     
+    except FutureTimeout:
+        print("Erro na predição: tempo esgotado aguardando o modelo")
+        return jsonify({
+            'error': 'Tempo esgotado aguardando o modelo',
+            'success': False
+        }), 504
     except Exception as e:
         print(f"Erro na predição: {e}")
         import traceback
@@ -232,7 +516,7 @@ def model_info():
             'input_shape': [int(x) if x else None for x in model.input_shape],
             'output_shape': [int(x) if x else None for x in model.output_shape],
             'layers': len(model.layers),
-            'trainable_params': int(np.sum([tf.size(w).numpy() for w in model.trainable_weights]))
+            'trainable_params': int(sum(np.prod(w.shape) for w in model.trainable_weights))
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -247,17 +531,19 @@ def login():
         username = data.get('username')
         password = data.get('password')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Busca usuário (sem hash de senha por simplicidade - use bcrypt em produção!)
-        cur.execute(
-            "SELECT id, username, full_name, email, role FROM users WHERE username = %s AND password = %s AND is_active = true",
-            (username, password)
-        )
-        user = cur.fetchone()
-        
-        if user:
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            
+            # Busca usuário (sem hash de senha por simplicidade - use bcrypt em produção!)
+            db_pool.execute_prepared(cur, 'login_user', (username, password))
+            user = cur.fetchone()
+            
+            if not user:
+                return jsonify({
+                    'success': False,
+                    'message': 'Usuário ou senha incorretos'
+                }), 401
+            
             user_id, username, full_name, email, role = user
             
             # Gera token
@@ -265,37 +551,28 @@ def login():
             expires_at = datetime.now() + timedelta(hours=24)
             
             # Salva sessão
-            cur.execute(
-                "INSERT INTO sessions (user_id, token, expires_at) VALUES (%s, %s, %s)",
-                (user_id, token, expires_at)
-            )
+            db_pool.execute_prepared(cur, 'insert_session', (user_id, token, expires_at))
             
             # Atualiza last_login
-            cur.execute(
-                "UPDATE users SET last_login = %s WHERE id = %s",
-                (datetime.now(), user_id)
-            )
+            db_pool.execute_prepared(cur, 'update_last_login', (datetime.now(), user_id))
             
             conn.commit()
             cur.close()
-            conn.close()
-            
-            return jsonify({
-                'success': True,
-                'token': token,
-                'user': {
-                    'id': user_id,
-                    'username': username,
-                    'full_name': full_name,
-                    'email': email,
-                    'role': role
-                }
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Usuário ou senha incorretos'
-            }), 401
+        
+        # Já deixa a sessão no cache para as próximas requisições
+        session_cache.put(token, {'id': user_id, 'username': username, 'full_name': full_name, 'role': role}, expires_at)
+        
+        return jsonify({
+            'success': True,
+            'token': token,
+            'user': {
+                'id': user_id,
+                'username': username,
+                'full_name': full_name,
+                'email': email,
+                'role': role
+            }
+        })
             
     except Exception as e:
         print(f"Erro no login: {e}")
@@ -307,31 +584,12 @@ def verify_token():
     try:
         token = request.json.get('token')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
+        session = get_session(token)
         
-        cur.execute(
-            """SELECT u.id, u.username, u.full_name, u.role 
-               FROM sessions s 
-               JOIN users u ON s.user_id = u.id 
-               WHERE s.token = %s AND s.expires_at > %s""",
-            (token, datetime.now())
-        )
-        result = cur.fetchone()
-        
-        cur.close()
-        conn.close()
-        
-        if result:
-            user_id, username, full_name, role = result
+        if session:
             return jsonify({
                 'valid': True,
-                'user': {
-                    'id': user_id,
-                    'username': username,
-                    'full_name': full_name,
-                    'role': role
-                }
+                'user': dict(session)
             })
         else:
             return jsonify({'valid': False}), 401
@@ -345,14 +603,12 @@ def logout():
     try:
         token = request.json.get('token')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("DELETE FROM sessions WHERE token = %s", (token,))
-        conn.commit()
-        
-        cur.close()
-        conn.close()
+        session_cache.invalidate(token)
+        with db_pool.cursor(commit=True) as cur:
+            db_pool.execute_prepared(cur, 'delete_session', (token,))
+        # De novo depois do commit: uma requisição concorrente pode ter validado o token
+        # na linha ainda não apagada e devolvido a sessão ao cache
+        session_cache.invalidate(token)
         
         return jsonify({'success': True})
     except Exception as e:
@@ -360,55 +616,68 @@ def logout():
 
 # ===== ROTAS DE HISTÓRICO =====
 
+def _optional_float(value):
+    return None if value is None else float(value)
+
+def serialize_history_row(row):
+    """Item JSON de uma linha do histórico (colunas NULL viram null)"""
+    return json.dumps({
+        'id': row[0],
+        'image_name': row[1],
+        'prediction_normal': _optional_float(row[2]),
+        'prediction_tumor': _optional_float(row[3]),
+        'confidence': _optional_float(row[4]),
+        'threshold_used': _optional_float(row[5]),
+        'result': row[6],
+        'created_at': row[7].isoformat()
+    })
+
+def stream_history_json(items, next_cursor):
+    """
+    Envia a página já serializada item a item, sem montar o corpo inteiro
+
+    Os itens são serializados antes da resposta começar: um erro vira 500 com
+    JSON válido, nunca um 200 com o corpo cortado.
+    """
+    yield '{"success": true, "history": ['
+    for i, item in enumerate(items):
+        yield f",{item}" if i else item
+    yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
-    """Lista histórico de análises do usuário"""
+    """Lista histórico de análises do usuário (mais recentes primeiro, paginado por cursor)"""
     try:
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Verifica token
-        cur.execute(
-            "SELECT user_id FROM sessions WHERE token = %s AND expires_at > %s",
-            (token, datetime.now())
-        )
-        session = cur.fetchone()
-        
-        if not session:
+        # Verifica token (cache de sessões; vai ao banco só em caso de falta)
+        user_id = get_session_user_id(token)
+        if user_id is None:
             return jsonify({'error': 'Token inválido'}), 401
         
-        user_id = session[0]
-        
-        # Busca histórico
-        cur.execute(
-            """SELECT id, image_name, prediction_normal, prediction_tumor, 
-                      confidence, threshold_used, result, created_at
-               FROM analysis_history 
-               WHERE user_id = %s 
-               ORDER BY created_at DESC 
-               LIMIT 50""",
-            (user_id,)
-        )
-        
-        history = []
-        for row in cur.fetchall():
-            history.append({
-                'id': row[0],
-                'image_name': row[1],
-                'prediction_normal': float(row[2]),
-                'prediction_tumor': float(row[3]),
-                'confidence': float(row[4]),
-                'threshold_used': float(row[5]),
-                'result': row[6],
-                'created_at': row[7].isoformat()
-            })
-        
-        cur.close()
-        conn.close()
-        
-        return jsonify({'success': True, 'history': history})
+        # Página: ?limit=N (padrão 50, máx. 500) e ?cursor=<next_cursor da página anterior>
+        try:
+            limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+            cursor = request.args.get('cursor')
+            after = decode_history_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        
+        with db_pool.cursor() as cur:
+            # Busca uma linha a mais para saber se existe próxima página
+            if after is None:
+                db_pool.execute_prepared(cur, 'history_first_page', (user_id, limit + 1))
+            else:
+                db_pool.execute_prepared(cur, 'history_next_page', (user_id, after[0], after[1], limit + 1))
+            rows = cur.fetchall()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_history_cursor(rows[-1][7], rows[-1][0]) if has_more else None
+        
+        items = [serialize_history_row(row) for row in rows]
+        return Response(stream_history_json(items, next_cursor), mimetype='application/json')
         
     except Exception as e:
         print(f"Erro ao buscar histórico: {e}")
@@ -419,31 +688,17 @@ def save_analysis():
     """Salva análise no histórico"""
     try:
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        data = request.json
-        
-        conn = get_db_connection()
-        cur = conn.cursor()
         
-        # Verifica token
-        cur.execute(
-            "SELECT user_id FROM sessions WHERE token = %s AND expires_at > %s",
-            (token, datetime.now())
-        )
-        session = cur.fetchone()
-        
-        if not session:
+        # Verifica token (cache de sessões; vai ao banco só em caso de falta)
+        user_id = get_session_user_id(token)
+        if user_id is None:
             return jsonify({'error': 'Token inválido'}), 401
         
-        user_id = session[0]
+        data = request.json
         
-        # Salva análise
-        cur.execute(
-            """INSERT INTO analysis_history 
-               (user_id, image_name, prediction_normal, prediction_tumor, 
-                confidence, threshold_used, result)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)
-               RETURNING id""",
-            (
+        with db_pool.cursor(commit=True) as cur:
+            # Salva análise
+            db_pool.execute_prepared(cur, 'insert_analysis', (
                 user_id,
                 data.get('image_name'),
                 data.get('prediction_normal'),
@@ -451,14 +706,8 @@ def save_analysis():
                 data.get('confidence'),
                 data.get('threshold_used'),
                 data.get('result')
-            )
-        )
-        
-        analysis_id = cur.fetchone()[0]
-        conn.commit()
-        
-        cur.close()
-        conn.close()
+            ))
+            analysis_id = cur.fetchone()[0]
         
         return jsonify({'success': True, 'id': analysis_id})
         
@@ -466,41 +715,56 @@ def save_analysis():
         print(f"Erro ao salvar análise: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/history/<int:analysis_id>', methods=['DELETE'])
-def delete_analysis(analysis_id):
-    """Deleta uma análise específica"""
+@app.route('/api/history/bulk', methods=['POST'])
+def save_analysis_bulk():
+    """Salva várias análises em uma transação (array JSON ou NDJSON)"""
     try:
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
+        # Verifica token (cache de sessões; vai ao banco só em caso de falta)
+        user_id = get_session_user_id(token)
+        if user_id is None:
+            return jsonify({'error': 'Token inválido'}), 401
         
-        # Verifica token
-        cur.execute(
-            "SELECT user_id FROM sessions WHERE token = %s AND expires_at > %s",
-            (token, datetime.now())
-        )
-        session = cur.fetchone()
+        # Decodifica e valida tudo antes de abrir a transação
+        try:
+            rows = validate_analyses(parse_analyses(request.get_data(), request.mimetype))
+        except BulkValidationError as e:
+            return jsonify({
+                'error': str(e),
+                'invalid': [{'index': i, 'error': msg} for i, msg in e.errors]
+            }), 400
         
-        if not session:
-            return jsonify({'error': 'Token inválido'}), 401
+        with db_pool.cursor(commit=True) as cur:
+            ids = insert_analyses(cur, user_id, rows)
         
-        user_id = session[0]
+        return jsonify({'success': True, 'count': len(ids), 'ids': ids})
         
-        # Verifica se análise pertence ao usuário
-        cur.execute(
-            "SELECT id FROM analysis_history WHERE id = %s AND user_id = %s",
-            (analysis_id, user_id)
-        )
-        if not cur.fetchone():
-            return jsonify({'error': 'Análise não encontrada'}), 404
+    except Exception as e:
+        print(f"Erro ao salvar análises em lote: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/history/<int:analysis_id>', methods=['DELETE'])
+def delete_analysis(analysis_id):
+    """Deleta uma análise específica"""
+    try:
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
-        # Deleta análise
-        cur.execute("DELETE FROM analysis_history WHERE id = %s", (analysis_id,))
-        conn.commit()
+        # Verifica token (cache de sessões; vai ao banco só em caso de falta)
+        user_id = get_session_user_id(token)
+        if user_id is None:
+            return jsonify({'error': 'Token inválido'}), 401
         
-        cur.close()
-        conn.close()
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            
+            # Deleta apenas se a análise pertencer ao usuário
+            db_pool.execute_prepared(cur, 'delete_user_analysis', (analysis_id, user_id))
+            if not cur.fetchone():
+                return jsonify({'error': 'Análise não encontrada'}), 404
+            
+            conn.commit()
+            cur.close()
         
         return jsonify({'success': True})
         
@@ -514,27 +778,14 @@ def clear_all_history():
     try:
         token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Verifica token
-        cur.execute(
-            "SELECT user_id FROM sessions WHERE token = %s AND expires_at > %s",
-            (token, datetime.now())
-        )
-        session = cur.fetchone()
-        
-        if not session:
+        # Verifica token (cache de sessões; vai ao banco só em caso de falta)
+        user_id = get_session_user_id(token)
+        if user_id is None:
             return jsonify({'error': 'Token inválido'}), 401
         
-        user_id = session[0]
-        
-        # Deleta todas as análises do usuário
-        cur.execute("DELETE FROM analysis_history WHERE user_id = %s", (user_id,))
-        conn.commit()
-        
-        cur.close()
-        conn.close()
+        with db_pool.cursor(commit=True) as cur:
+            # Deleta todas as análises do usuário
+            db_pool.execute_prepared(cur, 'clear_user_history', (user_id,))
         
         return jsonify({'success': True})
         
@@ -550,24 +801,32 @@ def serve_static(path):
     return send_from_directory('.', path)
 
 if __name__ == '__main__':
-    print("=" * 60)
-    print(" NeuroAI - Servidor de Inferência Local")
-    print("=" * 60)
+    # Servidor de desenvolvimento (Werkzeug). Para produção use: python web/serve.py
+    debug = os.environ.get('NEUROAI_DEBUG', '1') == '1'
     
-    # Carrega modelo
-    load_model()
-    
-    if model is None:
-        print("\n ATENÇÃO: Modelo não encontrado!")
-        print("Execute o treinamento primeiro ou verifique o caminho.")
-    else:
-        print("\n Modelo carregado com sucesso!")
-    
-    print("\n Servidor rodando em: http://localhost:5000")
-    print(" API disponível em: http://localhost:5000/api/predict")
-    print("\n Abra a interface web: http://localhost:5000/web/index.html")
-    print("\nPressione Ctrl+C para parar o servidor")
-    print("=" * 60)
+    # Com o reloader do modo debug, o processo pai só vigia os arquivos:
+    # o modelo é carregado apenas no processo filho que atende as requisições
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        print("=" * 60)
+        print(" NeuroAI - Servidor de Inferência Local")
+        print("=" * 60)
+        
+        init_worker()
+        
+        if model is None:
+            print("\n ATENÇÃO: Modelo não encontrado!")
+            print("Execute o treinamento primeiro ou verifique o caminho.")
+        else:
+            print("\n Modelo carregado com sucesso!")
+        
+        print("\n Servidor rodando em: http://localhost:5000")
+        print(" API disponível em: http://localhost:5000/api/predict")
+        print("\n Abra a interface web: http://localhost:5000/web/index.html")
+        print("\nPressione Ctrl+C para parar o servidor")
+        print("=" * 60)
     
     # Roda servidor
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=debug)
+    finally:
+        shutdown_worker()
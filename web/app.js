@@ -225,15 +225,22 @@ function updateActivationMap(heatmapBase64) {
         ctx.font = 'bold 14px Segoe UI';
         ctx.fillText('Imagem Original', 20, offsetY - 10);
         
+        // O mapa corresponde à região que o modelo vê: sem 10% de cada borda (crop_box em mri_preprocessing.py)
+        const width = originalImg.naturalWidth || originalImg.width;
+        const height = originalImg.naturalHeight || originalImg.height;
+        const marginX = Math.floor(width * 0.10);
+        const marginY = Math.floor(height * 0.10);
+        
         const offsetX = 320;
         ctx.globalAlpha = 0.6;
-        ctx.drawImage(originalImg, offsetX, offsetY, size, size);
+        ctx.drawImage(originalImg, marginX, marginY, width - 2 * marginX, height - 2 * marginY,
+                      offsetX, offsetY, size, size);
         ctx.globalAlpha = 0.4;
         ctx.drawImage(heatmapImg, offsetX, offsetY, size, size);
         ctx.globalAlpha = 1.0;
         
         ctx.fillStyle = '#00d4ff';
-        ctx.fillText('Mapa de Ativação', offsetX, offsetY - 10);
+        ctx.fillText('Mapa de Ativação (região analisada)', offsetX, offsetY - 10);
         
         ctx.fillStyle = '#ffffff';
         ctx.font = '11px Segoe UI';
@@ -0,0 +1,275 @@
+"""
+Pool de conexões PostgreSQL para a API Flask do NeuroAI
+
+- Pool thread-safe com tamanho mínimo/máximo e checkout via context manager
+- Health check (SELECT 1) em conexões ociosas há muito tempo ou fechadas
+- Prepared statements (PREPARE/EXECUTE) preparados uma vez por conexão
+- Métricas de uso expostas por get_stats()
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo limite"""
+
+
+class DatabasePool:
+    def __init__(self, config, min_size=1, max_size=10, connect=None,
+                 health_check_interval=30.0, checkout_timeout=5.0):
+        """
+        Inicializa o pool de conexões
+
+        Args:
+            config: Parâmetros de conexão (host, port, database, user, password)
+            min_size: Conexões abertas no open() e mantidas ociosas
+            max_size: Limite de conexões simultâneas
+            connect: Fábrica de conexões (padrão: psycopg2.connect)
+            health_check_interval: Segundos ociosos após os quais a conexão é testada no checkout
+            checkout_timeout: Segundos de espera por uma conexão livre
+        """
+        if connect is None:
+            import psycopg2
+            connect = psycopg2.connect
+
+        self.config = config
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size))
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = []  # Pilha de (conexão, instante em que foi devolvida)
+        self._size = 0  # Conexões abertas (ociosas + em uso)
+        self._prepared = {}  # id(conexão) -> nomes já preparados nela
+        self._statements = {}  # nome -> (tipos, sql com $1, $2...)
+        self._closed = False
+
+        # Métricas
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._health_check_failures = 0
+        self._total_wait = 0.0
+
+    # ===== Ciclo de vida =====
+
+    def open(self):
+        """Abre as conexões mínimas (falhas são toleradas: o pool abre sob demanda)"""
+        opened = []
+        try:
+            for _ in range(self.min_size):
+                opened.append(self._new_connection())
+        except Exception as e:
+            print(f"⚠️ Pool PostgreSQL: não foi possível abrir conexões iniciais: {e}")
+        with self._cond:
+            now = time.monotonic()
+            self._idle.extend((conn, now) for conn in opened)
+            self._cond.notify_all()
+        return self
+
+    def close_all(self):
+        """Fecha as conexões ociosas; as em uso são fechadas ao serem devolvidas"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def _new_connection(self):
+        with self._cond:
+            self._size += 1
+        try:
+            conn = self._connect(**self.config)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _discard(self, conn):
+        self._prepared.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn):
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self._health_check_failures += 1
+            return False
+
+    # ===== Checkout / devolução =====
+
+    def _acquire(self):
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        waited = False
+
+        while True:
+            conn = None
+            idle_since = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Pool de conexões encerrado")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                elif self._size < self.max_size:
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Nenhuma conexão livre em {self.checkout_timeout:.1f}s (máx. {self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                conn = self._new_connection()
+            elif getattr(conn, 'closed', False) or (
+                time.monotonic() - idle_since > self.health_check_interval and not self._is_healthy(conn)
+            ):
+                # Conexão morta: descarta e tenta de novo
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                self._total_wait += time.monotonic() - started
+            return conn
+
+    def _release(self, conn, broken=False, failed=False):
+        if not broken and not getattr(conn, 'closed', False):
+            try:
+                # Encerra transação pendente (no-op quando não há transação aberta)
+                conn.rollback()
+                if failed:
+                    # Após erro, não dá para saber quais PREPAREs sobreviveram: recomeça do zero
+                    cur = conn.cursor()
+                    cur.execute("DEALLOCATE ALL")
+                    cur.close()
+                    conn.commit()
+                    self._prepared.pop(id(conn), None)
+            except Exception:
+                broken = True
+
+        with self._cond:
+            keep = not broken and not self._closed and not getattr(conn, 'closed', False)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool
+
+        A transação é desfeita na devolução se não tiver sido confirmada com commit().
+        Conexões que falham com erro de conexão são descartadas.
+        """
+        conn = self._acquire()
+        broken = False
+        failed = False
+        try:
+            yield conn
+        except Exception as e:
+            failed = True
+            broken = _is_connection_error(e) or getattr(conn, 'closed', False)
+            raise
+        finally:
+            self._release(conn, broken=broken, failed=failed)
+
+    @contextmanager
+    def cursor(self, commit=False):
+        """Empresta uma conexão e um cursor; faz commit ao final se commit=True"""
+        with self.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                if commit:
+                    conn.commit()
+            finally:
+                cur.close()
+
+    # ===== Prepared statements =====
+
+    def register_statement(self, name, sql, param_types=()):
+        """
+        Registra uma consulta para ser preparada em cada conexão no primeiro uso
+
+        Args:
+            name: Nome do prepared statement
+            sql: SQL com parâmetros posicionais $1, $2, ...
+            param_types: Tipos PostgreSQL dos parâmetros (ex.: ('text', 'timestamp'))
+        """
+        self._statements[name] = (tuple(param_types), sql)
+
+    def execute_prepared(self, cur, name, params=()):
+        """Executa um prepared statement registrado, preparando-o na conexão se necessário"""
+        param_types, sql = self._statements[name]
+        conn = cur.connection
+        prepared = self._prepared.setdefault(id(conn), set())
+
+        if name not in prepared:
+            types = f" ({', '.join(param_types)})" if param_types else ""
+            cur.execute(f"PREPARE {name}{types} AS {sql}")
+            prepared.add(name)
+
+        if params:
+            placeholders = ', '.join(['%s'] * len(params))
+            cur.execute(f"EXECUTE {name} ({placeholders})", tuple(params))
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+    # ===== Métricas =====
+
+    def get_stats(self):
+        """Retorna métricas do pool"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'discarded': self._discarded,
+                'health_check_failures': self._health_check_failures,
+                'avg_checkout_wait_ms': (self._total_wait / self._checkouts * 1000.0) if self._checkouts else 0.0
+            }
+
+
+def _is_connection_error(error):
+    """Erros de conexão do psycopg2 (OperationalError/InterfaceError) invalidam a conexão"""
+    return type(error).__name__ in ('OperationalError', 'InterfaceError')
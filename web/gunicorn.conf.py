@@ -0,0 +1,55 @@
+"""
+Configuração do Gunicorn para servir a API do NeuroAI em produção
+
+Uso (a partir da raiz do projeto):
+    gunicorn -c web/gunicorn.conf.py
+ou simplesmente:
+    python web/serve.py
+
+Cada worker é um processo com o próprio modelo carregado DEPOIS do fork
+(preload_app = False): o runtime do TensorFlow não é seguro para fork.
+Dentro do worker, várias threads atendem requisições e o micro-batching
+agrupa as predições concorrentes em uma única passada do modelo.
+"""
+import os
+
+_cpu_count = os.cpu_count() or 1
+
+# Endereço e processos
+bind = os.environ.get('NEUROAI_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('NEUROAI_WORKERS', max(1, min(4, _cpu_count // 2))))
+worker_class = 'gthread'
+threads = int(os.environ.get('NEUROAI_THREADS', 8))
+
+# Aplicação (web/ no path para 'import api_server')
+wsgi_app = 'api_server:app'
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+preload_app = False
+
+# Carregar o modelo + aquecer o grafo pode levar dezenas de segundos
+timeout = int(os.environ.get('NEUROAI_WORKER_TIMEOUT', 120))
+# SIGTERM: para de aceitar conexões e espera as requisições em andamento
+graceful_timeout = int(os.environ.get('NEUROAI_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.environ.get('NEUROAI_ACCESS_LOG')  # ex.: '-' para stdout
+errorlog = '-'
+loglevel = os.environ.get('NEUROAI_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Divide os núcleos entre os workers para o TensorFlow (se não definido explicitamente)
+    os.environ.setdefault('NEUROAI_TF_INTRA_OP_THREADS', str(max(1, _cpu_count // server.cfg.workers)))
+
+
+def post_worker_init(worker):
+    # Modelo, micro-batching e pool PostgreSQL por worker, antes da primeira requisição
+    import api_server
+    api_server.init_worker()
+    worker.log.info("Worker %s pronto (modelo: %s)", worker.pid,
+                    'carregado' if api_server.model is not None else 'ausente')
+
+
+def worker_exit(server, worker):
+    import api_server
+    api_server.shutdown_worker()
@@ -0,0 +1,138 @@
+"""
+Gravação em lote do histórico de análises
+
+- Entrada como array JSON, objeto {"analyses": [...]} ou NDJSON (uma análise por linha)
+- Validação de todos os itens em uma passada, antes de tocar no banco
+- Escrita em uma única transação: INSERT multi-linha via execute_values (devolve os ids)
+  ou COPY (mais rápido, sem ids)
+"""
+import io
+import json
+
+from psycopg2.extras import execute_values
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+MAX_BULK_ITEMS = 5000
+
+# Colunas gravadas (além de user_id), na ordem do INSERT/COPY
+ANALYSIS_COLUMNS = (
+    'image_name', 'prediction_normal', 'prediction_tumor',
+    'confidence', 'threshold_used', 'result'
+)
+_PROBABILITY_FIELDS = ('prediction_normal', 'prediction_tumor', 'confidence', 'threshold_used')
+
+INSERT_SQL = (
+    f"INSERT INTO analysis_history (user_id, {', '.join(ANALYSIS_COLUMNS)}) "
+    "VALUES %s RETURNING id"
+)
+
+
+class BulkValidationError(ValueError):
+    """Carga inválida; errors lista (índice, mensagem) de cada item rejeitado"""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def parse_analyses(body, mimetype=None):
+    """
+    Decodifica o corpo da requisição em uma lista de análises
+
+    Args:
+        body: Corpo bruto (bytes ou str)
+        mimetype: Content-Type da requisição (NDJSON quando for application/x-ndjson)
+    """
+    try:
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        if mimetype in NDJSON_MIMETYPES:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+            if isinstance(items, dict):
+                items = items.get('analyses')
+    except UnicodeDecodeError:
+        raise BulkValidationError("Corpo da requisição deve estar em UTF-8")
+    except json.JSONDecodeError as e:
+        raise BulkValidationError(f"JSON inválido: {e}")
+
+    if not isinstance(items, list):
+        raise BulkValidationError("Envie um array de análises, {\"analyses\": [...]} ou NDJSON")
+    if not items:
+        raise BulkValidationError("Nenhuma análise enviada")
+    if len(items) > MAX_BULK_ITEMS:
+        raise BulkValidationError(f"Máximo de {MAX_BULK_ITEMS} análises por requisição")
+    return items
+
+
+def _validate_item(item):
+    if not isinstance(item, dict):
+        raise ValueError("item deve ser um objeto")
+
+    image_name = item.get('image_name')
+    if not isinstance(image_name, str) or not image_name or len(image_name) > 255:
+        raise ValueError("image_name deve ser texto com 1-255 caracteres")
+
+    values = [image_name]
+    for field in _PROBABILITY_FIELDS:
+        value = item.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0.0 <= value <= 1.0:
+            raise ValueError(f"{field} deve ser um número entre 0 e 1")
+        values.append(float(value))
+
+    result = item.get('result')
+    if not isinstance(result, str) or not result or len(result) > 20:
+        raise ValueError("result deve ser texto com 1-20 caracteres")
+    values.append(result)
+    return tuple(values)
+
+
+def validate_analyses(items):
+    """
+    Valida todos os itens de uma vez
+
+    Returns:
+        Lista de tuplas na ordem de ANALYSIS_COLUMNS
+
+    Raises:
+        BulkValidationError com todos os itens inválidos (nada é gravado)
+    """
+    rows = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            rows.append(_validate_item(item))
+        except ValueError as e:
+            errors.append((index, str(e)))
+
+    if errors:
+        raise BulkValidationError(f"{len(errors)} análise(s) inválida(s)", errors)
+    return rows
+
+
+def insert_analyses(cur, user_id, rows, page_size=1000):
+    """INSERT multi-linha em páginas de page_size; retorna os ids na ordem de entrada"""
+    returned = execute_values(
+        cur, INSERT_SQL,
+        [(user_id, *row) for row in rows],
+        page_size=page_size, fetch=True
+    )
+    return [r[0] for r in returned]
+
+
+def copy_analyses(cur, user_id, rows):
+    """COPY FROM STDIN das análises (caminho mais rápido, sem devolver ids)"""
+    buffer = io.StringIO()
+    for row in rows:
+        fields = [str(user_id)] + [
+            str(v).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+            for v in row
+        ]
+        buffer.write('\t'.join(fields))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY analysis_history (user_id, {', '.join(ANALYSIS_COLUMNS)}) FROM STDIN",
+        buffer
+    )
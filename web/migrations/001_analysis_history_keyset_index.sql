@@ -0,0 +1,20 @@
+-- Migração 001: índice composto para paginação por cursor (keyset) do histórico
+--
+-- GET /api/history ordena por (created_at DESC, id DESC) filtrando por user_id e
+-- continua a partir do último item da página anterior:
+--   WHERE user_id = $1 AND (created_at, id) < ($2, $3)
+--   ORDER BY created_at DESC, id DESC LIMIT $4
+-- Com este índice cada página é uma varredura curta do índice, independente de
+-- quantas análises o usuário já tem.
+--
+-- Aplicar em bancos existentes:
+--   psql -h localhost -p 5433 -U postgres -d neuroia -f web/migrations/001_analysis_history_keyset_index.sql
+-- (bancos novos já recebem o índice em web/setup_database.js)
+
+-- created_at entra no cursor: linhas antigas sem data recebem o instante da migração
+UPDATE analysis_history SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE analysis_history ALTER COLUMN created_at SET NOT NULL;
+
+-- CONCURRENTLY não bloqueia inserções durante a criação (não pode rodar dentro de BEGIN/COMMIT)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_analysis_history_user_created_id
+    ON analysis_history (user_id, created_at, id);
@@ -0,0 +1,184 @@
+"""
+Cache de predições endereçado por conteúdo
+
+A chave combina:
+- hash dos bytes da imagem enviada
+- identidade do modelo carregado (caminho, tamanho, mtime e hash do arquivo)
+- configuração de preprocessamento
+- variante da requisição (TTA, tipo e formato do mapa de ativação)
+
+Dois níveis: LRU em memória e, opcionalmente, arquivos JSON em disco
+(um subdiretório por modelo). Trocar o modelo muda o namespace e
+descarta o nível em memória, então resultados antigos nunca são servidos.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def hash_bytes(data):
+    """Hash de conteúdo (BLAKE2b de 128 bits)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def model_identity(path, chunk_size=1 << 20):
+    """
+    Identidade do arquivo do modelo: caminho absoluto, tamanho, mtime e hash do conteúdo
+
+    Qualquer alteração (outro MODEL_PATH, modelo re-treinado no mesmo caminho)
+    produz uma identidade diferente. Diretórios (SavedModel) entram com todos
+    os arquivos, em ordem de caminho relativo.
+    """
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+    else:
+        files = [path]
+
+    digest = hashlib.blake2b(digest_size=16)
+    sizes_mtimes = []
+    for file_path in files:
+        stat = os.stat(file_path)
+        sizes_mtimes.append(f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return hash_bytes(
+        f"{os.path.abspath(path)}|{','.join(sizes_mtimes)}|{digest.hexdigest()}".encode()
+    )
+
+
+class PredictionCache:
+    def __init__(self, max_entries=512, disk_dir=None):
+        """
+        Inicializa o cache
+
+        Args:
+            max_entries: Entradas no LRU em memória
+            disk_dir: Diretório do nível em disco (None = só memória)
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.disk_dir = disk_dir
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._namespace = None
+
+        # Métricas
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def set_namespace(self, model_id, preprocess_config):
+        """
+        Define o modelo/preprocessamento vigentes
+
+        Se mudou, o nível em memória é descartado; no disco cada namespace tem o
+        próprio subdiretório.
+        """
+        config = json.dumps(preprocess_config, sort_keys=True, default=list)
+        namespace = hash_bytes(f"{model_id}|{config}".encode())
+        with self._lock:
+            if namespace != self._namespace:
+                if self._namespace is not None:
+                    self._invalidations += 1
+                self._memory.clear()
+                self._namespace = namespace
+        return namespace
+
+    def make_key(self, image_bytes, **variant):
+        """Chave da requisição: hash da imagem + variante (tta, heatmap, formato...)"""
+        suffix = '|'.join(f"{k}={variant[k]}" for k in sorted(variant))
+        return hash_bytes(f"{hash_bytes(image_bytes)}|{suffix}".encode())
+
+    def _disk_path(self, namespace, key):
+        return os.path.join(self.disk_dir, namespace, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Retorna o resultado em cache (memória, depois disco) ou None"""
+        with self._lock:
+            namespace = self._namespace
+            if namespace is None:
+                return None
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._hits_memory += 1
+                return value
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(namespace, key), 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._hits_disk += 1
+                    if namespace == self._namespace:
+                        self._put_memory(key, value)
+                return value
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key, value):
+        """Armazena um resultado JSON-serializável nos dois níveis"""
+        with self._lock:
+            namespace = self._namespace
+            if namespace is None:
+                return
+            self._put_memory(key, value)
+            self._stores += 1
+
+        if self.disk_dir:
+            path = self._disk_path(namespace, key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Escrita atômica: outro worker nunca lê um arquivo pela metade
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(value, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Cache de predições: falha ao gravar em disco: {e}")
+
+    def _put_memory(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """Esvazia o nível em memória"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self):
+        """Retorna métricas do cache"""
+        with self._lock:
+            hits = self._hits_memory + self._hits_disk
+            lookups = hits + self._misses
+            return {
+                'namespace': self._namespace,
+                'entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'disk_dir': self.disk_dir,
+                'hits': hits,
+                'hits_memory': self._hits_memory,
+                'hits_disk': self._hits_disk,
+                'misses': self._misses,
+                'hit_rate': (hits / lookups) if lookups else 0.0,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
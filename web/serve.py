@@ -0,0 +1,74 @@
+"""
+Modo de produção da API do NeuroAI
+
+- Linux/macOS: Gunicorn com N processos (web/gunicorn.conf.py), modelo carregado
+  em cada worker depois do fork, threads por worker e encerramento gracioso
+- Windows: Waitress (um processo, várias threads), já que o Gunicorn não roda no Windows
+
+Uso (a partir da raiz do projeto):
+    python web/serve.py [--workers 4] [--threads 8] [--port 5000]
+"""
+import os
+import sys
+import argparse
+
+WEB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve_gunicorn(args):
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = [
+        'gunicorn',
+        '--config', os.path.join(WEB_DIR, 'gunicorn.conf.py'),
+        '--bind', f'{args.host}:{args.port}',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--graceful-timeout', str(args.graceful_timeout)
+    ]
+    run()
+
+
+def serve_waitress(args):
+    from waitress import serve
+
+    sys.path.insert(0, WEB_DIR)
+    import api_server
+
+    api_server.init_worker()
+    try:
+        # Waitress trata Ctrl+C/SIGTERM fechando o listener; as conexões em andamento terminam
+        serve(api_server.app, host=args.host, port=args.port, threads=args.threads)
+    finally:
+        api_server.shutdown_worker()
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Servidor de produção da API do NeuroAI")
+    parser.add_argument('--host', default=os.environ.get('NEUROAI_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('NEUROAI_PORT', 5000)))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('NEUROAI_WORKERS', max(1, min(4, cpu_count // 2)))),
+                        help="Processos (cada um com o próprio modelo); ignorado no Windows")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('NEUROAI_THREADS', 8)),
+                        help="Threads por processo")
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=int(os.environ.get('NEUROAI_GRACEFUL_TIMEOUT', 30)),
+                        help="Segundos para concluir requisições em andamento no encerramento")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(" NeuroAI - Servidor de Inferência (produção)")
+    print("=" * 60)
+
+    if sys.platform == 'win32':
+        print(f" Waitress: 1 processo x {args.threads} threads em http://{args.host}:{args.port}")
+        serve_waitress(args)
+    else:
+        print(f" Gunicorn: {args.workers} worker(s) x {args.threads} threads em http://{args.host}:{args.port}")
+        serve_gunicorn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cache em memória de tokens de sessão para as rotas autenticadas
+
+- LRU limitado por número de entradas (OrderedDict + lock)
+- TTL por entrada, nunca além do expires_at da sessão no banco
+- Invalidação explícita no logout; o token fica marcado como revogado por um TTL,
+  para que uma validação concorrente (lida antes do DELETE) não o devolva ao cache
+- Contadores de acertos/faltas expostos por get_stats()
+
+Com vários processos servindo a API, cada um tem o seu cache: um logout feito
+em outro processo só é percebido após o TTL, por isso ele é curto.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class SessionCache:
+    def __init__(self, max_entries=10000, ttl_seconds=60.0):
+        """
+        Inicializa o cache de sessões
+
+        Args:
+            max_entries: Número máximo de tokens mantidos (os menos usados saem primeiro)
+            ttl_seconds: Tempo máximo que uma validação fica em cache
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token -> (sessão, instante monotônico de expiração)
+        self._revoked = OrderedDict()  # token -> instante monotônico até o qual put é ignorado
+
+        # Métricas
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, token):
+        """Retorna a sessão em cache para o token, ou None se ausente/expirada"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._misses += 1
+                return None
+            session, expires = entry
+            if now >= expires:
+                del self._entries[token]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return session
+
+    def put(self, token, session, expires_at=None):
+        """
+        Armazena uma sessão validada
+
+        Args:
+            token: Token da sessão
+            session: Dados da sessão (devolvidos por get)
+            expires_at: datetime de expiração da sessão no banco (limita o TTL)
+        """
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+
+        now = time.monotonic()
+        expires = now + ttl
+        with self._lock:
+            revoked_until = self._revoked.get(token)
+            if revoked_until is not None:
+                if now < revoked_until:
+                    return
+                del self._revoked[token]
+            self._entries[token] = (session, expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, token):
+        """Remove o token do cache (logout) e ignora novos put dele durante um TTL"""
+        now = time.monotonic()
+        with self._lock:
+            if self._entries.pop(token, None) is not None:
+                self._invalidations += 1
+            self._revoked[token] = now + self.ttl_seconds
+            self._revoked.move_to_end(token)
+            while self._revoked and (len(self._revoked) > self.max_entries
+                                     or next(iter(self._revoked.values())) <= now):
+                self._revoked.popitem(last=False)
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Retorna métricas do cache"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits / lookups) if lookups else 0.0,
+                'expirations': self._expirations,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
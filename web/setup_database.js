@@ -92,10 +92,17 @@ async function setupDatabase() {
         confidence DECIMAL(5,4),
         threshold_used DECIMAL(3,2),
         result VARCHAR(20),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
       )
     `);
-    console.log('✅ Tabela analysis_history criada\n');
+    console.log('✅ Tabela analysis_history criada');
+
+    // Índice da paginação por cursor do histórico (ver web/migrations/001_analysis_history_keyset_index.sql)
+    await neuroiaClient.query(`
+      CREATE INDEX IF NOT EXISTS idx_analysis_history_user_created_id
+        ON analysis_history (user_id, created_at, id)
+    `);
+    console.log('✅ Índice idx_analysis_history_user_created_id criado\n');
 
     // 7. Verifica se usuário admin existe
     const checkAdmin = await neuroiaClient.query(